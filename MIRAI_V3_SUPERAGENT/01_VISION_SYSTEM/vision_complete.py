@@ -12,6 +12,7 @@ Version: 1.0.0
 
 import logging
 import base64
+import copy
 import json
 import os
 import time
@@ -75,6 +76,8 @@ class VisionConfig:
     max_delay: float = 60.0
     cache_enabled: bool = True
     cache_ttl: int = 300
+    screen_cache_grid: Tuple[int, int] = (8, 8)
+    screen_change_threshold: int = 6
     
     # Detection settings
     min_element_size: int = 10
@@ -211,6 +214,156 @@ class VisionCache:
         self.access_count.clear()
 
 
+class ScreenStateCache:
+    """
+    Perceptual-hash cache of screen analyses (Step 8).
+    
+    A pHash of the whole frame preselects similar stored screens; per grid
+    tile, dHash + aHash bits and mean brightness find which regions
+    changed, so a small change (clock, cursor) still hits and a local
+    change is re-analysed on its own instead of the full screenshot.
+    
+    Port of mirai-agent/core/screen_cache.py: same hashes, thresholds and
+    test scenarios. The V3 tree is installed on its own (see
+    requirements.txt) and cannot import the agent's core package, so the
+    algorithm is kept here in this module's dict/tuple API. Change both
+    together.
+    
+    Analyses are stored and returned as deep copies: callers may mutate
+    the result they get without changing the cached state.
+    """
+    
+    HIT = "hit"
+    PARTIAL = "partial"
+    MISS = "miss"
+    
+    def __init__(
+        self,
+        ttl: int = 300,
+        grid: Tuple[int, int] = (8, 8),
+        frame_threshold: int = 24,
+        tile_threshold: int = 6,
+        brightness_threshold: float = 8.0,
+        max_changed_fraction: float = 0.25,
+        max_entries: int = 16
+    ):
+        """Initialize screen state cache."""
+        self.ttl = ttl
+        self.grid = grid
+        self.frame_threshold = frame_threshold
+        self.tile_threshold = tile_threshold
+        self.brightness_threshold = brightness_threshold
+        self.max_changed_fraction = max_changed_fraction
+        self.max_entries = max_entries
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats = {'hits': 0, 'partial': 0, 'misses': 0}
+    
+    @staticmethod
+    def _gray(image: Image.Image, size: Tuple[int, int]) -> np.ndarray:
+        """Downscaled grayscale float32 array of size (width, height)."""
+        return np.asarray(image.convert('L').resize(size, Image.BILINEAR), dtype=np.float32)
+    
+    @staticmethod
+    def _dct_matrix(n: int) -> np.ndarray:
+        """Orthonormal DCT-II matrix."""
+        k = np.arange(n)[:, None]
+        matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+        matrix[0] /= np.sqrt(2)
+        return matrix
+    
+    def fingerprint(self, image: Image.Image) -> Dict[str, Any]:
+        """Compute frame pHash and per-tile hash bits and brightness."""
+        matrix = self._dct_matrix(32)
+        dct = matrix @ self._gray(image, (32, 32)) @ matrix.T
+        low = dct[:8, :8].ravel()
+        
+        rows, cols = self.grid
+        gray = self._gray(image, (cols * 9, rows * 8))
+        blocks = gray.reshape(rows, 8, cols, 9).transpose(0, 2, 1, 3)
+        means = blocks.mean(axis=(2, 3))
+        bits = np.concatenate([
+            blocks[..., 1:] > blocks[..., :-1],         # dHash
+            blocks[..., 1:] > means[..., None, None]    # aHash
+        ], axis=-1)
+        
+        return {
+            'size': image.size,
+            'phash': low > np.median(low[1:]),
+            'tiles': bits.reshape(rows, cols, -1),
+            'means': means
+        }
+    
+    def lookup(
+        self,
+        image: Image.Image,
+        key: str = ""
+    ) -> Tuple[str, Any, Optional[Tuple[int, int, int, int]], Dict[str, Any]]:
+        """
+        Find the closest stored screen state.
+        
+        Returns:
+            Tuple of (status, previous analysis, changed region (x, y, w, h), fingerprint)
+        """
+        fingerprint = self.fingerprint(image)
+        now = time.time()
+        entries = [e for e in self.entries.get(key, []) if now - e['created_at'] <= self.ttl]
+        self.entries[key] = entries
+        
+        best = None
+        for entry in entries:
+            if entry['fingerprint']['size'] != fingerprint['size']:
+                continue
+            frame_distance = int(np.count_nonzero(entry['fingerprint']['phash'] != fingerprint['phash']))
+            if frame_distance > self.frame_threshold:
+                continue
+            tile_distance = np.count_nonzero(
+                entry['fingerprint']['tiles'] != fingerprint['tiles'], axis=-1
+            )
+            brightness = np.abs(entry['fingerprint']['means'] - fingerprint['means'])
+            changed = np.argwhere(
+                (tile_distance > self.tile_threshold) | (brightness > self.brightness_threshold)
+            )
+            rank = (len(changed), frame_distance)
+            if best is None or rank < best[0]:
+                best = (rank, entry, changed)
+        
+        if best is None:
+            self.stats['misses'] += 1
+            return self.MISS, None, None, fingerprint
+        
+        (changed_count, _), entry, changed = best
+        if changed_count == 0:
+            self.stats['hits'] += 1
+            return self.HIT, copy.deepcopy(entry['value']), None, fingerprint
+        
+        rows, cols = self.grid
+        if changed_count <= self.max_changed_fraction * rows * cols:
+            width, height = fingerprint['size']
+            top, left = changed.min(axis=0)
+            bottom, right = changed.max(axis=0) + 1
+            region = (
+                int(left * width // cols),
+                int(top * height // rows),
+                int((right - left) * width // cols),
+                int((bottom - top) * height // rows)
+            )
+            self.stats['partial'] += 1
+            return self.PARTIAL, copy.deepcopy(entry['value']), region, fingerprint
+        
+        self.stats['misses'] += 1
+        return self.MISS, None, None, fingerprint
+    
+    def store(self, fingerprint: Dict[str, Any], value: Any, key: str = "") -> None:
+        """Remember analysis for a screen state."""
+        entries = self.entries.setdefault(key, [])
+        entries.append({'fingerprint': fingerprint, 'value': copy.deepcopy(value), 'created_at': time.time()})
+        del entries[:-self.max_entries]
+    
+    def clear(self) -> None:
+        """Clear all stored screen states."""
+        self.entries.clear()
+
+
 class VisionDatabase:
     """Database for storing vision analysis results (Step 14)."""
     
@@ -340,6 +493,7 @@ class VisionInitializer:
         self.config = config or VisionConfig()
         self.logger: Optional[VisionLogger] = None
         self.cache: Optional[VisionCache] = None
+        self.screen_cache: Optional[ScreenStateCache] = None
         self.db: Optional[VisionDatabase] = None
         self.gpu_info: Dict[str, Any] = {}
         self.directories: Dict[str, Path] = {}
@@ -365,6 +519,11 @@ class VisionInitializer:
         # Step 8: Set up cache
         if self.config.cache_enabled:
             self.cache = VisionCache(ttl=self.config.cache_ttl)
+            self.screen_cache = ScreenStateCache(
+                ttl=self.config.cache_ttl,
+                grid=self.config.screen_cache_grid,
+                tile_threshold=self.config.screen_change_threshold
+            )
             self.logger.info("✅ Cache initialized")
         
         # Step 14: Create database
@@ -669,7 +828,7 @@ class GPT4VisionAnalyzer:
     - API calls to GPT-4 Vision
     - Response parsing
     - Error handling and retries
-    - Result caching
+    - Result caching (perceptual screen state cache when available)
     """
     
     def __init__(
@@ -677,13 +836,15 @@ class GPT4VisionAnalyzer:
         client: openai.OpenAI,
         config: VisionConfig,
         logger: VisionLogger,
-        cache: Optional[VisionCache] = None
+        cache: Optional[VisionCache] = None,
+        screen_cache: Optional[ScreenStateCache] = None
     ):
         """Initialize GPT-4 Vision analyzer."""
         self.client = client
         self.config = config
         self.logger = logger
         self.cache = cache
+        self.screen_cache = screen_cache
     
     def analyze_image(
         self,
@@ -705,19 +866,6 @@ class GPT4VisionAnalyzer:
         """
         start_time = time.time()
         
-        # Step 31: Encode to base64
-        buffer = BytesIO()
-        image.save(buffer, format='JPEG', quality=85)
-        base64_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        # Check cache
-        cache_key = hashlib.sha256(base64_image.encode()).hexdigest()
-        if self.cache:
-            cached_result = self.cache.get(cache_key)
-            if cached_result:
-                self.logger.info("✅ Using cached analysis result")
-                return cached_result
-        
         # Step 32: Create prompt
         if prompt is None:
             prompt = """Analyze this screenshot and provide:
@@ -727,6 +875,43 @@ class GPT4VisionAnalyzer:
 4. Recommendations for interaction
 
 Respond in JSON format with keys: description, elements, problems, recommendations"""
+        cache_prompt = prompt
+        
+        # Check screen state cache: unchanged screen -> previous result,
+        # small change -> send only the changed region
+        fingerprint = None
+        cache_key = None
+        if self.screen_cache:
+            status, previous, region, fingerprint = self.screen_cache.lookup(image, key=prompt)
+            if status == ScreenStateCache.HIT:
+                self.logger.info("✅ Screen unchanged - using cached analysis result")
+                return previous
+            if status == ScreenStateCache.PARTIAL:
+                x, y, width, height = region
+                self.logger.info(f"🧩 Re-analysing changed region {width}x{height} at ({x}, {y})")
+                image = image.crop((x, y, x + width, y + height))
+                prompt = (
+                    f"{prompt}\n\nPrevious analysis of the full screen:\n"
+                    f"{json.dumps(previous, ensure_ascii=False, default=str)}\n\n"
+                    f"Since then only the region x={x}, y={y}, {width}x{height} changed; "
+                    f"the image shows that region. Return the updated analysis of the "
+                    f"full screen in the same JSON format."
+                )
+        
+        # Step 31: Encode to base64
+        buffer = BytesIO()
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, format='JPEG', quality=85)
+        base64_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        
+        # Exact-bytes cache when no screen state cache is configured
+        if self.cache and not self.screen_cache:
+            cache_key = hashlib.sha256(base64_image.encode()).hexdigest()
+            cached_result = self.cache.get(cache_key)
+            if cached_result:
+                self.logger.info("✅ Using cached analysis result")
+                return cached_result
         
         try:
             # Step 33: Call GPT-4 Vision
@@ -771,7 +956,9 @@ Respond in JSON format with keys: description, elements, problems, recommendatio
             result['timestamp'] = datetime.now().isoformat()
             
             # Cache result
-            if self.cache:
+            if fingerprint is not None:
+                self.screen_cache.store(fingerprint, result, key=cache_prompt)
+            elif self.cache:
                 self.cache.set(cache_key, result)
             
             self.logger.info(f"✅ GPT-4 Vision analysis complete ({result['processing_time']:.2f}s)")
@@ -1225,7 +1412,8 @@ class VisionOrchestrator:
                 self.openai_client,
                 self.config,
                 self.logger,
-                self.cache
+                self.cache,
+                self.initializer.screen_cache
             )
         else:
             self.gpt4_analyzer = None
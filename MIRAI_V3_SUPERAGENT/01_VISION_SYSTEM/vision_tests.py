@@ -13,6 +13,7 @@ Version: 1.0.0
 import unittest
 import os
 import tempfile
+import time
 import shutil
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
@@ -26,6 +27,7 @@ from vision_complete import (
     VisionConfig,
     VisionLogger,
     VisionCache,
+    ScreenStateCache,
     VisionDatabase,
     VisionInitializer,
     ScreenCaptureManager,
@@ -420,6 +422,95 @@ class TestGPT4VisionAnalyzer(unittest.TestCase):
         )
 
 
+class TestScreenStateCache(unittest.TestCase):
+    """Test perceptual screen state cache."""
+    
+    def setUp(self):
+        """Create a structured synthetic screen."""
+        screen = np.zeros((600, 800, 3), dtype=np.uint8)
+        screen[:] = np.linspace(40, 200, 800, dtype=np.uint8)[None, :, None]
+        screen[50:250, 50:400] = [230, 230, 230]    # window
+        screen[350:550, 450:750] = [30, 60, 120]    # panel
+        self.screen = screen
+        self.cache = ScreenStateCache()
+    
+    def test_small_change_hits(self):
+        """A few changed pixels (clock tick) still hit the cache."""
+        _, _, _, fingerprint = self.cache.lookup(Image.fromarray(self.screen))
+        self.cache.store(fingerprint, {'description': 'desktop'})
+        
+        ticked = self.screen.copy()
+        ticked[590:595, 780:790] = 255
+        status, value, _, _ = self.cache.lookup(Image.fromarray(ticked))
+        
+        self.assertEqual(status, ScreenStateCache.HIT)
+        self.assertEqual(value, {'description': 'desktop'})
+    
+    def test_local_change_is_partial(self):
+        """A new dialog in one area yields only that region."""
+        _, _, _, fingerprint = self.cache.lookup(Image.fromarray(self.screen))
+        self.cache.store(fingerprint, {'description': 'desktop'})
+        
+        dialog = self.screen.copy()
+        dialog[380:440, 480:560] = [255, 0, 0]
+        status, _, region, _ = self.cache.lookup(Image.fromarray(dialog))
+        
+        self.assertEqual(status, ScreenStateCache.PARTIAL)
+        x, y, width, height = region
+        self.assertTrue(x <= 480 and y <= 380 and x + width >= 560 and y + height >= 440)
+        self.assertLess(width * height, 800 * 600 / 4)
+    
+    def test_analyzer_sends_only_changed_region(self):
+        """GPT-4 analyzer skips unchanged screens and crops partial ones."""
+        client = MagicMock()
+        client.chat.completions.create.return_value.choices = [MagicMock()]
+        client.chat.completions.create.return_value.choices[0].message.content = '{"description": "ok"}'
+        analyzer = GPT4VisionAnalyzer(client, VisionConfig(), VisionLogger(), screen_cache=self.cache)
+        
+        analyzer.analyze_image(Image.fromarray(self.screen))
+        analyzer.analyze_image(Image.fromarray(self.screen))
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        
+        dialog = self.screen.copy()
+        dialog[380:440, 480:560] = [255, 0, 0]
+        analyzer.analyze_image(Image.fromarray(dialog))
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        
+        content = client.chat.completions.create.call_args.kwargs['messages'][0]['content']
+        self.assertIn('Previous analysis', content[0]['text'])
+    
+    def test_other_screen_key_and_ttl_miss(self):
+        """Different screens, different prompts and expired entries miss."""
+        _, _, _, fingerprint = self.cache.lookup(Image.fromarray(self.screen), key='what is open?')
+        self.cache.store(fingerprint, {'description': 'desktop'}, key='what is open?')
+        
+        other = np.full_like(self.screen, 20)
+        other[100:500, 100:700] = [200, 120, 40]
+        status, _, _, _ = self.cache.lookup(Image.fromarray(other), key='what is open?')
+        self.assertEqual(status, ScreenStateCache.MISS)
+        status, _, _, _ = self.cache.lookup(Image.fromarray(self.screen), key='other question')
+        self.assertEqual(status, ScreenStateCache.MISS)
+        
+        expiring = ScreenStateCache(ttl=0)
+        expiring.store(fingerprint, {'description': 'desktop'})
+        time.sleep(0.01)
+        status, _, _, _ = expiring.lookup(Image.fromarray(self.screen))
+        self.assertEqual(status, ScreenStateCache.MISS)
+    
+    def test_hit_returns_copy(self):
+        """Mutating a cached result does not change the cache."""
+        analysis = {'description': 'desktop', 'elements': ['start']}
+        _, _, _, fingerprint = self.cache.lookup(Image.fromarray(self.screen))
+        self.cache.store(fingerprint, analysis)
+        analysis['elements'].append('stored after')
+        
+        status, value, _, _ = self.cache.lookup(Image.fromarray(self.screen))
+        self.assertEqual(status, ScreenStateCache.HIT)
+        value['elements'].clear()
+        _, value, _, _ = self.cache.lookup(Image.fromarray(self.screen))
+        self.assertEqual(value, {'description': 'desktop', 'elements': ['start']})
+
+
 # ============================================================================
 # Test Screen Analyzer
 # ============================================================================
@@ -639,6 +730,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestVisionInitializer))
     suite.addTests(loader.loadTestsFromTestCase(TestScreenCaptureManager))
     suite.addTests(loader.loadTestsFromTestCase(TestGPT4VisionAnalyzer))
+    suite.addTests(loader.loadTestsFromTestCase(TestScreenStateCache))
     suite.addTests(loader.loadTestsFromTestCase(TestScreenAnalyzer))
     suite.addTests(loader.loadTestsFromTestCase(TestElementDetector))
     suite.addTests(loader.loadTestsFromTestCase(TestProblemDetector))
@@ -212,6 +212,231 @@ class WorkingMemory:
         }
 
 
+# Шаг 8a: Embedding Matrix
+class EmbeddingMatrix:
+    """
+    Матрица эмбеддингов для поиска по сходству
+    - Непрерывный float32 массив, строки нормализуются один раз при добавлении
+    - Запрос = одно матричное умножение + argpartition для top-k
+    - Маски по типу памяти и массив важности для фильтрации без SQL
+    - Опционально memory-mapped файл на диске (растёт удвоением)
+    """
+    
+    def __init__(self, path: Optional[str] = None, initial_capacity: int = 1024):
+        """
+        Args:
+            path: Файл матрицы (None = только в памяти)
+            initial_capacity: Начальное количество строк
+        """
+        self.path = Path(path) if path else None
+        self.meta_path = Path(f"{path}.json") if path else None
+        self.initial_capacity = initial_capacity
+        self.half_life_seconds: Optional[float] = None  # None = без забывания
+        self._lock = threading.RLock()
+        self._reset_state()
+        
+        if self.meta_path and self.meta_path.exists() and self.path.exists():
+            self.dim = json.loads(self.meta_path.read_text())['dim']
+            capacity = self.path.stat().st_size // (self.dim * 4)
+            if capacity:
+                self._map(capacity)
+    
+    def _reset_state(self):
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.count = 0  # выделенные строки (включая удалённые)
+        self.matrix: Optional[np.ndarray] = None
+        self.active = np.zeros(0, dtype=bool)
+        self.importance = np.zeros(0, dtype=np.float32)
+        self.decay_ref = np.zeros(0, dtype=np.float64)  # epoch seconds
+        self.type_masks: Dict[str, np.ndarray] = {}
+        self.row_ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+    
+    def _map(self, capacity: int):
+        """Отобразить файл матрицы на capacity строк"""
+        with open(self.path, 'ab') as f:
+            f.truncate(capacity * self.dim * 4)
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        self._resize_columns(capacity)
+    
+    def _resize_columns(self, capacity: int):
+        def grow(array: np.ndarray) -> np.ndarray:
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array[:capacity]
+            return grown
+        
+        self.active = grow(self.active)
+        self.importance = grow(self.importance)
+        self.decay_ref = grow(self.decay_ref)
+        self.type_masks = {k: grow(v) for k, v in self.type_masks.items()}
+        self.row_ids.extend([None] * (capacity - len(self.row_ids)))
+        self.capacity = capacity
+    
+    def _ensure_capacity(self, rows: int):
+        if rows <= self.capacity:
+            return
+        capacity = max(self.initial_capacity, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        
+        if self.path:
+            if self.matrix is not None:
+                self.matrix.flush()
+                self.matrix = None
+            self._map(capacity)
+        else:
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            if self.matrix is not None:
+                matrix[:self.count] = self.matrix[:self.count]
+            self.matrix = matrix
+            self._resize_columns(capacity)
+    
+    def _set_dim(self, dim: int):
+        self.dim = dim
+        if self.meta_path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.meta_path.write_text(json.dumps({'dim': dim}))
+    
+    def _register(self, id_: str, row: int, memory_type: Optional[str], importance: float,
+                  decay_ref: float, active: bool):
+        self.rows[id_] = row
+        self.row_ids[row] = id_
+        self.active[row] = active
+        self.importance[row] = importance
+        self.decay_ref[row] = decay_ref
+        for mask in self.type_masks.values():
+            mask[row] = False
+        if memory_type is not None:
+            mask = self.type_masks.get(memory_type)
+            if mask is None:
+                mask = self.type_masks[memory_type] = np.zeros(self.capacity, dtype=bool)
+            mask[row] = True
+        self.count = max(self.count, row + 1)
+    
+    def add(self, id_: str, vector: np.ndarray, memory_type: Optional[str] = None,
+            importance: float = 0.0, decay_ref: Optional[float] = None) -> int:
+        """Добавить или заменить вектор; возвращает номер строки"""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        with self._lock:
+            if self.dim is None:
+                self._set_dim(vector.shape[0])
+            if vector.shape[0] != self.dim:
+                raise ValueError(f"Размерность эмбеддинга {vector.shape[0]} != {self.dim}")
+            
+            row = self.rows.get(id_)
+            if row is None:
+                row = self.count
+                self._ensure_capacity(row + 1)
+            
+            norm = float(np.linalg.norm(vector))
+            self.matrix[row] = vector / norm if norm > 0 else 0.0
+            self._register(id_, row, memory_type, importance,
+                           time.time() if decay_ref is None else decay_ref, active=norm > 0)
+            return row
+    
+    def can_attach(self, max_row: int) -> bool:
+        """Покрывает ли файл матрицы строки до max_row включительно"""
+        return self.dim is not None and max_row < self.capacity
+    
+    def attach(self, id_: str, row: int, memory_type: Optional[str] = None,
+               importance: float = 0.0, decay_ref: float = 0.0):
+        """Зарегистрировать уже записанную в файл строку (при загрузке)"""
+        with self._lock:
+            self._register(id_, row, memory_type, importance, decay_ref,
+                           active=bool(np.any(self.matrix[row])))
+    
+    def remove(self, id_: str):
+        with self._lock:
+            row = self.rows.pop(id_, None)
+            if row is not None:
+                self.active[row] = False
+                self.row_ids[row] = None
+    
+    def set_importance(self, id_: str, importance: float, decay_ref: Optional[float] = None):
+        with self._lock:
+            row = self.rows.get(id_)
+            if row is not None:
+                self.importance[row] = importance
+                self.decay_ref[row] = time.time() if decay_ref is None else decay_ref
+    
+    def search(self,
+               query_vector: np.ndarray,
+               top_k: int = 5,
+               memory_type: Optional[Any] = None,
+               min_importance: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k по косинусному сходству
+        
+        Args:
+            query_vector: Вектор запроса
+            top_k: Количество результатов
+            memory_type: Только этот тип памяти (MemoryType или строка)
+            min_importance: Только воспоминания с важностью не ниже
+            
+        Returns:
+            Список (id, similarity) по убыванию сходства
+        """
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query))
+        
+        with self._lock:
+            n = self.count
+            if n == 0 or norm == 0 or top_k <= 0:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Размерность запроса {query.shape[0]} != {self.dim}")
+            query = query / norm
+            
+            mask = self.active[:n]
+            if memory_type is not None:
+                type_mask = self.type_masks.get(getattr(memory_type, 'value', memory_type))
+                if type_mask is None:
+                    return []
+                mask = mask & type_mask[:n]
+            if min_importance is not None:
+                importance = self.importance[:n]
+                if self.half_life_seconds:
+                    age = np.maximum(time.time() - self.decay_ref[:n], 0.0)
+                    importance = importance * np.exp2(-age / self.half_life_seconds)
+                mask = mask & (importance >= min_importance)
+            
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+            if len(candidates) < n // 2:
+                scores = self.matrix[candidates] @ query
+            else:
+                scores = (self.matrix[:n] @ query)[candidates]
+            
+            k = min(top_k, len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(k)
+            top = top[np.argsort(-scores[top], kind='stable')]
+            
+            return [(self.row_ids[candidates[i]], float(scores[i])) for i in top]
+    
+    def reset(self):
+        """Удалить все векторы (и файл матрицы)"""
+        with self._lock:
+            self.matrix = None
+            if self.path:
+                for path in (self.path, self.meta_path):
+                    if path.exists():
+                        path.unlink()
+            self._reset_state()
+    
+    def flush(self):
+        with self._lock:
+            if isinstance(self.matrix, np.memmap):
+                self.matrix.flush()
+    
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self.rows
+    
+    def __len__(self):
+        return len(self.rows)
+
+
 # Шаг 8: Long-Term Memory
 class LongTermMemory:
     """
@@ -219,16 +444,28 @@ class LongTermMemory:
     - Постоянное хранилище
     - SQLite база данных
     - Индексирование и поиск
+    - Матрица эмбеддингов (<db>.vectors), пополняется при store()
+    - Ленивое забывание: в БД хранится базовая важность и момент отсчёта
+      (decay_ref), эффективная важность вычисляется при чтении
+    - Все записи идут пачками через _write_batches()
     """
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, half_life_days: Optional[float] = None, batch_size: int = 500):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.half_life_days: Optional[float] = None
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self.conn.create_function("effective_importance", 2, self.effective_importance)
+        self._write_lock = threading.RLock()
         self._create_tables()
         
+        self.vectors = EmbeddingMatrix(None if db_path == ":memory:" else f"{db_path}.vectors")
+        self.set_half_life(half_life_days)
+        self._load_vector_index()
+        
         logger.info(f"✅ Long-Term Memory инициализирована: {db_path}")
     
     def _create_tables(self):
@@ -246,10 +483,19 @@ class LongTermMemory:
                 access_count INTEGER DEFAULT 0,
                 last_accessed TIMESTAMP,
                 metadata TEXT,
-                embedding BLOB
+                embedding BLOB,
+                embedding_row INTEGER,
+                decay_ref TIMESTAMP
             )
         """)
         
+        # Миграция старых БД: строка эмбеддинга в матрице, момент отсчёта забывания
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(memories)")}
+        if 'embedding_row' not in columns:
+            cursor.execute("ALTER TABLE memories ADD COLUMN embedding_row INTEGER")
+        if 'decay_ref' not in columns:
+            cursor.execute("ALTER TABLE memories ADD COLUMN decay_ref TIMESTAMP")
+        
         # Индексы для быстрого поиска
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON memories(timestamp)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_type ON memories(memory_type)")
@@ -257,28 +503,215 @@ class LongTermMemory:
         
         self.conn.commit()
     
+    # ------------------------------------------------------------------
+    # Забывание
+    # ------------------------------------------------------------------
+    
+    def set_half_life(self, half_life_days: Optional[float]):
+        """Включить ленивое забывание (None = важность не убывает)"""
+        self.half_life_days = half_life_days
+        self.vectors.half_life_seconds = half_life_days * 86400 if half_life_days else None
+    
+    def effective_importance(self, importance: float, decay_ref: Optional[str]) -> float:
+        """
+        Важность на текущий момент
+        
+        Также зарегистрирована в SQLite: ORDER BY effective_importance(importance, decay_ref)
+        """
+        if not self.half_life_days or not decay_ref or importance is None:
+            return importance
+        age_days = (datetime.now() - datetime.fromisoformat(decay_ref)).total_seconds() / 86400
+        return importance * 2 ** (-max(age_days, 0.0) / self.half_life_days)
+    
+    @staticmethod
+    def _decay_ref(row) -> Optional[str]:
+        return row['decay_ref'] or row['timestamp']
+    
+    def _write_batches(self, sql: str, params: List[tuple]) -> int:
+        """executemany пачками по batch_size, каждая пачка - своя короткая транзакция"""
+        changed = 0
+        with self._write_lock:
+            for start in range(0, len(params), self.batch_size):
+                cursor = self.conn.executemany(sql, params[start:start + self.batch_size])
+                changed += max(cursor.rowcount, 0)
+                self.conn.commit()
+        return changed
+    
+    def _load_vector_index(self):
+        """Подключить матрицу эмбеддингов; перестроить её, если файл отстал от БД"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT id, memory_type, importance, embedding_row, timestamp, decay_ref "
+            "FROM memories WHERE embedding IS NOT NULL"
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        
+        if any(row['embedding_row'] is None for row in rows) or \
+                not self.vectors.can_attach(max(row['embedding_row'] for row in rows)):
+            self.rebuild_vector_index()
+            return
+        
+        for row in rows:
+            self.vectors.attach(row['id'], row['embedding_row'], row['memory_type'], row['importance'],
+                                datetime.fromisoformat(self._decay_ref(row)).timestamp())
+    
+    def rebuild_vector_index(self) -> int:
+        """Заново построить матрицу эмбеддингов из SQLite"""
+        self.vectors.reset()
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT id, memory_type, importance, embedding, timestamp, decay_ref "
+            "FROM memories WHERE embedding IS NOT NULL"
+        )
+        
+        updates = []
+        for row in cursor.fetchall():
+            try:
+                index = self.vectors.add(
+                    row['id'], pickle.loads(row['embedding']), row['memory_type'], row['importance'],
+                    datetime.fromisoformat(self._decay_ref(row)).timestamp()
+                )
+            except ValueError as e:
+                logger.warning(f"⚠️ Эмбеддинг {row['id']} пропущен: {e}")
+                continue
+            updates.append((index, row['id']))
+        
+        self._write_batches("UPDATE memories SET embedding_row = ? WHERE id = ?", updates)
+        self.vectors.flush()
+        
+        logger.info(f"🔢 Матрица эмбеддингов перестроена: {len(updates)} векторов")
+        return len(updates)
+    
     def store(self, item: MemoryItem):
         """Сохранить элемент в долговременную память"""
-        cursor = self.conn.cursor()
+        self.store_many([item])
+    
+    def store_many(self, items: List[MemoryItem]) -> int:
+        """Сохранить элементы пачками; важность считается актуальной на момент записи"""
+        now = datetime.now()
+        params = []
+        with self._write_lock:
+            for item in items:
+                if item.embedding is not None:
+                    embedding_row = self.vectors.add(
+                        item.id, item.embedding, item.memory_type.value, item.importance, now.timestamp()
+                    )
+                else:
+                    embedding_row = None
+                    self.vectors.remove(item.id)
+                
+                params.append((
+                    item.id,
+                    json.dumps(item.content, ensure_ascii=False),
+                    item.memory_type.value,
+                    item.timestamp.isoformat(),
+                    item.importance,
+                    item.access_count,
+                    item.last_accessed.isoformat() if item.last_accessed else None,
+                    json.dumps(item.metadata, ensure_ascii=False),
+                    pickle.dumps(item.embedding) if item.embedding is not None else None,
+                    embedding_row,
+                    now.isoformat()
+                ))
+            
+            self._write_batches("""
+                INSERT OR REPLACE INTO memories 
+                (id, content, memory_type, timestamp, importance, access_count, last_accessed, metadata,
+                 embedding, embedding_row, decay_ref)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, params)
+        
+        for item in items:
+            logger.debug(f"💾 Сохранено в LTM: {item.id}")
+        return len(params)
+    
+    def reinforce_many(self, strengths: Dict[str, float]) -> int:
+        """
+        Укрепить воспоминания одной пачкой
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO memories 
-            (id, content, memory_type, timestamp, importance, access_count, last_accessed, metadata, embedding)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            item.id,
-            json.dumps(item.content, ensure_ascii=False),
-            item.memory_type.value,
-            item.timestamp.isoformat(),
-            item.importance,
-            item.access_count,
-            item.last_accessed.isoformat() if item.last_accessed else None,
-            json.dumps(item.metadata, ensure_ascii=False),
-            pickle.dumps(item.embedding) if item.embedding is not None else None
-        ))
+        Args:
+            strengths: {memory_id: прибавка к эффективной важности}
+            
+        Returns:
+            Количество обновлённых воспоминаний
+        """
+        now = datetime.now()
+        params = []
+        with self._write_lock:
+            for item_id, row in self._select_by_ids(
+                "id, importance, timestamp, decay_ref", list(strengths)
+            ).items():
+                importance = min(1.0, self.effective_importance(row['importance'], self._decay_ref(row))
+                                 + strengths[item_id])
+                params.append((importance, now.isoformat(), now.isoformat(), item_id))
+                self.vectors.set_importance(item_id, importance, now.timestamp())
+            
+            return self._write_batches("""
+                UPDATE memories
+                SET importance = ?,
+                    decay_ref = ?,
+                    access_count = access_count + 1,
+                    last_accessed = ?
+                WHERE id = ?
+            """, params)
+    
+    def compact_decay(self, min_change: float = 0.01) -> int:
+        """
+        Записать накопленное забывание в БД (set-based UPDATE пачками по rowid)
         
-        self.conn.commit()
-        logger.debug(f"💾 Сохранено в LTM: {item.id}")
+        Эффективная важность от этого не меняется - только базовая
+        важность и момент отсчёта сдвигаются к текущему времени.
+        """
+        if not self.half_life_days:
+            return 0
+        
+        now = datetime.now().isoformat()
+        max_rowid = self.conn.execute("SELECT MAX(rowid) FROM memories").fetchone()[0] or 0
+        updated = 0
+        for start in range(0, max_rowid, self.batch_size):
+            with self._write_lock:
+                cursor = self.conn.execute("""
+                    UPDATE memories
+                    SET importance = effective_importance(importance, COALESCE(decay_ref, timestamp)),
+                        decay_ref = ?
+                    WHERE rowid > ? AND rowid <= ?
+                      AND ABS(importance - effective_importance(importance, COALESCE(decay_ref, timestamp))) > ?
+                """, (now, start, start + self.batch_size, min_change))
+                updated += cursor.rowcount
+                self.conn.commit()
+        return updated
+    
+    def query_by_importance(self, limit: int = 10, memory_type: Optional[MemoryType] = None) -> List[MemoryItem]:
+        """Самые важные воспоминания с учётом забывания"""
+        where = "WHERE memory_type = ?" if memory_type else ""
+        params = (memory_type.value, limit) if memory_type else (limit,)
+        cursor = self.conn.execute(f"""
+            SELECT * FROM memories {where}
+            ORDER BY effective_importance(importance, COALESCE(decay_ref, timestamp)) DESC
+            LIMIT ?
+        """, params)
+        return [self._row_to_memory_item(row) for row in cursor.fetchall()]
+    
+    def _select_by_ids(self, columns: str, item_ids: List[str]) -> Dict[str, sqlite3.Row]:
+        rows = {}
+        cursor = self.conn.cursor()
+        for start in range(0, len(item_ids), 500):
+            chunk = item_ids[start:start + 500]
+            cursor.execute(
+                f"SELECT {columns} FROM memories WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for row in cursor.fetchall():
+                rows[row['id']] = row
+        return rows
+    
+    def retrieve_many(self, item_ids: List[str]) -> Dict[str, MemoryItem]:
+        """Получить несколько элементов по ID"""
+        return {
+            item_id: self._row_to_memory_item(row)
+            for item_id, row in self._select_by_ids("*", item_ids).items()
+        }
     
     def retrieve(self, item_id: str) -> Optional[MemoryItem]:
         """Получить элемент по ID"""
@@ -297,7 +730,7 @@ class LongTermMemory:
             content=json.loads(row['content']),
             memory_type=MemoryType(row['memory_type']),
             timestamp=datetime.fromisoformat(row['timestamp']),
-            importance=row['importance'],
+            importance=self.effective_importance(row['importance'], self._decay_ref(row)),
             access_count=row['access_count'],
             last_accessed=datetime.fromisoformat(row['last_accessed']) if row['last_accessed'] else None,
             metadata=json.loads(row['metadata']) if row['metadata'] else {},
@@ -318,6 +751,11 @@ class LongTermMemory:
         cursor = self.conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM memories")
         return cursor.fetchone()[0]
+    
+    def close(self):
+        """Сбросить матрицу на диск и закрыть БД"""
+        self.vectors.flush()
+        self.conn.close()
 
 
 # Шаг 9: Episodic Memory
@@ -586,46 +1024,32 @@ class MemoryRetriever:
         
         logger.info("✅ Memory Retriever создан")
     
-    def search_by_similarity(self, query: str, top_k: int = 5) -> List[Tuple[MemoryItem, float]]:
+    def search_by_similarity(self,
+                             query: str,
+                             top_k: int = 5,
+                             memory_type: Optional[MemoryType] = None,
+                             min_importance: Optional[float] = None) -> List[Tuple[MemoryItem, float]]:
         """
         Поиск по семантическому сходству
         
         Args:
             query: Запрос
             top_k: Количество результатов
+            memory_type: Искать только в этом типе памяти
+            min_importance: Минимальная важность
             
         Returns:
             Список (MemoryItem, similarity_score)
         """
         query_embedding = self.encoder.encode(query)
         
-        # Получить все элементы с эмбеддингами
-        cursor = self.ltm.conn.cursor()
-        cursor.execute("SELECT * FROM memories WHERE embedding IS NOT NULL")
-        rows = cursor.fetchall()
-        
-        results = []
-        for row in rows:
-            item = self.ltm._row_to_memory_item(row)
-            if item.embedding is not None:
-                similarity = self._cosine_similarity(query_embedding, item.embedding)
-                results.append((item, similarity))
-        
-        # Сортировка по сходству
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        return results[:top_k]
-    
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
-        """Вычислить косинусное сходство"""
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        # Top-k по матрице эмбеддингов, из SQLite читаются только найденные строки
+        hits = self.ltm.vectors.search(
+            query_embedding, top_k, memory_type=memory_type, min_importance=min_importance
+        )
+        items = self.ltm.retrieve_many([id_ for id_, _ in hits])
         
-        return float(dot_product / (norm1 * norm2))
+        return [(items[id_], score) for id_, score in hits if id_ in items]
     
     def retrieve_recent(self, n: int = 10, memory_type: Optional[MemoryType] = None) -> List[MemoryItem]:
         """Получить последние N воспоминаний"""
@@ -682,9 +1106,8 @@ class MemoryConsolidation:
                 
                 items_to_consolidate.append(item)
         
-        # Сохранить в LTM
-        for item in items_to_consolidate:
-            self.ltm.store(item)
+        # Сохранить в LTM одной пачкой
+        self.ltm.store_many(items_to_consolidate)
         
         logger.info(f"💫 Консолидировано элементов: {len(items_to_consolidate)}")
         
@@ -730,40 +1153,30 @@ class VectorDB:
     - Быстрый поиск по сходству
     """
     
-    def __init__(self):
-        self.vectors: List[np.ndarray] = []
-        self.ids: List[str] = []
-        self.metadata: List[Dict] = []
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Файл для memory-mapped матрицы (None = в памяти)
+        """
+        self.matrix = EmbeddingMatrix(path)
+        self.metadata: Dict[str, Dict] = {}
         
         logger.info("✅ Vector DB создана")
     
     def add(self, id_: str, vector: np.ndarray, metadata: Dict = None):
-        """Добавить вектор"""
-        self.vectors.append(vector)
-        self.ids.append(id_)
-        self.metadata.append(metadata or {})
+        """Добавить (или заменить) вектор"""
+        self.matrix.add(id_, vector)
+        self.metadata[id_] = metadata or {}
     
     def search(self, query_vector: np.ndarray, top_k: int = 5) -> List[Tuple[str, float, Dict]]:
         """Поиск ближайших векторов"""
-        if not self.vectors:
-            return []
-        
-        similarities = []
-        for i, vec in enumerate(self.vectors):
-            norm_query = np.linalg.norm(query_vector)
-            norm_vec = np.linalg.norm(vec)
-            
-            if norm_query > 0 and norm_vec > 0:
-                sim = np.dot(query_vector, vec) / (norm_query * norm_vec)
-                similarities.append((self.ids[i], float(sim), self.metadata[i]))
-        
-        # Сортировка по убыванию сходства
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        
-        return similarities[:top_k]
+        return [
+            (id_, score, self.metadata[id_])
+            for id_, score in self.matrix.search(query_vector, top_k)
+        ]
     
     def __len__(self):
-        return len(self.vectors)
+        return len(self.matrix)
 
 
 # Шаг 17: Memory Indexer
@@ -858,36 +1271,22 @@ class AttentionMechanism:
 
 
 class MemoryDecay:
-    """Забывание старых воспоминаний"""
+    """
+    Забывание старых воспоминаний
+    - Ленивое: эффективная важность вычисляется при чтении (LongTermMemory)
+    - apply_decay() только уплотняет: пишет накопленное забывание пачками
+    """
     
     def __init__(self, ltm: LongTermMemory, half_life_days: float = 30.0):
         self.ltm = ltm
         self.half_life_days = half_life_days
+        ltm.set_half_life(half_life_days)
         
         logger.info(f"✅ Memory Decay создан (half_life={half_life_days} days)")
     
     def apply_decay(self) -> int:
-        """Применить забывание"""
-        cursor = self.ltm.conn.cursor()
-        cursor.execute("SELECT id, timestamp, importance FROM memories")
-        
-        updated = 0
-        for row in cursor.fetchall():
-            old_importance = row['importance']
-            timestamp = datetime.fromisoformat(row['timestamp'])
-            
-            age_days = (datetime.now() - timestamp).days
-            decay_factor = 2 ** (-age_days / self.half_life_days)
-            new_importance = old_importance * decay_factor
-            
-            if abs(new_importance - old_importance) > 0.01:
-                cursor.execute(
-                    "UPDATE memories SET importance = ? WHERE id = ?",
-                    (new_importance, row['id'])
-                )
-                updated += 1
-        
-        self.ltm.conn.commit()
+        """Уплотнить забывание в БД"""
+        updated = self.ltm.compact_decay()
         logger.info(f"⏳ Применено забывание к {updated} воспоминаниям")
         
         return updated
@@ -903,27 +1302,12 @@ class MemoryReinforcement:
     
     def reinforce(self, memory_id: str, strength: float = 0.1):
         """Укрепить воспоминание"""
-        cursor = self.ltm.conn.cursor()
-        cursor.execute(
-            "SELECT importance, access_count FROM memories WHERE id = ?",
-            (memory_id,)
-        )
-        row = cursor.fetchone()
-        
-        if row:
-            new_importance = min(1.0, row['importance'] + strength)
-            new_access_count = row['access_count'] + 1
-            
-            cursor.execute("""
-                UPDATE memories 
-                SET importance = ?, 
-                    access_count = ?,
-                    last_accessed = ?
-                WHERE id = ?
-            """, (new_importance, new_access_count, datetime.now().isoformat(), memory_id))
-            
-            self.ltm.conn.commit()
+        if self.ltm.reinforce_many({memory_id: strength}):
             logger.debug(f"💪 Укреплено: {memory_id}")
+    
+    def reinforce_many(self, memory_ids: List[str], strength: float = 0.1) -> int:
+        """Укрепить несколько воспоминаний одной пачкой"""
+        return self.ltm.reinforce_many({memory_id: strength for memory_id in memory_ids})
 
 
 # ============================================================================
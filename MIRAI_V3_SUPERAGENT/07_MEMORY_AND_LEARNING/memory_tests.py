@@ -25,7 +25,7 @@ from memory_complete import (
     ShortTermMemory, WorkingMemory, LongTermMemory,
     EpisodicMemory, SemanticMemory, ProceduralMemory,
     MemoryEncoder, MemoryRetriever, MemoryConsolidation,
-    VectorDB, MemoryIndexer, AttentionMechanism, MemoryDecay,
+    VectorDB, EmbeddingMatrix, MemoryIndexer, AttentionMechanism, MemoryDecay,
     MemoryReinforcement, ExperienceRecorder, PatternDetector,
     LearningEngine, KnowledgeGraph, MemorySystem,
     MemoryVisionIntegration, SuperAgentValidator,
@@ -614,6 +614,129 @@ class TestVectorDB(unittest.TestCase):
         self.assertEqual(results[1][0], "id3")
 
 
+class TestEmbeddingMatrix(unittest.TestCase):
+    """Тесты для матрицы эмбеддингов (Шаг 8a)"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = Path(self.temp_dir) / "test_memory.db"
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_top_k_matches_brute_force(self):
+        """Top-k совпадает с полным перебором, матрица растёт"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(50, 16))
+        matrix = EmbeddingMatrix(initial_capacity=4)
+        for i, vec in enumerate(vectors):
+            matrix.add(f"id{i}", vec, "semantic" if i % 2 else "episodic", importance=i / 50)
+        
+        query = rng.normal(size=16)
+        sims = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        expected = [f"id{i}" for i in np.argsort(-sims)[:5]]
+        
+        results = matrix.search(query, top_k=5)
+        self.assertEqual([id_ for id_, _ in results], expected)
+        self.assertAlmostEqual(results[0][1], float(sims.max()), places=5)
+        self.assertGreaterEqual(matrix.capacity, 50)
+        
+        # Фильтры по типу и важности
+        filtered = matrix.search(query, top_k=50, memory_type=MemoryType.SEMANTIC, min_importance=0.5)
+        self.assertTrue(filtered)
+        self.assertTrue(all(int(id_[2:]) % 2 == 1 and int(id_[2:]) >= 25 for id_, _ in filtered))
+        
+        matrix.remove("id0")
+        self.assertNotIn("id0", [id_ for id_, _ in matrix.search(vectors[0], top_k=3)])
+    
+    def test_ltm_index_persists_and_migrates(self):
+        """Матрица переживает перезапуск и строится для старых БД"""
+        ltm = LongTermMemory(str(self.db_path))
+        encoder = MemoryEncoder()
+        for i, text in enumerate(["cat", "dog", "car"]):
+            item = MemoryItem(f"item_{i}", {"text": text}, MemoryType.EPISODIC if i else MemoryType.SEMANTIC)
+            ltm.store(encoder.encode_memory_item(item))
+        ltm.store(MemoryItem("plain", {"text": "no embedding"}, MemoryType.SEMANTIC))
+        ltm.close()
+        
+        ltm = LongTermMemory(str(self.db_path))
+        retriever = MemoryRetriever(ltm, encoder)
+        self.assertEqual(len(ltm.vectors), 3)
+        dog = json.dumps({"text": "dog"})  # кодировщик видит content как JSON
+        results = retriever.search_by_similarity(dog, top_k=3)
+        self.assertEqual(results[0][0].id, "item_1")
+        self.assertAlmostEqual(results[0][1], 1.0, places=4)
+        semantic = retriever.search_by_similarity(dog, top_k=3, memory_type=MemoryType.SEMANTIC)
+        self.assertEqual([item.id for item, _ in semantic], ["item_0"])
+        
+        # Старая БД: нет строк матрицы и файла
+        ltm.conn.execute("UPDATE memories SET embedding_row = NULL")
+        ltm.conn.commit()
+        ltm.close()
+        Path(f"{self.db_path}.vectors").unlink()
+        
+        ltm = LongTermMemory(str(self.db_path))
+        self.assertEqual(len(ltm.vectors), 3)
+        self.assertEqual(MemoryRetriever(ltm, encoder).search_by_similarity(json.dumps({"text": "car"}), top_k=1)[0][0].id, "item_2")
+        ltm.close()
+
+
+class TestMemoryDecay(unittest.TestCase):
+    """Тесты для ленивого забывания и укрепления (Шаги 18-20)"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.ltm = LongTermMemory(str(Path(self.temp_dir) / "test_memory.db"))
+        self.decay = MemoryDecay(self.ltm, half_life_days=30.0)
+        self.reinforcement = MemoryReinforcement(self.ltm)
+        
+        for i, importance in enumerate([0.8, 0.6]):
+            item = MemoryItem(f"item_{i}", {"i": i}, MemoryType.EPISODIC, importance=importance)
+            item.embedding = np.eye(4)[i]
+            self.ltm.store(item)
+        
+        # item_0 записан 30 дней назад (один период полураспада)
+        month_ago = (datetime.now() - timedelta(days=30)).isoformat()
+        self.ltm.conn.execute("UPDATE memories SET decay_ref = ? WHERE id = 'item_0'", (month_ago,))
+        self.ltm.conn.commit()
+        self.ltm.vectors.set_importance("item_0", 0.8, datetime.fromisoformat(month_ago).timestamp())
+    
+    def tearDown(self):
+        self.ltm.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_lazy_decay_on_read_and_ranking(self):
+        """Эффективная важность считается при чтении и в SQL"""
+        self.assertAlmostEqual(self.ltm.retrieve("item_0").importance, 0.4, places=3)
+        self.assertAlmostEqual(self.ltm.retrieve("item_1").importance, 0.6, places=3)
+        
+        ranked = self.ltm.query_by_importance(limit=2)
+        self.assertEqual([item.id for item in ranked], ["item_1", "item_0"])
+        
+        hits = self.ltm.vectors.search(np.ones(4), top_k=2, min_importance=0.5)
+        self.assertEqual([id_ for id_, _ in hits], ["item_1"])
+    
+    def test_compaction_preserves_effective_importance(self):
+        """apply_decay уплотняет, не меняя эффективную важность"""
+        self.assertEqual(self.decay.apply_decay(), 1)
+        row = self.ltm.conn.execute("SELECT importance FROM memories WHERE id = 'item_0'").fetchone()
+        self.assertAlmostEqual(row['importance'], 0.4, places=3)
+        self.assertAlmostEqual(self.ltm.retrieve("item_0").importance, 0.4, places=3)
+        self.assertEqual(self.decay.apply_decay(), 0)
+    
+    def test_reinforce_batches(self):
+        """Укрепление прибавляет к эффективной важности"""
+        self.assertEqual(self.reinforcement.reinforce_many(["item_0", "item_1", "missing"], 0.3), 2)
+        item_0, item_1 = self.ltm.retrieve("item_0"), self.ltm.retrieve("item_1")
+        self.assertAlmostEqual(item_0.importance, 0.7, places=3)
+        self.assertAlmostEqual(item_1.importance, 0.9, places=3)
+        self.assertEqual(item_0.access_count, 1)
+        self.assertIsNotNone(item_0.last_accessed)
+        
+        hits = self.ltm.vectors.search(np.ones(4), top_k=2, min_importance=0.65)
+        self.assertEqual(len(hits), 2)
+
+
 class TestPatternDetector(unittest.TestCase):
     """Тесты для обнаружения паттернов (Шаг 51)"""
     
@@ -896,6 +1019,8 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestMemoryRetriever))
     suite.addTests(loader.loadTestsFromTestCase(TestMemoryConsolidation))
     suite.addTests(loader.loadTestsFromTestCase(TestVectorDB))
+    suite.addTests(loader.loadTestsFromTestCase(TestEmbeddingMatrix))
+    suite.addTests(loader.loadTestsFromTestCase(TestMemoryDecay))
     suite.addTests(loader.loadTestsFromTestCase(TestPatternDetector))
     suite.addTests(loader.loadTestsFromTestCase(TestLearningEngine))
     suite.addTests(loader.loadTestsFromTestCase(TestKnowledgeGraph))
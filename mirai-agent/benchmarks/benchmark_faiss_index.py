@@ -0,0 +1,102 @@
+"""
+Benchmark FAISS Index Tiers
+Recall@k vs. query latency for Flat / IVF / IVF-PQ / HNSW on a synthetic corpus
+
+Usage:
+    python benchmarks/benchmark_faiss_index.py                 # 1M x 384, ~1.5 GB RAM
+    python benchmarks/benchmark_faiss_index.py --size 100000   # quick run
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.faiss_index import IndexPolicy, build_index, create_index, prepare_vectors, search_params
+
+
+def synthetic_corpus(size, dim, clusters=1000, seed=0):
+    """Clustered gaussian vectors, roughly like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((size, dim), dtype=np.float32)
+    step = 100_000
+    for start in range(0, size, step):
+        end = min(start + step, size)
+        labels = rng.integers(0, clusters, end - start)
+        vectors[start:end] = centers[labels] + 0.5 * rng.standard_normal((end - start, dim)).astype(np.float32)
+    queries = centers[rng.integers(0, clusters, 200)] + 0.5 * rng.standard_normal((200, dim)).astype(np.float32)
+    return vectors, queries.astype(np.float32)
+
+
+def recall_at_k(found, truth, k):
+    hits = sum(len(set(f[:k]) & set(t[:k])) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def time_queries(index, queries, k, params=None):
+    start = time.perf_counter()
+    ids = []
+    for q in queries:
+        q = q.reshape(1, -1)
+        _, found = index.search(q, k, params=params) if params is not None else index.search(q, k)
+        ids.append(found[0])
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return np.array(ids), elapsed_ms
+
+
+def benchmark_index_tiers(size=1_000_000, dim=384, k=10, metric="cosine"):
+    """Print a recall / latency table per tier and search setting"""
+    print(f"🏃 Generating {size} x {dim} synthetic corpus...")
+    vectors, queries = synthetic_corpus(size, dim)
+
+    flat_policy = IndexPolicy(metric=metric)
+    vectors = prepare_vectors(vectors, flat_policy)
+    queries = prepare_vectors(queries, flat_policy)
+
+    flat = create_index(flat_policy, dim, "flat")
+    flat.add(vectors)
+    truth, flat_ms = time_queries(flat, queries, k)
+
+    results = [("flat", "-", 0.0, 1.0, flat_ms)]
+    configs = [
+        ("ivf_flat", IndexPolicy(metric=metric, flat_max_vectors=0, ann_type="ivf_flat"), [1, 8, 32, 128]),
+        ("ivf_pq", IndexPolicy(metric=metric, flat_max_vectors=0, ann_type="ivf_flat", pq_min_vectors=1, pq_m=dim // 8), [8, 32, 128]),
+        ("hnsw", IndexPolicy(metric=metric, flat_max_vectors=0, ann_type="hnsw"), [16, 64, 256]),
+    ]
+    for name, policy, settings in configs:
+        print(f"🏗️ Building {name}...")
+        start = time.perf_counter()
+        index = build_index(policy, vectors)
+        build_s = time.perf_counter() - start
+        for value in settings:
+            if name == "hnsw":
+                params = search_params(index, ef_search=value)
+                label = f"efSearch={value}"
+            else:
+                params = search_params(index, nprobe=value)
+                label = f"nprobe={value}"
+            found, ms = time_queries(index, queries, k, params)
+            results.append((name, label, build_s, recall_at_k(found, truth, k), ms))
+
+    print(f"\n📊 Recall@{k} vs latency ({size} vectors, dim={dim}, metric={metric}):")
+    print(f"  {'index':10} {'setting':14} {'build_s':>8} {'recall':>7} {'ms/query':>9}")
+    for name, label, build_s, recall, ms in results:
+        print(f"  {name:10} {label:14} {build_s:8.1f} {recall:7.3f} {ms:9.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--metric", choices=["l2", "cosine"], default="cosine")
+    args = parser.parse_args()
+
+    print("🎯 Benchmarking FAISS Index Tiers\n" + "=" * 50)
+    benchmark_index_tiers(args.size, args.dim, args.k, args.metric)
+    print("\n✅ Benchmark complete!")
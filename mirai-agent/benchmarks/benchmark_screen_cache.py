@@ -0,0 +1,128 @@
+"""
+Benchmark Screen State Cache
+Replays a screenshot sequence and counts remote vision calls avoided
+
+Without arguments a synthetic desktop session is generated (clock ticks,
+blinking cursor, dialogs opening, app switches). Pass --frames-dir with
+recorded screenshots (sorted by name) to replay a real session.
+"""
+import argparse
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.screen_cache import HIT, PARTIAL, ScreenStateCache, crop
+
+
+def synthetic_session(frames=120, width=1920, height=1080, seed=0):
+    """Desktop-like frames: mostly static, with small and large changes"""
+    rng = np.random.default_rng(seed)
+
+    def desktop():
+        screen = np.empty((height, width, 3), dtype=np.uint8)
+        screen[:] = np.linspace(30, 90, width, dtype=np.uint8)[None, :, None]
+        screen[height - 40:] = 45  # taskbar
+        for _ in range(5):
+            x, y = rng.integers(0, width - 600), rng.integers(0, height - 500)
+            screen[y:y + 450, x:x + 560] = rng.integers(120, 250, 3)
+            screen[y:y + 30, x:x + 560] = rng.integers(0, 80, 3)  # title bar
+            for line in range(y + 50, y + 430, 18):  # text lines
+                length = int(rng.integers(100, 520))
+                screen[line:line + 8, x + 20:x + 20 + length] = 20
+        return screen
+
+    base = desktop()
+    dialog = None
+    for i in range(frames):
+        if i and i % 30 == 0:
+            base, dialog = desktop(), None  # app switch
+        elif i % 10 == 5:
+            dialog = (int(rng.integers(200, width - 700)), int(rng.integers(150, height - 500)))
+        elif i % 10 == 8:
+            dialog = None
+
+        frame = base.copy()
+        if dialog:
+            x, y = dialog
+            frame[y:y + 180, x:x + 360] = 235
+            frame[y:y + 28, x:x + 360] = 60
+        minute = i // 4  # clock in the tray
+        frame[height - 28:height - 12, width - 60 + (minute % 5) * 2:width - 50 + (minute % 5) * 2] = 230
+        if i % 2:
+            frame[400:418, 700:702] = 0  # blinking cursor
+        yield frame
+
+
+def recorded_session(frames_dir):
+    for path in sorted(Path(frames_dir).iterdir()):
+        if path.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp", ".bmp"):
+            with Image.open(path) as image:
+                yield np.asarray(image.convert("RGB"))
+
+
+def encoded_size(image):
+    buffer = BytesIO()
+    Image.fromarray(image).save(buffer, format="JPEG", quality=85)
+    return buffer.tell()
+
+
+def benchmark_screen_cache(frames, remote_latency):
+    cache = ScreenStateCache()
+    counts = {HIT: 0, PARTIAL: 0, "miss": 0}
+    hash_ms = []
+    bytes_baseline = bytes_sent = 0
+
+    for frame in frames:
+        start = time.perf_counter()
+        lookup = cache.lookup(frame)
+        hash_ms.append((time.perf_counter() - start) * 1000)
+        counts[lookup.status] += 1
+
+        full_bytes = encoded_size(frame)
+        bytes_baseline += full_bytes
+        if lookup.status == PARTIAL:
+            bytes_sent += encoded_size(np.ascontiguousarray(crop(frame, lookup.changed_region)))
+        elif lookup.status != HIT:
+            bytes_sent += full_bytes
+        if lookup.status != HIT:
+            cache.store(lookup.fingerprint, f"analysis #{len(hash_ms)}")
+
+    total = len(hash_ms)
+    calls = total - counts[HIT]
+    saved_s = counts[HIT] * remote_latency - sum(hash_ms) / 1000
+
+    print(f"\n📊 Screen cache over {total} frames:")
+    print(f"  Hits / partial / misses: {counts[HIT]} / {counts[PARTIAL]} / {counts['miss']}")
+    print(f"  Remote calls:  {calls} (baseline {total}, -{100 * (1 - calls / total):.0f}%)")
+    print(f"  Image bytes:   {bytes_sent / 1e6:.1f} MB (baseline {bytes_baseline / 1e6:.1f} MB)")
+    print(f"  Hashing:       {np.mean(hash_ms):.1f} ms/frame (p95 {np.percentile(hash_ms, 95):.1f} ms)")
+    print(f"  Latency saved: {saved_s:.1f}s at {remote_latency:.1f}s per remote call")
+    return {
+        "frames": total,
+        "remote_calls": calls,
+        "hits": counts[HIT],
+        "partial": counts[PARTIAL],
+        "bytes_sent": bytes_sent,
+        "bytes_baseline": bytes_baseline,
+        "hash_ms_mean": float(np.mean(hash_ms)),
+        "latency_saved_s": saved_s,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames-dir", help="directory with recorded screenshots")
+    parser.add_argument("--frames", type=int, default=120, help="synthetic session length")
+    parser.add_argument("--remote-latency", type=float, default=2.5, help="seconds per vision call")
+    args = parser.parse_args()
+
+    print("🎯 Benchmarking Screen State Cache\n" + "=" * 50)
+    frames = recorded_session(args.frames_dir) if args.frames_dir else synthetic_session(args.frames)
+    benchmark_screen_cache(frames, args.remote_latency)
+    print("\n✅ Benchmark complete!")
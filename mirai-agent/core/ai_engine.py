@@ -1,16 +1,13 @@
 """
 AI ENGINE - Единый интерфейс для всех AI моделей
-"""
 
-import asyncio
-from typing import Optional
+GPT-4 и Grok вызываются через общий асинхронный клиент (core.llm_client):
+пул соединений, объединение одинаковых запросов, потоковые ответы.
+"""
 
-import requests
+from typing import AsyncIterator, Dict, List, Optional
 
-try:  # pragma: no cover - optional dependency
-    from openai import OpenAI
-except ImportError:  # pragma: no cover
-    OpenAI = None
+from core.llm_client import StreamMetrics, shared_client
 
 # Import AI Tools
 try:
@@ -20,22 +17,35 @@ except ImportError:
     AI_TOOLS_AVAILABLE = False
     ai_tools = None
 
+SYSTEM_PROMPT = "You are Mirai, an autonomous AI agent."
+
+# model -> (имя модели у провайдера, провайдер)
+MODELS = {"gpt-4": ("gpt-4o-mini", "openai"), "grok": ("grok-beta", "grok")}
+
 
 class AIEngine:
     """Единый AI движок для GPT-4 и Grok с дополнительными инструментами"""
 
-    def __init__(self, openai_key: Optional[str] = None, grok_key: Optional[str] = None):
+    def __init__(
+        self,
+        openai_key: Optional[str] = None,
+        grok_key: Optional[str] = None,
+        openai_base_url: str = "https://api.openai.com/v1",
+        grok_base_url: str = "https://api.x.ai/v1",
+    ):
         self.openai_key = openai_key
         self.grok_key = grok_key
-        self._openai_client = None
         self.tools = ai_tools if AI_TOOLS_AVAILABLE else None
 
-        if openai_key and OpenAI:
-            try:
-                self._openai_client = OpenAI(api_key=openai_key)
-            except Exception as exc:  # pragma: no cover
-                self._openai_client = None
-                print(f"⚠️ Не удалось инициализировать OpenAI клиента: {exc}")
+        self._clients = {}
+        if openai_key:
+            self._clients["openai"] = shared_client(
+                openai_base_url, {"Authorization": f"Bearer {openai_key}"}, timeout=60
+            )
+        if grok_key:
+            self._clients["grok"] = shared_client(
+                grok_base_url, {"Authorization": f"Bearer {grok_key}"}, timeout=30
+            )
 
     async def think(
         self,
@@ -54,73 +64,80 @@ class AIEngine:
             max_tokens: Макс длина ответа
         """
 
-        # Авто-выбор модели - используем только GPT-4
-        if model == "auto":
-            model = "gpt-4" if self._openai_client else "grok"
-
-        if model == "gpt-4" and not self._openai_client:
-            return "AI (OpenAI) не настроен"
-
-        if model == "grok" and not self.grok_key:
-            return "AI (Grok) не настроен"
+        model = self._resolve_model(model)
+        if model not in MODELS:
+            return f"AI модель {model} недоступна"
+        if MODELS[model][1] not in self._clients:
+            return f"AI ({'OpenAI' if model == 'gpt-4' else 'Grok'}) не настроен"
 
         try:
-            if model == "gpt-4" and self._openai_client:
+            if model == "gpt-4":
                 return await self._call_gpt4(prompt, temperature, max_tokens)
-
-            if model == "grok" and self.grok_key:
-                return await self._call_grok(prompt, temperature, max_tokens)
-
-            return f"AI модель {model} недоступна"
+            return await self._call_grok(prompt, temperature, max_tokens)
 
         except Exception as exc:  # pragma: no cover - просто вернуть текст
             return f"AI Engine error: {exc}"
 
-    async def _call_gpt4(self, prompt: str, temp: float, tokens: int) -> str:
-        """GPT-4 (via OpenAI>=1.0 client)."""
-
-        def _request():
-            completion = self._openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are Mirai, an autonomous AI agent."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=temp,
-                max_tokens=tokens,
-            )
-            return completion.choices[0].message.content
+    async def stream(
+        self,
+        prompt: str,
+        model: str = "auto",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        metrics: Optional[StreamMetrics] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый think(): дельты ответа по мере генерации
 
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, _request)
+        Args:
+            metrics: Заполняется временем до первого токена и т.п.
+        """
+        model = self._resolve_model(model)
+        if model not in MODELS or MODELS[model][1] not in self._clients:
+            raise RuntimeError(f"AI модель {model} недоступна")
+
+        name, provider = MODELS[model]
+        payload = self._payload(name, prompt, temperature, max_tokens)
+        payload["stream"] = True
+        async for delta in self._clients[provider].stream(
+            "/chat/completions",
+            payload,
+            lambda chunk: (chunk.get("choices") or [{}])[0].get("delta", {}).get("content"),
+            sse=True,
+            metrics=metrics,
+        ):
+            yield delta
+
+    async def aclose(self):
+        """Закрыть пулы соединений провайдеров в текущем event loop"""
+        for client in self._clients.values():
+            await client.aclose()
+
+    def _resolve_model(self, model: str) -> str:
+        # Авто-выбор модели - используем GPT-4, если настроен
+        if model == "auto":
+            return "gpt-4" if "openai" in self._clients else "grok"
+        return model
+
+    @staticmethod
+    def _payload(name: str, prompt: str, temp: float, tokens: int) -> Dict:
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+        return {"model": name, "messages": messages, "temperature": temp, "max_tokens": tokens}
+
+    async def _complete(self, model: str, prompt: str, temp: float, tokens: int) -> str:
+        name, provider = MODELS[model]
+        result = await self._clients[provider].post_json(
+            "/chat/completions", self._payload(name, prompt, temp, tokens)
+        )
+        return result["choices"][0]["message"]["content"]
+
+    async def _call_gpt4(self, prompt: str, temp: float, tokens: int) -> str:
+        """GPT-4 (OpenAI chat completions)"""
+        return await self._complete("gpt-4", prompt, temp, tokens)
 
     async def _call_grok(self, prompt: str, temp: float, tokens: int) -> str:
         """Grok"""
-
-        loop = asyncio.get_running_loop()
-
-        def _request():
-            response = requests.post(
-                "https://api.x.ai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.grok_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "grok-beta",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are Mirai, an autonomous AI agent.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": temp,
-                    "max_tokens": tokens,
-                },
-                timeout=30,
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-
-        return await loop.run_in_executor(None, _request)
+        return await self._complete("grok", prompt, temp, tokens)
@@ -16,6 +16,7 @@ import json
 import logging
 import os
 import subprocess
+import time
 from contextlib import nullcontext
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -24,6 +25,9 @@ import requests
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from core.response_cache import get_response_cache
+from core.tool_scheduler import ToolCall, ToolScheduler, ToolSpec
+
 try:
     from utils.performance_tracker import performance_tracker
 except Exception:  # pragma: no cover - metrics should not block execution
@@ -42,6 +46,21 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Политики выполнения инструментов: независимые вызовы из одного ответа
+# модели выполняются параллельно, инструменты с побочными эффектами - по одному
+TOOL_SPECS = {
+    "search_web": ToolSpec(serial=False, timeout=30),
+    "read_file": ToolSpec(serial=False, timeout=10),
+    "execute_python": ToolSpec(serial=True, timeout=45),
+    "write_file": ToolSpec(serial=True, timeout=10),
+    "run_command": ToolSpec(serial=True, timeout=45),
+    "create_task": ToolSpec(serial=True, timeout=5),
+    "execute_code": ToolSpec(serial=True, timeout=90),
+    "database_query": ToolSpec(serial=True, timeout=60),
+    "github_action": ToolSpec(serial=True, timeout=30),
+    "desktop_control": ToolSpec(serial=True, timeout=180),
+}
+
 
 class AutonomousAgent:
     """Автономный AI агент с реальными возможностями"""
@@ -101,6 +120,12 @@ class AutonomousAgent:
             self.has_advanced_features = False
         self.tasks = []  # Список задач
         self.working_dir = "/root/mirai/mirai-agent"
+        self.tool_scheduler = ToolScheduler(self.execute_tool, TOOL_SPECS, max_workers=4)
+        self.response_cache = get_response_cache()  # None - кэш ответов LLM отключён
+        # None - температура модели по умолчанию (ответы think() не кэшируются),
+        # 0 - детерминированные ответы, повторные запросы берутся из кэша
+        self.think_temperature: Optional[float] = None
+        self.iteration_timings = []  # Время каждой итерации think()
 
         # Инструменты агента
         self.tools = [
@@ -658,6 +683,14 @@ class AutonomousAgent:
             logger.error(f"❌ Desktop control error: {e}")
             return f"❌ Ошибка управления компьютером: {str(e)}"
 
+    def _complete(self, caller: str, call, messages, tools=None, temperature=None, near=True):
+        """Запрос к модели через кэш ответов (если включён)"""
+        if self.response_cache is None:
+            return call()
+        return self.response_cache.cached_call(
+            caller, call, self.model, messages, tools=tools, temperature=temperature, near=near
+        )
+
     def _track(self, operation: str, metadata: Optional[Dict[str, Any]] = None):
         """Return a performance tracking context manager if metrics are enabled."""
         if self._metrics_enabled:
@@ -716,9 +749,11 @@ class AutonomousAgent:
 
         final_response = ""
         total_tokens = 0
+        self.iteration_timings = []
 
         for iteration in range(max_iterations):
             logger.info(f"🤔 Итерация {iteration + 1}/{max_iterations}")
+            iteration_start = time.perf_counter()
 
             try:
                 # Запрос к GPT-4 с инструментами
@@ -726,12 +761,22 @@ class AutonomousAgent:
                     "think_completion",
                     {"iteration": str(iteration + 1), "message_count": str(len(messages))},
                 ):
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=messages,
+                    sampling = {} if self.think_temperature is None else {"temperature": self.think_temperature}
+                    response = self._complete(
+                        "autonomous_agent.think",
+                        lambda: self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            tools=self.tools,
+                            tool_choice="auto",
+                            **sampling,
+                        ),
+                        messages,
                         tools=self.tools,
-                        tool_choice="auto",
+                        temperature=self.think_temperature,
+                        near=False,  # вызовы инструментов привязаны к точному тексту запроса
                     )
+                completion_time = time.perf_counter() - iteration_start
 
                 response_message = response.choices[0].message
                 messages.append(response_message)
@@ -742,6 +787,7 @@ class AutonomousAgent:
 
                 # Если нет вызовов инструментов - агент закончил
                 if not response_message.tool_calls:
+                    self._record_iteration(iteration + 1, completion_time, [], 0.0)
                     final_response = response_message.content or ""
                     logger.info("✅ Агент завершил работу")
 
@@ -761,28 +807,36 @@ class AutonomousAgent:
 
                     return final_response
 
-                # Выполняем вызовы инструментов
+                # Выполняем вызовы инструментов (независимые - параллельно)
+                calls = []
                 for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-
-                    logger.info(f"🔧 Вызов инструмента: {function_name}")
-                    logger.info(f"   Аргументы: {function_args}")
-
-                    # Выполняем инструмент
-                    function_response = self.execute_tool(function_name, function_args)
+                    calls.append(
+                        ToolCall(
+                            tool_call.id,
+                            tool_call.function.name,
+                            json.loads(tool_call.function.arguments),
+                        )
+                    )
+                    logger.info(f"🔧 Вызов инструмента: {calls[-1].name}")
+                    logger.info(f"   Аргументы: {calls[-1].arguments}")
 
-                    logger.info(f"📤 Результат: {function_response[:200]}...")
+                tools_start = time.perf_counter()
+                with self._track("think_tools", {"iteration": str(iteration + 1), "tool_calls": str(len(calls))}):
+                    results = self.tool_scheduler.run(calls)
+                tools_time = time.perf_counter() - tools_start
 
-                    # Добавляем результат в сообщения
+                # Добавляем результаты в сообщения в порядке tool_calls
+                for result in results:
+                    logger.info(f"📤 Результат {result.name} ({result.duration:.2f}s): {result.content[:200]}...")
                     messages.append(
                         {
-                            "tool_call_id": tool_call.id,
+                            "tool_call_id": result.id,
                             "role": "tool",
-                            "name": function_name,
-                            "content": function_response,
+                            "name": result.name,
+                            "content": result.content,
                         }
                     )
+                self._record_iteration(iteration + 1, completion_time, results, tools_time)
 
             except Exception as e:
                 error_msg = f"❌ Ошибка на итерации {iteration + 1}: {str(e)}"
@@ -791,6 +845,25 @@ class AutonomousAgent:
 
         return "⚠️ Достигнут лимит итераций. Агент остановлен."
 
+    def _record_iteration(self, iteration: int, completion_time: float, results, tools_time: float):
+        """Сохранить и залогировать время итерации think()"""
+        sequential = sum(result.duration for result in results)
+        timing = {
+            "iteration": iteration,
+            "completion_s": round(completion_time, 4),
+            "tools_s": round(tools_time, 4),
+            "tools_sequential_s": round(sequential, 4),
+            "tool_calls": len(results),
+            "total_s": round(completion_time + tools_time, 4),
+        }
+        self.iteration_timings.append(timing)
+        if results:
+            logger.info(
+                f"⏱️ Итерация {iteration}: {timing['total_s']:.2f}s "
+                f"(модель {completion_time:.2f}s, инструменты {tools_time:.2f}s "
+                f"вместо {sequential:.2f}s последовательно, вызовов: {len(results)})"
+            )
+
     def autonomous_loop(self, initial_goal: str = None):
         """Автономный цикл работы агента"""
         print("🚀 MIRAI Autonomous Agent запущен!")
@@ -0,0 +1,276 @@
+"""
+MIRAI Capabilities
+Ленивая загрузка модулей агента и профилирование старта
+
+- LazyCapability: модуль импортируется и создаётся при первом обращении
+  (атрибуты проксируются на настоящий объект)
+- Доступность проверяется дёшево: find_spec зависимостей, без импорта
+- CapabilityRegistry: фоновый прогрев самых используемых модулей,
+  статистика использования сохраняется между запусками
+- StartupProfiler: время импорта и инициализации по каждому модулю
+"""
+
+import importlib
+import importlib.util
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Время импорта и инициализации по этапам старта"""
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, **timings: float):
+        with self._lock:
+            entry = self.records.setdefault(name, {"import_s": 0.0, "init_s": 0.0, "modules": 0})
+            for key, value in timings.items():
+                entry[key] = entry.get(key, 0.0) + value
+
+    def stage(self, name: str) -> "_Stage":
+        """Контекстный менеджер: время этапа записывается как init_s"""
+        return _Stage(self, name)
+
+    def report(self) -> str:
+        with self._lock:
+            rows = sorted(self.records.items(), key=lambda item: -(item[1]["import_s"] + item[1]["init_s"]))
+        total = sum(r["import_s"] + r["init_s"] for _, r in rows)
+        lines = [
+            f"{'module':<24}{'import, ms':>12}{'init, ms':>12}{'total, ms':>12}{'new modules':>13}",
+            "-" * 73,
+        ]
+        for name, r in rows:
+            lines.append(
+                f"{name:<24}{r['import_s'] * 1000:>12.1f}{r['init_s'] * 1000:>12.1f}"
+                f"{(r['import_s'] + r['init_s']) * 1000:>12.1f}{int(r['modules']):>13}"
+            )
+        lines.append("-" * 73)
+        lines.append(f"{'total':<24}{'':>24}{total * 1000:>12.1f}")
+        return "\n".join(lines)
+
+    def print_report(self):
+        print("\n⏱️ Startup breakdown:")
+        print(self.report())
+
+
+class _Stage:
+    def __init__(self, profiler: StartupProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.modules = len(sys.modules)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(
+            self.name, init_s=time.perf_counter() - self.start, modules=len(sys.modules) - self.modules
+        )
+        return False
+
+
+class LazyCapability:
+    """
+    Модуль агента, загружаемый при первом использовании
+
+    Args:
+        name: Имя возможности (desktop, browser, ...)
+        module: Модуль для импорта
+        factory: module -> объект возможности (None - недоступна)
+        requires: Внешние пакеты, без которых возможность недоступна
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        factory: Callable[[Any], Any],
+        requires: Sequence[str] = (),
+        profiler: Optional[StartupProfiler] = None,
+        on_use: Optional[Callable[[str], None]] = None,
+    ):
+        self.name = name
+        self.module = module
+        self.factory = factory
+        self.requires = tuple(requires)
+        self.profiler = profiler
+        self.on_use = on_use
+
+        self._instance = None
+        self._loaded = False
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._missing = [package for package in self.requires if not _installed(package)]
+
+    @property
+    def available(self) -> bool:
+        """Можно ли использовать (без загрузки модуля)"""
+        if self._loaded:
+            return self._instance is not None
+        return not self._missing and self._error is None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def error(self) -> Optional[str]:
+        if self._missing:
+            return f"не установлено: {', '.join(self._missing)}"
+        return self._error
+
+    def get(self, count_use: bool = True) -> Any:
+        """Настоящий объект (загружается при первом вызове); None, если недоступен"""
+        if count_use and self.on_use is not None:
+            self.on_use(self.name)
+        if self._loaded:
+            return self._instance
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        return self._instance
+
+    def _load(self):
+        if self._missing:
+            logger.info(f"ℹ️ {self.name}: {self.error}")
+            self._loaded = True
+            return
+
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        imported = None
+        try:
+            module = importlib.import_module(self.module)
+            imported = time.perf_counter()
+            self._instance = self.factory(module)
+            if self._instance is None:
+                self._error = "отключено модулем"
+            else:
+                logger.info(f"✅ {self.name} загружен ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        except Exception as e:
+            self._error = str(e)
+            logger.warning(f"⚠️ {self.name} недоступен: {e}")
+        finally:
+            imported = imported or time.perf_counter()
+            if self.profiler is not None:
+                self.profiler.record(
+                    self.name,
+                    import_s=imported - start,
+                    init_s=time.perf_counter() - imported,
+                    modules=len(sys.modules) - modules_before,
+                )
+            self._loaded = True
+
+    def __getattr__(self, attr: str) -> Any:
+        # Вызывается только для атрибутов, которых нет у самого прокси
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        instance = self.get()
+        if instance is None:
+            raise RuntimeError(f"{self.name} недоступен: {self.error}")
+        return getattr(instance, attr)
+
+    def __bool__(self) -> bool:
+        return self.available
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._loaded else "lazy"
+        return f"<LazyCapability {self.name} ({state}, available={self.available})>"
+
+
+def _installed(package: str) -> bool:
+    if package in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(package) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class CapabilityRegistry:
+    """
+    Набор ленивых возможностей агента
+
+    Args:
+        usage_path: JSON со статистикой использования (для прогрева)
+    """
+
+    def __init__(self, usage_path: Optional[Path] = None, profiler: Optional[StartupProfiler] = None):
+        self.capabilities: Dict[str, LazyCapability] = {}
+        self.profiler = profiler or StartupProfiler()
+        self.usage_path = usage_path
+        self.usage: Counter = Counter()
+        self._lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        if usage_path is not None and usage_path.exists():
+            try:
+                self.usage.update(json.loads(usage_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Не удалось прочитать статистику возможностей: {e}")
+
+    def register(
+        self, name: str, module: str, factory: Callable[[Any], Any], requires: Sequence[str] = ()
+    ) -> LazyCapability:
+        capability = LazyCapability(name, module, factory, requires, self.profiler, self._record_use)
+        self.capabilities[name] = capability
+        return capability
+
+    def __getitem__(self, name: str) -> LazyCapability:
+        return self.capabilities[name]
+
+    def _record_use(self, name: str):
+        with self._lock:
+            self.usage[name] += 1
+
+    def most_used(self, count: int = 2) -> List[str]:
+        with self._lock:
+            ranked = [name for name, _ in self.usage.most_common() if name in self.capabilities]
+        return [name for name in ranked if self.capabilities[name].available][:count]
+
+    def warm_up(self, names: Sequence[str], background: bool = True):
+        """Загрузить возможности заранее (по умолчанию в фоновом потоке)"""
+        names = [name for name in names if name in self.capabilities]
+        if not names:
+            return
+
+        def load():
+            for name in names:
+                self.capabilities[name].get(count_use=False)
+
+        if background:
+            self._warmup_thread = threading.Thread(target=load, name="capability-warmup", daemon=True)
+            self._warmup_thread.start()
+        else:
+            load()
+
+    def wait_warm_up(self, timeout: Optional[float] = None):
+        if self._warmup_thread is not None:
+            self._warmup_thread.join(timeout)
+
+    def save_usage(self):
+        if self.usage_path is None:
+            return
+        try:
+            self.usage_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                data = dict(self.usage)
+            self.usage_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"⚠️ Не удалось сохранить статистику возможностей: {e}")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"available": c.available, "loaded": c.loaded, "error": c.error}
+            for name, c in self.capabilities.items()
+        }
@@ -0,0 +1,245 @@
+"""
+MIRAI Compile Cache
+Content-addressed cache of compiled artifacts for MultiLanguageExecutor
+
+- key = sha256(language, source, compiler version, flags)
+- artifacts live on disk, size-bounded, least recently used evicted first
+- concurrent requests for the same key share one compilation
+- artifacts are published with an atomic rename, so a crash or a second
+  process never sees a half-written binary
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CompileCache:
+    """
+    On-disk LRU cache of compiled artifacts
+
+    Args:
+        root: Cache directory
+        max_bytes: Total artifact size before LRU eviction kicks in
+    """
+
+    def __init__(self, root, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        # key -> {"size": bytes, "compile_seconds": float}, oldest use first
+        self._index: "OrderedDict[str, Dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._versions: Dict[str, str] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # waited for an in-flight compile of the same key
+        self.evictions = 0
+        self.saved_compile_seconds = 0.0
+        self.compile_seconds = 0.0
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def compiler_version(self, compiler: str, args: Optional[List[str]] = None) -> str:
+        """First line of `compiler --version`, memoized per process"""
+        args = args or ["--version"]
+        cache_key = " ".join([compiler] + args)
+        version = self._versions.get(cache_key)
+        if version is None:
+            try:
+                result = subprocess.run(
+                    [compiler] + args, capture_output=True, text=True, timeout=10
+                )
+                output = (result.stdout or result.stderr).strip()
+                version = output.splitlines()[0] if output else "unknown"
+            except Exception:
+                version = "unknown"
+            self._versions[cache_key] = version
+        return version
+
+    @staticmethod
+    def key(language: str, source: str, compiler_version: str, flags: List[str]) -> str:
+        digest = hashlib.sha256()
+        for part in (language, compiler_version, "\0".join(flags), source):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0\0")
+        return digest.hexdigest()
+
+    def _artifact_path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    # ------------------------------------------------------------------
+    # Lookup / build
+    # ------------------------------------------------------------------
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Cached artifact path (marked as recently used), or None"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = self._artifact_path(key)
+            if not path.exists():
+                self._drop(key)
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            self.saved_compile_seconds += entry["compile_seconds"]
+        try:
+            os.utime(path)  # LRU order survives restarts
+        except OSError:
+            pass
+        return path
+
+    async def get_or_build(
+        self, key: str, builder: Callable[[str], Awaitable[Dict]]
+    ) -> Tuple[Optional[Path], Optional[Dict]]:
+        """
+        Return (artifact, compile_result)
+
+        On a hit compile_result is None. On a miss builder(output_path) must
+        compile into output_path and return a dict with "success"; failed
+        builds are not cached and yield (None, compile_result).
+        """
+        path = self.lookup(key)
+        if path is not None:
+            return path, None
+
+        loop = asyncio.get_running_loop()
+        pending = self._in_flight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            self.shared += 1
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        self._in_flight[key] = future
+        try:
+            with self._lock:
+                self.misses += 1
+            outcome = await self._build(key, builder)
+            future.set_result(outcome)
+            return outcome
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # nobody may be waiting
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    async def _build(self, key: str, builder) -> Tuple[Optional[Path], Dict]:
+        final_path = self._artifact_path(key)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = final_path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+
+        start = time.perf_counter()
+        try:
+            result = await builder(str(tmp_path))
+            elapsed = time.perf_counter() - start
+            if not result.get("success") or not tmp_path.exists():
+                return None, result
+
+            os.replace(tmp_path, final_path)
+            meta = {"compile_seconds": elapsed, "created_at": time.time()}
+            final_path.with_suffix(".json").write_text(json.dumps(meta))
+            self._add(key, final_path.stat().st_size, elapsed)
+            return final_path, result
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    # ------------------------------------------------------------------
+    # Index and eviction
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Rebuild the index from disk, oldest mtime first"""
+        entries = []
+        for meta_path in self.root.glob("*/*.json"):
+            artifact = meta_path.with_suffix("")
+            try:
+                stat = artifact.stat()
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            entries.append((stat.st_mtime, artifact.name, stat.st_size, meta))
+        for stale in self.root.glob("*/*.tmp"):
+            stale.unlink(missing_ok=True)
+
+        with self._lock:
+            for _, key, size, meta in sorted(entries):
+                self._index[key] = {
+                    "size": size,
+                    "compile_seconds": float(meta.get("compile_seconds", 0.0)),
+                }
+                self._total_bytes += size
+            self._evict()
+
+    def _add(self, key: str, size: int, compile_seconds: float):
+        with self._lock:
+            if key in self._index:
+                self._total_bytes -= self._index[key]["size"]
+            self._index[key] = {"size": size, "compile_seconds": compile_seconds}
+            self._total_bytes += size
+            self.compile_seconds += compile_seconds
+            self._evict()
+
+    def _drop(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry["size"]
+        path = self._artifact_path(key)
+        for target in (path, path.with_suffix(".json")):
+            try:
+                target.unlink()
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used artifacts until under max_bytes (lock held)"""
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key = next(iter(self._index))
+            self._drop(key)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._drop(key)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.shared
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_builds": self.shared,
+                "hit_rate": (self.hits + self.shared) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "compile_seconds": round(self.compile_seconds, 3),
+                "saved_compile_seconds": round(self.saved_compile_seconds, 3),
+            }
@@ -0,0 +1,182 @@
+"""
+MIRAI Context Packer
+Token-budgeted packing of retrieved chunks into an LLM context
+
+Shared by FAISSRAGSystem and MiraiRAG:
+- uses token counts stored at ingestion (no tokenizer on the query path)
+- greedy knapsack: an oversized chunk is skipped, smaller ones still fit
+- exact duplicates are dropped, adjacent chunks of one source are merged
+  with their overlapping text removed
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+MIN_TEXT_OVERLAP = 8  # shorter suffix/prefix matches are treated as coincidence
+
+
+@dataclass
+class ContextChunk:
+    """One retrieval candidate"""
+
+    text: str
+    tokens: int
+    source: str = "unknown"
+    chunk_index: Optional[int] = None
+    score: float = 0.0
+    metadata: Dict = field(default_factory=dict)
+
+
+@dataclass
+class ContextPack:
+    """Result of packing: rendered parts plus accounting"""
+
+    chunks: List[ContextChunk]
+    parts: List[str]
+    total_tokens: int
+    max_tokens: int
+    skipped: int = 0
+    deduplicated: int = 0
+    separator: str = "\n\n---\n\n"
+
+    @property
+    def text(self) -> str:
+        return self.separator.join(self.parts)
+
+    def to_dict(self) -> Dict:
+        return {
+            "chunks": len(self.chunks),
+            "parts": len(self.parts),
+            "total_tokens": self.total_tokens,
+            "max_tokens": self.max_tokens,
+            "skipped": self.skipped,
+            "deduplicated": self.deduplicated,
+        }
+
+
+def text_overlap(previous: str, following: str, max_chars: int = 4000) -> int:
+    """Length of the longest suffix of previous that is a prefix of following"""
+    limit = min(len(previous), len(following), max_chars)
+    for size in range(limit, MIN_TEXT_OVERLAP - 1, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+class ContextPacker:
+    """
+    Greedy, token-budgeted context packer
+
+    Args:
+        max_tokens: Token budget for the packed context
+        max_chunks: Optional cap on the number of chunks
+        overlap_tokens: Tokens shared by consecutive chunks of one source,
+                        refunded when both are packed and their texts
+                        actually overlap; 0 keeps the budget a strict
+                        upper bound
+        source_format: Format of each rendered part ({source}, {text}), or None
+        separator: Join string between parts
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        max_chunks: Optional[int] = None,
+        overlap_tokens: int = 0,
+        source_format: Optional[str] = "[Source: {source}]\n{text}",
+        separator: str = "\n\n---\n\n",
+    ):
+        self.max_tokens = max_tokens
+        self.max_chunks = max_chunks
+        self.overlap_tokens = overlap_tokens
+        self.source_format = source_format
+        self.separator = separator
+
+    def pack(self, candidates: Iterable[ContextChunk]) -> ContextPack:
+        """Select chunks in score order under the budget and render them"""
+        ranked = sorted(candidates, key=lambda c: c.score, reverse=True)
+
+        selected: List[ContextChunk] = []
+        positions: Dict = {}  # (source, chunk_index) -> packed chunk
+        seen_texts = set()
+        total = 0
+        skipped = 0
+        deduplicated = 0
+
+        for chunk in ranked:
+            if self.max_chunks is not None and len(selected) >= self.max_chunks:
+                break
+
+            if chunk.text in seen_texts:
+                deduplicated += 1
+                continue
+
+            cost = chunk.tokens
+            if chunk.chunk_index is not None and self.overlap_tokens:
+                previous = positions.get((chunk.source, chunk.chunk_index - 1))
+                following = positions.get((chunk.source, chunk.chunk_index + 1))
+                shared = (previous is not None and text_overlap(previous.text, chunk.text) > 0) + (
+                    following is not None and text_overlap(chunk.text, following.text) > 0
+                )
+                cost = max(0, cost - shared * self.overlap_tokens)
+
+            if total + cost > self.max_tokens:
+                skipped += 1  # too big for what's left; smaller chunks may still fit
+                continue
+
+            selected.append(chunk)
+            seen_texts.add(chunk.text)
+            if chunk.chunk_index is not None:
+                positions[(chunk.source, chunk.chunk_index)] = chunk
+            total += cost
+
+        parts, merged = self._render(selected)
+        return ContextPack(
+            chunks=selected,
+            parts=parts,
+            total_tokens=total,
+            max_tokens=self.max_tokens,
+            skipped=skipped,
+            deduplicated=deduplicated + merged,
+            separator=self.separator,
+        )
+
+    def _render(self, selected: List[ContextChunk]):
+        """Merge runs of consecutive chunks per source, best source first"""
+        groups: Dict[str, List[ContextChunk]] = {}
+        for chunk in selected:  # already in score order
+            groups.setdefault(chunk.source, []).append(chunk)
+
+        parts = []
+        merged = 0
+        for source, chunks in groups.items():
+            indexed = sorted(
+                (c for c in chunks if c.chunk_index is not None), key=lambda c: c.chunk_index
+            )
+            runs: List[List[ContextChunk]] = []
+            for chunk in indexed:
+                if runs and runs[-1][-1].chunk_index + 1 == chunk.chunk_index:
+                    runs[-1].append(chunk)
+                else:
+                    runs.append([chunk])
+            runs.extend([c] for c in chunks if c.chunk_index is None)
+
+            for run in runs:
+                text = run[0].text
+                for chunk in run[1:]:
+                    overlap = text_overlap(text, chunk.text)
+                    if overlap:
+                        merged += 1
+                    text += chunk.text[overlap:] if overlap else "\n" + chunk.text
+                if self.source_format:
+                    parts.append(self.source_format.format(source=source, text=text))
+                else:
+                    parts.append(text)
+        return parts, merged
+
+
+def pack_context(
+    candidates: Iterable[ContextChunk], max_tokens: int, **kwargs
+) -> ContextPack:
+    """Convenience wrapper around ContextPacker(max_tokens, **kwargs).pack()"""
+    return ContextPacker(max_tokens, **kwargs).pack(candidates)
@@ -32,12 +32,15 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-import cv2
-import numpy as np
 import pyautogui
 from openai import OpenAI
 from PIL import Image, ImageGrab
 
+from core.frame_buffer import DiskSink, Frame, FrameBuffer, mime_type
+from core.ocr_index import OCRIndex
+from core.screen_cache import HIT, PARTIAL, ScreenStateCache
+from core.template_matcher import TemplateMatcher
+
 # OCR
 try:
     import pytesseract
@@ -203,7 +206,10 @@ class MiraiDesktopAgent:
         enable_safety: bool = True,
         enable_memory: bool = True,
         screenshots_dir: str = "screenshots",
-        user_id: str = "desktop_user"
+        user_id: str = "desktop_user",
+        save_screenshots: bool = False,
+        vision_format: str = "JPEG",
+        vision_max_bytes: int = 400_000
     ):
         """
         Инициализация Desktop Agent
@@ -214,6 +220,9 @@ class MiraiDesktopAgent:
             enable_memory: Включить долговременную память
             screenshots_dir: Директория для скриншотов
             user_id: ID пользователя для memory system
+            save_screenshots: Сохранять кадры на диск (асинхронно, в фоне)
+            vision_format: Формат изображений для Vision (JPEG / WEBP)
+            vision_max_bytes: Бюджет размера изображения для Vision, байт
         """
         logger.info("🚀 Инициализация MIRAI Desktop Agent V2...")
         
@@ -227,9 +236,11 @@ class MiraiDesktopAgent:
         self.enable_memory = enable_memory
         self.user_id = user_id
         
-        # Директория для скриншотов
+        # Кадры экрана живут в памяти; диск - только опциональный sink
         self.screenshots_dir = Path(screenshots_dir)
-        self.screenshots_dir.mkdir(exist_ok=True, parents=True)
+        self.frames = FrameBuffer(sink=DiskSink(screenshots_dir) if save_screenshots else None)
+        self.vision_format = vision_format
+        self.vision_max_bytes = vision_max_bytes
         
         # Информация о системе
         self.os_type = platform.system()
@@ -255,6 +266,15 @@ class MiraiDesktopAgent:
         self.action_history: List[DesktopAction] = []
         self.last_screenshot_path: Optional[str] = None
         
+        # Инкрементальный OCR экрана с индексом слов
+        self.ocr_index = OCRIndex() if OCR_AVAILABLE else None
+        
+        # Поиск UI-элементов по шаблонам (пирамиды, ROI, прошлые положения)
+        self.template_matcher = TemplateMatcher()
+        
+        # Кэш Vision анализа по перцептивным хэшам экрана
+        self.screen_cache = ScreenStateCache()
+        
         # Счетчики для rate limiting
         self._action_timestamps: Dict[str, List[float]] = {
             "click": [],
@@ -395,7 +415,8 @@ class MiraiDesktopAgent:
                     "parameters": {
                         "type": "object",
                         "properties": {
-                            "image_path": {"type": "string", "description": "Путь к изображению-шаблону"}
+                            "image_path": {"type": "string", "description": "Путь к изображению-шаблону"},
+                            "window_title": {"type": "string", "description": "Искать только в окне с этим заголовком (опционально)"}
                         },
                         "required": ["image_path"]
                     }
@@ -533,6 +554,7 @@ class MiraiDesktopAgent:
             
             # Выполнить клик
             pyautogui.click(x, y, clicks=clicks, button=button)
+            self.frames.invalidate()
             
             duration = time.time() - start_time
             result = f"✅ Клик {button} в ({x}, {y}) x{clicks}"
@@ -558,6 +580,7 @@ class MiraiDesktopAgent:
             
             # Напечатать
             pyautogui.write(text, interval=interval)
+            self.frames.invalidate()
             
             duration = time.time() - start_time
             result = f"✅ Напечатан текст ({len(text)} символов)"
@@ -589,6 +612,7 @@ class MiraiDesktopAgent:
                 pyautogui.press(key_list[0])
             else:
                 pyautogui.hotkey(*key_list)
+            self.frames.invalidate()
             
             duration = time.time() - start_time
             result = f"✅ Нажата клавиша: {keys}"
@@ -605,6 +629,7 @@ class MiraiDesktopAgent:
         """Переместить курсор"""
         try:
             pyautogui.moveTo(x, y, duration=duration)
+            self.frames.invalidate()  # hover меняет экран
             return f"✅ Курсор перемещен в ({x}, {y})"
         except Exception as e:
             return f"❌ Ошибка: {e}"
@@ -621,6 +646,7 @@ class MiraiDesktopAgent:
         """Подождать"""
         try:
             time.sleep(seconds)
+            self.frames.invalidate()  # ждём как раз изменения экрана
             return f"✅ Ожидание {seconds}с завершено"
         except Exception as e:
             return f"❌ Ошибка: {e}"
@@ -638,29 +664,26 @@ class MiraiDesktopAgent:
             if not self._check_rate_limit("screenshot", SafetyLimits.MAX_SCREENSHOTS_PER_MINUTE):
                 return "❌ Превышен лимит скриншотов в минуту"
             
-            # Имя файла
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_{timestamp}.png"
-            filepath = self.screenshots_dir / filename
-            
-            # Сделать скриншот
+            # Сделать скриншот (в буфер кадров, без записи на диск)
             if region == "full":
-                screenshot = pyautogui.screenshot()
+                frame = self.frames.capture()
             else:
                 # Парсим регион: "x,y,width,height"
                 parts = [int(p.strip()) for p in region.split(',')]
                 if len(parts) != 4:
                     return "❌ Неверный формат региона. Используйте: x,y,width,height"
-                screenshot = pyautogui.screenshot(region=tuple(parts))
+                frame = self.frames.capture(region=tuple(parts))
             
-            # Сохранить
-            screenshot.save(filepath)
-            self.last_screenshot_path = str(filepath)
+            # Путь есть, только если включено сохранение на диск
+            self.last_screenshot_path = frame.path
             
             duration = time.time() - start_time
-            result = f"✅ Скриншот: {filepath.name}"
+            width, height = frame.size
+            result = f"✅ Скриншот: {width}x{height}"
+            if frame.path:
+                result += f" ({Path(frame.path).name})"
             
-            self._log_action("screenshot", {"region": region}, result, duration, str(filepath))
+            self._log_action("screenshot", {"region": region}, result, duration, frame.path)
             
             return result
             
@@ -669,39 +692,41 @@ class MiraiDesktopAgent:
             return f"❌ Ошибка: {e}"
     
     def analyze_screenshot(self, question: str) -> str:
-        """Анализ скриншота через GPT-4 Vision"""
+        """
+        Анализ скриншота через GPT-4 Vision
+        
+        Если экран визуально не изменился с прошлого вопроса - ответ из кэша;
+        если изменилась небольшая область - в модель уходит только она.
+        """
         try:
-            if not self.last_screenshot_path:
+            frame = self.frames.latest()
+            if frame is None:
                 return "❌ Нет скриншота. Сначала сделай скриншот (take_screenshot)"
             
-            # Загрузить изображение
-            with open(self.last_screenshot_path, "rb") as img_file:
-                img_data = base64.b64encode(img_file.read()).decode()
+            fingerprint = frame.memo("fingerprint", lambda f: self.screen_cache.fingerprint(f.image()))
+            lookup = self.screen_cache.lookup(fingerprint, key=question)
+            if lookup.status == HIT:
+                analysis = lookup.analysis
+            elif lookup.status == PARTIAL:
+                x, y, width, height = lookup.changed_region
+                prompt = (
+                    f"{question}\n\n"
+                    f"Ранее по всему экрану был дан ответ:\n{lookup.analysis}\n\n"
+                    f"С тех пор изменилась только область x={x}, y={y}, {width}x{height} "
+                    f"(она на изображении). Дай обновлённый полный ответ."
+                )
+                analysis = self._vision_request(prompt, frame.crop(lookup.changed_region))
+            else:
+                analysis = self._vision_request(question, frame)
             
-            # Запрос к GPT-4 Vision
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": question},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{img_data}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000
-            )
+            if lookup.status != HIT:
+                self.screen_cache.store(lookup.fingerprint, analysis, key=question)
             
-            analysis = response.choices[0].message.content
             result = f"🔍 Vision анализ:\n{analysis}"
             
-            self._log_action("analyze_screenshot", {"question": question}, analysis)
+            self._log_action(
+                "analyze_screenshot", {"question": question, "screen_cache": lookup.status}, analysis
+            )
             
             return result
             
@@ -709,6 +734,32 @@ class MiraiDesktopAgent:
             logger.error(f"Ошибка анализа: {e}", exc_info=True)
             return f"❌ Ошибка: {e}"
     
+    def _vision_request(self, prompt: str, frame: Frame) -> str:
+        """Один запрос к GPT-4 Vision (кадр кодируется один раз под бюджет байт)"""
+        encoded = frame.encode(self.vision_format, self.vision_max_bytes)
+        img_data = base64.b64encode(encoded).decode()
+        
+        response = self.client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime_type(self.vision_format)};base64,{img_data}"
+                            }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=1000
+        )
+        
+        return response.choices[0].message.content
+    
     # ═══════════════════════════════════════════════════════════════
     # OCR и Computer Vision
     # ═══════════════════════════════════════════════════════════════
@@ -719,16 +770,18 @@ class MiraiDesktopAgent:
             if not OCR_AVAILABLE:
                 return "❌ OCR недоступен. Установите pytesseract"
             
-            # Сделать скриншот
-            screenshot = pyautogui.screenshot()
+            # Свежий кадр из буфера (или новый скриншот)
+            frame = self.frames.get_or_capture()
             
-            # OCR
-            ocr_text = pytesseract.image_to_string(screenshot)
+            # OCR только изменившихся тайлов, поиск по индексу слов
+            matches = self.ocr_index.find(text, frame=frame)
             
-            # Поиск текста
-            if text.lower() in ocr_text.lower():
-                # Найти координаты (упрощенно - через поиск в тексте)
-                return f"✅ Текст '{text}' найден на экране\nOCR результат:\n{ocr_text[:200]}..."
+            if matches:
+                lines = [f"✅ Текст '{text}' найден на экране ({len(matches)}):"]
+                for match in matches[:5]:
+                    center_x, center_y = match.center
+                    lines.append(f"  '{match.text}' в ({center_x}, {center_y})")
+                return "\n".join(lines)
             else:
                 return f"❌ Текст '{text}' не найден на экране"
             
@@ -736,37 +789,43 @@ class MiraiDesktopAgent:
             logger.error(f"Ошибка OCR: {e}", exc_info=True)
             return f"❌ Ошибка OCR: {e}"
     
-    def find_image_on_screen(self, image_path: str) -> str:
-        """Найти изображение на экране с помощью OpenCV"""
+    def find_image_on_screen(self, image_path: str, window_title: str = "", threshold: float = 0.8) -> str:
+        """
+        Найти изображение на экране (coarse-to-fine поиск по пирамиде)
+        
+        Если указан window_title, поиск идёт только в окне приложения;
+        иначе сначала рядом с прошлым положением элемента, затем по всему экрану.
+        """
         try:
             # Проверить существование файла
             if not Path(image_path).exists():
                 return f"❌ Файл не найден: {image_path}"
             
-            # Загрузить шаблон
-            template = cv2.imread(image_path)
-            if template is None:
+            # Загрузить шаблон (пирамида шаблона кэшируется)
+            try:
+                template = self.template_matcher.load_template(image_path)
+            except OSError:
                 return f"❌ Не удалось загрузить изображение: {image_path}"
             
-            # Скриншот экрана
-            screenshot = pyautogui.screenshot()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # Template matching
-            result = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            # Порог совпадения
-            threshold = 0.8
-            if max_val >= threshold:
-                x, y = max_loc
-                h, w = template.shape[:2]
-                center_x, center_y = x + w // 2, y + h // 2
-                
-                return f"✅ Изображение найдено в ({center_x}, {center_y}), совпадение: {max_val:.2%}"
+            # Ограничить поиск окном приложения, если оно указано
+            roi = None
+            if window_title:
+                for window in self._get_all_windows():
+                    if window_title.lower() in window.title.lower() and window.is_visible:
+                        region = window.to_region()
+                        roi = region.to_tuple() if region else None
+                        break
+            
+            # Свежий кадр из буфера (пирамида строится один раз на кадр)
+            frame = self.frames.get_or_capture()
+            
+            # Coarse-to-fine template matching
+            match = self.template_matcher.find(frame, template, threshold=threshold, roi=roi)
+            if match is not None:
+                center_x, center_y = match.center
+                return f"✅ Изображение найдено в ({center_x}, {center_y}), совпадение: {match.score:.2%}"
             else:
-                return f"❌ Изображение не найдено (лучшее совпадение: {max_val:.2%})"
+                return f"❌ Изображение не найдено (порог совпадения {threshold:.0%})"
             
         except Exception as e:
             logger.error(f"Ошибка поиска изображения: {e}", exc_info=True)
@@ -810,6 +869,7 @@ class MiraiDesktopAgent:
             
             # Подождать запуска
             time.sleep(2)
+            self.frames.invalidate()
             
             result = f"✅ Приложение '{app_name}' запущено"
             self._log_action("open_application", {"app_name": app_name, "args": args}, result)
@@ -859,6 +919,7 @@ class MiraiDesktopAgent:
                 pyautogui.hotkey('alt', 'tab')
             
             time.sleep(0.5)
+            self.frames.invalidate()
             
             result = f"✅ Активировано: {window.title}"
             self._log_action("activate_window", {"title": title_contains}, result)
@@ -916,6 +977,7 @@ class MiraiDesktopAgent:
             if self.browser_automation:
                 # Использовать BrowserAutomation
                 self.browser_automation.navigate(url)
+                self.frames.invalidate()
                 return f"✅ Открыт URL: {url}"
             else:
                 # Fallback - открыть через системный браузер
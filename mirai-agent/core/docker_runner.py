@@ -1,12 +1,27 @@
 """
 Docker Code Runner
 Secure code execution in isolated Docker containers
+
+Images are pulled once, and snippets for interpreted languages run via
+`docker exec` (code on stdin) in a pool of warm, network-less,
+resource-limited containers whose writable dirs are wiped after every run.
+Pooled containers are labelled with their owner (host:pid): they are removed
+when the pool is closed, garbage-collected or the process exits, and
+containers left behind by dead owners are removed on startup.
 """
 
 import json
 import logging
+import os
+import queue
+import socket
+import subprocess
 import tempfile
+import threading
 import time
+import weakref
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
@@ -37,6 +52,311 @@ class ExecutionResult:
     container_id: Optional[str] = None
 
 
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _remove_containers(docker: str, containers: Dict[str, set]):
+    """Remove every container of a pool (ContainerPool finalizer)"""
+    ids = [container_id for language_ids in containers.values() for container_id in language_ids]
+    for language_ids in containers.values():
+        language_ids.clear()
+    if not ids:
+        return
+    try:
+        subprocess.run([docker, "rm", "-f"] + ids, capture_output=True, timeout=60)
+    except Exception as e:
+        logger.warning(f"Failed to remove pooled containers: {e}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by another user
+    return True
+
+
+class ContainerPool:
+    """
+    Warm containers per language, reused through `docker exec`
+
+    Each container runs `sleep infinity` with no network, memory/CPU/pids
+    limits, a read-only root and tmpfs /sandbox and /tmp. Snippets are fed
+    to the interpreter on stdin; after each run the tmpfs dirs are wiped in
+    the background before the container goes back to the pool. Containers
+    that time out, hit the memory limit or reach max_uses are replaced.
+    """
+
+    # Interpreters that read the program from stdin
+    RUNTIMES = {
+        "python": ["python", "-"],
+        "javascript": ["node", "-"],
+        "bash": ["bash", "-s"],
+    }
+    RESET_COMMAND = "find /sandbox /tmp -mindepth 1 -delete 2>/dev/null; true"
+    OWNER_LABEL = "mirai.pool.owner"
+
+    def __init__(
+        self,
+        images: Dict[str, str],
+        size: int = 2,
+        memory_limit: str = "256m",
+        cpu_quota: int = 50000,
+        pids_limit: int = 64,
+        max_uses: int = 100,
+        docker: str = "docker",
+    ):
+        self.images = images
+        self.size = size
+        self.memory_limit = memory_limit
+        self.cpu_quota = cpu_quota
+        self.pids_limit = pids_limit
+        self.max_uses = max_uses
+        self.docker = docker
+
+        self._lock = threading.Lock()
+        self._idle: Dict[str, "queue.Queue[str]"] = defaultdict(queue.Queue)
+        self._containers: Dict[str, set] = defaultdict(set)  # language -> container ids
+        self._uses: Dict[str, int] = {}
+        self._busy: Dict[str, int] = defaultdict(int)
+        self._starting: Dict[str, int] = defaultdict(int)
+        self._pulled: set = set()
+        self._pull_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._recycler = ThreadPoolExecutor(max_workers=2, thread_name_prefix="docker-pool")
+        self._closed = False
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # Runs on shutdown(), garbage collection or interpreter exit
+        self._finalizer = weakref.finalize(self, _remove_containers, docker, self._containers)
+
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"cold_starts": 0, "reuses": 0, "recycled": 0, "exhausted": 0}
+        )
+
+    def _run(self, args: List[str], timeout: float = 30, **kwargs) -> subprocess.CompletedProcess:
+        return subprocess.run([self.docker] + args, capture_output=True, text=True,
+                              timeout=timeout, **kwargs)
+
+    def ensure_image(self, image: str) -> bool:
+        """Pull image once per process if it is not present locally"""
+        if image in self._pulled:
+            return True
+        with self._pull_locks[image]:
+            if image in self._pulled:
+                return True
+            try:
+                if self._run(["image", "inspect", image]).returncode != 0:
+                    logger.info(f"📥 Pulling Docker image {image}...")
+                    self._run(["pull", image], timeout=600, check=True)
+                self._pulled.add(image)
+                return True
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Docker pull timeout for {image}")
+            except subprocess.CalledProcessError as e:
+                logger.warning(f"Failed to pull {image}: {e.stderr}")
+            except Exception as e:
+                logger.error(f"Docker pull error: {e}")
+            return False
+
+    def reap_orphans(self) -> int:
+        """Remove pooled containers of dead processes on this host"""
+        try:
+            result = self._run([
+                "ps", "-a", "--filter", "label=mirai.pool=1",
+                "--format", '{{.ID}} {{.Label "%s"}}' % self.OWNER_LABEL,
+            ])
+        except Exception as e:
+            logger.warning(f"Failed to list pooled containers: {e}")
+            return 0
+        host = socket.gethostname()
+        orphans = []
+        for line in result.stdout.splitlines():
+            container_id, _, owner = line.strip().partition(" ")
+            owner_host, _, pid = owner.rpartition(":")
+            # containers of other hosts (shared daemon) or without an owner are left alone
+            if owner_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                orphans.append(container_id)
+        if orphans:
+            try:
+                self._run(["rm", "-f"] + orphans, timeout=60)
+                logger.info(f"🧹 Removed {len(orphans)} orphaned pool containers")
+            except Exception as e:
+                logger.warning(f"Failed to remove orphaned containers: {e}")
+        return len(orphans)
+
+    def prewarm(self, languages: Optional[List[str]] = None):
+        """Pull all images, then start `size` containers per pooled language"""
+        for image in sorted(set(self.images.values())):
+            self.ensure_image(image)
+        for language in languages or list(self.RUNTIMES):
+            if language not in self.RUNTIMES:
+                continue
+            while not self._closed and self._reserve(language):
+                container_id = self._start(language)
+                if container_id is None:
+                    break
+                self._idle[language].put(container_id)
+        logger.info(f"🔥 Container pool warm: {self._warm_counts()}")
+
+    def _reserve(self, language: str) -> bool:
+        """Claim a slot for a new container if the pool is below size"""
+        with self._lock:
+            if len(self._containers[language]) + self._starting[language] >= self.size:
+                return False
+            self._starting[language] += 1
+            return True
+
+    def _start(self, language: str) -> Optional[str]:
+        """Start a container in a slot claimed by _reserve()"""
+        try:
+            return self._start_container(language)
+        finally:
+            with self._lock:
+                self._starting[language] -= 1
+
+    def _start_container(self, language: str) -> Optional[str]:
+        image = self.images.get(language)
+        if image is None or not self.ensure_image(image):
+            return None
+        try:
+            result = self._run([
+                "run", "-d", "--rm",
+                "--network", "none",
+                "--memory", self.memory_limit,
+                "--memory-swap", self.memory_limit,
+                "--cpu-quota", str(self.cpu_quota),
+                "--pids-limit", str(self.pids_limit),
+                "--security-opt", "no-new-privileges",
+                "--cap-drop", "ALL",
+                "--read-only",
+                "--tmpfs", "/sandbox:rw,exec,size=64m",
+                "--tmpfs", "/tmp:rw,size=64m",
+                "--workdir", "/sandbox",
+                "--label", "mirai.pool=1",
+                "--label", f"{self.OWNER_LABEL}={self.owner}",
+                image, "sleep", "infinity",
+            ], timeout=60)
+        except Exception as e:
+            logger.warning(f"Failed to start {language} container: {e}")
+            return None
+        if result.returncode != 0 or not result.stdout.strip():
+            logger.warning(f"Failed to start {language} container: {result.stderr.strip()}")
+            return None
+
+        container_id = result.stdout.strip()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._containers[language].add(container_id)
+                self._uses[container_id] = 0
+        if closed:  # started while the pool was shutting down
+            self._run(["rm", "-f", container_id], timeout=30)
+            return None
+        self.stats[language]["cold_starts"] += 1
+        return container_id
+
+    def acquire(self, language: str, wait: float = 5.0) -> Optional[str]:
+        """Idle container, a freshly started one if below size, else wait"""
+        try:
+            container_id = self._idle[language].get_nowait()
+            self.stats[language]["reuses"] += 1
+        except queue.Empty:
+            container_id = self._start(language) if self._reserve(language) else None
+            if container_id is None:
+                try:
+                    container_id = self._idle[language].get(timeout=wait)
+                    self.stats[language]["reuses"] += 1
+                except queue.Empty:
+                    self.stats[language]["exhausted"] += 1
+                    return None
+        with self._lock:
+            self._busy[language] += 1
+        return container_id
+
+    def release(self, language: str, container_id: str, healthy: bool = True):
+        """Return container after a run: reset it, or replace it if unhealthy"""
+        with self._lock:
+            self._busy[language] -= 1
+            self._uses[container_id] = self._uses.get(container_id, 0) + 1
+            recycle = not healthy or self._closed or self._uses[container_id] >= self.max_uses
+        if self._closed:
+            self._remove(language, container_id)
+        elif recycle:
+            self._recycler.submit(self._recycle, language, container_id)
+        else:
+            self._recycler.submit(self._reset, language, container_id)
+
+    def _reset(self, language: str, container_id: str):
+        try:
+            result = self._run(["exec", container_id, "sh", "-c", self.RESET_COMMAND], timeout=10)
+            if result.returncode == 0:
+                self._idle[language].put(container_id)
+                return
+        except Exception as e:
+            logger.warning(f"Container reset failed: {e}")
+        self._recycle(language, container_id)
+
+    def _recycle(self, language: str, container_id: str):
+        self._remove(language, container_id)
+        self.stats[language]["recycled"] += 1
+        if not self._closed and self._reserve(language):
+            replacement = self._start(language)
+            if replacement is not None:
+                self._idle[language].put(replacement)
+
+    def _remove(self, language: str, container_id: str):
+        with self._lock:
+            self._containers[language].discard(container_id)
+            self._uses.pop(container_id, None)
+        try:
+            self._run(["rm", "-f", container_id], timeout=30)
+        except Exception as e:
+            logger.warning(f"Failed to remove container {container_id[:12]}: {e}")
+
+    def execute(self, language: str, container_id: str, code: str,
+                timeout: float) -> subprocess.CompletedProcess:
+        """Run code in a pooled container (raises subprocess.TimeoutExpired)"""
+        return self._run(
+            ["exec", "-i", "-w", "/sandbox", container_id] + self.RUNTIMES[language],
+            timeout=timeout,
+            input=code,
+        )
+
+    def _warm_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {language: len(ids) for language, ids in self._containers.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            languages = set(self._containers) | set(self.stats)
+            return {
+                language: {
+                    **self.stats[language],
+                    "containers": len(self._containers[language]),
+                    "idle": self._idle[language].qsize(),
+                    "busy": self._busy[language],
+                    "utilization": self._busy[language] / self.size if self.size else 0.0,
+                }
+                for language in sorted(languages)
+            }
+
+    def shutdown(self):
+        """Remove all pooled containers"""
+        with self._lock:
+            self._closed = True
+        self._recycler.shutdown(wait=True)
+        self._finalizer()
+        with self._lock:
+            self._uses.clear()
+        for language in list(self._idle):
+            self._idle[language] = queue.Queue()
+
+
 class DockerCodeRunner:
     """
     Execute code in isolated Docker containers
@@ -47,6 +367,7 @@ class DockerCodeRunner:
     - CPU limits
     - Timeout enforcement
     - Automatic cleanup
+    - Warm container pool (images pulled once, runs via docker exec)
     """
 
     def __init__(
@@ -55,6 +376,8 @@ class DockerCodeRunner:
         cpu_quota: int = 50000,  # 50% of one CPU
         timeout: int = 30,
         docker_available: bool = True,
+        pool_size: int = 2,
+        prewarm: bool = True,
     ):
         """
         Initialize Docker code runner
@@ -64,6 +387,9 @@ class DockerCodeRunner:
             cpu_quota: CPU quota in microseconds per 100ms period
             timeout: Execution timeout in seconds
             docker_available: Whether Docker is available (set by check)
+            pool_size: Warm containers per language (0 = cold `docker run` per call)
+            prewarm: Pull images and start the pool in a background thread
+                (orphaned pool containers are reaped there either way)
         """
         self.memory_limit = memory_limit
         self.cpu_quota = cpu_quota
@@ -88,11 +414,31 @@ class DockerCodeRunner:
             "timeouts": 0,
             "avg_execution_time": 0.0,
         }
+        self.latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self._stats_lock = threading.Lock()
+
+        # Warm container pool
+        self.pool: Optional[ContainerPool] = None
+        if self.docker_available and pool_size > 0:
+            self.pool = ContainerPool(
+                self.images,
+                size=pool_size,
+                memory_limit=memory_limit,
+                cpu_quota=cpu_quota,
+            )
+            threading.Thread(
+                target=self._start_pool, args=(prewarm,), name="docker-prewarm", daemon=True
+            ).start()
+
+    def _start_pool(self, prewarm: bool):
+        """Remove containers left by dead processes, then optionally prewarm"""
+        self.pool.reap_orphans()
+        if prewarm:
+            self.pool.prewarm()
 
     def _check_docker(self) -> bool:
         """Check if Docker is available"""
         try:
-            import subprocess
             result = subprocess.run(
                 ["docker", "version"],
                 capture_output=True,
@@ -141,6 +487,84 @@ class DockerCodeRunner:
             timeout=timeout or self.timeout,
         )
 
+    def _record(self, language: str, status: ExecutionStatus, execution_time: float):
+        """Update counters and per-language latency samples"""
+        with self._stats_lock:
+            self.stats["avg_execution_time"] = (
+                self.stats["avg_execution_time"] * (self.stats["total_executions"] - 1)
+                + execution_time
+            ) / self.stats["total_executions"]
+            if status == ExecutionStatus.SUCCESS:
+                self.stats["successful"] += 1
+            else:
+                self.stats["failed"] += 1
+                if status == ExecutionStatus.TIMEOUT:
+                    self.stats["timeouts"] += 1
+            self.latencies[language].append(execution_time)
+
+    def _execute_pooled(
+        self, code: str, language: str, timeout: int, start_time: float
+    ) -> Optional[ExecutionResult]:
+        """Run in a warm container; None if no container could be obtained"""
+        container_id = self.pool.acquire(language, wait=min(timeout, 5))
+        if container_id is None:
+            return None
+
+        healthy = True
+        try:
+            result = self.pool.execute(language, container_id, code, timeout)
+            execution_time = time.time() - start_time
+
+            if result.returncode == 0:
+                status = ExecutionStatus.SUCCESS
+            elif result.returncode == 137:  # SIGKILL: OOM killer inside the cgroup
+                status = ExecutionStatus.MEMORY_LIMIT
+                healthy = False
+            else:
+                status = ExecutionStatus.ERROR
+            self._record(language, status, execution_time)
+
+            return ExecutionResult(
+                status=status,
+                output=result.stdout,
+                error=result.stderr if result.stderr else None,
+                execution_time=execution_time,
+                memory_used=0,
+                exit_code=result.returncode,
+                container_id=container_id,
+            )
+
+        except subprocess.TimeoutExpired:
+            healthy = False  # the snippet may still be running inside
+            execution_time = time.time() - start_time
+            self._record(language, ExecutionStatus.TIMEOUT, execution_time)
+            return ExecutionResult(
+                status=ExecutionStatus.TIMEOUT,
+                output="",
+                error=f"Execution timeout ({timeout}s)",
+                execution_time=execution_time,
+                memory_used=0,
+                exit_code=-1,
+                container_id=container_id,
+            )
+
+        except Exception as e:
+            healthy = False
+            execution_time = time.time() - start_time
+            self._record(language, ExecutionStatus.ERROR, execution_time)
+            return ExecutionResult(
+                status=ExecutionStatus.ERROR,
+                output="",
+                error=str(e),
+                execution_time=execution_time,
+                memory_used=0,
+                exit_code=-1,
+                container_id=container_id,
+            )
+
+        finally:
+            self.pool.release(language, container_id, healthy=healthy)
+
     def _execute_in_docker(
         self,
         code: str,
@@ -149,8 +573,6 @@ class DockerCodeRunner:
         timeout: int,
     ) -> ExecutionResult:
         """Execute code in Docker container"""
-        import subprocess
-
         if not self.docker_available:
             return ExecutionResult(
                 status=ExecutionStatus.DOCKER_ERROR,
@@ -161,26 +583,19 @@ class DockerCodeRunner:
                 exit_code=-1,
             )
 
-        self.stats["total_executions"] += 1
+        with self._stats_lock:
+            self.stats["total_executions"] += 1
         start_time = time.time()
 
-        # Get Docker image
-        image = self.images.get(language, "python:3.11-slim")
+        if self.pool is not None and language in ContainerPool.RUNTIMES:
+            pooled = self._execute_pooled(code, language, timeout, start_time)
+            if pooled is not None:
+                return pooled
 
-        # Pull image if not present (with timeout)
-        try:
-            subprocess.run(
-                ["docker", "pull", image],
-                capture_output=True,
-                timeout=120,
-                check=True,
-            )
-        except subprocess.TimeoutExpired:
-            logger.warning(f"Docker pull timeout for {image}")
-        except subprocess.CalledProcessError:
-            logger.warning(f"Failed to pull {image}, assuming it exists locally")
-        except Exception as e:
-            logger.error(f"Docker pull error: {e}")
+        # Get Docker image (pulled once per process, not per run)
+        image = self.images.get(language, "python:3.11-slim")
+        if self.pool is not None:
+            self.pool.ensure_image(image)
 
         # Create temporary file for code
         with tempfile.NamedTemporaryFile(
@@ -224,19 +639,12 @@ class DockerCodeRunner:
 
             execution_time = time.time() - start_time
 
-            # Update stats
-            self.stats["avg_execution_time"] = (
-                self.stats["avg_execution_time"] * (self.stats["total_executions"] - 1)
-                + execution_time
-            ) / self.stats["total_executions"]
-
             # Determine status
             if result.returncode == 0:
                 status = ExecutionStatus.SUCCESS
-                self.stats["successful"] += 1
             else:
                 status = ExecutionStatus.ERROR
-                self.stats["failed"] += 1
+            self._record(language, status, execution_time)
 
             return ExecutionResult(
                 status=status,
@@ -249,8 +657,7 @@ class DockerCodeRunner:
 
         except subprocess.TimeoutExpired:
             execution_time = time.time() - start_time
-            self.stats["timeouts"] += 1
-            self.stats["failed"] += 1
+            self._record(language, ExecutionStatus.TIMEOUT, execution_time)
 
             return ExecutionResult(
                 status=ExecutionStatus.TIMEOUT,
@@ -263,7 +670,7 @@ class DockerCodeRunner:
 
         except Exception as e:
             execution_time = time.time() - start_time
-            self.stats["failed"] += 1
+            self._record(language, ExecutionStatus.ERROR, execution_time)
 
             return ExecutionResult(
                 status=ExecutionStatus.ERROR,
@@ -283,6 +690,16 @@ class DockerCodeRunner:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get execution statistics"""
+        with self._stats_lock:
+            latency = {
+                language: {
+                    "count": len(samples),
+                    "p50_ms": percentile(samples, 50) * 1000,
+                    "p95_ms": percentile(samples, 95) * 1000,
+                }
+                for language, samples in self.latencies.items()
+                if samples
+            }
         return {
             **self.stats,
             "success_rate": (
@@ -290,12 +707,17 @@ class DockerCodeRunner:
                 if self.stats["total_executions"] > 0
                 else 0.0
             ),
+            "latency": latency,
+            "pool": self.pool.get_stats() if self.pool is not None else {},
         }
 
+    def close(self):
+        """Remove the warm containers"""
+        if self.pool is not None:
+            self.pool.shutdown()
+
     def cleanup_containers(self):
         """Clean up any dangling containers"""
-        import subprocess
-        
         try:
             # Remove stopped containers
             subprocess.run(
@@ -325,8 +747,6 @@ class SubprocessCodeRunner:
 
     def execute_python(self, code: str, timeout: Optional[int] = None) -> ExecutionResult:
         """Execute Python code using subprocess"""
-        import subprocess
-
         self.stats["total_executions"] += 1
         start_time = time.time()
 
@@ -410,6 +830,7 @@ if __name__ == "__main__":
 
         # Stats
         print(f"\n✅ Stats: {runner.get_stats()}")
+        runner.close()
     else:
         print("⚠️ Docker not available, skipping tests")
         print("   Install Docker to use isolated code execution")
@@ -0,0 +1,140 @@
+"""
+MIRAI Embedding Backends
+Pluggable text embeddings for the RAG systems
+
+- LocalEmbeddings   - SentenceTransformer on CPU, no network (default)
+- OpenAIEmbeddingsBackend - remote OpenAI embeddings (needs OPENAI_API_KEY)
+- CachedEmbeddings  - on-disk cache in front of any backend
+
+All backends expose the LangChain Embeddings interface
+(embed_documents / embed_query), so they plug straight into Chroma.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+from core.faiss_store import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+
+
+class LocalEmbeddings:
+    """SentenceTransformer embeddings, model loaded on first use"""
+
+    def __init__(self, model_name: str = DEFAULT_LOCAL_MODEL, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info(f"📥 Loading embedding model: {self.model_name}")
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OpenAIEmbeddingsBackend:
+    """Remote OpenAI embeddings via langchain_openai"""
+
+    def __init__(self, model_name: str = DEFAULT_OPENAI_MODEL):
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError("OPENAI_API_KEY не найден в переменных окружения!")
+        from langchain_openai import OpenAIEmbeddings
+
+        self.model_name = model_name
+        self._client = OpenAIEmbeddings(model=model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._client.embed_documents(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._client.embed_query(text)
+
+
+class CachedEmbeddings:
+    """
+    Content-hash keyed on-disk cache in front of an embedding backend
+
+    Only texts never seen before (for this model) reach the backend, and
+    they are sent in one embed_documents() call.
+    """
+
+    def __init__(self, backend, cache_path: Union[str, Path]):
+        self.backend = backend
+        self.model_name = getattr(backend, "model_name", type(backend).__name__)
+        self.cache = EmbeddingCache(Path(cache_path), self.model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.backend.embed_documents(list(missing.values()))
+            fresh = {key: np.asarray(v, dtype=np.float32) for key, v in zip(missing, vectors)}
+            self.cache.put_many(fresh)
+            found.update(fresh)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def get_stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+
+def create_embedding_backend(
+    backend: Optional[str] = None,
+    model_name: Optional[str] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+):
+    """
+    Build an embedding backend by name
+
+    Args:
+        backend: "local" or "openai" (default: $MIRAI_EMBEDDINGS or "local")
+        model_name: Model override for the chosen backend
+        cache_dir: Directory for the on-disk embedding cache (None: no cache)
+    """
+    backend = (backend or os.getenv("MIRAI_EMBEDDINGS") or "local").lower()
+    if backend == "local":
+        embeddings = LocalEmbeddings(model_name or DEFAULT_LOCAL_MODEL)
+    elif backend == "openai":
+        embeddings = OpenAIEmbeddingsBackend(model_name or DEFAULT_OPENAI_MODEL)
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    if cache_dir is None:
+        return embeddings
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return CachedEmbeddings(embeddings, cache_dir / f"embeddings_{backend}.db")
@@ -0,0 +1,160 @@
+"""
+MIRAI FAISS index policy
+Tiered index selection: exact Flat for small corpora, ANN as the corpus grows
+
+- flat     - IndexFlat (exact), below IndexPolicy.flat_max_vectors
+- ivf_flat - IndexIVFFlat, nlist ~ 4 * sqrt(n)
+- ivf_pq   - IndexIVFPQ (compressed), above IndexPolicy.pq_min_vectors
+- hnsw     - IndexHNSWFlat (graph, no training)
+
+Metric is either "l2" or "cosine" (L2-normalised vectors + inner product).
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+@dataclass
+class IndexPolicy:
+    """When and how to promote the FAISS index"""
+
+    metric: str = "l2"  # "l2" | "cosine"
+    flat_max_vectors: int = 50_000
+    ann_type: str = "hnsw"  # "ivf_flat" | "ivf_pq" | "hnsw"
+    pq_min_vectors: Optional[int] = None  # switch ivf_flat -> ivf_pq above this
+    nlist: Optional[int] = None  # None: 4 * sqrt(n)
+    pq_m: int = 16  # sub-quantizers, must divide the embedding dim
+    pq_bits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    nprobe: int = 16
+    ef_search: int = 64
+    train_sample: int = 100_000
+    retrain_growth: float = 4.0  # rebuild IVF once nlist target grows this much
+
+    def __post_init__(self):
+        if self.metric not in ("l2", "cosine"):
+            raise ValueError(f"Unknown metric: {self.metric}")
+        if self.ann_type not in INDEX_TYPES[1:]:
+            raise ValueError(f"Unknown ANN index type: {self.ann_type}")
+
+    @property
+    def faiss_metric(self) -> int:
+        return faiss.METRIC_INNER_PRODUCT if self.metric == "cosine" else faiss.METRIC_L2
+
+    def tier_for(self, n: int) -> str:
+        """Index type appropriate for a corpus of n vectors"""
+        if n < self.flat_max_vectors:
+            return "flat"
+        if self.ann_type == "ivf_flat" and self.pq_min_vectors and n >= self.pq_min_vectors:
+            return "ivf_pq"
+        return self.ann_type
+
+    def nlist_for(self, n: int) -> int:
+        if self.nlist:
+            return self.nlist
+        return max(1, min(int(4 * math.sqrt(max(n, 1))), n // 39 or 1))
+
+
+def index_type(index) -> str:
+    """Classify a (possibly deserialised) FAISS index"""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def prepare_vectors(vectors: np.ndarray, policy: IndexPolicy) -> np.ndarray:
+    """float32 contiguous copy, L2-normalised for cosine"""
+    vectors = np.array(vectors, dtype=np.float32, copy=True, order="C")
+    if policy.metric == "cosine" and len(vectors):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def create_index(policy: IndexPolicy, dim: int, tier: str = "flat", n: int = 0):
+    """Construct an empty (untrained) index of the given tier"""
+    metric = policy.faiss_metric
+    if tier == "flat":
+        return faiss.IndexFlatIP(dim) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dim)
+    if tier == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, policy.hnsw_m, metric)
+        index.hnsw.efConstruction = policy.ef_construction
+        index.hnsw.efSearch = policy.ef_search
+        return index
+
+    quantizer = create_index(policy, dim, "flat")
+    nlist = policy.nlist_for(n)
+    if tier == "ivf_pq":
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, policy.pq_m, policy.pq_bits, metric)
+    else:
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+    index.nprobe = policy.nprobe
+    return index
+
+
+def build_index(policy: IndexPolicy, vectors: np.ndarray, batch_size: int = 65_536):
+    """Build the tier matching len(vectors), train it and add all vectors
+
+    vectors must already be prepared (see prepare_vectors) or be a raw
+    memory map; batches are prepared on the fly to bound memory use.
+    """
+    n, dim = vectors.shape
+    tier = policy.tier_for(n)
+    index = create_index(policy, dim, tier, n)
+
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample_size = min(n, policy.train_sample)
+        sample_ids = np.sort(rng.choice(n, size=sample_size, replace=False))
+        index.train(prepare_vectors(vectors[sample_ids], policy))
+
+    for start in range(0, n, batch_size):
+        index.add(prepare_vectors(vectors[start : start + batch_size], policy))
+
+    logger.info(f"🏗️ Built {tier} index over {n} vectors")
+    return index
+
+
+def needs_rebuild(index, policy: IndexPolicy) -> bool:
+    """True when the corpus has outgrown the current index tier"""
+    if index.metric_type != policy.faiss_metric:
+        return True
+    n = index.ntotal
+    current = index_type(index)
+    if current != policy.tier_for(n):
+        # Never demote: an ANN index stays until explicitly rebuilt
+        return current == "flat" or policy.tier_for(n) == "ivf_pq"
+    if current in ("ivf_flat", "ivf_pq"):
+        nlist = faiss.extract_index_ivf(index).nlist
+        return policy.nlist_for(n) >= nlist * policy.retrain_growth
+    return False
+
+
+def search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Per-query FAISS SearchParameters (None keeps the index defaults)"""
+    kind = index_type(index)
+    if kind in ("ivf_flat", "ivf_pq") and nprobe:
+        return faiss.SearchParametersIVF(nprobe=int(nprobe))
+    if kind == "hnsw" and ef_search:
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search))
+    return None
+
+
+def distance_to_score(distance: float, policy: IndexPolicy) -> float:
+    """Map a FAISS distance to a similarity score (higher is better)"""
+    if policy.metric == "cosine":
+        return float(distance)
+    return 1.0 / (1.0 + float(distance))
@@ -3,9 +3,14 @@ MIRAI FAISS-based RAG System
 Fast and efficient local vector storage using FAISS
 """
 
+import hashlib
 import json
 import logging
 import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -14,17 +19,73 @@ import numpy as np
 import tiktoken
 from sentence_transformers import SentenceTransformer
 
+from core.context_packer import ContextChunk, ContextPack, ContextPacker
+from core.faiss_index import (
+    IndexPolicy,
+    build_index,
+    create_index,
+    distance_to_score,
+    index_type,
+    needs_rebuild,
+    prepare_vectors,
+    search_params,
+)
+from core.faiss_store import (
+    ChunkStore,
+    EmbeddingCache,
+    VectorSegment,
+    atomic_write_bytes,
+    atomic_write_json,
+    reconcile,
+)
+
 logger = logging.getLogger(__name__)
 
 
+class _LRUCache:
+    """Thread-safe LRU mapping with hit/miss counters"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class FAISSRAGSystem:
     """
     RAG system using FAISS for local vector storage
     
     Features:
-    - Fast similarity search
-    - Local embeddings (no API calls)
-    - Persistent storage
+    - Fast similarity search (Flat, promoted to IVF/HNSW as the corpus grows)
+    - Local embeddings (no API calls), batched and cached on disk
+    - Persistent storage (append-only segment + SQLite metadata, atomic checkpoints)
     - Chunk management with metadata
     """
 
@@ -35,6 +96,11 @@ class FAISSRAGSystem:
         embedding_model: str = "all-MiniLM-L6-v2",
         chunk_size: int = 512,
         chunk_overlap: int = 50,
+        checkpoint_interval: int = 10000,
+        index_policy: Optional[IndexPolicy] = None,
+        embed_batch_size: int = 256,
+        ingest_workers: int = 4,
+        query_cache_size: int = 1024,
     ):
         """
         Initialize FAISS RAG system
@@ -45,6 +111,11 @@ class FAISSRAGSystem:
             embedding_model: Sentence-transformer model name
             chunk_size: Text chunk size in tokens
             chunk_overlap: Overlap between chunks
+            checkpoint_interval: New vectors before a background index checkpoint
+            index_policy: Index tiers / metric (default: Flat L2, HNSW above 50k)
+            embed_batch_size: Chunks per embedding model call during ingestion
+            ingest_workers: Threads reading and chunking files
+            query_cache_size: LRU entries for query embeddings and search results
         """
         self.collection_name = collection_name
         self.persist_directory = Path(persist_directory)
@@ -52,11 +123,27 @@ class FAISSRAGSystem:
 
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.checkpoint_interval = checkpoint_interval
+        self.index_policy = index_policy or IndexPolicy()
+        self.embed_batch_size = embed_batch_size
+        self.ingest_workers = ingest_workers
+        self.last_ingest_stats: Dict = {}
+
+        # Query-side caches; results are keyed by index version so any
+        # mutation of the index invalidates them
+        self._query_embeddings = _LRUCache(query_cache_size)
+        self._query_results = _LRUCache(query_cache_size)
+        self._index_version = 0
 
         # Initialize embedding model (local, no API)
         logger.info(f"📥 Loading embedding model: {embedding_model}")
         self.embedding_model = SentenceTransformer(embedding_model)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        self.embedding_cache = EmbeddingCache(
+            self.persist_directory / f"{collection_name}.embcache.db",
+            embedding_model,
+            self.embedding_dim,
+        )
 
         # Initialize tokenizer
         try:
@@ -64,11 +151,6 @@ class FAISSRAGSystem:
         except:
             self.tokenizer = tiktoken.get_encoding("cl100k_base")
 
-        # Initialize or load FAISS index
-        self.index = None
-        self.documents = []  # Store document metadata
-        self.load_or_create_index()
-
         # Metrics for hit@k tracking
         self.metrics = {
             "total_queries": 0,
@@ -78,64 +160,164 @@ class FAISSRAGSystem:
             "avg_retrieval_time_ms": 0.0,
         }
 
+        # Initialize or load FAISS index
+        self._lock = threading.RLock()  # guards index + append path
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoint_thread: Optional[threading.Thread] = None
+        self._checkpointed = 0  # vectors covered by the on-disk .index
+        self.index = None
+        self.segment: Optional[VectorSegment] = None
+        self.documents: ChunkStore = None  # Chunk metadata, indexed by vector id
+        self.load_or_create_index()
+
+    def _path(self, suffix: str) -> Path:
+        return self.persist_directory / f"{self.collection_name}{suffix}"
+
     def load_or_create_index(self):
-        """Load existing index or create new one"""
-        index_path = self.persist_directory / f"{self.collection_name}.index"
-        docs_path = self.persist_directory / f"{self.collection_name}.docs.pkl"
-        metrics_path = self.persist_directory / f"{self.collection_name}.metrics.json"
+        """Open the segment/metadata files and restore the index from the last checkpoint"""
+        index_path = self._path(".index")
+        docs_path = self._path(".docs.pkl")
+        metrics_path = self._path(".metrics.json")
 
-        if index_path.exists() and docs_path.exists():
-            try:
-                # Load FAISS index
-                self.index = faiss.read_index(str(index_path))
+        self.segment = VectorSegment(self._path(".vectors.f32"), self.embedding_dim)
+        self.documents = ChunkStore(self._path(".chunks.db"))
 
-                # Load documents metadata
-                with open(docs_path, "rb") as f:
-                    self.documents = pickle.load(f)
+        if docs_path.exists() and len(self.segment) == 0 and len(self.documents) == 0:
+            self._migrate_legacy_pickle(index_path, docs_path)
 
-                # Load metrics
-                if metrics_path.exists():
-                    with open(metrics_path, "r") as f:
-                        self.metrics = json.load(f)
+        count = reconcile(self.segment, self.documents)
 
-                logger.info(
-                    f"✅ Loaded FAISS index: {len(self.documents)} documents"
-                )
+        # Checkpoint is only usable if it is a prefix of the committed vectors
+        self.index = None
+        if index_path.exists():
+            try:
+                index = faiss.read_index(str(index_path))
+                if (
+                    index.d == self.embedding_dim
+                    and index.ntotal <= count
+                    and index.metric_type == self.index_policy.faiss_metric
+                ):
+                    self.index = index
+                else:
+                    logger.warning("FAISS checkpoint does not match segment, rebuilding")
             except Exception as e:
-                logger.error(f"Failed to load index: {e}")
-                self._create_new_index()
-        else:
+                logger.error(f"Failed to load index checkpoint: {e}")
+        if self.index is None:
             self._create_new_index()
+        self._checkpointed = self.index.ntotal
+
+        # Replay vectors appended after the checkpoint
+        tail = self.segment.read(self.index.ntotal, count)
+        if len(tail):
+            self.index.add(prepare_vectors(tail, self.index_policy))
+
+        if metrics_path.exists():
+            try:
+                with open(metrics_path, "r") as f:
+                    self.metrics.update(json.load(f))
+            except Exception as e:
+                logger.error(f"Failed to load metrics: {e}")
+
+        logger.info(
+            f"✅ Loaded FAISS {index_type(self.index)} index: {len(self.documents)} chunks "
+            f"({len(tail)} replayed since checkpoint)"
+        )
+        self._maybe_schedule_checkpoint()
+
+    def _migrate_legacy_pickle(self, index_path: Path, docs_path: Path):
+        """One-time import of the old .index + .docs.pkl pair"""
+        try:
+            with open(docs_path, "rb") as f:
+                documents = pickle.load(f)
+            index = faiss.read_index(str(index_path))
+            count = min(len(documents), index.ntotal)
+            if count:
+                vectors = index.reconstruct_n(0, count)
+                start_id = self.segment.append(vectors)
+                self.documents.append_many(start_id, documents[:count])
+                self.segment.sync()
+            docs_path.rename(docs_path.with_name(docs_path.name + ".migrated"))
+            logger.info(f"📦 Migrated {count} chunks from legacy pickle storage")
+        except Exception as e:
+            logger.error(f"Failed to migrate legacy index: {e}")
 
     def _create_new_index(self):
         """Create new FAISS index"""
-        # Use IndexFlatL2 for exact search (good for small datasets)
-        # For larger datasets, consider IndexIVFFlat or IndexHNSWFlat
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
-        self.documents = []
+        # Exact Flat index to start with; _rebuild_index() promotes it to
+        # IVF/HNSW once the corpus outgrows index_policy.flat_max_vectors
+        self.index = create_index(self.index_policy, self.embedding_dim, "flat")
         logger.info(f"✅ Created new FAISS index (dim={self.embedding_dim})")
 
-    def save_index(self):
-        """Save index and documents to disk"""
-        index_path = self.persist_directory / f"{self.collection_name}.index"
-        docs_path = self.persist_directory / f"{self.collection_name}.docs.pkl"
-        metrics_path = self.persist_directory / f"{self.collection_name}.metrics.json"
+    def _bump_index_version(self):
+        """Invalidate cached search results (call with self._lock held)"""
+        self._index_version += 1
+        self._query_results.clear()
+
+    def _rebuild_index(self):
+        """Retrain into the tier the policy wants for the current corpus size"""
+        with self._lock:
+            n = self.index.ntotal
+        new_index = build_index(self.index_policy, self.segment.read(0, n))
+
+        # Catch up with vectors appended while we were training
+        with self._lock:
+            tail = self.segment.read(n, self.index.ntotal)
+            if len(tail):
+                new_index.add(prepare_vectors(tail, self.index_policy))
+            self.index = new_index
+            self._bump_index_version()
+        logger.info(f"⬆️ Promoted FAISS index to {index_type(new_index)} ({new_index.ntotal} vectors)")
+
+    def flush(self):
+        """Make appended vectors and metrics durable (O(new data), no index rewrite)"""
+        self.segment.sync()
+        atomic_write_json(self._path(".metrics.json"), self.metrics)
 
+    def save_index(self):
+        """Checkpoint the FAISS index atomically (tmp file + fsync + rename)"""
         try:
-            # Save FAISS index
-            faiss.write_index(self.index, str(index_path))
+            with self._checkpoint_lock:
+                self.segment.sync()
+                with self._lock:
+                    ntotal = self.index.ntotal
+                    data = faiss.serialize_index(self.index)
+                atomic_write_bytes(self._path(".index"), data.tobytes())
+                atomic_write_json(self._path(".metrics.json"), self.metrics)
+                self.documents.checkpoint()
+                self._checkpointed = ntotal
+
+            logger.info(f"💾 Saved index checkpoint: {ntotal} vectors")
+        except Exception as e:
+            logger.error(f"Failed to save index: {e}")
 
-            # Save documents metadata
-            with open(docs_path, "wb") as f:
-                pickle.dump(self.documents, f)
+    def _run_maintenance(self):
+        try:
+            if needs_rebuild(self.index, self.index_policy):
+                self._rebuild_index()
+        except Exception as e:
+            logger.error(f"Failed to rebuild index: {e}")
+        self.save_index()
 
-            # Save metrics
-            with open(metrics_path, "w") as f:
-                json.dump(self.metrics, f, indent=2)
+    def _maybe_schedule_checkpoint(self):
+        """Promote and/or compact the appended tail into a new checkpoint in the background"""
+        promote = needs_rebuild(self.index, self.index_policy)
+        if not promote and self.index.ntotal - self._checkpointed < self.checkpoint_interval:
+            return
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            return
+        self._checkpoint_thread = threading.Thread(
+            target=self._run_maintenance, name="faiss-checkpoint", daemon=True
+        )
+        self._checkpoint_thread.start()
 
-            logger.info(f"💾 Saved index: {len(self.documents)} documents")
-        except Exception as e:
-            logger.error(f"Failed to save index: {e}")
+    def close(self):
+        """Wait for a running checkpoint and release file handles"""
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+        self.flush()
+        self.segment.close()
+        self.documents.close()
+        self.embedding_cache.close()
 
     def count_tokens(self, text: str) -> int:
         """Count tokens in text"""
@@ -193,18 +375,7 @@ class FAISSRAGSystem:
 
         # Chunk the text
         chunks = self.chunk_text(text, doc_metadata)
-
-        # Generate embeddings
-        texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=False)
-
-        # Add to FAISS index
-        embeddings_np = np.array(embeddings).astype("float32")
-        self.index.add(embeddings_np)
-
-        # Store document metadata
-        for chunk in chunks:
-            self.documents.append(chunk)
+        self._add_chunks(chunks)
 
         logger.info(
             f"📄 Added document: {source} ({len(chunks)} chunks, "
@@ -213,12 +384,76 @@ class FAISSRAGSystem:
 
         return len(chunks)
 
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, reusing cached vectors and batching the misses into one call"""
+        keys = [self.embedding_cache.key(text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = self.embedding_model.encode(
+                list(missing.values()),
+                batch_size=self.embed_batch_size,
+                show_progress_bar=False,
+            )
+            fresh = dict(zip(missing, np.asarray(encoded, dtype=np.float32)))
+            self.embedding_cache.put_many(fresh)
+            cached.update(fresh)
+
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        return np.stack([cached[key] for key in keys]).astype(np.float32)
+
+    def _add_chunks(self, chunks: List[Dict]):
+        """Embed chunks and append them to segment, metadata and index"""
+        if not chunks:
+            return
+        embeddings_np = self.embed_texts([chunk["text"] for chunk in chunks])
+
+        # Append vectors, then commit metadata (the commit point), then index
+        with self._lock:
+            start_id = self.segment.append(embeddings_np)
+            self.documents.append_many(start_id, chunks)
+            self.index.add(prepare_vectors(embeddings_np, self.index_policy))
+            self._bump_index_version()
+        self._maybe_schedule_checkpoint()
+
+    def _prepare_file(self, file_path: Path, source: str) -> Optional[Dict]:
+        """Read + hash + chunk one file (runs in the ingestion thread pool)
+
+        Returns None when the file is unchanged since the last ingestion.
+        """
+        stat = file_path.stat()
+        known = self.documents.get_file(source)
+        if known and known[0] == stat.st_mtime and known[1] == stat.st_size:
+            return None
+
+        data = file_path.read_bytes()
+        sha256 = hashlib.sha256(data).hexdigest()
+        manifest = (source, stat.st_mtime, stat.st_size, sha256)
+        if known and known[2] == sha256:
+            return {"manifest": manifest, "chunks": None}  # touched, not changed
+
+        text = data.decode("utf-8")
+        chunks = self.chunk_text(
+            text,
+            {"source": source, "filename": file_path.name, "extension": file_path.suffix},
+        )
+        return {"manifest": manifest, "chunks": chunks, "replace": known is not None}
+
     def add_documents_from_directory(
         self, directory: str, pattern: str = "*.md"
     ) -> int:
         """
         Add all documents from directory
 
+        Files are read and chunked in a thread pool, chunks from many files
+        are embedded together in batches of embed_batch_size, and files whose
+        mtime/size or content hash is unchanged are skipped.
+
         Args:
             directory: Directory path
             pattern: File pattern (e.g., "*.md", "*.txt")
@@ -231,32 +466,85 @@ class FAISSRAGSystem:
             logger.warning(f"Directory not found: {directory}")
             return 0
 
-        total_chunks = 0
+        start_time = time.perf_counter()
+        cache_hits, cache_misses = self.embedding_cache.hits, self.embedding_cache.misses
         files = list(dir_path.glob(pattern))
+        stats = {"files": len(files), "skipped": 0, "failed": 0, "documents": 0, "chunks": 0}
 
         logger.info(f"📂 Indexing {len(files)} files from {directory}")
 
-        for file_path in files:
+        pending: List[Dict] = []
+        pending_chunks = 0
+
+        def flush_pending():
+            nonlocal pending, pending_chunks
+            batch = [chunk for prepared in pending for chunk in prepared["chunks"]]
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    text = f.read()
+                for prepared in pending:
+                    if prepared["replace"]:
+                        self.documents.delete_source(prepared["manifest"][0])
+                        with self._lock:
+                            self._bump_index_version()
+                self._add_chunks(batch)
+                self.documents.record_files([prepared["manifest"] for prepared in pending])
+                stats["documents"] += len(pending)
+                stats["chunks"] += len(batch)
+            except Exception as e:
+                stats["failed"] += len(pending)
+                logger.error(f"Failed to index batch of {len(pending)} files: {e}")
+            pending, pending_chunks = [], 0
 
-                chunks = self.add_document(
-                    text=text,
-                    source=str(file_path.relative_to(dir_path.parent)),
-                    metadata={"filename": file_path.name, "extension": file_path.suffix},
+        def prepare(file_path: Path):
+            try:
+                return file_path, self._prepare_file(
+                    file_path, str(file_path.relative_to(dir_path.parent))
                 )
-                total_chunks += chunks
-
             except Exception as e:
-                logger.error(f"Failed to index {file_path}: {e}")
-
-        self.save_index()
-        logger.info(f"✅ Indexed {total_chunks} chunks from {len(files)} files")
-        return total_chunks
+                return file_path, e
+
+        with ThreadPoolExecutor(max_workers=self.ingest_workers) as pool:
+            for file_path, prepared in pool.map(prepare, files):
+                if isinstance(prepared, Exception):
+                    stats["failed"] += 1
+                    logger.error(f"Failed to index {file_path}: {prepared}")
+                    continue
+                if prepared is None or prepared["chunks"] is None:
+                    stats["skipped"] += 1
+                    if prepared is not None:
+                        self.documents.record_files([prepared["manifest"]])
+                    continue
+                pending.append(prepared)
+                pending_chunks += len(prepared["chunks"])
+                if pending_chunks >= self.embed_batch_size:
+                    flush_pending()
+        if pending:
+            flush_pending()
+
+        self.flush()
+        elapsed = max(time.perf_counter() - start_time, 1e-9)
+        stats.update(
+            {
+                "seconds": round(elapsed, 3),
+                "docs_per_sec": round(stats["documents"] / elapsed, 2),
+                "chunks_per_sec": round(stats["chunks"] / elapsed, 2),
+                "embedding_cache_hits": self.embedding_cache.hits - cache_hits,
+                "embedding_cache_misses": self.embedding_cache.misses - cache_misses,
+            }
+        )
+        self.last_ingest_stats = stats
+        logger.info(
+            f"✅ Indexed {stats['chunks']} chunks from {stats['documents']} files "
+            f"({stats['skipped']} unchanged) - {stats['docs_per_sec']} docs/s, "
+            f"{stats['chunks_per_sec']} chunks/s"
+        )
+        return stats["chunks"]
 
     def search(
-        self, query: str, top_k: int = 5
+        self,
+        query: str,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
     ) -> List[Tuple[Dict, float]]:
         """
         Search for relevant chunks
@@ -264,48 +552,137 @@ class FAISSRAGSystem:
         Args:
             query: Search query
             top_k: Number of results to return
+            nprobe: IVF lists to probe for this query (IVF tiers only)
+            ef_search: HNSW search breadth for this query (HNSW tier only)
 
         Returns:
             List of (document, score) tuples
         """
-        import time
+        return self.search_many([query], top_k, nprobe, ef_search)[0]
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Prepared query vectors, encoding only LRU misses (in one batch)"""
+        vectors = [self._query_embeddings.get(query) for query in queries]
+        missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+        if missing:
+            encoded = self.embedding_model.encode(missing, show_progress_bar=False)
+            fresh = dict(zip(missing, prepare_vectors(encoded, self.index_policy)))
+            for query, vector in fresh.items():
+                self._query_embeddings.put(query, vector)
+            vectors = [fresh[q] if v is None else v for q, v in zip(queries, vectors)]
+        return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search several queries at once
 
-        start_time = time.time()
+        Queries are encoded in one batch and sent to FAISS as a single 2-D
+        matrix; repeated queries are served from the result LRU until the
+        index changes.
 
-        if self.index.ntotal == 0:
-            logger.warning("Index is empty")
+        Returns:
+            One list of (document, score) tuples per query, in input order
+        """
+        start_time = time.time()
+        if not queries:
             return []
 
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query], show_progress_bar=False)
-        query_embedding_np = np.array(query_embedding).astype("float32")
-
-        # Search
-        distances, indices = self.index.search(query_embedding_np, min(top_k, self.index.ntotal))
-
-        # Prepare results
-        results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if idx < len(self.documents):
-                doc = self.documents[idx]
-                # Convert L2 distance to similarity score (0-1)
-                score = 1.0 / (1.0 + distance)
-                results.append((doc, score))
+        index = self.index
+        if index.ntotal == 0:
+            logger.warning("Index is empty")
+            return [[] for _ in queries]
+
+        version = self._index_version
+        keys = [(query, top_k, nprobe, ef_search, version) for query in queries]
+        results: List[Optional[List[Tuple[Dict, float]]]] = [
+            self._query_results.get(key) for key in keys
+        ]
+        pending = list(dict.fromkeys(q for q, r in zip(queries, results) if r is None))
+
+        if pending:
+            # Generate query embeddings
+            query_matrix = self._embed_queries(pending)
+
+            # Search
+            # Over-fetch a little when tombstoned (replaced) chunks may occupy top slots
+            extra = min(self.documents.deleted_count, top_k * 3)
+            k = min(top_k + extra, index.ntotal)
+            params = search_params(index, nprobe, ef_search)
+            if params is not None:
+                distances, indices = index.search(query_matrix, k, params=params)
+            else:
+                distances, indices = index.search(query_matrix, k)
+
+            # Prepare results (one metadata query for all hits of all queries)
+            chunks = self.documents.get_many({int(i) for i in indices.flat if i >= 0})
+            fresh = {}
+            for query, row_ids, row_distances in zip(pending, indices, distances):
+                hits = []
+                for idx, distance in zip(row_ids, row_distances):
+                    if idx in chunks:
+                        # Convert distance to similarity score (higher is better)
+                        score = distance_to_score(distance, self.index_policy)
+                        hits.append((chunks[idx], score))
+                        if len(hits) == top_k:
+                            break
+                fresh[query] = hits
+                self._query_results.put((query, top_k, nprobe, ef_search, version), hits)
+            results = [fresh[q] if r is None else r for q, r in zip(queries, results)]
 
         # Update metrics
         elapsed_ms = (time.time() - start_time) * 1000
-        self.metrics["total_queries"] += 1
-        
-        # Update average retrieval time
-        n = self.metrics["total_queries"]
-        self.metrics["avg_retrieval_time_ms"] = (
-            self.metrics["avg_retrieval_time_ms"] * (n - 1) + elapsed_ms
-        ) / n
-
-        logger.debug(f"🔍 Search completed in {elapsed_ms:.2f}ms, found {len(results)} results")
+        per_query_ms = elapsed_ms / len(queries)
+        for _ in queries:
+            self.metrics["total_queries"] += 1
+
+            # Update average retrieval time
+            n = self.metrics["total_queries"]
+            self.metrics["avg_retrieval_time_ms"] = (
+                self.metrics["avg_retrieval_time_ms"] * (n - 1) + per_query_ms
+            ) / n
+
+        logger.debug(
+            f"🔍 Searched {len(queries)} queries in {elapsed_ms:.2f}ms "
+            f"({len(pending)} uncached)"
+        )
 
         return results
 
+    def pack_context(
+        self, query: str, max_chunks: int = 5, max_tokens: int = 2000
+    ) -> ContextPack:
+        """
+        Pack the most relevant chunks into a token budget
+
+        Uses the token counts stored at ingestion, skips chunks that don't
+        fit instead of stopping, and merges overlapping neighbours.
+
+        Returns:
+            ContextPack (parts, total_tokens, ...)
+        """
+        # Over-fetch so skipped/merged chunks can be replaced by the next best
+        results = self.search(query, top_k=max_chunks * 2)
+        candidates = [
+            ContextChunk(
+                text=doc["text"],
+                tokens=doc["tokens"],
+                source=doc["metadata"].get("source", "unknown"),
+                chunk_index=doc.get("chunk_index"),
+                score=score,
+            )
+            for doc, score in results
+        ]
+        packer = ContextPacker(
+            max_tokens, max_chunks=max_chunks, overlap_tokens=self.chunk_overlap
+        )
+        return packer.pack(candidates)
+
     def get_relevant_context(
         self, query: str, max_chunks: int = 5, max_tokens: int = 2000
     ) -> str:
@@ -320,26 +697,15 @@ class FAISSRAGSystem:
         Returns:
             Concatenated context string
         """
-        results = self.search(query, top_k=max_chunks)
-
-        context_parts = []
-        total_tokens = 0
-
-        for doc, score in results:
-            text = doc["text"]
-            tokens = doc["tokens"]
-
-            if total_tokens + tokens <= max_tokens:
-                source = doc["metadata"].get("source", "unknown")
-                context_parts.append(f"[Source: {source}]\n{text}")
-                total_tokens += tokens
-            else:
-                break
-
-        context = "\n\n---\n\n".join(context_parts)
-        return context
+        return self.pack_context(query, max_chunks, max_tokens).text
 
-    def update_hit_metrics(self, query: str, relevant_sources: List[str], k: int = 5):
+    def update_hit_metrics(
+        self,
+        query: str,
+        relevant_sources: List[str],
+        k: int = 5,
+        results: Optional[List[Tuple[Dict, float]]] = None,
+    ):
         """
         Update hit@k metrics
 
@@ -347,22 +713,30 @@ class FAISSRAGSystem:
             query: Query that was searched
             relevant_sources: List of sources that should be in results
             k: Number of top results to check
+            results: Results of the original search; when omitted the cached
+                     results for (query, k) are reused instead of re-searching
         """
-        results = self.search(query, top_k=k)
-
-        # Check if relevant source is in top results
-        found_sources = {doc["metadata"].get("source") for doc, _ in results}
-
-        for relevant_source in relevant_sources:
-            if relevant_source in found_sources:
-                # Update hit counts
-                if k >= 1:
-                    self.metrics["hits_at_1"] += 1
-                if k >= 3:
-                    self.metrics["hits_at_3"] += 1
-                if k >= 5:
-                    self.metrics["hits_at_5"] += 1
-                break  # Count once per query
+        if results is None:
+            results = self._query_results.get((query, k, None, None, self._index_version))
+        if results is None:
+            results = self.search(query, top_k=k)
+
+        # Rank of the first relevant source (one pass covers hit@1/3/5)
+        relevant = set(relevant_sources)
+        rank = next(
+            (
+                position
+                for position, (doc, _) in enumerate(results[:k], start=1)
+                if doc["metadata"].get("source") in relevant
+            ),
+            None,
+        )
+        if rank is None:
+            return
+
+        for cutoff in (1, 3, 5):
+            if rank <= cutoff <= k:
+                self.metrics[f"hits_at_{cutoff}"] += 1
 
     def get_hit_rate(self, k: int = 5) -> float:
         """
@@ -394,16 +768,40 @@ class FAISSRAGSystem:
         return {
             "total_documents": len(self.documents),
             "index_size": self.index.ntotal,
+            "index_type": index_type(self.index),
+            "metric": self.index_policy.metric,
+            "checkpointed_vectors": self._checkpointed,
+            "deleted_chunks": self.documents.deleted_count,
             "embedding_dim": self.embedding_dim,
             "metrics": self.metrics,
             "hit_rate_1": self.get_hit_rate(1),
             "hit_rate_3": self.get_hit_rate(3),
             "hit_rate_5": self.get_hit_rate(5),
+            "embedding_cache": {
+                "hits": self.embedding_cache.hits,
+                "misses": self.embedding_cache.misses,
+            },
+            "query_cache": {
+                "index_version": self._index_version,
+                "embedding_hits": self._query_embeddings.hits,
+                "embedding_misses": self._query_embeddings.misses,
+                "result_hits": self._query_results.hits,
+                "result_misses": self._query_results.misses,
+            },
+            "last_ingest": self.last_ingest_stats,
         }
 
     def clear(self):
         """Clear all documents and index"""
-        self._create_new_index()
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+        with self._lock:
+            self.documents.truncate(0)
+            self.segment.truncate(0)
+            self._create_new_index()
+            self._path(".index").unlink(missing_ok=True)
+            self._checkpointed = 0
+            self._bump_index_version()
         logger.info("🗑️ Cleared index")
 
 
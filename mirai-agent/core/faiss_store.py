@@ -0,0 +1,366 @@
+"""
+MIRAI FAISS storage layer
+Append-only, crash-safe persistence for FAISSRAGSystem
+
+Layout per collection:
+- {name}.vectors.f32  - append-only float32 segment (row i == vector id i)
+- {name}.chunks.db    - SQLite chunk metadata keyed by vector id
+- {name}.index        - FAISS checkpoint, replaced atomically
+- {name}.embcache.db  - content-hash keyed embedding cache
+
+Vectors are appended first and metadata committed second, so the SQLite
+commit is the durable "commit point". On open the two files are reconciled
+to their common prefix, which makes a crash at any moment recoverable.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def fsync_directory(directory: Path):
+    """Persist a rename inside directory (no-op where unsupported)"""
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write file via tmp + fsync + rename so readers never see partial data"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path.parent)
+
+
+def atomic_write_json(path: Path, payload: Dict):
+    atomic_write_bytes(path, json.dumps(payload, indent=2).encode("utf-8"))
+
+
+class VectorSegment:
+    """Append-only float32 vector file, readable through a memory map"""
+
+    def __init__(self, path: Path, dim: int):
+        self.path = Path(path)
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self._lock = threading.Lock()
+        self.path.touch(exist_ok=True)
+
+        # Drop a torn trailing row left by a crash mid-append
+        size = self.path.stat().st_size
+        if size % self.row_bytes:
+            logger.warning(f"Truncating torn vector row in {self.path.name}")
+            self._truncate_bytes(size - size % self.row_bytes)
+
+        self._file = open(self.path, "ab")
+        self._count = self.path.stat().st_size // self.row_bytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _truncate_bytes(self, size: int):
+        with open(self.path, "r+b") as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, vectors: np.ndarray) -> int:
+        """Append vectors, returning the id of the first one"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected (n, {self.dim}) vectors, got {vectors.shape}")
+        with self._lock:
+            start = self._count
+            self._file.write(vectors.tobytes())
+            self._file.flush()
+            self._count += len(vectors)
+        return start
+
+    def truncate(self, count: int):
+        """Keep only the first count vectors"""
+        with self._lock:
+            if count >= self._count:
+                return
+            self._file.close()
+            self._truncate_bytes(count * self.row_bytes)
+            self._file = open(self.path, "ab")
+            self._count = count
+
+    def sync(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Memory-mapped view of rows [start, end)"""
+        end = self._count if end is None else min(end, self._count)
+        if end <= start:
+            return np.empty((0, self.dim), dtype=np.float32)
+        mapped = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+        return mapped[start:end]
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._file.close()
+
+
+class ChunkStore(Sequence):
+    """
+    SQLite-backed chunk metadata, indexable like the old documents list
+
+    store[i] returns the chunk dict for vector id i, so FAISS result ids map
+    directly onto rows without loading every chunk into RAM.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                source TEXT,
+                chunk_index INTEGER,
+                tokens INTEGER,
+                text TEXT NOT NULL,
+                metadata TEXT,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+        if "deleted" not in columns:
+            self._conn.execute("ALTER TABLE chunks ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source)")
+
+        # Ingestion manifest: lets re-indexing skip unchanged files
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            )
+        """
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        self.deleted_count = self._conn.execute(
+            "SELECT COUNT(*) FROM chunks WHERE deleted = 1"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _row_to_chunk(row) -> Dict:
+        return {
+            "text": row[4],
+            "tokens": row[3],
+            "metadata": json.loads(row[5]) if row[5] else {},
+            "chunk_index": row[2],
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("chunk index out of range")
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM chunks WHERE id = ?", (index,)).fetchone()
+        return self._row_to_chunk(row)
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, Dict]:
+        """Fetch several live (not deleted) chunks in one query"""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM chunks WHERE id IN ({placeholders}) AND deleted = 0", ids
+            ).fetchall()
+        return {row[0]: self._row_to_chunk(row) for row in rows}
+
+    def delete_source(self, source: str) -> int:
+        """Tombstone every chunk of a source (vectors stay, results skip them)"""
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE chunks SET deleted = 1 WHERE source = ? AND deleted = 0", (source,)
+                )
+            self.deleted_count += cursor.rowcount
+            return cursor.rowcount
+
+    def get_file(self, source: str) -> Optional[Tuple[float, int, str]]:
+        """(mtime, size, sha256) recorded at the last ingestion of source"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime, size, sha256 FROM files WHERE source = ?", (source,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def record_files(self, files: List[Tuple[str, float, int, str]]):
+        """Upsert (source, mtime, size, sha256) manifest rows"""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files (source, mtime, size, sha256) VALUES (?, ?, ?, ?)",
+                    files,
+                )
+
+    def append_many(self, start_id: int, chunks: List[Dict]):
+        """Insert chunks with consecutive ids starting at start_id (one transaction)"""
+        rows = [
+            (
+                start_id + offset,
+                chunk.get("metadata", {}).get("source"),
+                chunk.get("chunk_index", offset),
+                chunk.get("tokens", 0),
+                chunk["text"],
+                json.dumps(chunk.get("metadata", {}), ensure_ascii=False),
+            )
+            for offset, chunk in enumerate(chunks)
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO chunks (id, source, chunk_index, tokens, text, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            self._count += len(rows)
+
+    def truncate(self, count: int):
+        """Delete chunks with id >= count"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks WHERE id >= ?", (count,))
+                if count == 0:
+                    self._conn.execute("DELETE FROM files")
+            self._count = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            self.deleted_count = self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE deleted = 1"
+            ).fetchone()[0]
+
+    def max_id(self) -> int:
+        with self._lock:
+            value = self._conn.execute("SELECT MAX(id) FROM chunks").fetchone()[0]
+        return -1 if value is None else value
+
+    def checkpoint(self):
+        """Fold the SQLite WAL back into the main database file"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by sha1(model + text)
+
+    Re-indexing unchanged content never re-runs the embedding model.
+    """
+
+    def __init__(self, path: Path, model_name: str, dim: Optional[int] = None):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if self.dim is None or vector.shape[0] == self.dim:
+                        found[key] = vector
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        rows = [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def reconcile(segment: VectorSegment, store: ChunkStore) -> int:
+    """
+    Trim vectors and metadata to their common committed prefix
+
+    Returns the number of consistent vectors.
+    """
+    committed = store.max_id() + 1
+    if len(store) != committed:
+        # Gaps mean ids are no longer positional; keep only the dense prefix
+        with store._lock:
+            rows = store._conn.execute("SELECT id FROM chunks ORDER BY id").fetchall()
+        committed = next((i for i, (row_id,) in enumerate(rows) if row_id != i), len(rows))
+
+    count = min(len(segment), committed)
+    if len(segment) > count:
+        logger.warning(f"Dropping {len(segment) - count} uncommitted vectors")
+        segment.truncate(count)
+    if len(store) > count:
+        logger.warning(f"Dropping {len(store) - count} chunks without vectors")
+        store.truncate(count)
+    return count
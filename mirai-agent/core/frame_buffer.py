@@ -0,0 +1,211 @@
+"""
+MIRAI Frame Buffer
+Общий буфер кадров экрана в памяти
+
+- Последние кадры хранятся как NumPy массивы (RGB) и разделяются между
+  OCR, поиском шаблонов и vision-анализом - без повторных скриншотов
+- Производные данные кадра (grayscale, BGR, хэши, пирамиды) считаются
+  один раз и кэшируются в самом кадре (Frame.memo)
+- Кодирование в JPEG/WebP под заданный бюджет байт - один раз на формат
+- Диск - только опциональный асинхронный sink
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Качество для подбора под бюджет: от лучшего к худшему
+QUALITY_STEPS = (90, 80, 70, 60, 50, 40, 30)
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+class Frame:
+    """
+    Один кадр экрана
+
+    Args:
+        pixels: RGB массив (H, W, 3)
+        origin: Координаты левого верхнего угла на экране
+    """
+
+    def __init__(self, pixels: np.ndarray, origin: Tuple[int, int] = (0, 0), timestamp: Optional[float] = None):
+        self.pixels = np.ascontiguousarray(pixels)
+        self.pixels.flags.writeable = False  # кадр разделяется между потребителями
+        self.origin = origin
+        self.timestamp = timestamp or time.time()
+        self.path: Optional[str] = None  # если кадр сохранён sink'ом
+        self._memo: Dict[Any, Any] = {}
+        self._lock = threading.RLock()  # производные данные строятся друг из друга
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height)"""
+        return self.pixels.shape[1], self.pixels.shape[0]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def memo(self, key: Any, factory: Callable[["Frame"], Any]) -> Any:
+        """Посчитать производные данные кадра один раз"""
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = factory(self)
+            return self._memo[key]
+
+    def image(self) -> Image.Image:
+        return self.memo("image", lambda f: Image.fromarray(f.pixels))
+
+    def gray(self) -> np.ndarray:
+        return self.memo("gray", lambda f: np.asarray(f.image().convert("L")))
+
+    def bgr(self) -> np.ndarray:
+        return self.memo("bgr", lambda f: np.ascontiguousarray(f.pixels[..., ::-1]))
+
+    def crop(self, region: Tuple[int, int, int, int]) -> "Frame":
+        """Под-кадр (x, y, width, height) в координатах кадра"""
+        x, y, width, height = region
+        return Frame(
+            self.pixels[y:y + height, x:x + width],
+            origin=(self.origin[0] + x, self.origin[1] + y),
+            timestamp=self.timestamp,
+        )
+
+    def encode(self, format: str = "JPEG", max_bytes: Optional[int] = None) -> bytes:
+        """
+        Закодировать кадр (кэшируется по формату и бюджету)
+
+        Если max_bytes задан, подбирается лучшее качество, укладывающееся
+        в бюджет; если не помогает и минимальное качество - кадр уменьшается.
+        """
+        format = format.upper()
+        return self.memo(("encoded", format, max_bytes), lambda f: f._encode(format, max_bytes))
+
+    def _encode(self, format: str, max_bytes: Optional[int]) -> bytes:
+        image = self.image()
+        while True:
+            data = b""
+            for quality in QUALITY_STEPS if format != "PNG" else (None,):
+                buffer = BytesIO()
+                if quality is None:
+                    image.save(buffer, format=format, optimize=True)
+                else:
+                    image.save(buffer, format=format, quality=quality)
+                data = buffer.getvalue()
+                if max_bytes is None or len(data) <= max_bytes:
+                    return data
+            if min(image.size) <= 64:
+                return data
+            image = image.resize((image.width * 3 // 4, image.height * 3 // 4), Image.LANCZOS)
+
+
+class DiskSink:
+    """
+    Асинхронное сохранение кадров на диск (один фоновый поток)
+
+    Путь известен сразу, запись идёт в фоне и не задерживает действие агента.
+    """
+
+    def __init__(self, directory: str, format: str = "PNG"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.format = format.upper()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-sink")
+
+    def submit(self, frame: Frame, prefix: str = "screenshot") -> Tuple[str, Future]:
+        timestamp = datetime.fromtimestamp(frame.timestamp).strftime("%Y%m%d_%H%M%S_%f")
+        path = self.directory / f"{prefix}_{timestamp}.{self.format.lower()}"
+        frame.path = str(path)
+        return str(path), self._executor.submit(self._write, frame, path)
+
+    def _write(self, frame: Frame, path: Path) -> str:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(frame.encode(self.format))
+        tmp_path.replace(path)
+        return str(path)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def _pyautogui_grab(region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    import pyautogui
+
+    return np.asarray(pyautogui.screenshot(region=region))
+
+
+class FrameBuffer:
+    """
+    Кольцевой буфер последних кадров
+
+    Args:
+        capacity: Сколько последних кадров хранить
+        grabber: Функция region -> RGB массив (по умолчанию pyautogui)
+        sink: Опциональный DiskSink для сохранения кадров
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4,
+        grabber: Optional[Callable[[Optional[Tuple[int, int, int, int]]], np.ndarray]] = None,
+        sink: Optional[DiskSink] = None,
+    ):
+        self.frames: Deque[Frame] = deque(maxlen=capacity)
+        self.grabber = grabber or _pyautogui_grab
+        self.sink = sink
+        self._latest_full: Optional[Frame] = None
+        self._lock = threading.Lock()
+        self.stats = {"captures": 0, "reuses": 0, "persisted": 0, "invalidations": 0}
+
+    def capture(self, region: Optional[Tuple[int, int, int, int]] = None) -> Frame:
+        """Сделать новый кадр (region = x, y, width, height)"""
+        pixels = self.grabber(region)
+        frame = Frame(pixels[..., :3], origin=region[:2] if region else (0, 0))
+        with self._lock:
+            self.frames.append(frame)
+            if region is None:
+                self._latest_full = frame
+            self.stats["captures"] += 1
+        if self.sink is not None:
+            self.sink.submit(frame)
+            self.stats["persisted"] += 1
+        return frame
+
+    def latest(self, max_age: Optional[float] = None, full_only: bool = False) -> Optional[Frame]:
+        """Последний кадр (None, если его нет или он старше max_age)"""
+        with self._lock:
+            frame = self._latest_full if full_only else (self.frames[-1] if self.frames else None)
+        if frame is None or (max_age is not None and frame.age > max_age):
+            return None
+        return frame
+
+    def invalidate(self):
+        """Экран изменён действием: следующий get_or_capture() снимет новый кадр"""
+        with self._lock:
+            self._latest_full = None
+            self.stats["invalidations"] += 1
+
+    def get_or_capture(self, max_age: float = 0.5) -> Frame:
+        """Свежий полный кадр: переиспользовать последний или снять новый"""
+        frame = self.latest(max_age=max_age, full_only=True)
+        if frame is not None:
+            self.stats["reuses"] += 1
+            return frame
+        return self.capture()
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+
+def mime_type(format: str) -> str:
+    return MIME_TYPES[format.upper()]
@@ -0,0 +1,203 @@
+"""
+MIRAI LLM Client
+Общий асинхронный HTTP-клиент для LLM API (Ollama, OpenAI-совместимые)
+
+- Пул соединений с keep-alive: одна aiohttp-сессия на event loop,
+  общая для всех клиентов одного сервера (shared_client)
+- Потоковая генерация: async-итератор дельт токенов с метрикой
+  time-to-first-token
+- Объединение запросов: пока запрос выполняется, такой же запрос не
+  отправляется повторно, а ждёт результат первого
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamMetrics:
+    """Метрики одного потокового ответа"""
+    ttft: Optional[float] = None  # секунды до первого токена
+    duration: float = 0.0
+    chunks: int = 0
+    chars: int = 0
+
+
+class _LoopState:
+    """Сессия и выполняющиеся запросы одного event loop"""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self.inflight: Dict[str, asyncio.Task] = {}
+
+
+class LLMHTTPClient:
+    """
+    Асинхронный клиент одного LLM сервера
+
+    Args:
+        base_url: Адрес сервера (http://localhost:11434, https://api.openai.com/v1)
+        headers: Заголовки каждого запроса (авторизация)
+        timeout: Таймаут запроса в секундах
+        limit: Максимум одновременных соединений в пуле
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 120,
+        limit: int = 16,
+        keepalive: float = 60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.limit = limit
+        self.keepalive = keepalive
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.stats = {"requests": 0, "coalesced": 0, "streams": 0}
+        self.stream_metrics: deque = deque(maxlen=100)
+
+    def _state(self) -> _LoopState:
+        # aiohttp-сессия привязана к event loop, в котором создана
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None or state.session.closed:
+            session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=self.keepalive),
+            )
+            state = self._states[loop] = _LoopState(session)
+        return state
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def post_json(self, path: str, payload: Dict[str, Any], coalesce: bool = True) -> Dict[str, Any]:
+        """
+        POST с JSON ответом
+
+        Одинаковые (path, payload) запросы, выполняющиеся одновременно,
+        отправляются на сервер один раз.
+        """
+        state = self._state()
+        if not coalesce:
+            return await self._post(state, path, payload)
+
+        key = hashlib.sha256(json.dumps([path, payload], sort_keys=True, default=str).encode()).hexdigest()
+        task = state.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post(state, path, payload))
+            state.inflight[key] = task
+            task.add_done_callback(lambda t: (state.inflight.pop(key, None), t.cancelled() or t.exception()))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: отмена одного ожидающего не отменяет запрос для остальных
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _post(self, state: _LoopState, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.stats["requests"] += 1
+        async with state.session.post(self._url(path), json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def stream(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        extract: Callable[[Dict[str, Any]], Optional[str]],
+        sse: bool = False,
+        metrics: Optional[StreamMetrics] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый ответ: дельты текста по мере генерации
+
+        Args:
+            extract: JSON-чанк -> дельта текста (None - пропустить)
+            sse: Формат Server-Sent Events ("data: {...}", OpenAI);
+                иначе JSON по строке (Ollama)
+            metrics: Заполняется по ходу потока (ttft, chunks, ...)
+        """
+        metrics = metrics if metrics is not None else StreamMetrics()
+        state = self._state()
+        self.stats["requests"] += 1
+        self.stats["streams"] += 1
+        start = time.perf_counter()
+        try:
+            async with state.session.post(self._url(path), json=payload) as response:
+                response.raise_for_status()
+                async for raw in response.content:
+                    line = raw.strip()
+                    if sse:
+                        if not line.startswith(b"data:"):
+                            continue
+                        line = line[5:].strip()
+                        if line == b"[DONE]":
+                            break
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"LLM stream error: {chunk['error']}")
+                    delta = extract(chunk)
+                    if delta:
+                        if metrics.ttft is None:
+                            metrics.ttft = time.perf_counter() - start
+                        metrics.chunks += 1
+                        metrics.chars += len(delta)
+                        yield delta
+        finally:
+            metrics.duration = time.perf_counter() - start
+            self.stream_metrics.append(metrics)
+
+    def get_stats(self) -> Dict[str, Any]:
+        ttfts = [m.ttft for m in self.stream_metrics if m.ttft is not None]
+        return {
+            **self.stats,
+            "avg_ttft_ms": round(sum(ttfts) / len(ttfts) * 1000, 1) if ttfts else None,
+        }
+
+    async def aclose(self):
+        """Закрыть сессию текущего event loop"""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.session.close()
+
+
+_clients: Dict[Tuple, LLMHTTPClient] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(base_url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 120) -> LLMHTTPClient:
+    """Общий клиент сервера (один пул соединений на процесс и event loop)"""
+    key = (base_url.rstrip("/"), tuple(sorted((headers or {}).items())), timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = LLMHTTPClient(base_url, headers, timeout)
+        return client
+
+
+async def close_shared_clients():
+    """Закрыть сессии общих клиентов в текущем event loop"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        await client.aclose()
@@ -130,6 +130,7 @@ class MasterAgent:
 
         await self.autonomous.stop()
         await self.trader.stop()
+        await self.ai_engine.aclose()
         await self.api.stop()
         
         if self.telegram_bot:
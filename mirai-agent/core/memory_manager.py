@@ -18,17 +18,33 @@ Features:
 - ✅ Knowledge base
 - ✅ RAG-ready (embeddings support)
 - ✅ Session management
+- ✅ Pooled WAL connections + group-commit for messages
+- ✅ Knowledge search: FTS5 + in-memory vector index (hybrid ranking)
 """
 
+import array
 import json
 import logging
+import queue
+import re
 import sqlite3
+import threading
+import time
 import uuid
+from concurrent.futures import Future
 from contextlib import contextmanager, nullcontext
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - semantic search needs numpy
+    np = None
+    NUMPY_AVAILABLE = False
 
 try:
     from utils.performance_tracker import performance_tracker
@@ -179,6 +195,241 @@ class Knowledge:
         return d
 
 
+def pack_embedding(embedding: Optional[Sequence[float]]) -> Optional[bytes]:
+    """Pack embedding as float32 BLOB"""
+    if not embedding:
+        return None
+    return array.array("f", embedding).tobytes()
+
+
+def unpack_embedding(blob: Any) -> Optional[List[float]]:
+    """Decode embedding column (float32 BLOB, or legacy JSON text)"""
+    if not blob:
+        return None
+    if isinstance(blob, str):
+        return json.loads(blob)
+    values = array.array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Knowledge Vector Index
+# ═══════════════════════════════════════════════════════════════════
+
+
+class KnowledgeVectorIndex:
+    """
+    In-memory matrix of L2-normalised knowledge embeddings
+
+    Ранжирование одним векторизованным dot product вместо
+    json.loads + сравнения в Python по каждой строке.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._initial_capacity = initial_capacity
+        self.dim: Optional[int] = None
+        self.size = 0
+        self.loaded_max_id = 0  # rows up to this id came from the initial load
+        self._ids = None
+        self._matrix = None
+
+    def _ensure_capacity(self, needed: int):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(self._initial_capacity, capacity * 2, needed)
+        matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        if self.size:
+            matrix[: self.size] = self._matrix[: self.size]
+            ids[: self.size] = self._ids[: self.size]
+        self._matrix, self._ids = matrix, ids
+
+    def add_many(self, ids: Sequence[int], vectors: "np.ndarray") -> int:
+        """Append vectors; rows with a different dimension are skipped"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(vectors):
+            return 0
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                return 0
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._ensure_capacity(self.size + len(vectors))
+            end = self.size + len(vectors)
+            self._matrix[self.size : end] = vectors / norms
+            self._ids[self.size : end] = ids
+            self.size = end
+            return len(vectors)
+
+    def add(self, knowledge_id: int, embedding: Sequence[float]) -> bool:
+        return self.add_many([knowledge_id], np.asarray([embedding], dtype=np.float32)) == 1
+
+    def search(self, query: Sequence[float], k: int = 10) -> List[Tuple[int, float]]:
+        """Return [(knowledge_id, cosine_score)] best first"""
+        with self._lock:
+            if not self.size:
+                return []
+            q = np.asarray(query, dtype=np.float32)
+            if q.shape != (self.dim,):
+                return []
+            norm = np.linalg.norm(q)
+            if norm == 0:
+                return []
+            scores = self._matrix[: self.size] @ (q / norm)
+            ids = self._ids[: self.size]
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Connection Pool
+# ═══════════════════════════════════════════════════════════════════
+
+
+class SQLiteConnectionPool:
+    """
+    Per-thread SQLite connection pool
+
+    Каждый поток получает одно долгоживущее соединение (WAL, tuned pragmas)
+    вместо connect/close на каждую операцию.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        cache_size_kb: int = 16384,
+        mmap_size: int = 64 * 1024 * 1024,
+        synchronous: str = "NORMAL",
+        busy_timeout_ms: int = 5000,
+    ):
+        self.db_path = Path(db_path)
+        self.pragmas = [
+            "PRAGMA journal_mode=WAL",
+            f"PRAGMA synchronous={synchronous}",
+            f"PRAGMA cache_size=-{int(cache_size_kb)}",
+            f"PRAGMA mmap_size={int(mmap_size)}",
+            "PRAGMA temp_store=MEMORY",
+            f"PRAGMA busy_timeout={int(busy_timeout_ms)}",
+        ]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self.stats = {"created": 0, "reused": 0, "closed": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Access columns by name
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._lock:
+                self.stats["reused"] += 1
+            return conn
+
+        conn = self._connect()
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+            self.stats["created"] += 1
+        return conn
+
+    def close_all(self):
+        """Close every pooled connection (idempotent)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self.stats["closed"] += len(connections)
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # Fresh thread-local store: every thread reconnects lazily on next use
+        self._local = threading.local()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open"] = len(self._connections)
+        return stats
+
+
+class _MessageWriteBatcher:
+    """
+    Group-commit writer for add_message()
+
+    Собирает INSERT INTO messages + UPDATE sessions от многих потоков
+    и коммитит их одной транзакцией в фоновом потоке.
+    """
+
+    _STOP = object()
+
+    def __init__(self, manager: "MemoryManager", max_batch_size: int = 64, window_ms: float = 2.0):
+        self.manager = manager
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="mirai-memory-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, message: Message) -> "Future[int]":
+        future: "Future[int]" = Future()
+        self._queue.put((message, future))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+
+            batch = [item]
+            deadline = time.perf_counter() + self.window
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is self._STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: List[Tuple[Message, "Future[int]"]]):
+        try:
+            ids = self.manager._write_messages([message for message, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), message_id in zip(batch, ids):
+            future.set_result(message_id)
+
+    def close(self, timeout: float = 5.0):
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+
 # ═══════════════════════════════════════════════════════════════════
 # Memory Manager
 # ═══════════════════════════════════════════════════════════════════
@@ -196,13 +447,25 @@ class MemoryManager:
     - База знаний
     """
 
-    def __init__(self, db_path: str = "data/mirai_memory.db", max_messages: int = 12):
+    def __init__(
+        self,
+        db_path: str = "data/mirai_memory.db",
+        max_messages: int = 12,
+        batch_writes: bool = False,
+        batch_size: int = 64,
+        batch_window_ms: float = 2.0,
+        embedding_fn: Optional[Callable[[str], Sequence[float]]] = None,
+    ):
         """
         Initialize Memory Manager
 
         Args:
             db_path: Path to SQLite database
             max_messages: Max messages in short-term memory
+            batch_writes: Group concurrent add_message() calls into one transaction
+            batch_size: Max messages per group commit
+            batch_window_ms: How long the writer waits to fill a batch
+            embedding_fn: Text -> embedding, used for semantic knowledge search
         """
         self.logger = logging.getLogger(__name__)
         self._metrics_enabled = performance_tracker is not None
@@ -212,25 +475,61 @@ class MemoryManager:
         # Create data directory if needed
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
+        self._pool = SQLiteConnectionPool(self.db_path)
+        self._stats_lock = threading.Lock()
+        self._commit_stats = {
+            "commits": 0,
+            "commit_total_ms": 0.0,
+            "commit_max_ms": 0.0,
+            "batches": 0,
+            "batched_messages": 0,
+        }
+
+        self.embedding_fn = embedding_fn
+        self._fts_enabled = False
+        self._vector_index: Optional[KnowledgeVectorIndex] = None
+        self._vector_index_lock = threading.Lock()
+
         # Initialize database
         self._init_database()
 
+        self._batcher: Optional[_MessageWriteBatcher] = None
+        if batch_writes:
+            self._batcher = _MessageWriteBatcher(self, batch_size, batch_window_ms)
+
         self.logger.info(f"Memory Manager initialized: {self.db_path}")
 
     @contextmanager
     def _get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row  # Access columns by name
+        """Context manager for pooled database connections (one transaction)"""
+        conn = self._pool.acquire()
         try:
             yield conn
-            conn.commit()
+            self._commit(conn)
         except Exception as e:
             conn.rollback()
             self.logger.error(f"Database error: {e}", exc_info=True)
             raise
-        finally:
-            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection):
+        """Commit and record commit latency"""
+        start = time.perf_counter()
+        with self._track("commit"):
+            conn.commit()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._commit_stats["commits"] += 1
+            self._commit_stats["commit_total_ms"] += elapsed_ms
+            self._commit_stats["commit_max_ms"] = max(
+                self._commit_stats["commit_max_ms"], elapsed_ms
+            )
+
+    def close(self):
+        """Flush pending batched writes and close pooled connections"""
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+        self._pool.close_all()
 
     def _track(self, operation: str, metadata: Optional[Dict[str, str]] = None):
         """Return performance tracking context manager if metrics are enabled."""
@@ -346,9 +645,62 @@ class MemoryManager:
             """
             )
 
+            self._migrate_knowledge_embeddings(cursor)
+            self._fts_enabled = self._init_knowledge_fts(cursor)
+
             conn.commit()
             self.logger.info("Database schema initialized")
 
+    def _migrate_knowledge_embeddings(self, cursor: sqlite3.Cursor):
+        """Convert legacy JSON-text embeddings to float32 BLOBs"""
+        cursor.execute(
+            "SELECT id, embedding FROM knowledge WHERE typeof(embedding) = 'text'"
+        )
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany(
+                "UPDATE knowledge SET embedding = ? WHERE id = ?",
+                [(pack_embedding(json.loads(row["embedding"])), row["id"]) for row in rows],
+            )
+            self.logger.info(f"Migrated {len(rows)} knowledge embeddings to BLOB")
+
+    def _init_knowledge_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """Create FTS5 index over knowledge(key, value), kept in sync by triggers"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'knowledge_fts'"
+        )
+        existed = cursor.fetchone() is not None
+        try:
+            cursor.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts
+                USING fts5(key, value, content='knowledge', content_rowid='id')
+            """
+            )
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"FTS5 unavailable, falling back to LIKE search: {e}")
+            return False
+
+        cursor.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS knowledge_fts_ai AFTER INSERT ON knowledge BEGIN
+                INSERT INTO knowledge_fts(rowid, key, value) VALUES (new.id, new.key, new.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS knowledge_fts_ad AFTER DELETE ON knowledge BEGIN
+                INSERT INTO knowledge_fts(knowledge_fts, rowid, key, value)
+                VALUES ('delete', old.id, old.key, old.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS knowledge_fts_au AFTER UPDATE OF key, value ON knowledge BEGIN
+                INSERT INTO knowledge_fts(knowledge_fts, rowid, key, value)
+                VALUES ('delete', old.id, old.key, old.value);
+                INSERT INTO knowledge_fts(rowid, key, value) VALUES (new.id, new.key, new.value);
+            END;
+        """
+        )
+        if not existed:
+            cursor.execute("INSERT INTO knowledge_fts(knowledge_fts) VALUES ('rebuild')")
+        return True
+
     # ═══════════════════════════════════════════════════════════════
     # Session Management
     # ═══════════════════════════════════════════════════════════════
@@ -453,8 +805,23 @@ class MemoryManager:
             "role": message.role,
         }
         with self._track("add_message", metadata):
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
+            if self._batcher is not None:
+                message_id = self._batcher.submit(message).result()
+            else:
+                message_id = self._write_messages([message])[0]
+
+            self.logger.debug(
+                f"Added message {message_id} to session {message.session_id}"
+            )
+            return message_id
+
+    def _write_messages(self, messages: List[Message]) -> List[int]:
+        """Insert messages and bump their sessions in a single transaction"""
+        message_ids = []
+        session_counts: Dict[str, int] = {}
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for message in messages:
                 cursor.execute(
                     """
                     INSERT INTO messages (session_id, role, content, timestamp, tokens, model)
@@ -469,24 +836,28 @@ class MemoryManager:
                         message.model,
                     ),
                 )
-
-                message_id = cursor.lastrowid
-
-                # Update session message count
-                cursor.execute(
-                    """
-                    UPDATE sessions 
-                    SET message_count = message_count + 1,
-                        last_active = ?
-                    WHERE id = ?
-                """,
-                    (datetime.now(), message.session_id),
+                message_ids.append(cursor.lastrowid)
+                session_counts[message.session_id] = (
+                    session_counts.get(message.session_id, 0) + 1
                 )
 
-            self.logger.debug(
-                f"Added message {message_id} to session {message.session_id}"
+            # Update session message count (one UPDATE per session, not per message)
+            now = datetime.now()
+            cursor.executemany(
+                """
+                UPDATE sessions 
+                SET message_count = message_count + ?,
+                    last_active = ?
+                WHERE id = ?
+            """,
+                [(count, now, session_id) for session_id, count in session_counts.items()],
             )
-            return message_id
+
+        if len(messages) > 1 or self._batcher is not None:
+            with self._stats_lock:
+                self._commit_stats["batches"] += 1
+                self._commit_stats["batched_messages"] += len(messages)
+        return message_ids
 
     def get_recent_messages(
         self, session_id: str, limit: Optional[int] = None
@@ -743,11 +1114,32 @@ class MemoryManager:
                     knowledge.confidence,
                     knowledge.created_at,
                     knowledge.updated_at,
-                    json.dumps(knowledge.embedding) if knowledge.embedding else None,
+                    pack_embedding(knowledge.embedding),
                 ),
             )
-
-            return cursor.lastrowid
+            knowledge_id = cursor.lastrowid
+
+        # Keep the in-memory vector index in sync (only if already loaded)
+        if knowledge.embedding and NUMPY_AVAILABLE:
+            with self._vector_index_lock:
+                index = self._vector_index
+                if index is not None and knowledge_id > index.loaded_max_id:
+                    index.add(knowledge_id, knowledge.embedding)
+
+        return knowledge_id
+
+    def _row_to_knowledge(self, row: sqlite3.Row) -> Knowledge:
+        return Knowledge(
+            id=row["id"],
+            category=row["category"],
+            key=row["key"],
+            value=row["value"],
+            source=row["source"],
+            confidence=row["confidence"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+            embedding=unpack_embedding(row["embedding"]),
+        )
 
     def get_knowledge(
         self, category: Optional[str] = None, key: Optional[str] = None
@@ -782,59 +1174,142 @@ class MemoryManager:
                 """
                 )
 
-            knowledge_list = []
-            for row in cursor.fetchall():
-                embedding = json.loads(row["embedding"]) if row["embedding"] else None
-                knowledge_list.append(
-                    Knowledge(
-                        id=row["id"],
-                        category=row["category"],
-                        key=row["key"],
-                        value=row["value"],
-                        source=row["source"],
-                        confidence=row["confidence"],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"]),
-                        embedding=embedding,
-                    )
-                )
-            return knowledge_list
-
-    def search_knowledge(self, query: str) -> List[Knowledge]:
-        """
-        Simple text search in knowledge base
+            return [self._row_to_knowledge(row) for row in cursor.fetchall()]
 
-        For RAG with embeddings, use get_knowledge() and compare embeddings
-        """
+    def _get_knowledge_by_ids(self, ids: List[int]) -> List[Knowledge]:
+        """Fetch knowledge rows preserving the order of ids"""
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """
-                SELECT * FROM knowledge 
-                WHERE key LIKE ? OR value LIKE ?
-                ORDER BY confidence DESC, updated_at DESC
-                LIMIT 10
-            """,
-                (f"%{query}%", f"%{query}%"),
+                f"SELECT * FROM knowledge WHERE id IN ({placeholders})", ids
             )
+            by_id = {row["id"]: self._row_to_knowledge(row) for row in cursor.fetchall()}
+        return [by_id[i] for i in ids if i in by_id]
 
-            knowledge_list = []
-            for row in cursor.fetchall():
-                embedding = json.loads(row["embedding"]) if row["embedding"] else None
-                knowledge_list.append(
-                    Knowledge(
-                        id=row["id"],
-                        category=row["category"],
-                        key=row["key"],
-                        value=row["value"],
-                        source=row["source"],
-                        confidence=row["confidence"],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"]),
-                        embedding=embedding,
-                    )
+    def _get_vector_index(self) -> Optional[KnowledgeVectorIndex]:
+        """Load all knowledge embeddings into the vector index on first use"""
+        if not NUMPY_AVAILABLE:
+            return None
+        if self._vector_index is not None:
+            return self._vector_index
+
+        with self._vector_index_lock:
+            if self._vector_index is None:
+                index = KnowledgeVectorIndex()
+                with self._get_connection() as conn:
+                    rows = conn.execute(
+                        "SELECT id, embedding FROM knowledge WHERE embedding IS NOT NULL"
+                    ).fetchall()
+                by_dim: Dict[int, Tuple[List[int], List[bytes]]] = {}
+                for row in rows:
+                    blob = row["embedding"]
+                    ids, blobs = by_dim.setdefault(len(blob), ([], []))
+                    ids.append(row["id"])
+                    blobs.append(blob)
+                if by_dim:
+                    # Index the dominant dimension; mixed-model rows are ignored
+                    ids, blobs = max(by_dim.values(), key=lambda item: len(item[0]))
+                    matrix = np.frombuffer(b"".join(blobs), dtype=np.float32)
+                    index.add_many(ids, matrix.reshape(len(ids), -1))
+                index.loaded_max_id = max((row["id"] for row in rows), default=0)
+                self._vector_index = index
+                self.logger.info(f"Knowledge vector index loaded: {index.size} vectors")
+        return self._vector_index
+
+    @staticmethod
+    def _fts_query(query: str, any_term: bool = False) -> Optional[str]:
+        """Build a safe FTS5 MATCH expression (prefix match per token)"""
+        tokens = re.findall(r"\w+", query, flags=re.UNICODE)
+        if not tokens:
+            return None
+        joiner = " OR " if any_term else " "
+        return joiner.join(f'"{token}"*' for token in tokens)
+
+    def _search_fts(self, query: str, k: int, any_term: bool = False) -> List[int]:
+        """Knowledge ids ranked by bm25 (falls back to LIKE without FTS5)"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            match = self._fts_query(query, any_term) if self._fts_enabled else None
+            if match:
+                cursor.execute(
+                    """
+                    SELECT knowledge_fts.rowid AS id FROM knowledge_fts
+                    JOIN knowledge ON knowledge.id = knowledge_fts.rowid
+                    WHERE knowledge_fts MATCH ?
+                    ORDER BY bm25(knowledge_fts), knowledge.confidence DESC
+                    LIMIT ?
+                """,
+                    (match, k),
                 )
-            return knowledge_list
+            else:
+                cursor.execute(
+                    """
+                    SELECT id FROM knowledge 
+                    WHERE key LIKE ? OR value LIKE ?
+                    ORDER BY confidence DESC, updated_at DESC
+                    LIMIT ?
+                """,
+                    (f"%{query}%", f"%{query}%", k),
+                )
+            return [row["id"] for row in cursor.fetchall()]
+
+    def _search_semantic(
+        self, query: str, k: int, query_embedding: Optional[Sequence[float]]
+    ) -> Optional[List[int]]:
+        """Knowledge ids ranked by cosine similarity, or None if unavailable"""
+        if query_embedding is None and self.embedding_fn is not None:
+            query_embedding = self.embedding_fn(query)
+        if query_embedding is None:
+            return None
+        index = self._get_vector_index()
+        if index is None:
+            return None
+        return [knowledge_id for knowledge_id, _ in index.search(query_embedding, k)]
+
+    def search_knowledge(
+        self,
+        query: str,
+        k: int = 10,
+        mode: str = "hybrid",
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Knowledge]:
+        """
+        Search knowledge base
+
+        Args:
+            query: Text query
+            k: Max results
+            mode: 'fts' (bm25 over key/value), 'semantic' (embedding cosine)
+                  or 'hybrid' (reciprocal rank fusion of both)
+            query_embedding: Precomputed query embedding (else embedding_fn)
+
+        Semantic/hybrid degrade to FTS when no query embedding is available.
+        """
+        if mode not in ("fts", "semantic", "hybrid"):
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        with self._track("search_knowledge", {"mode": mode, "k": str(k)}):
+            if mode == "fts":
+                return self._get_knowledge_by_ids(self._search_fts(query, k))
+
+            candidates = k if mode == "semantic" else k * 4
+            semantic_ids = self._search_semantic(query, candidates, query_embedding)
+            if semantic_ids is None:
+                return self._get_knowledge_by_ids(self._search_fts(query, k))
+            if mode == "semantic":
+                return self._get_knowledge_by_ids(semantic_ids)
+
+            # Reciprocal rank fusion: robust to incomparable bm25/cosine scales
+            fts_ids = self._search_fts(query, candidates, any_term=True)
+            fused: Dict[int, float] = {}
+            for ranking in (semantic_ids, fts_ids):
+                for rank, knowledge_id in enumerate(ranking):
+                    fused[knowledge_id] = fused.get(knowledge_id, 0.0) + 1.0 / (60 + rank)
+            ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+            return self._get_knowledge_by_ids(ranked)
 
     # ═══════════════════════════════════════════════════════════════
     # Cleanup & Maintenance
@@ -934,6 +1409,7 @@ class MemoryManager:
                     if self.db_path.exists()
                     else 0
                 ),
+                "connection_pool": self.get_pool_stats(),
             }
 
             metadata.update(
@@ -945,6 +1421,22 @@ class MemoryManager:
 
         return stats
 
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Connection pool, commit latency and group-commit statistics"""
+        with self._stats_lock:
+            commit_stats = dict(self._commit_stats)
+        commits = commit_stats["commits"]
+        batches = commit_stats["batches"]
+        return {
+            "connections": self._pool.get_stats(),
+            "batch_writes": self._batcher is not None,
+            "commits": commits,
+            "avg_commit_ms": commit_stats["commit_total_ms"] / commits if commits else 0.0,
+            "max_commit_ms": commit_stats["commit_max_ms"],
+            "batches": batches,
+            "avg_batch_size": commit_stats["batched_messages"] / batches if batches else 0.0,
+        }
+
 
 # ═══════════════════════════════════════════════════════════════════
 # Convenience Functions
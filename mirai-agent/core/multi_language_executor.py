@@ -1,24 +1,41 @@
 """
 MULTI-LANGUAGE EXECUTOR - Выполнение кода на разных языках
 Поддержка: Python, JavaScript, C/C++, Go, Rust, Bash
+
+Скомпилированные артефакты (C, C++, Go, Rust, TypeScript через tsc)
+кэшируются по (язык, хэш исходника, версия компилятора, флаги) —
+повторный запуск того же кода не перекомпилирует его.
 """
 
 import subprocess
 import tempfile
 import os
 import asyncio
-from typing import Dict, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import shutil
 
+from core.compile_cache import DEFAULT_MAX_BYTES, CompileCache
+
 
 class MultiLanguageExecutor:
     """Выполнение кода на множестве языков программирования"""
 
-    def __init__(self, timeout: int = 30):
+    def __init__(
+        self,
+        timeout: int = 30,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
         self.timeout = timeout
         self.working_dir = "/root/mirai/mirai-agent/temp_execution"
         os.makedirs(self.working_dir, exist_ok=True)
 
+        # Кэш скомпилированных артефактов
+        self.compile_cache = CompileCache(
+            cache_dir or os.path.join(self.working_dir, ".compile_cache"),
+            max_bytes=cache_max_bytes,
+        )
+
     async def execute_code(self, code: str, language: str) -> Dict[str, str]:
         """
         Выполнить код на указанном языке
@@ -114,8 +131,77 @@ class MultiLanguageExecutor:
         finally:
             os.unlink(filepath)
 
+    async def _compile_and_run(
+        self,
+        language: str,
+        code: str,
+        compiler: str,
+        suffix: str,
+        flags: List[str],
+        build_cmd: Callable[[str, str], List[str]],
+        run_cmd: Callable[[str], List[str]] = lambda artifact: [artifact],
+        version_args: Optional[List[str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Скомпилировать (или взять из кэша) и выполнить
+
+        build_cmd(source, output) возвращает команду компиляции,
+        run_cmd(artifact) — команду запуска артефакта.
+        """
+        version = self.compile_cache.compiler_version(compiler, version_args)
+        key = self.compile_cache.key(language, code, version, flags)
+
+        async def build(output: str) -> Dict[str, str]:
+            with tempfile.NamedTemporaryFile(
+                mode="w", suffix=suffix, delete=False, dir=self.working_dir
+            ) as f:
+                f.write(code)
+                source_file = f.name
+            try:
+                return await self._run_command(build_cmd(source_file, output))
+            finally:
+                if os.path.exists(source_file):
+                    os.unlink(source_file)
+
+        artifact, compile_result = await self.compile_cache.get_or_build(key, build)
+        if artifact is None:
+            return {
+                "success": False,
+                "output": compile_result["output"],
+                "error": f"❌ Ошибка компиляции:\n{compile_result['error']}",
+                "execution_time": compile_result["execution_time"],
+            }
+
+        # Выполнение
+        run_result = await self._run_command(run_cmd(str(artifact)))
+        run_result["compile_cached"] = compile_result is None
+        return run_result
+
+    def get_compile_cache_stats(self) -> Dict:
+        """Статистика кэша компиляции (hit rate, сэкономленные секунды)"""
+        return self.compile_cache.get_stats()
+
     async def _execute_typescript(self, code: str) -> Dict[str, str]:
-        """Выполнить TypeScript код (через ts-node)"""
+        """Выполнить TypeScript код (tsc + node с кэшем, иначе ts-node)"""
+        if shutil.which("tsc") and shutil.which("node"):
+            def tsc_build(source: str, output: str) -> List[str]:
+                # tsc пишет <name>.js рядом с --outDir, переносим в output
+                out_dir = output + ".d"
+                js_file = os.path.join(out_dir, os.path.basename(source)[:-3] + ".js")
+                return [
+                    "sh", "-c",
+                    'tsc --target es2020 --module commonjs --outDir "$1" "$2" '
+                    '&& mv "$3" "$4"; rc=$?; rm -rf "$1"; exit $rc',
+                    "tsc", out_dir, source, js_file, output,
+                ]
+
+            return await self._compile_and_run(
+                "typescript", code, "tsc", ".ts",
+                ["--target", "es2020", "--module", "commonjs"],
+                tsc_build,
+                run_cmd=lambda artifact: ["node", artifact],
+            )
+
         # Проверяем ts-node
         if not shutil.which("ts-node"):
             # Пробуем через npx
@@ -153,35 +239,10 @@ class MultiLanguageExecutor:
                 "execution_time": 0,
             }
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".c", delete=False, dir=self.working_dir
-        ) as f:
-            f.write(code)
-            source_file = f.name
-
-        executable = source_file.replace(".c", ".out")
-
-        try:
-            # Компиляция
-            compile_result = await self._run_command(
-                ["gcc", source_file, "-o", executable]
-            )
-            if not compile_result["success"]:
-                return {
-                    "success": False,
-                    "output": compile_result["output"],
-                    "error": f"❌ Ошибка компиляции:\n{compile_result['error']}",
-                    "execution_time": compile_result["execution_time"],
-                }
-
-            # Выполнение
-            run_result = await self._run_command([executable])
-            return run_result
-        finally:
-            if os.path.exists(source_file):
-                os.unlink(source_file)
-            if os.path.exists(executable):
-                os.unlink(executable)
+        return await self._compile_and_run(
+            "c", code, "gcc", ".c", [],
+            lambda source, output: ["gcc", source, "-o", output],
+        )
 
     async def _execute_cpp(self, code: str) -> Dict[str, str]:
         """Компилировать и выполнить C++ код"""
@@ -193,35 +254,10 @@ class MultiLanguageExecutor:
                 "execution_time": 0,
             }
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".cpp", delete=False, dir=self.working_dir
-        ) as f:
-            f.write(code)
-            source_file = f.name
-
-        executable = source_file.replace(".cpp", ".out")
-
-        try:
-            # Компиляция
-            compile_result = await self._run_command(
-                ["g++", source_file, "-o", executable, "-std=c++17"]
-            )
-            if not compile_result["success"]:
-                return {
-                    "success": False,
-                    "output": compile_result["output"],
-                    "error": f"❌ Ошибка компиляции:\n{compile_result['error']}",
-                    "execution_time": compile_result["execution_time"],
-                }
-
-            # Выполнение
-            run_result = await self._run_command([executable])
-            return run_result
-        finally:
-            if os.path.exists(source_file):
-                os.unlink(source_file)
-            if os.path.exists(executable):
-                os.unlink(executable)
+        return await self._compile_and_run(
+            "cpp", code, "g++", ".cpp", ["-std=c++17"],
+            lambda source, output: ["g++", source, "-o", output, "-std=c++17"],
+        )
 
     async def _execute_go(self, code: str) -> Dict[str, str]:
         """Выполнить Go код"""
@@ -233,17 +269,12 @@ class MultiLanguageExecutor:
                 "execution_time": 0,
             }
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".go", delete=False, dir=self.working_dir
-        ) as f:
-            f.write(code)
-            filepath = f.name
-
-        try:
-            result = await self._run_command(["go", "run", filepath])
-            return result
-        finally:
-            os.unlink(filepath)
+        # go build вместо go run: бинарник можно переиспользовать
+        return await self._compile_and_run(
+            "go", code, "go", ".go", [],
+            lambda source, output: ["go", "build", "-o", output, source],
+            version_args=["version"],
+        )
 
     async def _execute_rust(self, code: str) -> Dict[str, str]:
         """Компилировать и выполнить Rust код"""
@@ -255,35 +286,10 @@ class MultiLanguageExecutor:
                 "execution_time": 0,
             }
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".rs", delete=False, dir=self.working_dir
-        ) as f:
-            f.write(code)
-            source_file = f.name
-
-        executable = source_file.replace(".rs", "")
-
-        try:
-            # Компиляция
-            compile_result = await self._run_command(
-                ["rustc", source_file, "-o", executable]
-            )
-            if not compile_result["success"]:
-                return {
-                    "success": False,
-                    "output": compile_result["output"],
-                    "error": f"❌ Ошибка компиляции:\n{compile_result['error']}",
-                    "execution_time": compile_result["execution_time"],
-                }
-
-            # Выполнение
-            run_result = await self._run_command([executable])
-            return run_result
-        finally:
-            if os.path.exists(source_file):
-                os.unlink(source_file)
-            if os.path.exists(executable):
-                os.unlink(executable)
+        return await self._compile_and_run(
+            "rust", code, "rustc", ".rs", [],
+            lambda source, output: ["rustc", source, "-o", output],
+        )
 
     async def _execute_bash(self, code: str) -> Dict[str, str]:
         """Выполнить Bash скрипт"""
@@ -8,7 +8,9 @@ import re
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from core.response_cache import ResponseCache, get_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -62,10 +64,12 @@ class AdvancedLearningEngine:
     6. VERIFICATION - итоговая верификация
     """
 
-    def __init__(self, ai_agent, sandbox, quality_analyzer):
+    def __init__(self, ai_agent, sandbox, quality_analyzer, response_cache: Optional[ResponseCache] = None):
         self.ai = ai_agent
         self.sandbox = sandbox
         self.quality = quality_analyzer
+        # Исследование одной и той же технологии не требует повторного запроса к LLM
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
         self.min_quality_score = 0.6  # минимум "D" grade
         self.min_proficiency = 0.5
 
@@ -290,7 +294,7 @@ What is {technology}? What problem does it solve? (3-5 sentences)
 
 Be thorough but concise. Focus on actionable information."""
 
-        research_data = self.ai.ask(prompt)
+        research_data = self._ask_cached("advanced_learning.research", prompt)
 
         # Better quality scoring с учётом GitHub примеров
         quality = 0.0
@@ -323,6 +327,18 @@ Be thorough but concise. Focus on actionable information."""
             quality_score=min(quality, 1.0),
         )
 
+    def _ask_cached(self, caller: str, prompt: str) -> str:
+        """self.ai.ask() через кэш ответов (ошибки не кэшируются)"""
+        if self.response_cache is None:
+            return self.ai.ask(prompt)
+        return self.response_cache.cached_call(
+            caller,
+            lambda: self.ai.ask(prompt),
+            getattr(self.ai, "model", "default"),
+            [{"role": "user", "content": prompt}],
+            validate=lambda text: bool(text) and not text.startswith("Error:"),
+        )
+
     def _phase_synthesis(
         self, technology: str, research: LearningArtifact, depth: str
     ) -> LearningArtifact:
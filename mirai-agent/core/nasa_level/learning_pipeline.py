@@ -1,17 +1,26 @@
 """
 NASA-Level Learning Pipeline
 Manages learning queue with priorities, dependencies, and retry logic
+
+Scheduling is event-driven (DAG):
+- a task with unmet dependencies is parked, keyed by each missing dependency
+- completing a technology releases exactly the tasks waiting on it
+- ready tasks are dispatched by priority up to max_concurrent
+- state snapshots are written on change, debounced
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
+import os
+import threading
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from queue import PriorityQueue
 from typing import Dict, List, Optional, Set
 
 logger = logging.getLogger(__name__)
@@ -59,31 +68,78 @@ class LearningTask:
 
 
 class DependencyResolver:
-    """Resolves learning dependencies"""
+    """
+    Resolves learning dependencies
+
+    Tasks whose dependencies are not learned yet are parked in `waiting`
+    (dependency -> waiting technologies). mark_completed() returns the
+    technologies that became ready, mark_failed() the ones that can never run.
+    """
 
     def __init__(self):
         self.learned: Set[str] = set()
         self.in_progress: Set[str] = set()
+        self.failed: Set[str] = set()
+        self.waiting: Dict[str, Set[str]] = {}  # dependency -> blocked technologies
+        self.blocked: Dict[str, Set[str]] = {}  # technology -> missing dependencies
+
+    def missing(self, task: LearningTask) -> Set[str]:
+        """Dependencies that are not learned yet"""
+        return {dep for dep in task.dependencies if dep not in self.learned}
 
     def can_learn(self, task: LearningTask) -> bool:
         """Check if all dependencies are satisfied"""
-        for dep in task.dependencies:
-            if dep not in self.learned and dep not in self.in_progress:
-                return False
-        return True
+        return not self.missing(task)
+
+    def park(self, technology: str, missing: Set[str]):
+        """Block technology until every dependency in missing is learned"""
+        self.blocked[technology] = set(missing)
+        for dep in missing:
+            self.waiting.setdefault(dep, set()).add(technology)
 
     def mark_started(self, technology: str):
         """Mark technology as being learned"""
         self.in_progress.add(technology)
 
-    def mark_completed(self, technology: str):
-        """Mark technology as learned"""
+    def mark_completed(self, technology: str) -> List[str]:
+        """Mark technology as learned, return technologies it unblocked"""
         self.in_progress.discard(technology)
+        self.failed.discard(technology)
         self.learned.add(technology)
 
-    def mark_failed(self, technology: str):
-        """Mark technology learning as failed"""
+        released = []
+        for dependent in self.waiting.pop(technology, ()):
+            missing = self.blocked.get(dependent)
+            if missing is None:
+                continue
+            missing.discard(technology)
+            if not missing:
+                del self.blocked[dependent]
+                released.append(dependent)
+        return released
+
+    def mark_failed(self, technology: str) -> List[tuple]:
+        """
+        Mark technology learning as failed
+
+        Returns (dependent, failed dependency) for every waiting task that
+        can no longer run, transitively.
+        """
         self.in_progress.discard(technology)
+        self.failed.add(technology)
+
+        doomed = []
+        stack = [technology]
+        while stack:
+            failed = stack.pop()
+            for dependent in self.waiting.pop(failed, ()):
+                if self.blocked.pop(dependent, None) is not None:
+                    for deps in self.waiting.values():
+                        deps.discard(dependent)
+                    self.failed.add(dependent)
+                    doomed.append((dependent, failed))
+                    stack.append(dependent)
+        return doomed
 
 
 class LearningPipeline:
@@ -103,18 +159,34 @@ class LearningPipeline:
         metrics=None,
         max_concurrent: int = 2,
         state_file: str = "/tmp/learning_pipeline_state.json",
+        save_debounce: float = 1.0,
     ):
         self.learning_engine = learning_engine
         self.knowledge_manager = knowledge_manager
         self.metrics = metrics
         self.max_concurrent = max_concurrent
         self.state_file = Path(state_file)
+        self.save_debounce = save_debounce
 
-        self.queue: PriorityQueue = PriorityQueue()
+        # Ready tasks: (priority, sequence, technology); stale entries are skipped
+        self.queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()  # add_task may come from other threads
         self.tasks: Dict[str, LearningTask] = {}
         self.resolver = DependencyResolver()
         self.running = False
 
+        # Event loop plumbing (set while process_queue runs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._retries_pending = 0
+
+        # Debounced state snapshots
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_depth = 0
+        self.saves = 0
+
         # Stats
         self.total_completed = 0
         self.total_failed = 0
@@ -132,76 +204,162 @@ class LearningPipeline:
     ) -> LearningTask:
         """Add a new learning task to the queue"""
 
-        if technology in self.tasks:
-            logger.info(f"📝 Task {technology} already exists, updating priority")
-            task = self.tasks[technology]
-            if priority.value < task.priority.value:
-                task.priority = priority
-            return task
-
-        task = LearningTask(
-            technology=technology,
-            depth=depth,
-            priority=priority,
-            dependencies=dependencies or [],
-        )
+        with self._lock:
+            if technology in self.tasks:
+                logger.info(f"📝 Task {technology} already exists, updating priority")
+                task = self.tasks[technology]
+                if priority.value < task.priority.value:
+                    task.priority = priority
+                    if task.status == TaskStatus.PENDING and technology not in self.resolver.blocked:
+                        self._push_ready(task)  # old heap entry becomes stale
+                    self._mark_dirty()
+                return task
+
+            task = LearningTask(
+                technology=technology,
+                depth=depth,
+                priority=priority,
+                dependencies=dependencies or [],
+            )
 
-        self.tasks[technology] = task
-        self.queue.put(task)
+            self.tasks[technology] = task
+            self._schedule(task)
 
         logger.info(f"➕ Added task: {technology} (priority: {priority.name})")
-        self._save_state()
+        self._mark_dirty()
 
         return task
 
     def add_batch(self, technologies: List[str], priority: Priority = Priority.NORMAL):
         """Add multiple technologies at once"""
-        for tech in technologies:
-            self.add_task(tech, priority=priority)
+        self._batch_depth += 1
+        try:
+            for tech in technologies:
+                self.add_task(tech, priority=priority)
+        finally:
+            self._batch_depth -= 1
+        self._mark_dirty()
         logger.info(f"➕ Added {len(technologies)} tasks to queue")
 
-    async def process_queue(self):
-        """Main processing loop - handle tasks with concurrency"""
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _push_ready(self, task: LearningTask):
+        heapq.heappush(self.queue, (task.priority.value, next(self._sequence), task.technology))
+        self._notify()
+
+    def _schedule(self, task: LearningTask):
+        """Queue task as ready, park it on missing dependencies, or fail it"""
+        missing = self.resolver.missing(task)
+        failed = missing & self.resolver.failed
+        if failed:
+            self._fail_blocked(task, f"dependency failed: {', '.join(sorted(failed))}")
+            return
+        if missing:
+            self.resolver.park(task.technology, missing)
+            logger.info(f"⏳ {task.technology} waiting for: {', '.join(sorted(missing))}")
+            return
+        self._push_ready(task)
+
+    def _pop_ready(self) -> Optional[LearningTask]:
+        with self._lock:
+            while self.queue:
+                priority, _, technology = heapq.heappop(self.queue)
+                task = self.tasks.get(technology)
+                if (
+                    task is not None
+                    and task.status in (TaskStatus.PENDING, TaskStatus.RETRYING)
+                    and task.priority.value == priority
+                ):
+                    task.status = TaskStatus.IN_PROGRESS
+                    return task
+        return None
+
+    def _fail_blocked(self, task: LearningTask, reason: str):
+        task.status = TaskStatus.FAILED
+        task.error = reason
+        task.completed_at = time.time()
+        self.total_failed += 1
+        logger.error(f"❌ {task.technology} skipped: {reason}")
+        self._fail_dependents(task.technology)
+
+    def _fail_dependents(self, technology: str):
+        """Fail every task waiting (transitively) on a failed technology"""
+        with self._lock:
+            for dependent_name, failed in self.resolver.mark_failed(technology):
+                dependent = self.tasks[dependent_name]
+                dependent.status = TaskStatus.FAILED
+                dependent.error = f"dependency failed: {failed}"
+                dependent.completed_at = time.time()
+                self.total_failed += 1
+                logger.error(f"❌ {dependent_name} skipped: {dependent.error}")
+
+    def _notify(self):
+        """Wake process_queue (safe from any thread)"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wakeup.set()
+        else:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def process_queue(self, until_idle: bool = False):
+        """
+        Main processing loop - dispatch ready tasks, sleep until something changes
+
+        Args:
+            until_idle: Return once no task is ready, running or awaiting a
+                        retry, instead of waiting for stop()
+        """
         self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
         logger.info(f"🚀 Starting pipeline with max_concurrent={self.max_concurrent}")
 
         active_tasks = set()
 
         try:
-            while self.running or not self.queue.empty() or active_tasks:
+            while True:
+                self._wakeup.clear()
+
                 # Start new tasks if we have capacity
-                while (
-                    len(active_tasks) < self.max_concurrent and not self.queue.empty()
-                ):
-                    task = self.queue.get_nowait()
-
-                    # Check dependencies
-                    if not self.resolver.can_learn(task):
-                        logger.info(f"⏳ {task.technology} waiting for dependencies")
-                        self.queue.put(task)  # Put back in queue
-                        await asyncio.sleep(1)
-                        continue
-
-                    # Start learning
-                    task_future = asyncio.create_task(self._process_task(task))
-                    active_tasks.add(task_future)
-
-                # Wait for any task to complete
-                if active_tasks:
-                    done, active_tasks = await asyncio.wait(
-                        active_tasks, timeout=1.0, return_when=asyncio.FIRST_COMPLETED
-                    )
-                else:
-                    await asyncio.sleep(1)
+                while len(active_tasks) < self.max_concurrent:
+                    task = self._pop_ready()
+                    if task is None:
+                        break
+                    active_tasks.add(asyncio.create_task(self._process_task(task)))
+
+                keep_waiting = self.running and not until_idle
+                if not (keep_waiting or active_tasks or self.queue or self._retries_pending):
+                    break
+
+                # Sleep until a task finishes or new work is queued/released
+                waiter = asyncio.create_task(self._wakeup.wait())
+                done, _ = await asyncio.wait(
+                    active_tasks | {waiter}, return_when=asyncio.FIRST_COMPLETED
+                )
+                waiter.cancel()
+                active_tasks -= done
 
-                # Save state periodically
-                self._save_state()
+            if self.resolver.blocked:
+                logger.warning(
+                    f"⏳ {len(self.resolver.blocked)} tasks still waiting for dependencies "
+                    f"that were never queued"
+                )
 
         except KeyboardInterrupt:
             logger.info("⚠️  Pipeline interrupted by user")
         finally:
             self.running = False
-            self._save_state()
+            self._flush_state()
+            self._loop = None
+            self._wakeup = None
             logger.info("🛑 Pipeline stopped")
 
     async def _process_task(self, task: LearningTask):
@@ -209,6 +367,7 @@ class LearningPipeline:
         task.status = TaskStatus.IN_PROGRESS
         task.started_at = time.time()
         self.resolver.mark_started(task.technology)
+        self._mark_dirty()
 
         logger.info(f"🎯 Learning: {task.technology} (depth: {task.depth})")
 
@@ -229,8 +388,11 @@ class LearningPipeline:
                     "execution_time": result.execution_time,
                 }
 
-                self.resolver.mark_completed(task.technology)
+                with self._lock:
+                    for technology in self.resolver.mark_completed(task.technology):
+                        self._push_ready(self.tasks[technology])
                 self.total_completed += 1
+                self._mark_dirty()
 
                 duration = task.completed_at - task.started_at
                 logger.info(
@@ -267,33 +429,41 @@ class LearningPipeline:
             task.status = TaskStatus.RETRYING
             self.total_retries += 1
 
-            # Exponential backoff
+            # Exponential backoff, without holding a concurrency slot
             delay = 2**task.retry_count
             logger.warning(
                 f"⚠️  {task.technology} failed, retry {task.retry_count}/{task.max_retries} "
                 f"in {delay}s"
             )
 
-            await asyncio.sleep(delay)
-            self.queue.put(task)
+            self.resolver.in_progress.discard(task.technology)
+            self._retries_pending += 1
+            asyncio.get_running_loop().call_later(delay, self._requeue_retry, task)
+            self._mark_dirty()
 
         else:
             task.status = TaskStatus.FAILED
             task.completed_at = time.time()
-            self.resolver.mark_failed(task.technology)
             self.total_failed += 1
-
             logger.error(
                 f"❌ {task.technology} failed after {task.max_retries} retries. "
                 f"Errors: {task.error}"
             )
 
+            self._fail_dependents(task.technology)
+            self._mark_dirty()
+
             # Record failure
             if self.metrics:
                 self.metrics.record_learning(
                     technology=task.technology, success=False, errors=task.error
                 )
 
+    def _requeue_retry(self, task: LearningTask):
+        self._retries_pending -= 1
+        with self._lock:
+            self._push_ready(task)
+
     def get_status(self) -> Dict:
         """Get pipeline status"""
         pending = sum(1 for t in self.tasks.values() if t.status == TaskStatus.PENDING)
@@ -307,10 +477,11 @@ class LearningPipeline:
 
         return {
             "running": self.running,
-            "queue_size": self.queue.qsize(),
+            "queue_size": pending - len(self.resolver.blocked),
             "tasks": {
                 "total": len(self.tasks),
                 "pending": pending,
+                "waiting": len(self.resolver.blocked),
                 "in_progress": in_progress,
                 "completed": completed,
                 "failed": failed,
@@ -322,6 +493,43 @@ class LearningPipeline:
             },
         }
 
+    # ------------------------------------------------------------------
+    # State snapshots
+    # ------------------------------------------------------------------
+
+    def _mark_dirty(self):
+        """
+        Schedule a state snapshot
+
+        Inside process_queue the write is debounced by save_debounce seconds;
+        outside an event loop it happens right away (once per add_batch).
+        """
+        self._dirty = True
+        if self._batch_depth:
+            return
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._flush_state()
+            return
+        if self._save_handle is None:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                self._save_handle = loop.call_later(self.save_debounce, self._flush_state)
+            else:
+                loop.call_soon_threadsafe(self._mark_dirty)
+
+    def _flush_state(self):
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty:
+            self._dirty = False
+            self._save_state()
+
     def _save_state(self):
         """Save pipeline state to disk"""
         try:
@@ -346,7 +554,10 @@ class LearningPipeline:
                 "saved_at": datetime.now().isoformat(),
             }
 
-            self.state_file.write_text(json.dumps(state, indent=2))
+            tmp_path = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(state, indent=2))
+            os.replace(tmp_path, self.state_file)
+            self.saves += 1
 
         except Exception as e:
             logger.error(f"Failed to save state: {e}")
@@ -372,6 +583,7 @@ class LearningPipeline:
         """Stop the pipeline gracefully"""
         logger.info("🛑 Stopping pipeline...")
         self.running = False
+        self._notify()
 
 
 # Demo/Test
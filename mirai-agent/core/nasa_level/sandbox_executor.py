@@ -1,19 +1,194 @@
 """
 NASA-Level Sandbox Execution System
 Безопасное выполнение кода в изолированном окружении
+
+На POSIX код выполняется пулом заранее запущенных интерпретаторов
+(zygote): воркер получает код по pipe, делает fork() на каждый запуск,
+ребёнок ставит rlimits (CPU / память / размер и число файлов) и
+выполняет код в чистом namespace. os.wait4() даёт реальные пиковый RSS
+и CPU-время каждого запуска. Воркер заменяется после max_runs запусков
+или при любом сбое.
+
+Ребёнок запускается в своей группе процессов, и воркер сам следит за
+дедлайном: по его истечении вся группа получает SIGKILL, даже если код
+перехватил SIGALRM. Если не отвечает сам воркер, группу его текущего
+запуска убивает хост (SandboxWorker.close).
 """
 
+import json
 import logging
 import os
 import re
+import select
+import signal
+import struct
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Worker process: reads length-prefixed JSON requests on fd 0, forks a
+# child per request, sends the child's pid and then answers with exit
+# code, output and rusage on fd 1.
+WORKER_SOURCE = r"""
+import json, os, resource, select, shutil, signal, struct, sys, tempfile, time, traceback
+
+# Extra wall-clock time before the worker kills a run that survived its itimer
+KILL_GRACE = 0.5
+
+def read_exact(fd, size):
+    data = b""
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def write_all(fd, data):
+    while data:
+        data = data[os.write(fd, data):]
+
+def kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def wait_child(pid, deadline):
+    # pidfd wakes us up exactly when the child exits; polling is the fallback
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pidfd = None
+    delay = 0.001
+    try:
+        while True:
+            done, status, usage = os.wait4(pid, os.WNOHANG)
+            if done:
+                return status, usage, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                kill_group(pid)
+                _, status, usage = os.wait4(pid, 0)
+                return status, usage, True
+            if pidfd is not None:
+                select.select([pidfd], [], [], remaining)
+            else:
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.05)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+def child(request, limits, out, err, workdir, proto_fds):
+    os.setpgid(0, 0)
+    for fd in proto_fds:
+        os.close(fd)
+    os.dup2(out.fileno(), 1)
+    os.dup2(err.fileno(), 2)
+    os.chdir(workdir)
+    timeout = float(request["timeout"])
+    cpu = int(timeout) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (limits["memory_bytes"], limits["memory_bytes"]))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits["max_file_bytes"], limits["max_file_bytes"]))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limits["max_open_files"], limits["max_open_files"]))
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    code = 0
+    try:
+        exec(compile(request["code"], "<sandbox>", "exec"), {"__name__": "__main__"})
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        pass
+    os._exit(code)
+
+def run(request, limits, proto_fds):
+    proto_out = proto_fds[1]
+    workdir = tempfile.mkdtemp(prefix="sandbox_")
+    out, err = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child(request, limits, out, err, workdir, proto_fds)
+            finally:
+                os._exit(70)
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass
+        # the host learns the child's group first, to kill it if we get stuck
+        write_all(proto_out, struct.pack(">I", pid))
+        deadline = time.monotonic() + float(request["timeout"]) + KILL_GRACE
+        status, usage, timed_out = wait_child(pid, deadline)
+        kill_group(pid)  # leftovers the snippet forked
+        outputs = []
+        for f in (out, err):
+            f.seek(0)
+            outputs.append(f.read(limits["max_output_bytes"]).decode("utf-8", "replace"))
+        return {
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "timed_out": timed_out,
+            "stdout": outputs[0],
+            "stderr": outputs[1],
+            "max_rss": usage.ru_maxrss,
+            "cpu_time": usage.ru_utime + usage.ru_stime,
+        }
+    finally:
+        out.close()
+        err.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    limits = json.loads(sys.argv[1])
+    for name in limits.get("preload", []):
+        try:
+            __import__(name)
+        except Exception:
+            pass
+    proto_in, proto_out = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    while True:
+        header = read_exact(proto_in, 4)
+        if header is None:
+            return
+        request = json.loads(read_exact(proto_in, struct.unpack(">I", header)[0]))
+        payload = json.dumps(run(request, limits, (proto_in, proto_out))).encode()
+        write_all(proto_out, struct.pack(">I", len(payload)) + payload)
+
+main()
+"""
+
+# Modules imported once by each worker, so children get them for free
+DEFAULT_PRELOAD = [
+    "collections", "dataclasses", "datetime", "functools", "itertools",
+    "json", "math", "random", "re", "typing", "unittest",
+]
+
 
 class ExecutionStatus(Enum):
     SUCCESS = "success"
@@ -32,6 +207,173 @@ class ExecutionResult:
     memory_used: int
     exit_code: int
     security_score: float  # 0.0-1.0
+    cpu_time: float = 0.0
+
+
+class SandboxWorker:
+    """One pre-forked interpreter speaking the WORKER_SOURCE protocol"""
+
+    def __init__(self, limits: Dict, python: str = sys.executable):
+        self.process = subprocess.Popen(
+            [python, "-c", WORKER_SOURCE, json.dumps(limits)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.runs = 0
+        self.child_pid: Optional[int] = None
+
+    def run(self, code: str, timeout: float, grace: float = 5.0) -> Dict:
+        """Execute code in a fresh fork; raises TimeoutError/EOFError on a stuck/dead worker"""
+        payload = json.dumps({"code": code, "timeout": timeout}).encode()
+        self.process.stdin.write(struct.pack(">I", len(payload)) + payload)
+        self.process.stdin.flush()
+        self.runs += 1
+
+        deadline = time.monotonic() + timeout + grace
+        self.child_pid = struct.unpack(">I", self._read(4, deadline))[0]
+        header = self._read(4, deadline)
+        result = json.loads(self._read(struct.unpack(">I", header)[0], deadline))
+        self.child_pid = None
+        return result
+
+    def _read(self, size: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        data = b""
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError("sandbox worker did not answer")
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                raise EOFError("sandbox worker exited")
+            data += chunk
+        return data
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        # the run's group outlives a killed worker
+        if self.child_pid is not None:
+            try:
+                os.killpg(self.child_pid, signal.SIGKILL)
+            except OSError:
+                pass
+            self.child_pid = None
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+class SandboxWorkerPool:
+    """
+    Pool of SandboxWorker processes
+
+    Workers are spawned lazily up to size, recycled after max_runs
+    executions and replaced whenever they crash or stop answering.
+    Callers wait on a condition that both returning and discarding a
+    worker notify, so a freed slot is refilled by a waiting caller.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_runs: int = 50,
+        memory_limit_mb: int = 512,
+        max_file_bytes: int = 16 * 1024 * 1024,
+        max_open_files: int = 64,
+        max_output_bytes: int = 1024 * 1024,
+        preload: Optional[List[str]] = None,
+    ):
+        self.size = size
+        self.max_runs = max_runs
+        self.limits = {
+            "memory_bytes": memory_limit_mb * 1024 * 1024,
+            "max_file_bytes": max_file_bytes,
+            "max_open_files": max_open_files,
+            "max_output_bytes": max_output_bytes,
+            "preload": DEFAULT_PRELOAD if preload is None else preload,
+        }
+        self._idle: List[SandboxWorker] = []
+        self._cond = threading.Condition()
+        self._count = 0
+        self.stats = {"spawned": 0, "recycled": 0, "crashed": 0, "runs": 0}
+
+    def _acquire(self) -> SandboxWorker:
+        with self._cond:
+            while not self._idle and self._count >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._count += 1
+        try:
+            worker = SandboxWorker(self.limits)
+        except Exception:
+            self._free_slot()
+            raise
+        self.stats["spawned"] += 1
+        return worker
+
+    def _release(self, worker: SandboxWorker):
+        with self._cond:
+            self._idle.append(worker)
+            self._cond.notify()
+
+    def _free_slot(self):
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
+
+    def _discard(self, worker: SandboxWorker):
+        worker.close()
+        self._free_slot()
+
+    def run(self, code: str, timeout: float) -> Dict:
+        worker = self._acquire()
+        try:
+            result = worker.run(code, timeout)
+        except Exception:
+            self.stats["crashed"] += 1
+            self._discard(worker)
+            raise
+        self.stats["runs"] += 1
+        if worker.runs >= self.max_runs or not worker.alive():
+            self.stats["recycled"] += 1
+            self._discard(worker)
+        else:
+            self._release(worker)
+        return result
+
+    def prewarm(self):
+        """Start all workers now instead of on first use"""
+        with self._cond:
+            missing = self.size - self._count
+            self._count += missing
+        for spawned in range(missing):
+            try:
+                worker = SandboxWorker(self.limits)
+            except Exception:
+                for _ in range(missing - spawned):
+                    self._free_slot()
+                raise
+            self.stats["spawned"] += 1
+            self._release(worker)
+
+    def shutdown(self):
+        with self._cond:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            self._discard(worker)
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {**self.stats, "workers": self._count, "idle": len(self._idle)}
 
 
 class SandboxExecutor:
@@ -39,16 +381,30 @@ class SandboxExecutor:
     Безопасное выполнение кода в изолированном окружении
 
     Версия без Docker (для начала):
-    - Ограничения через subprocess
+    - Пул интерпретаторов с fork() на каждый запуск (POSIX)
+    - rlimits: CPU, память, размер и число файлов
     - Security scan
     - Timeout control
-    - Memory limits (best effort)
+    - Пиковый RSS и CPU-время каждого запуска
 
     TODO: Добавить Docker для полной изоляции
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size: int = 2,
+        max_runs_per_worker: int = 50,
+        memory_limit_mb: int = 512,
+    ):
         self.max_cpu_time = 30  # seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.pool: Optional[SandboxWorkerPool] = None
+        if pool_size > 0 and hasattr(os, "fork"):
+            self.pool = SandboxWorkerPool(
+                size=pool_size,
+                max_runs=max_runs_per_worker,
+                memory_limit_mb=memory_limit_mb,
+            )
         self.blacklist_patterns = [
             r"os\.system",
             r"subprocess\.",
@@ -66,8 +422,6 @@ class SandboxExecutor:
     ) -> ExecutionResult:
         """Выполнить Python код в sandbox"""
 
-        import time
-
         start_time = time.time()
 
         # 1. Security scan
@@ -84,20 +438,28 @@ class SandboxExecutor:
                 security_score=security_score,
             )
 
-        # 2. Create temporary file
+        # 2. Pooled interpreter (fork per run)
+        if self.pool is not None:
+            try:
+                return self._execute_pooled(code, timeout, security_score, start_time)
+            except Exception as e:
+                logger.warning(f"Sandbox worker failed, falling back to subprocess: {e}")
+                start_time = time.time()
+
+        # 3. Fallback: fresh interpreter per snippet
         with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
             f.write(code)
             temp_file = f.name
 
         try:
-            # 3. Execute with timeout
+            # Execute with timeout
             result = subprocess.run(
                 ["python3", temp_file], capture_output=True, text=True, timeout=timeout
             )
 
             execution_time = time.time() - start_time
 
-            # 4. Parse output
+            # Parse output
             output = result.stdout
             error = result.stderr if result.returncode != 0 else None
 
@@ -142,6 +504,47 @@ class SandboxExecutor:
             if os.path.exists(temp_file):
                 os.unlink(temp_file)
 
+    def _execute_pooled(
+        self, code: str, timeout: int, security_score: float, start_time: float
+    ) -> ExecutionResult:
+        result = self.pool.run(code, timeout)
+        execution_time = time.time() - start_time
+
+        exit_code = result["exit_code"]
+        # Linux reports ru_maxrss in KiB, macOS in bytes
+        memory_used = result["max_rss"] * (1 if sys.platform == "darwin" else 1024)
+        stderr = result["stderr"]
+
+        if exit_code == 0:
+            status = ExecutionStatus.SUCCESS
+        elif result.get("timed_out") or exit_code in (-14, -24):  # worker deadline / SIGALRM / SIGXCPU
+            status = ExecutionStatus.TIMEOUT
+            stderr = stderr or f"Execution timeout after {timeout}s"
+        elif "MemoryError" in stderr:
+            status = ExecutionStatus.MEMORY_LIMIT
+        else:
+            status = ExecutionStatus.ERROR
+
+        return ExecutionResult(
+            status=status,
+            output=result["stdout"],
+            error=stderr if exit_code != 0 else None,
+            execution_time=execution_time,
+            memory_used=memory_used,
+            exit_code=exit_code,
+            security_score=security_score,
+            cpu_time=result["cpu_time"],
+        )
+
+    def get_stats(self) -> Dict:
+        """Статистика пула воркеров"""
+        return self.pool.get_stats() if self.pool is not None else {}
+
+    def close(self):
+        """Остановить воркеры"""
+        if self.pool is not None:
+            self.pool.shutdown()
+
     def _security_scan(self, code: str) -> float:
         """
         Оценить безопасность кода (0.0-1.0)
@@ -0,0 +1,313 @@
+"""
+MIRAI OCR Index
+Инкрементальный OCR экрана с индексом слов
+
+- Кадр режется на перекрывающиеся тайлы; OCR запускается только для
+  тайлов, содержимое которых изменилось с прошлого прохода
+- Изменённые тайлы распознаются параллельно в пуле процессов
+- Результаты тайлов кэшируются по хэшу содержимого (возврат к прежнему
+  виду экрана не требует повторного OCR)
+- Индекс слово -> bounding box отвечает на поиск текста без OCR
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OCRWord:
+    """Распознанное слово (координаты тайла или экрана)"""
+    text: str
+    x: int
+    y: int
+    width: int
+    height: int
+    confidence: float = 100.0
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+    def shifted(self, dx: int, dy: int) -> "OCRWord":
+        return replace(self, x=self.x + dx, y=self.y + dy)
+
+
+@dataclass
+class TextMatch:
+    """Найденный на экране текст (одно слово или фраза)"""
+    text: str
+    x: int
+    y: int
+    width: int
+    height: int
+    confidence: float
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+
+def tesseract_words(tile: np.ndarray, lang: str = "eng", min_confidence: float = 30.0) -> List[OCRWord]:
+    """OCR-движок по умолчанию: pytesseract.image_to_data"""
+    import pytesseract
+
+    data = pytesseract.image_to_data(Image.fromarray(tile), lang=lang, output_type=pytesseract.Output.DICT)
+    words = []
+    for i, text in enumerate(data["text"]):
+        text = text.strip()
+        confidence = float(data["conf"][i])
+        if text and confidence >= min_confidence:
+            words.append(OCRWord(
+                text, data["left"][i], data["top"][i], data["width"][i], data["height"][i], confidence
+            ))
+    return words
+
+
+def normalize(text: str) -> str:
+    """Ключ индекса: нижний регистр без пунктуации по краям"""
+    return re.sub(r"^\W+|\W+$", "", text.lower())
+
+
+class OCRIndex:
+    """
+    Инкрементальный OCR с индексом слов текущего экрана
+
+    Args:
+        engine: tile (RGB массив) -> список OCRWord в координатах тайла;
+            должен быть picklable (функция модуля или functools.partial)
+        tile_size: Размер тайла (width, height)
+        overlap: Перекрытие соседних тайлов (x, y) - слово короче
+            перекрытия целиком попадает хотя бы в один тайл
+        workers: Процессов для OCR (0 - без пула, в текущем процессе)
+        cache_size: Сколько результатов тайлов хранить по хэшу
+    """
+
+    def __init__(
+        self,
+        engine: Callable[[np.ndarray], List[OCRWord]] = tesseract_words,
+        tile_size: Tuple[int, int] = (768, 256),
+        overlap: Tuple[int, int] = (128, 48),
+        workers: Optional[int] = None,
+        cache_size: int = 2048,
+    ):
+        self.engine = engine
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.workers = min(os.cpu_count() or 1, 8) if workers is None else workers
+        self.cache_size = cache_size
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._results: "OrderedDict[bytes, List[OCRWord]]" = OrderedDict()
+        self._words: List[OCRWord] = []
+        self._index: Dict[str, List[int]] = {}
+        self._frame = None
+        self._lock = threading.Lock()
+        self.stats = {"passes": 0, "tiles": 0, "ocr_tiles": 0, "lookups": 0}
+
+    # ─── Тайлы ───────────────────────────────────────────────────
+
+    def tiles(self, width: int, height: int) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+        """
+        Тайлы кадра: [(тайл x, y, w, h), (своя зона x0, y0, x1, y1)]
+
+        Слово принадлежит тому тайлу, в чьей зоне лежит его центр, поэтому
+        слова из перекрытий не дублируются.
+        """
+        result = []
+        ys = self._axis(height, self.tile_size[1], self.overlap[1])
+        xs = self._axis(width, self.tile_size[0], self.overlap[0])
+        for y, y_size, y0, y1 in ys:
+            for x, x_size, x0, x1 in xs:
+                result.append(((x, y, x_size, y_size), (x0, y0, x1, y1)))
+        return result
+
+    @staticmethod
+    def _axis(length: int, size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+        step = max(size - overlap, 1)
+        count = max(1, -(-(length - overlap) // step))
+        spans = []
+        for i in range(count):
+            start = i * step
+            own_start = 0 if i == 0 else start + overlap // 2
+            own_end = length if i == count - 1 else (i + 1) * step + overlap // 2
+            spans.append((start, min(size, length - start), own_start, own_end))
+        return spans
+
+    # ─── Обновление ──────────────────────────────────────────────
+
+    def update(self, frame) -> Dict[str, int]:
+        """
+        Обновить индекс по кадру (Frame или RGB массив)
+
+        Returns:
+            {"tiles": всего тайлов, "ocr_tiles": распознано заново}
+        """
+        pixels = getattr(frame, "pixels", frame)
+        origin = getattr(frame, "origin", (0, 0))
+        with self._lock:
+            if frame is self._frame:
+                return {"tiles": 0, "ocr_tiles": 0}
+
+            tiles = self.tiles(pixels.shape[1], pixels.shape[0])
+            hashes = []
+            pending: Dict[bytes, np.ndarray] = {}
+            for (x, y, width, height), _ in tiles:
+                tile = pixels[y:y + height, x:x + width]
+                digest = hashlib.blake2b(np.ascontiguousarray(tile).data, digest_size=16).digest()
+                hashes.append(digest)
+                if digest in self._results:
+                    self._results.move_to_end(digest)
+                elif digest not in pending:
+                    pending[digest] = np.ascontiguousarray(tile)
+
+            for digest, words in zip(pending, self._recognize(list(pending.values()))):
+                self._results[digest] = words
+            while len(self._results) > max(self.cache_size, len(tiles)):
+                self._results.popitem(last=False)
+
+            words = []
+            for ((x, y, _, _), (x0, y0, x1, y1)), digest in zip(tiles, hashes):
+                for word in self._results[digest]:
+                    word = word.shifted(x, y)
+                    cx, cy = word.center
+                    if x0 <= cx < x1 and y0 <= cy < y1:
+                        words.append(word.shifted(*origin))
+            self._set_words(words)
+            self._frame = frame
+
+            self.stats["passes"] += 1
+            self.stats["tiles"] += len(tiles)
+            self.stats["ocr_tiles"] += len(pending)
+            return {"tiles": len(tiles), "ocr_tiles": len(pending)}
+
+    def _recognize(self, tiles: List[np.ndarray]) -> List[List[OCRWord]]:
+        if len(tiles) <= 1 or self.workers <= 1:
+            return [self.engine(tile) for tile in tiles]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._executor.map(self.engine, tiles))
+
+    def _set_words(self, words: List[OCRWord]):
+        # Порядок чтения: строки сверху вниз, слова слева направо
+        words.sort(key=lambda w: (w.y + w.height // 2, w.x))
+        lines: List[List[OCRWord]] = []
+        for word in words:
+            line = lines[-1] if lines else None
+            if line and abs(word.center[1] - line[0].center[1]) <= max(line[0].height, word.height) // 2:
+                line.append(word)
+            else:
+                lines.append([word])
+        self._words = [w for line in lines for w in sorted(line, key=lambda w: w.x)]
+
+        index = defaultdict(list)
+        for i, word in enumerate(self._words):
+            key = normalize(word.text)
+            if key:
+                index[key].append(i)
+        self._index = dict(index)
+
+    # ─── Поиск ───────────────────────────────────────────────────
+
+    def find(self, text: str, frame=None, partial: bool = True) -> List[TextMatch]:
+        """
+        Найти слово или фразу на экране
+
+        Args:
+            text: Искомый текст
+            frame: Если передан - сначала обновить индекс по кадру
+            partial: Разрешить совпадение по части слова ("Sav" -> "Save")
+        """
+        if frame is not None:
+            self.update(frame)
+        query = [normalize(part) for part in text.split()]
+        query = [part for part in query if part]
+        if not query:
+            return []
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            starts = list(self._index.get(query[0], []))
+            if partial and len(query) == 1:
+                starts += [
+                    i for key, positions in self._index.items()
+                    if key != query[0] and query[0] in key for i in positions
+                ]
+            elif partial:
+                starts += [
+                    i for key, positions in self._index.items()
+                    if key != query[0] and key.endswith(query[0]) for i in positions
+                ]
+
+            matches = []
+            for start in sorted(set(starts)):
+                phrase = self._phrase_at(start, query, partial)
+                if phrase:
+                    matches.append(self._merge(phrase))
+            return matches
+
+    def _phrase_at(self, start: int, query: List[str], partial: bool) -> Optional[List[OCRWord]]:
+        """Слова фразы, идущие подряд в одной строке начиная с start"""
+        phrase = [self._words[start]]
+        for offset, part in enumerate(query[1:], 1):
+            if start + offset >= len(self._words):
+                return None
+            word, previous = self._words[start + offset], phrase[-1]
+            key = normalize(word.text)
+            last = offset == len(query) - 1
+            if not (key == part or (partial and last and key.startswith(part))):
+                return None
+            same_line = abs(word.center[1] - previous.center[1]) <= max(word.height, previous.height) // 2
+            if not same_line or word.x - (previous.x + previous.width) > 2 * max(word.height, previous.height):
+                return None
+            phrase.append(word)
+        return phrase
+
+    @staticmethod
+    def _merge(words: List[OCRWord]) -> TextMatch:
+        left = min(w.x for w in words)
+        top = min(w.y for w in words)
+        right = max(w.x + w.width for w in words)
+        bottom = max(w.y + w.height for w in words)
+        return TextMatch(
+            " ".join(w.text for w in words), left, top, right - left, bottom - top,
+            min(w.confidence for w in words),
+        )
+
+    def text(self) -> str:
+        """Весь распознанный текст экрана в порядке чтения"""
+        with self._lock:
+            lines, current, last_y = [], [], None
+            for word in self._words:
+                cy = word.center[1]
+                if last_y is not None and abs(cy - last_y) > word.height // 2:
+                    lines.append(" ".join(current))
+                    current = []
+                current.append(word.text)
+                last_y = cy
+            if current:
+                lines.append(" ".join(current))
+            return "\n".join(lines)
+
+    @property
+    def words(self) -> List[OCRWord]:
+        return list(self._words)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "cached_tiles": len(self._results), "words": len(self._words)}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,14 +1,21 @@
 """
 Ollama Local LLM Client
 Support for offline AI inference using Ollama
+
+- Sync methods reuse one keep-alive requests.Session
+- Async methods (agenerate, achat, stream_*) share a pooled aiohttp client;
+  identical in-flight requests are coalesced, streams report time-to-first-token
 """
 
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import requests
 
+from core.llm_client import StreamMetrics, shared_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,12 +39,14 @@ class OllamaClient:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
+        self._session = requests.Session()
+        self._client = shared_client(self.base_url, timeout=timeout)
         self._check_connection()
 
     def _check_connection(self) -> bool:
         """Check if Ollama server is running"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 logger.info(f"✅ Ollama connected. Available models: {len(models)}")
@@ -68,12 +77,57 @@ class OllamaClient:
         Returns:
             Generated text
         """
-        url = f"{self.base_url}/api/generate"
+        payload = self._generate_payload(prompt, system, temperature, max_tokens, stream=False)
+
+        try:
+            response = self._session.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            return result.get("response", "")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Ollama generation failed: {e}")
+            raise
+
+    async def agenerate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 4000,
+    ) -> str:
+        """Async generate() over the shared connection pool"""
+        payload = self._generate_payload(prompt, system, temperature, max_tokens, stream=False)
+        result = await self._client.post_json("/api/generate", payload)
+        return result.get("response", "")
+
+    async def stream_generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 4000,
+        metrics: Optional[StreamMetrics] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text
 
+        Yields:
+            Text deltas as the model produces them; metrics (if given)
+            receives time-to-first-token and chunk counts
+        """
+        payload = self._generate_payload(prompt, system, temperature, max_tokens, stream=True)
+        async for delta in self._client.stream(
+            "/api/generate", payload, lambda chunk: chunk.get("response"), metrics=metrics
+        ):
+            yield delta
+
+    def _generate_payload(
+        self, prompt: str, system: Optional[str], temperature: float, max_tokens: int, stream: bool
+    ) -> Dict[str, Any]:
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens,
@@ -82,15 +136,7 @@ class OllamaClient:
 
         if system:
             payload["system"] = system
-
-        try:
-            response = requests.post(url, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            result = response.json()
-            return result.get("response", "")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ollama generation failed: {e}")
-            raise
+        return payload
 
     def chat(
         self,
@@ -111,73 +157,86 @@ class OllamaClient:
         Returns:
             Response dict with message and optional tool calls
         """
-        url = f"{self.base_url}/api/chat"
+        payload = self._chat_payload(messages, temperature, max_tokens, tools, stream=False)
 
-        payload = {
+        try:
+            response = self._session.post(f"{self.base_url}/api/chat", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return self._chat_result(response.json())
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Ollama chat failed: {e}")
+            raise
+
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 4000,
+        tools: Optional[List[Dict]] = None,
+    ) -> Dict[str, Any]:
+        """Async chat() over the shared connection pool"""
+        payload = self._chat_payload(messages, temperature, max_tokens, tools, stream=False)
+        return self._chat_result(await self._client.post_json("/api/chat", payload))
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 4000,
+        tools: Optional[List[Dict]] = None,
+        metrics: Optional[StreamMetrics] = None,
+    ) -> AsyncIterator[str]:
+        """Stream assistant message content deltas"""
+        payload = self._chat_payload(messages, temperature, max_tokens, tools, stream=True)
+        async for delta in self._client.stream(
+            "/api/chat", payload, lambda chunk: chunk.get("message", {}).get("content"), metrics=metrics
+        ):
+            yield delta
+
+    def _chat_payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[List[Dict]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        # Add tools to system message if provided (caller's messages stay untouched)
+        if tools:
+            tools_description = self._format_tools_for_prompt(tools)
+            if messages and messages[0]["role"] == "system":
+                system = {**messages[0], "content": f"{messages[0]['content']}\n\n{tools_description}"}
+                messages = [system, *messages[1:]]
+            else:
+                messages = [{"role": "system", "content": tools_description}, *messages]
+
+        return {
             "model": self.model,
             "messages": messages,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens,
             },
         }
 
-        # Add tools to system message if provided
-        if tools:
-            tools_description = self._format_tools_for_prompt(tools)
-            # Inject tools into system message
-            if messages and messages[0]["role"] == "system":
-                messages[0]["content"] += f"\n\n{tools_description}"
-            else:
-                messages.insert(
-                    0, {"role": "system", "content": tools_description}
-                )
-
-        try:
-            response = requests.post(url, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            result = response.json()
-
-            message = result.get("message", {})
-            content = message.get("content", "")
+    def _chat_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        message = result.get("message", {})
+        content = message.get("content", "")
 
-            # Try to parse tool calls from response
-            tool_calls = self._extract_tool_calls(content)
+        # Try to parse tool calls from response
+        tool_calls = self._extract_tool_calls(content)
 
-            return {
-                "message": {"role": "assistant", "content": content},
-                "tool_calls": tool_calls,
-                "model": self.model,
-                "done": result.get("done", True),
-            }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ollama chat failed: {e}")
-            raise
+        return {
+            "message": {"role": "assistant", "content": content},
+            "tool_calls": tool_calls,
+            "model": self.model,
+            "done": result.get("done", True),
+        }
 
     def _format_tools_for_prompt(self, tools: List[Dict]) -> str:
-        """Format tools as text for prompt injection"""
-        tools_text = "# Available Tools\n\n"
-        tools_text += "You can call tools by responding with JSON in this format:\n"
-        tools_text += '```json\n{"tool": "tool_name", "arguments": {...}}\n```\n\n'
-        tools_text += "Available tools:\n\n"
-
-        for tool in tools:
-            func = tool.get("function", {})
-            name = func.get("name", "unknown")
-            desc = func.get("description", "")
-            params = func.get("parameters", {}).get("properties", {})
-
-            tools_text += f"## {name}\n"
-            tools_text += f"{desc}\n\n"
-            tools_text += "Parameters:\n"
-            for param_name, param_info in params.items():
-                param_type = param_info.get("type", "string")
-                param_desc = param_info.get("description", "")
-                tools_text += f"- {param_name} ({param_type}): {param_desc}\n"
-            tools_text += "\n"
-
-        return tools_text
+        """Format tools as text for prompt injection (rendered once per tool set)"""
+        return _render_tools(json.dumps(tools, ensure_ascii=False))
 
     def _extract_tool_calls(self, content: str) -> List[Dict]:
         """Extract tool calls from response content"""
@@ -207,6 +266,15 @@ class OllamaClient:
 
         return tool_calls
 
+    def close(self):
+        """Закрыть синхронную HTTP-сессию"""
+        self._session.close()
+
+    async def aclose(self):
+        """Закрыть синхронную сессию и пул соединений в текущем event loop"""
+        self.close()
+        await self._client.aclose()
+
     def pull_model(self, model_name: Optional[str] = None) -> bool:
         """
         Pull/download a model
@@ -224,7 +292,7 @@ class OllamaClient:
 
         try:
             logger.info(f"📥 Pulling model: {model}")
-            response = requests.post(url, json=payload, timeout=600)
+            response = self._session.post(url, json=payload, timeout=600)
             response.raise_for_status()
             logger.info(f"✅ Model pulled: {model}")
             return True
@@ -235,10 +303,37 @@ class OllamaClient:
     def list_models(self) -> List[str]:
         """List available models"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
             response.raise_for_status()
             models = response.json().get("models", [])
             return [m.get("name") for m in models]
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to list models: {e}")
             return []
+
+
+@lru_cache(maxsize=32)
+def _render_tools(tools_json: str) -> str:
+    """Tools preamble for a JSON-serialised tool list"""
+    tools = json.loads(tools_json)
+    tools_text = "# Available Tools\n\n"
+    tools_text += "You can call tools by responding with JSON in this format:\n"
+    tools_text += '```json\n{"tool": "tool_name", "arguments": {...}}\n```\n\n'
+    tools_text += "Available tools:\n\n"
+
+    for tool in tools:
+        func = tool.get("function", {})
+        name = func.get("name", "unknown")
+        desc = func.get("description", "")
+        params = func.get("parameters", {}).get("properties", {})
+
+        tools_text += f"## {name}\n"
+        tools_text += f"{desc}\n\n"
+        tools_text += "Parameters:\n"
+        for param_name, param_info in params.items():
+            param_type = param_info.get("type", "string")
+            param_desc = param_info.get("description", "")
+            tools_text += f"- {param_name} ({param_type}): {param_desc}\n"
+        tools_text += "\n"
+
+    return tools_text
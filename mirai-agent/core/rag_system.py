@@ -3,23 +3,102 @@ MIRAI RAG System - Retrieval Augmented Generation
 
 Возможности:
 - Разбиение больших документов на чанки
-- Векторизация через OpenAI Embeddings
-- Хранение в Chroma DB
+- Векторизация: локальный SentenceTransformer (по умолчанию) или OpenAI,
+  с дисковым кэшем эмбеддингов
+- Хранение в Chroma DB, индекс source -> chunk ids (delete/upsert по источнику)
 - Семантический поиск
 - Работа с контекстом больше GPT лимита
 """
 
-import os
+import hashlib
+import sqlite3
+import threading
 from typing import List, Dict, Optional
 from pathlib import Path
 import logging
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 import tiktoken
 
+from core.context_packer import ContextChunk, ContextPack, ContextPacker
+from core.embedding_backends import create_embedding_backend
+
+
+class SourceIndex:
+    """
+    Индекс source -> chunk ids (SQLite)
+
+    Нужен для delete/upsert по источнику: Chroma хранит только чанки.
+    """
+
+    def __init__(self, db_path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_sources (
+                    chunk_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL
+                )
+            """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_sources_source ON chunk_sources(source)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    source TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL
+                )
+            """
+            )
+
+    def chunk_ids(self, source: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunk_sources WHERE source = ?", (source,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def content_hash(self, source: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, source: str, chunk_ids: List[str], content_hash: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_sources (chunk_id, source) VALUES (?, ?)",
+                [(chunk_id, source) for chunk_id in chunk_ids],
+            )
+            if content_hash:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (source, content_hash) VALUES (?, ?)",
+                    (source, content_hash),
+                )
+
+    def remove(self, source: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunk_sources WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunk_sources")
+            self._conn.execute("DELETE FROM sources")
+
+    def count_sources(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(DISTINCT source) FROM chunk_sources"
+            ).fetchone()[0]
+
 
 class MiraiRAG:
     """
@@ -38,6 +117,8 @@ class MiraiRAG:
         persist_directory: str = "data/chroma_db",
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        embedding_backend=None,
+        embedding_model: Optional[str] = None,
     ):
         """
         Инициализация RAG системы
@@ -47,6 +128,10 @@ class MiraiRAG:
             persist_directory: Папка для хранения БД
             chunk_size: Размер чанка в символах
             chunk_overlap: Перекрытие между чанками
+            embedding_backend: "local" (по умолчанию, $MIRAI_EMBEDDINGS),
+                               "openai" или готовый объект с
+                               embed_documents/embed_query
+            embedding_model: Модель для выбранного backend
         """
         self.collection_name = collection_name
         self.persist_directory = Path(persist_directory)
@@ -55,14 +140,18 @@ class MiraiRAG:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
-        # Проверить OpenAI API ключ
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError("OPENAI_API_KEY не найден в переменных окружения!")
+        # Создать embeddings (локально + дисковый кэш; OpenAI только по запросу)
+        if embedding_backend is None or isinstance(embedding_backend, str):
+            self.embeddings = create_embedding_backend(
+                embedding_backend,
+                model_name=embedding_model,
+                cache_dir=self.persist_directory / "embedding_cache",
+            )
+        else:
+            self.embeddings = embedding_backend
 
-        # Создать embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small"  # Дешевле чем ada-002
-        )
+        # source -> chunk ids для delete/upsert
+        self.source_index = SourceIndex(self.persist_directory / f"{collection_name}_sources.db")
 
         # Text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -98,8 +187,16 @@ class MiraiRAG:
         """Подсчитать количество токенов в тексте"""
         return len(self.tokenizer.encode(text))
 
+    @staticmethod
+    def _chunk_id(source: str, content_hash: str, index: int) -> str:
+        return hashlib.sha1(f"{source}\0{content_hash}\0{index}".encode("utf-8")).hexdigest()
+
     def add_text(
-        self, text: str, metadata: Dict = None, source: str = "unknown"
+        self,
+        text: str,
+        metadata: Dict = None,
+        source: str = "unknown",
+        replace: bool = False,
     ) -> int:
         """
         Добавить текст в RAG систему
@@ -108,12 +205,17 @@ class MiraiRAG:
             text: Текст для добавления
             metadata: Дополнительные метаданные
             source: Источник текста
+            replace: Сначала удалить прежние чанки этого источника
 
         Returns:
             Количество созданных чанков
         """
         logging.info(f"📝 Добавляю текст в RAG ({len(text)} символов)...")
 
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if replace:
+            self.delete_by_source(source)
+
         # Разбить на чанки
         chunks = self.text_splitter.split_text(text)
 
@@ -134,8 +236,11 @@ class MiraiRAG:
 
             documents.append(Document(page_content=chunk, metadata=doc_metadata))
 
-        # Добавить в vectorstore
-        self.vectorstore.add_documents(documents)
+        # Добавить в vectorstore (детерминированные id -> индекс по source)
+        ids = [self._chunk_id(source, content_hash, i) for i in range(len(documents))]
+        if documents:
+            self.vectorstore.add_documents(documents, ids=ids)
+        self.source_index.add(source, ids, content_hash if replace else None)
 
         total_tokens = sum(doc.metadata["tokens"] for doc in documents)
         logging.info(
@@ -177,7 +282,22 @@ class MiraiRAG:
         if metadata:
             file_metadata.update(metadata)
 
-        return self.add_text(text, metadata=file_metadata, source=str(file_path))
+        return self.upsert_by_source(text, source=str(file_path), metadata=file_metadata)
+
+    def upsert_by_source(self, text: str, source: str, metadata: Dict = None) -> int:
+        """
+        Заменить чанки источника новой версией текста
+
+        Неизменённый текст не переэмбеддится и не дублируется.
+
+        Returns:
+            Количество созданных чанков (0 если текст не изменился)
+        """
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if self.source_index.content_hash(source) == content_hash:
+            logging.info(f"⏭️ Источник не изменился: {source}")
+            return 0
+        return self.add_text(text, metadata=metadata, source=source, replace=True)
 
     def search(
         self, query: str, k: int = 5, filter_metadata: Dict = None
@@ -197,7 +317,7 @@ class MiraiRAG:
 
         results = self.vectorstore.similarity_search(query, k=k, filter=filter_metadata)
 
-        total_tokens = sum(self.count_tokens(doc.page_content) for doc in results)
+        total_tokens = sum(self._chunk_tokens(doc) for doc in results)
         logging.info(f"✅ Найдено {len(results)} чанков ({total_tokens} токенов)")
 
         return results
@@ -218,6 +338,38 @@ class MiraiRAG:
 
         return results
 
+    def _chunk_tokens(self, doc: Document) -> int:
+        """Token count stored at ingestion (tokenizer only for legacy chunks)"""
+        tokens = doc.metadata.get("tokens")
+        return tokens if tokens is not None else self.count_tokens(doc.page_content)
+
+    def pack_context_for_query(
+        self, query: str, max_tokens: int = 4000, k: int = 10
+    ) -> ContextPack:
+        """
+        Упаковать релевантные чанки в бюджет токенов
+
+        Пропускает чанки, которые не влезают (вместо остановки), и
+        склеивает перекрывающиеся соседние чанки одного источника.
+
+        Returns:
+            ContextPack (parts, total_tokens, ...)
+        """
+        results = self.vectorstore.similarity_search_with_score(query, k=k)
+
+        # Chroma возвращает distance (меньше = лучше)
+        candidates = [
+            ContextChunk(
+                text=doc.page_content,
+                tokens=self._chunk_tokens(doc),
+                source=doc.metadata.get("source", "unknown"),
+                chunk_index=doc.metadata.get("chunk_index"),
+                score=-distance,
+            )
+            for doc, distance in results
+        ]
+        return ContextPacker(max_tokens, source_format=None).pack(candidates)
+
     def get_context_for_query(
         self, query: str, max_tokens: int = 4000, k: int = 10
     ) -> str:
@@ -234,52 +386,55 @@ class MiraiRAG:
         Returns:
             Собранный контекст
         """
-        # Найти релевантные чанки
-        results = self.search(query, k=k)
-
-        context_parts = []
-        total_tokens = 0
-
-        for doc in results:
-            chunk = doc.page_content
-            tokens = self.count_tokens(chunk)
-
-            if total_tokens + tokens <= max_tokens:
-                context_parts.append(chunk)
-                total_tokens += tokens
-            else:
-                break
-
-        context = "\n\n---\n\n".join(context_parts)
+        pack = self.pack_context_for_query(query, max_tokens=max_tokens, k=k)
 
         logging.info(
-            f"✅ Собран контекст: {len(context_parts)} чанков, "
-            f"{total_tokens} токенов"
+            f"✅ Собран контекст: {len(pack.chunks)} чанков, "
+            f"{pack.total_tokens} токенов"
         )
 
-        return context
+        return pack.text
 
     def get_stats(self) -> Dict:
         """Получить статистику RAG системы"""
         collection = self.vectorstore._collection
         count = collection.count()
 
-        return {
+        stats = {
             "collection_name": self.collection_name,
             "total_chunks": count,
+            "total_sources": self.source_index.count_sources(),
             "persist_directory": str(self.persist_directory),
         }
+        if hasattr(self.embeddings, "get_stats"):
+            stats["embeddings"] = self.embeddings.get_stats()
+        return stats
 
     def clear(self):
         """Очистить всю коллекцию"""
         self.vectorstore.delete_collection()
+        self.source_index.clear()
         logging.warning("🗑️ Коллекция очищена!")
 
-    def delete_by_source(self, source: str):
-        """Удалить все чанки из определенного источника"""
-        # Chroma пока не поддерживает удаление по метаданным напрямую
-        # Нужно найти ID и удалить
-        logging.warning(f"🗑️ Удаление по source: {source}")
+    def delete_by_source(self, source: str) -> int:
+        """
+        Удалить все чанки из определенного источника
+
+        Returns:
+            Количество удалённых чанков
+        """
+        ids = self.source_index.chunk_ids(source)
+        if not ids:
+            # Чанки, добавленные до появления индекса: найти по метаданным
+            found = self.vectorstore._collection.get(where={"source": source})
+            ids = found.get("ids", [])
+
+        if ids:
+            self.vectorstore.delete(ids=ids)
+        self.source_index.remove(source)
+
+        logging.info(f"🗑️ Удалено {len(ids)} чанков источника: {source}")
+        return len(ids)
 
 
 # Пример использования
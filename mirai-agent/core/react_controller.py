@@ -9,6 +9,8 @@ import time
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from core.response_cache import ResponseCache, get_response_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,6 +58,7 @@ class ReActController:
         tools: List[Dict],
         max_steps: int = 10,
         verbose: bool = True,
+        response_cache: Optional[ResponseCache] = None,
     ):
         """
         Initialize ReAct controller
@@ -65,8 +68,10 @@ class ReActController:
             tools: List of available tools
             max_steps: Maximum steps per task
             verbose: Print progress
+            response_cache: LLM response cache (default: shared process cache)
         """
         self.llm_client = llm_client
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
         self.tools = {tool["function"]["name"]: tool["function"] for tool in tools}
         self.tool_handlers = {}  # Map tool names to handler functions
         self.max_steps = max_steps
@@ -263,21 +268,33 @@ Final Answer: <answer>
             if hasattr(self.llm_client, "chat"):
                 if hasattr(self.llm_client.chat, "completions"):
                     # OpenAI client
-                    response = self.llm_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=context,
-                        temperature=0.3,
-                        max_tokens=500,
-                    )
-                    return response.choices[0].message.content
+                    model = "gpt-4o-mini"
+
+                    def call():
+                        response = self.llm_client.chat.completions.create(
+                            model=model,
+                            messages=context,
+                            temperature=0.3,
+                            max_tokens=500,
+                        )
+                        return response.choices[0].message.content
                 else:
                     # Ollama client
-                    response = self.llm_client.chat(
-                        messages=context,
-                        temperature=0.3,
-                        max_tokens=500,
-                    )
-                    return response["message"]["content"]
+                    model = getattr(self.llm_client, "model", "ollama")
+
+                    def call():
+                        response = self.llm_client.chat(
+                            messages=context,
+                            temperature=0.3,
+                            max_tokens=500,
+                        )
+                        return response["message"]["content"]
+
+                if self.response_cache is None:
+                    return call()
+                return self.response_cache.cached_call(
+                    "react_controller", call, model, context, temperature=0.3, max_tokens=500
+                )
             else:
                 return "Error: Invalid LLM client"
         except Exception as e:
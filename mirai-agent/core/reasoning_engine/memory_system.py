@@ -14,14 +14,18 @@ Features:
 """
 
 import logging
+import re
 import sqlite3
+import threading
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from collections import deque
 import json
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -105,23 +109,59 @@ class LongTermMemory:
     - SQLite database with history
     - Indexes for fast search
     - Retention policy (90 days)
+    
+    Search indexes:
+    - FTS5 over flattened event keys and values (BM25 ranking)
+    - Generated columns action_type / application with B-tree indexes
+    - Optional embedding index (memory_embeddings) when an embedder is given
+    
+    One connection is kept open for the lifetime of the object.
     """
     
-    def __init__(self, db_path: Optional[Path] = None):
+    # Weights of the similarity components in find_similar_situations
+    TEXT_WEIGHT = 0.6
+    EMBEDDING_WEIGHT = 0.6
+    FEATURE_WEIGHT = 0.4
+    
+    # Keys and scalar values of a JSON document as one string (array indexes skipped)
+    _FLATTEN_SQL = """(
+        SELECT group_concat(
+            CASE WHEN typeof(key) = 'text' THEN key || ' ' ELSE '' END || coalesce(atom, ''), ' '
+        )
+        FROM json_tree({column}) WHERE type NOT IN ('object', 'array')
+    )"""
+    
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        embedder: Optional[Callable[[str], Optional[List[float]]]] = None
+    ):
         if db_path is None:
             db_path = Path(__file__).parent.parent.parent / "data" / "long_term_memory.db"
         
-        self.db_path = db_path
+        self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.retention_days = 90
+        self.embedder = embedder
+        self.fts_enabled = False
+        
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        self._vectors: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (event ids, unit rows)
         
         self._init_database()
         logger.info(f"✅ Long-term memory initialized at {db_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
     def _init_database(self):
         """Initialize database schema"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             
             # Event-Action-Result table (Step 47)
             cursor.execute("""
@@ -137,6 +177,22 @@ class LongTermMemory:
                 )
             """)
             
+            # Structured features as generated columns (older databases get them added)
+            columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(event_action_results)")}
+            if "action_type" not in columns:
+                cursor.execute("""
+                    ALTER TABLE event_action_results ADD COLUMN action_type TEXT
+                    GENERATED ALWAYS AS (json_extract(action, '$.type')) VIRTUAL
+                """)
+            if "application" not in columns:
+                cursor.execute("""
+                    ALTER TABLE event_action_results ADD COLUMN application TEXT
+                    GENERATED ALWAYS AS (lower(coalesce(
+                        json_extract(event, '$.application'), json_extract(event, '$.app'),
+                        json_extract(action, '$.application'), json_extract(action, '$.app')
+                    ))) VIRTUAL
+                """)
+            
             # Create indexes for fast search
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_timestamp 
@@ -148,6 +204,16 @@ class LongTermMemory:
                 ON event_action_results(success)
             """)
             
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_action_type
+                ON event_action_results(action_type, timestamp)
+            """)
+            
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_application
+                ON event_action_results(application, success)
+            """)
+            
             # Embeddings table for semantic search (Step 43)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS memory_embeddings (
@@ -159,13 +225,51 @@ class LongTermMemory:
                     FOREIGN KEY (event_id) REFERENCES event_action_results(id)
                 )
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_embedding_event
+                ON memory_embeddings(event_id)
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS event_embeddings_delete
+                AFTER DELETE ON event_action_results BEGIN
+                    DELETE FROM memory_embeddings WHERE event_id = old.id;
+                END
+            """)
+            
+            # Full-text index over event keys and values (Step 44)
+            try:
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS event_fts
+                    USING fts5(content, tokenize = 'unicode61')
+                """)
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS event_fts_insert
+                    AFTER INSERT ON event_action_results BEGIN
+                        INSERT INTO event_fts(rowid, content) VALUES (new.id, {self._FLATTEN_SQL.format(column="new.event")});
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS event_fts_delete
+                    AFTER DELETE ON event_action_results BEGIN
+                        DELETE FROM event_fts WHERE rowid = old.id;
+                    END
+                """)
+                # Backfill rows stored before the index existed
+                cursor.execute(f"""
+                    INSERT INTO event_fts(rowid, content)
+                    SELECT id, {self._FLATTEN_SQL.format(column="event")} FROM event_action_results
+                    WHERE id > coalesce((SELECT max(rowid) FROM event_fts), 0)
+                """)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ FTS5 unavailable, falling back to LIKE search: {e}")
             
-            conn.commit()
+            self._conn.commit()
     
     def store_event_action_result(self, ear: EventActionResult) -> int:
         """Store Event-Action-Result triple"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("""
                 INSERT INTO event_action_results 
                 (event, action, result, success, confidence, timestamp)
@@ -178,88 +282,174 @@ class LongTermMemory:
                 ear.confidence,
                 ear.timestamp.isoformat()
             ))
-            conn.commit()
-            return cursor.lastrowid
+            event_id = cursor.lastrowid
+            
+            if self.embedder is not None:
+                embedding = self.embedder(_flatten_text(ear.event))
+                if embedding is not None:
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    cursor.execute("""
+                        INSERT INTO memory_embeddings (event_id, embedding, dimension)
+                        VALUES (?, ?, ?)
+                    """, (event_id, vector.tobytes(), len(vector)))
+                    self._vectors = None  # rebuilt lazily on next search
+            
+            self._conn.commit()
+            return event_id
     
     def get_recent_events(self, limit: int = 10) -> List[EventActionResult]:
         """Get recent event-action-result triples"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        with self._lock:
+            rows = self._conn.execute("""
                 SELECT event, action, result, success, confidence, timestamp
                 FROM event_action_results
                 ORDER BY timestamp DESC
                 LIMIT ?
-            """, (limit,))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append(EventActionResult(
-                    event=json.loads(row[0]),
-                    action=json.loads(row[1]),
-                    result=json.loads(row[2]),
-                    success=bool(row[3]),
-                    confidence=row[4],
-                    timestamp=datetime.fromisoformat(row[5])
-                ))
-            
-            return results
+            """, (limit,)).fetchall()
+        
+        results = []
+        for row in rows:
+            results.append(EventActionResult(
+                event=json.loads(row[0]),
+                action=json.loads(row[1]),
+                result=json.loads(row[2]),
+                success=bool(row[3]),
+                confidence=row[4],
+                timestamp=datetime.fromisoformat(row[5])
+            ))
+        
+        return results
     
     def find_similar_situations(self, situation: Dict, limit: int = 5) -> List[Dict]:
         """
         Step 44 (part): Find similar past situations
-        Basic implementation without embeddings
+        
+        Candidates come from the FTS5 index (BM25), the embedding index
+        (cosine) and the structured application/type index. Each result
+        carries a "score" in [0, 1]; results are sorted by it.
         """
-        # Simple keyword-based search
-        situation_str = json.dumps(situation).lower()
-        keywords = situation_str.split()[:5]  # First 5 words
+        # Only values: keys like "task" occur in nearly every event
+        terms = sorted(set(re.findall(r"\w+", _flatten_text(situation, keys=False).lower())))
+        application = _application(situation)
+        candidate_limit = max(limit * 10, 50)
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        text_scores: Dict[int, float] = {}
+        embedding_scores: Dict[int, float] = {}
+        feature_ids: List[int] = []
+        
+        with self._lock:
+            if terms and self.fts_enabled:
+                match = " OR ".join(f'"{term}"' for term in terms)
+                rows = self._conn.execute("""
+                    SELECT rowid, bm25(event_fts) FROM event_fts
+                    WHERE event_fts MATCH ?
+                    ORDER BY bm25(event_fts) LIMIT ?
+                """, (match, candidate_limit)).fetchall()
+                best = max((-rank for _, rank in rows), default=0.0)
+                if best > 0:
+                    text_scores = {row_id: -rank / best for row_id, rank in rows}
+            elif terms:
+                conditions = " OR ".join("lower(event) LIKE ?" for _ in terms)
+                rows = self._conn.execute(
+                    f"SELECT id FROM event_action_results WHERE {conditions} ORDER BY timestamp DESC LIMIT ?",
+                    [f"%{term}%" for term in terms] + [candidate_limit]
+                ).fetchall()
+                text_scores = {row_id: 1.0 for row_id, in rows}
             
-            # Search for events with similar keywords
-            query = "SELECT event, action, result, success, timestamp FROM event_action_results WHERE "
-            conditions = [f"lower(event) LIKE ?" for _ in keywords]
-            query += " OR ".join(conditions)
-            query += " ORDER BY timestamp DESC LIMIT ?"
+            if application:
+                feature_ids = [row_id for row_id, in self._conn.execute("""
+                    SELECT id FROM event_action_results WHERE application = ?
+                    ORDER BY timestamp DESC LIMIT ?
+                """, (application, candidate_limit))]
             
-            params = [f"%{kw}%" for kw in keywords] + [limit]
-            cursor.execute(query, params)
+            if self.embedder is not None:
+                embedding_scores = self._embedding_candidates(situation, candidate_limit)
             
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    "situation": json.loads(row[0]),
-                    "action": json.loads(row[1]),
-                    "result": json.loads(row[2]),
-                    "success": bool(row[3]),
-                    "timestamp": row[4]
-                })
+            candidate_ids = set(text_scores) | set(embedding_scores) | set(feature_ids)
+            if not candidate_ids:
+                return []
             
-            return results
+            placeholders = ",".join("?" * len(candidate_ids))
+            rows = self._conn.execute(f"""
+                SELECT id, event, action, result, success, timestamp, application
+                FROM event_action_results WHERE id IN ({placeholders})
+            """, list(candidate_ids)).fetchall()
+        
+        results = []
+        for row_id, event, action, result, success, timestamp, row_application in rows:
+            event = json.loads(event)
+            feature = self._feature_score(situation, application, event, row_application)
+            if embedding_scores:
+                similarity = self.EMBEDDING_WEIGHT * embedding_scores.get(row_id, 0.0)
+            else:
+                similarity = self.TEXT_WEIGHT * text_scores.get(row_id, 0.0)
+            results.append({
+                "id": row_id,
+                "situation": event,
+                "action": json.loads(action),
+                "result": json.loads(result),
+                "success": bool(success),
+                "timestamp": timestamp,
+                "score": round(similarity + self.FEATURE_WEIGHT * feature, 4)
+            })
+        
+        results.sort(key=lambda r: (r["score"], r["timestamp"]), reverse=True)
+        return results[:limit]
+    
+    @staticmethod
+    def _feature_score(situation: Dict, application: Optional[str], event: Dict, row_application: Optional[str]) -> float:
+        """Share of the situation's structured features (application, type) found in the event"""
+        features = []
+        if application:
+            features.append(application == row_application)
+        if "type" in situation:
+            features.append(situation.get("type") == event.get("type"))
+        return sum(features) / len(features) if features else 0.0
+    
+    def _embedding_candidates(self, situation: Dict, limit: int) -> Dict[int, float]:
+        """Cosine similarity of the situation to stored event embeddings"""
+        query = self.embedder(_flatten_text(situation))
+        if query is None:
+            return {}
+        
+        if self._vectors is None:
+            rows = self._conn.execute("SELECT event_id, embedding FROM memory_embeddings").fetchall()
+            if not rows:
+                return {}
+            ids = np.array([row[0] for row in rows])
+            matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self._vectors = (ids, matrix)
+        
+        ids, matrix = self._vectors
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[0] != matrix.shape[1]:
+            return {}
+        scores = matrix @ (query / max(np.linalg.norm(query), 1e-12))
+        top = np.argsort(-scores)[:limit]
+        return {int(ids[i]): float(max(scores[i], 0.0)) for i in top}
     
     def get_action_history(self, action_type: str, limit: int = 10) -> List[Dict]:
         """Get history of specific action type"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        with self._lock:
+            rows = self._conn.execute("""
                 SELECT action, result, success, timestamp
                 FROM event_action_results
-                WHERE json_extract(action, '$.type') = ?
+                WHERE action_type = ?
                 ORDER BY timestamp DESC
                 LIMIT ?
-            """, (action_type, limit))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    "action": json.loads(row[0]),
-                    "result": json.loads(row[1]),
-                    "success": bool(row[2]),
-                    "timestamp": row[3]
-                })
-            
-            return results
+            """, (action_type, limit)).fetchall()
+        
+        results = []
+        for row in rows:
+            results.append({
+                "action": json.loads(row[0]),
+                "result": json.loads(row[1]),
+                "success": bool(row[2]),
+                "timestamp": row[3]
+            })
+        
+        return results
     
     def consolidate_memory(self):
         """
@@ -268,10 +458,10 @@ class LongTermMemory:
         - Combine similar events
         - Delete old useless records
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             
-            # Delete records older than retention period
+            # Delete records older than retention period (triggers clean the indexes)
             cutoff_date = datetime.now() - timedelta(days=self.retention_days)
             cursor.execute("""
                 DELETE FROM event_action_results
@@ -279,7 +469,8 @@ class LongTermMemory:
             """, (cutoff_date.isoformat(),))
             
             deleted = cursor.rowcount
-            conn.commit()
+            self._conn.commit()
+            self._vectors = None
             
             # Vacuum to reclaim space
             cursor.execute("VACUUM")
@@ -295,8 +486,13 @@ class LongTermMemory:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = self.db_path.parent / f"memory_backup_{timestamp}.db"
         
-        import shutil
-        shutil.copy2(self.db_path, backup_path)
+        # SQLite online backup: consistent even with the connection open
+        with self._lock:
+            target = sqlite3.connect(backup_path)
+            try:
+                self._conn.backup(target)
+            finally:
+                target.close()
         logger.info(f"💾 Memory backed up to {backup_path}")
         return backup_path
     
@@ -308,9 +504,38 @@ class LongTermMemory:
         if not backup_path.exists():
             raise FileNotFoundError(f"Backup not found: {backup_path}")
         
-        import shutil
-        shutil.copy2(backup_path, self.db_path)
+        with self._lock:
+            source = sqlite3.connect(backup_path)
+            try:
+                source.backup(self._conn)
+            finally:
+                source.close()
+            self._vectors = None
+            self._init_database()
         logger.info(f"♻️ Memory restored from {backup_path}")
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def _flatten_text(data: Any, keys: bool = True) -> str:
+    """Keys (optionally) and scalar values of a nested dict/list as one string"""
+    if isinstance(data, dict):
+        return " ".join(
+            f"{key} {_flatten_text(value, keys)}" if keys else _flatten_text(value, keys)
+            for key, value in data.items()
+        )
+    if isinstance(data, (list, tuple)):
+        return " ".join(_flatten_text(value, keys) for value in data)
+    return "" if data is None else str(data)
+
+
+def _application(situation: Dict) -> Optional[str]:
+    """Application name of a situation (same rule as the generated column)"""
+    value = situation.get("application") or situation.get("app")
+    return str(value).lower() if value else None
 
 
 class SessionMemory:
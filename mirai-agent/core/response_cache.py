@@ -0,0 +1,266 @@
+"""
+MIRAI Response Cache
+Кэш ответов LLM для повторяющихся запросов агента
+
+- Ключ: (model, нормализованные messages, tools, temperature, параметры)
+- Точное совпадение - словарь по sha256 ключа (микросекунды)
+- Почти-совпадение (опционально): та же модель/инструменты/начало диалога
+  и похожее последнее сообщение (косинус эмбеддингов >= порога)
+- TTL и LRU-вытеснение по размеру
+- Статистика попаданий по вызывающим (autonomous_agent.think, ...)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires: float
+    scope: str
+    vector: Optional[np.ndarray] = None
+
+
+def normalize_message(message: Any) -> Dict[str, Any]:
+    """Сообщение (dict или объект ответа OpenAI) -> канонический dict"""
+    if hasattr(message, "model_dump"):
+        message = message.model_dump(exclude_none=True)
+    elif not isinstance(message, dict):
+        message = {key: value for key, value in vars(message).items() if not key.startswith("_")}
+    normalized = {}
+    for key, value in message.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = re.sub(r"\s+", " ", value).strip()
+        normalized[key] = value
+    return normalized
+
+
+def _digest(data: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ResponseCache:
+    """
+    Кэш ответов LLM
+
+    Args:
+        max_entries: Сколько ответов хранить (LRU)
+        ttl: Время жизни ответа в секундах
+        embedder: text -> вектор (или объект с embed_query) для
+            поиска почти-совпадений; None - только точные совпадения
+        similarity_threshold: Минимальный косинус для почти-совпадения
+        max_temperature: Кэшировать только вызовы с явной temperature
+            не выше порога (без temperature модель сэмплирует с
+            температурой по умолчанию); None - кэшировать любые
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        embedder: Optional[Any] = None,
+        similarity_threshold: float = 0.95,
+        max_temperature: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = getattr(embedder, "embed_query", embedder)
+        self.similarity_threshold = similarity_threshold
+        self.max_temperature = max_temperature
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._scopes: Dict[str, List[str]] = defaultdict(list)
+        self._lock = threading.RLock()
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+        )
+
+    # ─── Ключи ───────────────────────────────────────────────────
+
+    def keys(
+        self,
+        model: str,
+        messages: Sequence[Any],
+        tools: Optional[Sequence[Dict]] = None,
+        temperature: Optional[float] = None,
+        **params: Any,
+    ) -> Tuple[str, str, str]:
+        """
+        (ключ, область почти-совпадений, текст последнего сообщения)
+
+        Область - всё, кроме последнего сообщения: почти-совпадение ищется
+        только среди ответов на тот же диалог с тем же набором инструментов.
+        """
+        messages = [normalize_message(m) for m in messages]
+        head = {"model": model, "tools": tools or [], "temperature": temperature, "params": params}
+        scope = _digest([head, messages[:-1]])
+        last = messages[-1] if messages else {}
+        return _digest([scope, last]), scope, str(last.get("content", ""))
+
+    def cacheable(self, temperature: Optional[float]) -> bool:
+        if self.max_temperature is None:
+            return True
+        return temperature is not None and temperature <= self.max_temperature
+
+    # ─── Поиск и сохранение ──────────────────────────────────────
+
+    def get(self, key: str, scope: str = "", text: str = "", caller: str = "default", near: bool = True) -> Any:
+        """Ответ из кэша или None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > now:
+                self._entries.move_to_end(key)
+                self.stats[caller]["hits"] += 1
+                return entry.value
+            if entry is not None:
+                self._remove(key)
+
+        if near and self.embedder is not None and text:
+            value = self._near(scope, text, now)
+            if value is not None:
+                with self._lock:
+                    self.stats[caller]["near_hits"] += 1
+                return value
+
+        with self._lock:
+            self.stats[caller]["misses"] += 1
+        return None
+
+    def _near(self, scope: str, text: str, now: float) -> Any:
+        with self._lock:
+            candidates = [
+                (key, self._entries[key]) for key in self._scopes.get(scope, [])
+                if self._entries[key].vector is not None and self._entries[key].expires > now
+            ]
+        if not candidates:
+            return None
+
+        query = self._embed(text)
+        matrix = np.stack([entry.vector for _, entry in candidates])
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        key, entry = candidates[best]
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry.value
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embedder(text), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def put(self, key: str, value: Any, scope: str = "", text: str = "", caller: str = "default"):
+        vector = self._embed(text) if self.embedder is not None and text else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, time.time() + self.ttl, scope, vector)
+            self._scopes[scope].append(key)
+            self.stats[caller]["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        keys = self._scopes.get(entry.scope)
+        if keys is not None:
+            keys.remove(key)
+            if not keys:
+                del self._scopes[entry.scope]
+
+    def cached_call(
+        self,
+        caller: str,
+        call: Callable[[], Any],
+        model: str,
+        messages: Sequence[Any],
+        tools: Optional[Sequence[Dict]] = None,
+        temperature: Optional[float] = None,
+        near: bool = True,
+        validate: Optional[Callable[[Any], bool]] = None,
+        **params: Any,
+    ) -> Any:
+        """
+        Ответ из кэша или результат call() (сохраняется в кэш)
+
+        Args:
+            caller: Имя вызывающего для статистики
+            call: Настоящий вызов LLM
+            validate: Сохранять ответ, только если validate(ответ) истинно
+                (например, не кэшировать текст ошибки)
+        """
+        if not self.cacheable(temperature):
+            return call()
+        key, scope, text = self.keys(model, messages, tools, temperature, **params)
+        value = self.get(key, scope, text, caller, near)
+        if value is not None:
+            return value
+        value = call()
+        if value is not None and (validate is None or validate(value)):
+            self.put(key, value, scope, text, caller)
+        return value
+
+    # ─── Обслуживание ────────────────────────────────────────────
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика по вызывающим, с долей попаданий"""
+        with self._lock:
+            result = {}
+            for caller, counts in self.stats.items():
+                lookups = counts["hits"] + counts["near_hits"] + counts["misses"]
+                hits = counts["hits"] + counts["near_hits"]
+                result[caller] = {**counts, "hit_rate": round(hits / lookups, 3) if lookups else 0.0}
+            return result
+
+
+_global_response_cache: Optional[ResponseCache] = None
+_global_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Общий кэш ответов процесса (None, если отключён MIRAI_LLM_CACHE=0)
+
+    По умолчанию кэширует только детерминированные вызовы (temperature=0);
+    порог задаёт MIRAI_LLM_CACHE_MAX_TEMPERATURE.
+    """
+    global _global_response_cache
+    if os.getenv("MIRAI_LLM_CACHE", "1").lower() in ("0", "false", "off"):
+        return None
+    with _global_lock:
+        if _global_response_cache is None:
+            _global_response_cache = ResponseCache(
+                max_entries=int(os.getenv("MIRAI_LLM_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("MIRAI_LLM_CACHE_TTL", "3600")),
+                max_temperature=float(os.getenv("MIRAI_LLM_CACHE_MAX_TEMPERATURE", "0")),
+            )
+        return _global_response_cache
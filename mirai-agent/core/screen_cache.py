@@ -0,0 +1,256 @@
+"""
+MIRAI Screen State Cache
+Кэш анализа экрана по перцептивным хэшам
+
+- pHash всего кадра (DCT уменьшенного grayscale) - быстрый отбор похожих
+  сохранённых состояний
+- dHash + aHash и средняя яркость по сетке тайлов - какие именно области
+  изменились (dHash не видит плоских областей, aHash и яркость - видят)
+- hit: экран не изменился, возвращаем прошлый анализ без vision-запроса
+- partial: изменилась небольшая область, повторно анализируется только она
+- miss: экран изменился сильно, нужен полный анализ
+
+Мелкие изменения (часы в трее, мигающий курсор) не меняют хэши, в отличие
+от SHA-256 по байтам изображения.
+
+Копия алгоритма с теми же порогами и тестами - ScreenStateCache в
+MIRAI_V3_SUPERAGENT/01_VISION_SYSTEM/vision_complete.py (V3 ставится
+отдельно и не импортирует core); менять обе вместе.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+HIT = "hit"
+PARTIAL = "partial"
+MISS = "miss"
+
+
+def to_grayscale(image, size: Tuple[int, int]) -> np.ndarray:
+    """PIL Image или массив (H, W[, C]) -> float32 grayscale размера size=(width, height)"""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    return np.asarray(image.convert("L").resize(size, Image.BILINEAR), dtype=np.float32)
+
+
+def _pack_bits(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def dhash(image, hash_size: int = 8) -> int:
+    """Difference hash: знак градиента между соседними пикселями"""
+    gray = to_grayscale(image, (hash_size + 1, hash_size))
+    return _pack_bits(gray[:, 1:] > gray[:, :-1])
+
+
+def phash(image, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """Perceptual hash: низкие частоты DCT относительно медианы"""
+    n = hash_size * highfreq_factor
+    dct = _dct_matrix(n)
+    coeffs = dct @ to_grayscale(image, (n, n)) @ dct.T
+    low = coeffs[:hash_size, :hash_size]
+    return _pack_bits(low > np.median(low.ravel()[1:]))
+
+
+def tile_hashes(
+    image, grid: Tuple[int, int] = (8, 8), hash_size: int = 8
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Хэши тайлов сетки grid=(rows, cols) за одно уменьшение кадра
+
+    Returns:
+        (биты dHash + aHash (rows, cols, hash_size * hash_size / 4) uint8,
+         средняя яркость (rows, cols) float32)
+    """
+    rows, cols = grid
+    gray = to_grayscale(image, (cols * (hash_size + 1), rows * hash_size))
+    blocks = gray.reshape(rows, hash_size, cols, hash_size + 1).transpose(0, 2, 1, 3)
+    means = blocks.mean(axis=(2, 3))
+    gradient = blocks[..., 1:] > blocks[..., :-1]
+    average = blocks[..., 1:] > means[..., None, None]
+    bits = np.concatenate([gradient, average], axis=-1)
+    return np.packbits(bits.reshape(rows, cols, -1), axis=-1), means
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def tile_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Расстояние Хэмминга между соответствующими тайлами"""
+    return np.unpackbits(a ^ b, axis=-1).sum(axis=-1)
+
+
+@dataclass
+class ScreenFingerprint:
+    """Перцептивный отпечаток кадра"""
+    size: Tuple[int, int]  # (width, height)
+    frame_hash: int
+    tiles: np.ndarray
+    tile_means: np.ndarray
+
+
+@dataclass
+class ScreenLookup:
+    """Результат поиска в кэше"""
+    status: str  # hit / partial / miss
+    fingerprint: ScreenFingerprint
+    analysis: Any = None  # копия прошлого анализа (hit и partial)
+    changed_tiles: List[Tuple[int, int]] = field(default_factory=list)
+    changed_region: Optional[Tuple[int, int, int, int]] = None  # x, y, width, height
+
+
+class ScreenStateCache:
+    """
+    Кэш анализа экрана по перцептивным хэшам
+
+    Args:
+        grid: Сетка тайлов (rows, cols)
+        frame_threshold: Состояния дальше этого расстояния pHash не сравниваются по тайлам
+        tile_threshold: Расстояние хэшей, после которого тайл считается изменённым
+        brightness_threshold: Изменение средней яркости тайла (0-255), после которого он изменён
+        max_changed_fraction: Больше этой доли изменённых тайлов - полный анализ
+        ttl: Время жизни анализа, секунды
+        max_entries: Сколько состояний экрана хранить на один ключ (вопрос/промпт)
+    """
+
+    def __init__(
+        self,
+        grid: Tuple[int, int] = (8, 8),
+        hash_size: int = 8,
+        frame_threshold: int = 24,
+        tile_threshold: int = 6,
+        brightness_threshold: float = 8.0,
+        max_changed_fraction: float = 0.25,
+        ttl: float = 300,
+        max_entries: int = 16,
+    ):
+        self.grid = grid
+        self.hash_size = hash_size
+        self.frame_threshold = frame_threshold
+        self.tile_threshold = tile_threshold
+        self.brightness_threshold = brightness_threshold
+        self.max_changed_fraction = max_changed_fraction
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: Dict[str, "OrderedDict[int, Tuple[ScreenFingerprint, Any, float]]"] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.stats = {"hits": 0, "partial": 0, "misses": 0, "stores": 0}
+
+    def fingerprint(self, image) -> ScreenFingerprint:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        tiles, means = tile_hashes(image, self.grid, self.hash_size)
+        return ScreenFingerprint(
+            size=image.size,
+            frame_hash=phash(image, self.hash_size),
+            tiles=tiles,
+            tile_means=means,
+        )
+
+    def changed_tiles(self, a: ScreenFingerprint, b: ScreenFingerprint) -> np.ndarray:
+        """Индексы (row, col) изменившихся тайлов"""
+        changed = (tile_distances(a.tiles, b.tiles) > self.tile_threshold) | (
+            np.abs(a.tile_means - b.tile_means) > self.brightness_threshold
+        )
+        return np.argwhere(changed)
+
+    def lookup(self, image, key: str = "") -> ScreenLookup:
+        """Найти ближайшее сохранённое состояние экрана для key"""
+        fingerprint = image if isinstance(image, ScreenFingerprint) else self.fingerprint(image)
+        best = None
+        now = time.time()
+
+        with self._lock:
+            entries = self._entries.get(key, OrderedDict())
+            for entry_id, (stored, analysis, created_at) in list(entries.items()):
+                if now - created_at > self.ttl:
+                    del entries[entry_id]
+                    continue
+                if stored.size != fingerprint.size:
+                    continue
+                frame_distance = hamming(stored.frame_hash, fingerprint.frame_hash)
+                if frame_distance > self.frame_threshold:
+                    continue
+                changed = self.changed_tiles(stored, fingerprint)
+                rank = (len(changed), frame_distance)
+                if best is None or rank < best[0]:
+                    best = (rank, entry_id, analysis, changed)
+
+            if best is None:
+                self.stats["misses"] += 1
+                return ScreenLookup(MISS, fingerprint)
+
+            (changed_count, _), entry_id, analysis, changed = best
+            entries.move_to_end(entry_id)
+            if changed_count == 0:
+                self.stats["hits"] += 1
+                return ScreenLookup(HIT, fingerprint, copy.deepcopy(analysis))
+
+            rows, cols = self.grid
+            if changed_count <= self.max_changed_fraction * rows * cols:
+                self.stats["partial"] += 1
+                tiles = [(int(r), int(c)) for r, c in changed]
+                return ScreenLookup(
+                    PARTIAL, fingerprint, copy.deepcopy(analysis), tiles, self._region(fingerprint.size, tiles)
+                )
+
+            self.stats["misses"] += 1
+            return ScreenLookup(MISS, fingerprint, changed_tiles=[(int(r), int(c)) for r, c in changed])
+
+    def _region(self, size: Tuple[int, int], tiles: List[Tuple[int, int]]) -> Tuple[int, int, int, int]:
+        """Пиксельный прямоугольник, покрывающий изменённые тайлы"""
+        width, height = size
+        rows, cols = self.grid
+        top = min(r for r, _ in tiles) * height // rows
+        bottom = (max(r for r, _ in tiles) + 1) * height // rows
+        left = min(c for _, c in tiles) * width // cols
+        right = (max(c for _, c in tiles) + 1) * width // cols
+        return left, top, right - left, bottom - top
+
+    def store(self, fingerprint: ScreenFingerprint, analysis: Any, key: str = ""):
+        """Запомнить анализ для состояния экрана"""
+        with self._lock:
+            entries = self._entries.setdefault(key, OrderedDict())
+            self._next_id += 1
+            entries[self._next_id] = (fingerprint, copy.deepcopy(analysis), time.time())
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self.stats["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["partial"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": sum(len(e) for e in self._entries.values()),
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+def crop(image, region: Tuple[int, int, int, int]):
+    """Вырезать (x, y, width, height) из PIL Image или массива"""
+    x, y, width, height = region
+    if isinstance(image, np.ndarray):
+        return image[y:y + height, x:x + width]
+    return image.crop((x, y, x + width, y + height))
@@ -0,0 +1,415 @@
+"""
+MIRAI Template Matcher
+Поиск UI-элементов на экране по шаблонам
+
+- Пирамида кадра (grayscale, уменьшение в 2 раза на уровень) строится
+  один раз на кадр и переиспользуется всеми шаблонами
+- Coarse-to-fine: полный поиск только на грубом уровне, дальше уточнение
+  в маленьком окне вокруг кандидатов
+- ROI: если известно окно или прошлое положение элемента, ищем сначала там
+- Несколько масштабов шаблона (разный DPI / zoom)
+- OpenCV используется, если установлен; иначе NCC на NumPy через FFT
+  (та же метрика, что cv2.TM_CCOEFF_NORMED)
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+from core.frame_buffer import Frame
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # x, y, width, height
+
+
+def to_gray(image) -> np.ndarray:
+    """PIL Image / RGB или grayscale массив -> float32 grayscale"""
+    if isinstance(image, Frame):
+        return image.gray().astype(np.float32)
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("L"), dtype=np.float32)
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image = image[..., :3] @ np.array([0.299, 0.587, 0.114])
+    return image.astype(np.float32)
+
+
+def downsample(gray: np.ndarray) -> np.ndarray:
+    """Уменьшение в 2 раза усреднением блоков 2x2"""
+    height, width = gray.shape[0] // 2 * 2, gray.shape[1] // 2 * 2
+    blocks = gray[:height, :width].reshape(height // 2, 2, width // 2, 2)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def build_pyramid(gray: np.ndarray, levels: int) -> List[np.ndarray]:
+    pyramid = [gray]
+    for _ in range(levels - 1):
+        if min(pyramid[-1].shape) < 32:
+            break
+        pyramid.append(downsample(pyramid[-1]))
+    return pyramid
+
+
+def _integral(image: np.ndarray) -> np.ndarray:
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    integral[1:, 1:] = image.cumsum(0).cumsum(1)
+    return integral
+
+
+def _window_sums(integral: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Суммы по всем окнам height x width из интегрального изображения"""
+    return (
+        integral[height:, width:] - integral[:-height, width:]
+        - integral[height:, :-width] + integral[:-height, :-width]
+    )
+
+
+class SearchImage:
+    """
+    Изображение, подготовленное для NCC с любым числом шаблонов
+
+    Спектр и интегральные изображения считаются один раз, поэтому каждый
+    следующий шаблон стоит одного умножения спектров.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.shape = image.shape
+        if not CV2_AVAILABLE:
+            data = image.astype(np.float64)
+            self._spectrum = np.fft.rfft2(data)
+            self._integral = _integral(data)
+            self._integral_sq = _integral(data * data)
+
+    def match(self, template: np.ndarray) -> np.ndarray:
+        """
+        Нормированная кросс-корреляция (TM_CCOEFF_NORMED)
+
+        Returns:
+            Карта совпадений (H - h + 1, W - w + 1), значения в [-1, 1]
+        """
+        if CV2_AVAILABLE:
+            return cv2.matchTemplate(self.image, template, cv2.TM_CCOEFF_NORMED)
+
+        height, width = template.shape
+        shape = self.shape
+        centered = template.astype(np.float64) - template.mean()
+
+        spectrum = self._spectrum * np.conj(np.fft.rfft2(centered, s=shape))
+        correlation = np.fft.irfft2(spectrum, s=shape)[: shape[0] - height + 1, : shape[1] - width + 1]
+
+        sums = _window_sums(self._integral, height, width)
+        variance = _window_sums(self._integral_sq, height, width) - sums * sums / (height * width)
+        denominator = np.sqrt(np.maximum(variance, 0) * (centered * centered).sum())
+
+        result = np.zeros_like(correlation)
+        valid = denominator > 1e-6 * max(denominator.max(), 1.0)
+        result[valid] = correlation[valid] / denominator[valid]
+        return np.clip(result, -1.0, 1.0).astype(np.float32)
+
+
+def match_ncc(image: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """NCC одного шаблона (для многих шаблонов - SearchImage)"""
+    return SearchImage(image).match(template)
+
+
+def _peaks(scores: np.ndarray, count: int, min_score: float, radius: Tuple[int, int]) -> List[Tuple[float, int, int]]:
+    """Лучшие локальные максимумы (score, x, y) с подавлением соседей"""
+    scores = scores.copy()
+    ry, rx = radius
+    peaks = []
+    for _ in range(count):
+        y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        score = float(scores[y, x])
+        if score < min_score:
+            break
+        peaks.append((score, int(x), int(y)))
+        scores[max(0, y - ry):y + ry + 1, max(0, x - rx):x + rx + 1] = -1.0
+    return peaks
+
+
+class Template:
+    """Шаблон UI-элемента с пирамидами для каждого масштаба"""
+
+    def __init__(self, image, name: str = "template", scales: Sequence[float] = (1.0,), levels: int = 4):
+        self.name = name
+        gray = to_gray(image)
+        self.pyramids: Dict[float, List[np.ndarray]] = {}
+        for scale in scales:
+            scaled = gray
+            if scale != 1.0:
+                size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+                scaled = np.asarray(Image.fromarray(gray).resize(size, Image.BILINEAR), dtype=np.float32)
+            self.pyramids[scale] = build_pyramid(scaled, levels)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) в масштабе 1.0"""
+        base = self.pyramids.get(1.0) or next(iter(self.pyramids.values()))
+        return base[0].shape[1], base[0].shape[0]
+
+
+@dataclass
+class Match:
+    """Найденный шаблон (координаты экрана)"""
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+    score: float
+    scale: float = 1.0
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+    @property
+    def region(self) -> Region:
+        return self.x, self.y, self.width, self.height
+
+
+class TemplateMatcher:
+    """
+    Coarse-to-fine поиск шаблонов
+
+    Args:
+        levels: Максимум уровней пирамиды
+        min_template_size: Минимальная сторона шаблона на грубом уровне, px
+        coarse_margin: Насколько порог на грубом уровне ниже итогового
+        candidates: Сколько кандидатов грубого уровня уточнять
+        roi_margin: Запас вокруг прошлого положения элемента, px
+    """
+
+    def __init__(
+        self,
+        levels: int = 4,
+        min_template_size: int = 8,
+        coarse_margin: float = 0.25,
+        candidates: int = 3,
+        roi_margin: int = 150,
+    ):
+        self.levels = levels
+        self.min_template_size = min_template_size
+        self.coarse_margin = coarse_margin
+        self.candidates = candidates
+        self.roi_margin = roi_margin
+
+        self._templates: Dict[Tuple[str, float, Tuple[float, ...]], Template] = {}
+        self._last_seen: Dict[str, Region] = {}
+        self._lock = threading.Lock()
+        self.stats = {"searches": 0, "roi_hits": 0, "full_searches": 0}
+
+    # ─── Шаблоны и пирамиды ──────────────────────────────────────
+
+    def load_template(self, path: str, scales: Sequence[float] = (1.0,)) -> Template:
+        """Загрузить шаблон с диска (кэшируется до изменения файла)"""
+        mtime = Path(path).stat().st_mtime
+        key = (str(path), mtime, tuple(scales))
+        with self._lock:
+            template = self._templates.get(key)
+        if template is None:
+            with Image.open(path) as image:
+                template = Template(image, name=str(path), scales=scales, levels=self.levels)
+            with self._lock:
+                self._templates[key] = template
+        return template
+
+    def pyramid(self, frame) -> List[np.ndarray]:
+        """Пирамида кадра; для Frame строится один раз и хранится в кадре"""
+        if isinstance(frame, Frame):
+            return frame.memo(("pyramid", self.levels), lambda f: build_pyramid(to_gray(f), self.levels))
+        return build_pyramid(to_gray(frame), self.levels)
+
+    # ─── Поиск ───────────────────────────────────────────────────
+
+    def find(
+        self,
+        frame,
+        template: Union[Template, str],
+        threshold: float = 0.8,
+        roi: Optional[Region] = None,
+    ) -> Optional[Match]:
+        """Найти один шаблон; None, если совпадение ниже threshold"""
+        return self.find_many(frame, [template], threshold, roi)[self._name(template)]
+
+    def find_many(
+        self,
+        frame,
+        templates: Iterable[Union[Template, str]],
+        threshold: float = 0.8,
+        roi: Optional[Region] = None,
+    ) -> Dict[str, Optional[Match]]:
+        """
+        Найти несколько шаблонов в одном кадре (общая пирамида)
+
+        Области поиска: явный roi (только он), иначе сначала прошлое
+        положение элемента, затем весь кадр.
+        """
+        pyramid = self.pyramid(frame)
+        origin = frame.origin if isinstance(frame, Frame) else (0, 0)
+        frame_region = (0, 0, pyramid[0].shape[1], pyramid[0].shape[0])
+        prepared: Dict[Tuple[int, Region], SearchImage] = {}  # грубые уровни, общие для шаблонов
+
+        results = {}
+        for template in templates:
+            if isinstance(template, str):
+                template = self.load_template(template)
+            self.stats["searches"] += 1
+
+            regions = []
+            if roi is not None:
+                regions.append(self._to_frame(roi, origin))
+            else:
+                last = self._last_seen.get(template.name)
+                if last is not None:
+                    x, y, width, height = self._to_frame(last, origin)
+                    margin = self.roi_margin
+                    regions.append((x - margin, y - margin, width + 2 * margin, height + 2 * margin))
+            regions.append(frame_region)
+
+            if roi is not None:
+                regions = regions[:1]  # явный roi: за его пределами не ищем
+
+            match = None
+            for region in regions:
+                if region is frame_region:
+                    self.stats["full_searches"] += 1
+                region = self._clip(region, frame_region)
+                if region is None:
+                    continue
+                match = self._search(pyramid, template, region, threshold, prepared)
+                if match is not None:
+                    if region != frame_region:
+                        self.stats["roi_hits"] += 1
+                    break
+
+            if match is not None:
+                match.x += origin[0]
+                match.y += origin[1]
+                match.name = template.name
+                self._last_seen[template.name] = match.region
+            results[template.name] = match
+        return results
+
+    def _search(
+        self,
+        pyramid: List[np.ndarray],
+        template: Template,
+        region: Region,
+        threshold: float,
+        prepared: Dict[Tuple[int, Region], SearchImage],
+    ) -> Optional[Match]:
+        best = None
+        for scale, template_pyramid in template.pyramids.items():
+            match = self._search_scale(pyramid, template_pyramid, region, threshold, prepared)
+            if match is not None and (best is None or match.score > best.score):
+                match.scale = scale
+                best = match
+        return best
+
+    def _search_scale(
+        self,
+        pyramid: List[np.ndarray],
+        template_pyramid: List[np.ndarray],
+        region: Region,
+        threshold: float,
+        prepared: Dict[Tuple[int, Region], SearchImage],
+    ) -> Optional[Match]:
+        x0, y0, width, height = region
+        base_h, base_w = template_pyramid[0].shape
+        if base_w > width or base_h > height:
+            return None
+
+        # Самый грубый уровень, где шаблон ещё различим
+        level = 0
+        while (
+            level + 1 < min(len(pyramid), len(template_pyramid))
+            and min(template_pyramid[level + 1].shape) >= self.min_template_size
+        ):
+            level += 1
+
+        # Полный поиск в ROI на грубом уровне
+        factor = 2 ** level
+        key = (level, region)
+        if key not in prepared:
+            prepared[key] = SearchImage(
+                pyramid[level][y0 // factor:(y0 + height) // factor, x0 // factor:(x0 + width) // factor]
+            )
+        search_image = prepared[key]
+        tmpl = template_pyramid[level]
+        if tmpl.shape[0] > search_image.shape[0] or tmpl.shape[1] > search_image.shape[1]:
+            return None
+        scores = search_image.match(tmpl)
+        min_score = threshold - self.coarse_margin if level else threshold
+        candidates = [
+            (score, x + x0 // factor, y + y0 // factor)
+            for score, x, y in _peaks(scores, self.candidates, min_score, (tmpl.shape[0] // 2, tmpl.shape[1] // 2))
+        ]
+
+        # Уточнение кандидатов на каждом более детальном уровне
+        for finer in range(level - 1, -1, -1):
+            tmpl = template_pyramid[finer]
+            image = pyramid[finer]
+            refined = []
+            for _, x, y in candidates:
+                x, y = x * 2, y * 2
+                left, top = max(0, x - 2), max(0, y - 2)
+                window = image[top:y + tmpl.shape[0] + 2, left:x + tmpl.shape[1] + 2]
+                if window.shape[0] < tmpl.shape[0] or window.shape[1] < tmpl.shape[1]:
+                    continue
+                local = match_ncc(window, tmpl)
+                dy, dx = np.unravel_index(int(np.argmax(local)), local.shape)
+                refined.append((float(local[dy, dx]), left + int(dx), top + int(dy)))
+            min_score = threshold - self.coarse_margin * finer / max(level, 1)
+            candidates = [c for c in refined if c[0] >= min_score]
+
+        if not candidates:
+            return None
+        score, x, y = max(candidates)
+        if score < threshold:
+            return None
+        return Match("", x, y, base_w, base_h, score)
+
+    # ─── Служебное ───────────────────────────────────────────────
+
+    @staticmethod
+    def _name(template: Union[Template, str]) -> str:
+        return template if isinstance(template, str) else template.name
+
+    @staticmethod
+    def _to_frame(region: Region, origin: Tuple[int, int]) -> Region:
+        x, y, width, height = region
+        return x - origin[0], y - origin[1], width, height
+
+    @staticmethod
+    def _clip(region: Region, bounds: Region) -> Optional[Region]:
+        x, y, width, height = region
+        left, top = max(x, bounds[0]), max(y, bounds[1])
+        right = min(x + width, bounds[0] + bounds[2])
+        bottom = min(y + height, bounds[1] + bounds[3])
+        if right <= left or bottom <= top:
+            return None
+        return left, top, right - left, bottom - top
+
+    def forget(self, name: Optional[str] = None):
+        """Сбросить прошлые положения элементов"""
+        if name is None:
+            self._last_seen.clear()
+        else:
+            self._last_seen.pop(name, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "templates": len(self._templates), "tracked": len(self._last_seen)}
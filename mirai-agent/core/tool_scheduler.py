@@ -0,0 +1,211 @@
+"""
+MIRAI Tool Scheduler
+Параллельное выполнение вызовов инструментов из одного ответа модели
+
+- Независимые вызовы (чтение, поиск) выполняются одновременно в
+  ограниченном пуле потоков
+- Инструменты с побочными эффектами выполняются по одному: все вызовы до
+  них завершаются раньше, все вызовы после - начинаются позже
+- Таймаут на каждый инструмент (отсчёт от фактического старта вызова)
+- Пока вызов с побочными эффектами, брошенный по таймауту, ещё работает,
+  следующие вызовы не выполняются, а получают сообщение об этом
+- Результаты возвращаются в исходном порядке tool_calls
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Политика выполнения инструмента"""
+    serial: bool = True  # побочные эффекты: выполнять строго по одному
+    timeout: float = 60.0
+
+
+@dataclass
+class ToolCall:
+    """Вызов инструмента из ответа модели"""
+    id: str
+    name: str
+    arguments: Dict[str, Any]
+
+
+@dataclass
+class ToolResult:
+    """Результат вызова (content - текст для сообщения role=tool)"""
+    id: str
+    name: str
+    content: str
+    duration: float = 0.0
+    timed_out: bool = False
+    error: Optional[str] = None
+
+
+class ToolScheduler:
+    """
+    Планировщик вызовов инструментов
+
+    Args:
+        execute: (имя, аргументы) -> строка результата
+        specs: Политики инструментов; неизвестный инструмент считается
+            инструментом с побочными эффектами
+        max_workers: Размер пула потоков
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str, Dict[str, Any]], str],
+        specs: Optional[Dict[str, ToolSpec]] = None,
+        max_workers: int = 4,
+        default: ToolSpec = ToolSpec(),
+    ):
+        self.execute = execute
+        self.specs = dict(specs or {})
+        self.default = default
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Вызовы с побочными эффектами, брошенные по таймауту: (имя, future)
+        self._stuck: List[Tuple[str, Future]] = []
+        self.stats = {"calls": 0, "concurrent_batches": 0, "timeouts": 0, "errors": 0, "skipped": 0}
+
+    def spec(self, name: str) -> ToolSpec:
+        return self.specs.get(name, self.default)
+
+    def batches(self, calls: Sequence[ToolCall]) -> List[List[int]]:
+        """
+        Группы индексов вызовов, выполняемые одна за другой
+
+        Соседние независимые вызовы объединяются в одну группу; каждый
+        вызов с побочными эффектами - отдельная группа.
+        """
+        groups: List[List[int]] = []
+        for i, call in enumerate(calls):
+            if not self.spec(call.name).serial and groups and not self.spec(calls[groups[-1][0]].name).serial:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+        return groups
+
+    def run(self, calls: Sequence[ToolCall]) -> List[ToolResult]:
+        """Выполнить вызовы; результаты в порядке calls"""
+        results: List[Optional[ToolResult]] = [None] * len(calls)
+        for group in self.batches(calls):
+            blocker = self._still_running()
+            if blocker is not None:
+                # Порядок нарушился бы: следующий вызов начался бы до конца предыдущего
+                for i in group:
+                    results[i] = self._skipped(calls[i], blocker)
+                continue
+            if len(group) > 1:
+                self.stats["concurrent_batches"] += 1
+            for i, result in zip(group, self._run_group([calls[i] for i in group])):
+                results[i] = result
+        self.stats["calls"] += len(calls)
+        return results
+
+    def _still_running(self) -> Optional[str]:
+        """Имя брошенного по таймауту вызова с побочными эффектами, если он ещё идёт"""
+        with self._lock:
+            self._stuck = [(name, future) for name, future in self._stuck if not future.done()]
+            return self._stuck[0][0] if self._stuck else None
+
+    def _skipped(self, call: ToolCall, blocker: str) -> ToolResult:
+        self.stats["skipped"] += 1
+        logger.warning(f"⏭️ {call.name} пропущен: {blocker} ещё выполняется")
+        return ToolResult(
+            call.id, call.name,
+            f"⚠️ Инструмент {call.name} не запущен: предыдущий вызов с побочными эффектами "
+            f"({blocker}) ещё выполняется. Повтори вызов позже.",
+            error="previous side-effecting call still running",
+        )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mirai-tool")
+            return self._executor
+
+    def _invoke(self, call: ToolCall, started: Dict[int, float], index: int) -> ToolResult:
+        start = started[index] = time.perf_counter()
+        try:
+            content = self.execute(call.name, call.arguments)
+            return ToolResult(call.id, call.name, content, time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"❌ Инструмент {call.name} завершился с ошибкой: {e}")
+            return ToolResult(
+                call.id, call.name, f"❌ Ошибка инструмента {call.name}: {e}",
+                time.perf_counter() - start, error=str(e),
+            )
+
+    def _run_group(self, calls: List[ToolCall]) -> List[ToolResult]:
+        pool = self._pool()
+        started: Dict[int, float] = {}
+        futures: Dict[Future, int] = {pool.submit(self._invoke, call, started, i): i for i, call in enumerate(calls)}
+        results: List[Optional[ToolResult]] = [None] * len(calls)
+        pending = set(futures)
+
+        while pending:
+            deadlines = [
+                started[futures[f]] + self.spec(calls[futures[f]].name).timeout
+                for f in pending if futures[f] in started
+            ]
+            # Пока вызов ждёт свободного потока, его таймаут не идёт
+            wait_for = max(min(deadlines) - time.perf_counter(), 0) if deadlines else 0.05
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            now = time.perf_counter()
+            expired = False
+            for future in list(pending):
+                i = futures[future]
+                timeout = self.spec(calls[i].name).timeout
+                if i in started and now - started[i] >= timeout:
+                    # Поток нельзя прервать: результат просто больше не ждём
+                    pending.discard(future)
+                    expired = True
+                    self.stats["timeouts"] += 1
+                    if self.spec(calls[i].name).serial:
+                        with self._lock:
+                            self._stuck.append((calls[i].name, future))
+                    logger.warning(f"⏱️ {calls[i].name} превысил {timeout:g} с")
+                    results[i] = ToolResult(
+                        calls[i].id, calls[i].name,
+                        f"⚠️ Инструмент {calls[i].name} превысил {timeout:g} секунд",
+                        now - started[i], timed_out=True,
+                    )
+
+            if expired:
+                # Зависшие потоки занимают пул - остальные вызовы переносим в новый
+                self._abandon_pool()
+                pool = self._pool()
+                for future in list(pending):
+                    if future.cancel():
+                        pending.discard(future)
+                        i = futures.pop(future)
+                        retry = pool.submit(self._invoke, calls[i], started, i)
+                        futures[retry] = i
+                        pending.add(retry)
+
+        self.stats["errors"] += sum(1 for r in results if r.error)
+        return results
+
+    def _abandon_pool(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    def close(self):
+        self._abandon_pool()
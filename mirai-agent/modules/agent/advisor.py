@@ -16,23 +16,34 @@ try:
 except ImportError:
     OPENAI_AVAILABLE = False
 
+from core.response_cache import ResponseCache, get_response_cache
 from modules.utils.logger import Logger
 
 logger = Logger("SignalAdvisor").logger
 
 
+def _is_json(content: str) -> bool:
+    try:
+        json.loads(content)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
 class SignalAdvisor:
     """AI-powered trading signal advisor"""
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, response_cache: ResponseCache | None = None):
         """
         Initialize the advisor with optional OpenAI API key
 
         Args:
             api_key: OpenAI API key, if None will try to get from environment
+            response_cache: LLM response cache (default: shared process cache)
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.use_openai = OPENAI_AVAILABLE and bool(self.api_key)
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
 
         if self.use_openai:
             openai.api_key = self.api_key
@@ -66,23 +77,39 @@ class SignalAdvisor:
             # Prepare the prompt with market features
             prompt = self._build_analysis_prompt(features)
 
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert trading advisor. Analyze the provided market data "
-                            "and return a JSON response with trading recommendations."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=300,
-                temperature=0.3,
-            )
-
-            content = (response.choices[0].message.content or "").strip()
+            messages = [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are an expert trading advisor. Analyze the provided market data "
+                        "and return a JSON response with trading recommendations."
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ]
+
+            def call() -> str:
+                response = openai.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=300,
+                    temperature=0.3,
+                )
+                return (response.choices[0].message.content or "").strip()
+
+            if self.response_cache is None:
+                content = call()
+            else:
+                # Same market snapshot -> same prompt: reuse the answer (valid JSON only)
+                content = self.response_cache.cached_call(
+                    "signal_advisor",
+                    call,
+                    "gpt-3.5-turbo",
+                    messages,
+                    temperature=0.3,
+                    validate=_is_json,
+                    max_tokens=300,
+                )
 
             # Try to parse JSON response
             try:
@@ -16,6 +16,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, FileResponse
 from pydantic import BaseModel, Field
 
+from core.llm_client import close_shared_clients
 from modules.agent.autonomous import Task
 from modules.api.web.ui import ui_router
 
@@ -44,6 +45,11 @@ class APIServer:
         )
 
     def _setup_routes(self):
+        @self.app.on_event("shutdown")
+        async def shutdown_event():
+            """Закрыть пулы соединений LLM клиентов (сессии живут в этом event loop)"""
+            await close_shared_clients()
+
         # Mount simple HTML UI at root - DISABLED (uses auth)
         # self.app.include_router(ui_router)
         
@@ -343,4 +349,5 @@ class APIServer:
         await server.serve()
 
     async def stop(self):
+        await close_shared_clients()
         self.logger.info("⏸️ API Server stopped")
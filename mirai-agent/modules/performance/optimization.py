@@ -1 +1,934 @@
-# Performance module disabled due to aioredis compatibility issues
+"""
+Performance Optimization Framework for Mirai Trading System
+Advanced performance enhancements: connection pooling, caching, async optimization
+
+Everything runs in-process:
+- AdvancedCache: TTL + LRU memory cache, optional Redis-protocol L2
+  (redis_url or $MIRAI_REDIS_URL, needs the `redis` package)
+- AsyncTaskManager: bounded priority queue + worker pool, results are awaitable
+- ConnectionPoolManager: shared aiohttp sessions per named pool
+
+Background loops start lazily on first use inside a running event loop,
+so importing this module never needs one.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import pickle
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+import psutil
+
+from modules.utils.logger import Logger
+
+LOGGER = Logger("PerformanceOptimization").logger
+
+_MISSING = object()
+
+TASK_PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+@dataclass
+class PerformanceMetrics:
+    """Performance metrics tracking"""
+    timestamp: datetime
+    operation: str
+    duration: float
+    memory_usage: float
+    cpu_usage: float
+    cache_hit_rate: float = 0.0
+    connection_pool_size: int = 0
+    active_connections: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'operation': self.operation,
+            'duration': self.duration,
+            'memory_usage': self.memory_usage,
+            'cpu_usage': self.cpu_usage,
+            'cache_hit_rate': self.cache_hit_rate,
+            'connection_pool_size': self.connection_pool_size,
+            'active_connections': self.active_connections
+        }
+
+
+class ConnectionPoolManager:
+    """
+    Shared aiohttp connection pools for external APIs
+
+    One ClientSession (and TCP connector) per pool name, reused by every
+    request, so keep-alive connections and the DNS cache are actually shared.
+    """
+
+    def __init__(self, max_connections: int = 100, max_connections_per_host: int = 20,
+                 keepalive_timeout: float = 30.0):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.logger = Logger("ConnectionPoolManager").logger
+
+        self.http_pools: Dict[str, aiohttp.ClientSession] = {}
+        self.pool_stats: Dict[str, Dict[str, Any]] = defaultdict(self._new_stats)
+
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {
+            'active_connections': 0,
+            'total_requests': 0,
+            'failed_requests': 0,
+            'avg_response_time': 0.0,
+            'created_at': datetime.now().isoformat()
+        }
+
+    async def get_http_session(self, pool_name: str = "default") -> aiohttp.ClientSession:
+        """Get or create HTTP session with connection pooling"""
+        session = self.http_pools.get(pool_name)
+        if session is not None and not session.closed:
+            # Sessions are bound to the loop they were created in
+            if getattr(session, "_loop", None) is asyncio.get_running_loop():
+                return session
+            self.http_pools.pop(pool_name, None)
+
+        timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            enable_cleanup_closed=True,
+            use_dns_cache=True,
+            ttl_dns_cache=300
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={'User-Agent': 'Mirai-Trading-Bot/1.0'}
+        )
+        self.http_pools[pool_name] = session
+        self.pool_stats[pool_name]['created_at'] = datetime.now().isoformat()
+        self._start_monitoring()
+
+        self.logger.info(f"Created HTTP pool: {pool_name}")
+        return session
+
+    async def make_http_request(self, method: str, url: str,
+                                pool_name: str = "default", **kwargs) -> aiohttp.ClientResponse:
+        """
+        Make HTTP request through a shared pool
+
+        The body is read before the connection goes back to the pool, so
+        response.json() / response.text() keep working on the returned object.
+        """
+        start_time = time.perf_counter()
+        session = await self.get_http_session(pool_name)
+        stats = self.pool_stats[pool_name]
+
+        stats['active_connections'] += 1
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                await response.read()
+            return response
+        except Exception:
+            stats['failed_requests'] += 1
+            raise
+        finally:
+            stats['active_connections'] -= 1
+            stats['total_requests'] += 1
+            duration = time.perf_counter() - start_time
+            stats['avg_response_time'] += (duration - stats['avg_response_time']) / stats['total_requests']
+
+    async def request_json(self, method: str, url: str,
+                           pool_name: str = "default", **kwargs) -> Any:
+        """make_http_request() + decoded JSON body"""
+        response = await self.make_http_request(method, url, pool_name=pool_name, **kwargs)
+        return await response.json(content_type=None)
+
+    def _start_monitoring(self):
+        """Start background monitoring of connection pools (needs a running loop)"""
+        if self._monitor_task is not None and not self._monitor_task.done():
+            return
+        if _running_loop() is None:
+            return
+
+        async def monitor():
+            while True:
+                try:
+                    await asyncio.sleep(60)  # Monitor every minute
+                    await self._monitor_pools()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Pool monitoring failed: {e}")
+
+        self._monitor_task = asyncio.create_task(monitor())
+
+    async def _monitor_pools(self):
+        """Monitor pool health and performance"""
+        for pool_name, stats in self.pool_stats.items():
+            failure_rate = 0
+            if stats['total_requests'] > 0:
+                failure_rate = stats['failed_requests'] / stats['total_requests']
+
+            # Log warnings for high failure rates
+            if failure_rate > 0.1:  # 10% failure rate
+                self.logger.warning(
+                    f"High failure rate in pool {pool_name}: {failure_rate:.2%}"
+                )
+
+            # Log slow average response times
+            if stats['avg_response_time'] > 5.0:  # 5 seconds
+                self.logger.warning(
+                    f"Slow response times in pool {pool_name}: {stats['avg_response_time']:.2f}s"
+                )
+
+    async def close_all_pools(self):
+        """Close all connection pools"""
+        for pool_name, session in list(self.http_pools.items()):
+            if not session.closed:
+                await session.close()
+            self.logger.info(f"Closed HTTP pool: {pool_name}")
+        self.http_pools.clear()
+
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        pools = {}
+        for pool_name, stats in self.pool_stats.items():
+            session = self.http_pools.get(pool_name)
+            connector = session.connector if session is not None and not session.closed else None
+            pools[pool_name] = {
+                **stats,
+                'open': connector is not None,
+                'limit': connector.limit if connector is not None else 0,
+            }
+        return {
+            'http_pools': pools,
+            'total_pools': len(self.http_pools),
+            'max_connections': self.max_connections,
+            'max_connections_per_host': self.max_connections_per_host
+        }
+
+
+class AdvancedCache:
+    """
+    TTL + LRU in-process cache with an optional Redis-protocol second level
+
+    L1 is an OrderedDict: O(1) get/set, least recently used entry evicted
+    first. L2 is used only when a Redis URL is configured and the `redis`
+    package is installed; any L2 error degrades to L1-only.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, max_memory_items: int = 10000,
+                 default_ttl: int = 300):
+        self.redis_url = redis_url if redis_url is not None else os.getenv("MIRAI_REDIS_URL")
+        self.logger = Logger("PerformanceCache").logger
+
+        # In-memory cache (L1): key -> (expires_at monotonic, value)
+        self.memory_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.cache_stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'l2_hits': 0,
+            'l2_errors': 0
+        }
+
+        # Cache configuration
+        self.max_memory_items = max_memory_items
+        self.default_ttl = default_ttl
+
+        # Redis connection (L2), created lazily
+        self.redis = None
+        self._redis_disabled = not self.redis_url
+
+        # Cache invalidation tracking
+        self.invalidation_patterns: Dict[str, List[str]] = defaultdict(list)
+
+        # Performance tracking
+        self.access_times: deque = deque(maxlen=1000)
+
+    async def _get_redis(self):
+        """Get Redis connection, or None when L2 is not available"""
+        if self._redis_disabled:
+            return None
+        if self.redis is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                self.logger.warning("redis package not installed - L2 cache disabled")
+                self._redis_disabled = True
+                return None
+            self.redis = redis_asyncio.from_url(self.redis_url)
+        return self.redis
+
+    def _generate_cache_key(self, prefix: str, *args, **kwargs) -> str:
+        """Generate cache key from function arguments"""
+        key_parts = [prefix]
+
+        for arg in args:
+            key_parts.append(self._key_part(arg))
+        for k, v in sorted(kwargs.items()):
+            key_parts.append(f"{k}:{self._key_part(v)}")
+
+        return ":".join(key_parts)
+
+    @staticmethod
+    def _key_part(value: Any) -> str:
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return str(value)
+        # Hash complex objects
+        return hashlib.md5(repr(value).encode()).hexdigest()[:12]
+
+    def _memory_get(self, key: str) -> Any:
+        entry = self.memory_cache.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.memory_cache[key]
+            self.cache_stats['expirations'] += 1
+            return _MISSING
+        self.memory_cache.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: Any, ttl: float):
+        self.memory_cache[key] = (time.monotonic() + ttl, value)
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.max_memory_items:
+            self.memory_cache.popitem(last=False)
+            self.cache_stats['evictions'] += 1
+
+    async def lookup(self, key: str) -> Any:
+        """Like get(), but returns the module-level _MISSING sentinel on a miss"""
+        start_time = time.perf_counter()
+        try:
+            value = self._memory_get(key)
+            if value is not _MISSING:
+                self.cache_stats['hits'] += 1
+                return value
+
+            redis = await self._get_redis()
+            if redis is not None:
+                try:
+                    cached_data = await redis.get(key)
+                except Exception as e:
+                    self.cache_stats['l2_errors'] += 1
+                    self.logger.warning(f"Redis cache get failed: {e}")
+                    cached_data = None
+                if cached_data is not None:
+                    value = pickle.loads(cached_data)
+                    self._memory_set(key, value, self.default_ttl)
+                    self.cache_stats['hits'] += 1
+                    self.cache_stats['l2_hits'] += 1
+                    return value
+
+            self.cache_stats['misses'] += 1
+            return _MISSING
+        finally:
+            self.access_times.append(time.perf_counter() - start_time)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Get value from cache (L1 memory -> L2 Redis)"""
+        value = await self.lookup(key)
+        return default if value is _MISSING else value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set value in cache (both L1 and L2); ttl <= 0 stores nothing"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return False
+
+        self._memory_set(key, value, ttl)
+
+        redis = await self._get_redis()
+        if redis is not None:
+            try:
+                await redis.set(key, pickle.dumps(value), ex=max(1, int(ttl)))
+            except Exception as e:
+                self.cache_stats['l2_errors'] += 1
+                self.logger.warning(f"Redis cache set failed: {e}")
+        return True
+
+    async def delete(self, key: str):
+        """Remove one key from both levels"""
+        self.memory_cache.pop(key, None)
+        redis = await self._get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(key)
+            except Exception as e:
+                self.cache_stats['l2_errors'] += 1
+                self.logger.warning(f"Redis cache delete failed: {e}")
+
+    async def invalidate(self, pattern: str) -> int:
+        """Invalidate cache entries whose key contains pattern"""
+        keys_to_remove = [key for key in self.memory_cache if pattern in key]
+        for key in keys_to_remove:
+            del self.memory_cache[key]
+
+        redis_removed = 0
+        redis = await self._get_redis()
+        if redis is not None:
+            try:
+                keys = [key async for key in redis.scan_iter(match=f"*{pattern}*")]
+                if keys:
+                    redis_removed = await redis.delete(*keys)
+            except Exception as e:
+                self.cache_stats['l2_errors'] += 1
+                self.logger.error(f"Redis cache invalidation failed: {e}")
+
+        self.logger.info(f"Invalidated {len(keys_to_remove)} memory + {redis_removed} Redis keys")
+        return len(keys_to_remove) + redis_removed
+
+    def register_invalidation_pattern(self, cache_key_pattern: str, invalidation_triggers: List[str]):
+        """Register automatic cache invalidation patterns"""
+        self.invalidation_patterns[cache_key_pattern] = invalidation_triggers
+
+    async def trigger_invalidation(self, trigger: str):
+        """Trigger cache invalidation based on registered patterns"""
+        for pattern, triggers in self.invalidation_patterns.items():
+            if trigger in triggers:
+                await self.invalidate(pattern)
+
+    async def close(self):
+        if self.redis is not None:
+            try:
+                await self.redis.close()
+            finally:
+                self.redis = None
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache performance statistics"""
+        total_requests = self.cache_stats['hits'] + self.cache_stats['misses']
+        hit_rate = self.cache_stats['hits'] / total_requests if total_requests > 0 else 0
+
+        avg_access_time = sum(self.access_times) / len(self.access_times) if self.access_times else 0
+
+        return {
+            'hit_rate': hit_rate,
+            'total_requests': total_requests,
+            'hits': self.cache_stats['hits'],
+            'misses': self.cache_stats['misses'],
+            'evictions': self.cache_stats['evictions'],
+            'expirations': self.cache_stats['expirations'],
+            'memory_items': len(self.memory_cache),
+            'max_memory_items': self.max_memory_items,
+            'l2_backend': 'redis' if self.redis is not None else None,
+            'l2_hits': self.cache_stats['l2_hits'],
+            'l2_errors': self.cache_stats['l2_errors'],
+            'avg_access_time_ms': avg_access_time * 1000
+        }
+
+
+def cached(ttl: int = 300, cache_key_prefix: Optional[str] = None,
+           cache: Optional[AdvancedCache] = None):
+    """
+    Decorator for caching coroutine results
+
+    ttl <= 0 disables caching. Concurrent calls with the same key share one
+    in-flight execution instead of all missing the cache at once.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache_prefix = cache_key_prefix or f"{func.__module__}.{func.__name__}"
+        if ttl <= 0:
+            return func
+
+        in_flight: Dict[str, asyncio.Future] = {}
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            store = cache or advanced_cache
+            cache_key = store._generate_cache_key(cache_prefix, *args, **kwargs)
+
+            cached_result = await store.lookup(cache_key)
+            if cached_result is not _MISSING:
+                return cached_result
+
+            pending = in_flight.get(cache_key)
+            if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+                return await asyncio.shield(pending)
+
+            future = asyncio.get_running_loop().create_future()
+            in_flight[cache_key] = future
+            try:
+                result = await func(*args, **kwargs)
+                await store.set(cache_key, result, ttl)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else waits
+                raise
+            finally:
+                if in_flight.get(cache_key) is future:
+                    del in_flight[cache_key]
+
+        return wrapper
+    return decorator
+
+
+class AsyncTaskManager:
+    """
+    Bounded, priority-aware async task execution
+
+    Tasks go into one asyncio.PriorityQueue (high < normal < low, FIFO
+    within a priority) drained by max_concurrent_tasks workers. submit()
+    returns an awaitable future; submit_task() returns a task id whose
+    result is available via result(task_id). When max_queue_size tasks are
+    waiting, submitters wait too (backpressure).
+    """
+
+    def __init__(self, max_concurrent_tasks: int = 100, max_queue_size: int = 10000,
+                 keep_results: int = 1000):
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.max_queue_size = max_queue_size
+        self.logger = Logger("TaskManager").logger
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+
+        # Task tracking
+        self.active_tasks: Dict[str, asyncio.Task] = {}
+        self._futures: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        self.keep_results = keep_results
+        self.completed_tasks: deque = deque(maxlen=1000)
+        self.failed_tasks: deque = deque(maxlen=100)
+        self.queued_by_priority: Dict[str, int] = defaultdict(int)
+
+        # Performance metrics
+        self.task_metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self.queue_wait_times: deque = deque(maxlen=1000)
+
+    def _ensure_started(self):
+        """Start workers in the running loop (restart if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        if self._loop is not None and self._loop is not loop:
+            # Previous loop is gone: its queue, workers and futures are unusable
+            self._futures.clear()
+            self.active_tasks.clear()
+            self.queued_by_priority.clear()
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_queue_size)
+        self._workers = [
+            loop.create_task(self._worker(), name=f"mirai-task-worker-{i}")
+            for i in range(self.max_concurrent_tasks)
+        ]
+
+    async def submit(self, coro, priority: str = "normal",
+                     task_id: Optional[str] = None) -> asyncio.Future:
+        """Queue a coroutine; the returned future resolves to its result"""
+        self._ensure_started()
+        if priority not in TASK_PRIORITIES:
+            priority = "normal"
+        task_id = task_id or f"task_{next(self._sequence)}_{int(time.time() * 1000)}"
+
+        future = self._loop.create_future()
+        self._futures[task_id] = future
+        while len(self._futures) > self.keep_results:
+            old_id, old_future = next(iter(self._futures.items()))
+            if not old_future.done():
+                break
+            del self._futures[old_id]
+
+        item = {
+            'id': task_id,
+            'coro': coro,
+            'future': future,
+            'submitted_at': time.perf_counter(),
+            'priority': priority
+        }
+        self.queued_by_priority[priority] += 1
+        await self._queue.put((TASK_PRIORITIES[priority], next(self._sequence), item))
+
+        self.logger.debug(f"Submitted task {task_id} with priority {priority}")
+        return future
+
+    async def submit_task(self, coro, priority: str = "normal",
+                          task_id: Optional[str] = None) -> str:
+        """Submit async task with priority, returns its task id"""
+        task_id = task_id or f"task_{next(self._sequence)}_{int(time.time() * 1000)}"
+        await self.submit(coro, priority=priority, task_id=task_id)
+        return task_id
+
+    async def run(self, coro, priority: str = "normal") -> Any:
+        """Submit and wait for the result"""
+        return await (await self.submit(coro, priority=priority))
+
+    async def result(self, task_id: str, timeout: Optional[float] = None) -> Any:
+        """Wait for a submitted task; re-raises its exception"""
+        future = self._futures.get(task_id)
+        if future is None:
+            raise KeyError(f"Unknown or expired task: {task_id}")
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def gather(self, task_ids: Iterable[str], return_exceptions: bool = False) -> List[Any]:
+        """Results of several task ids, in order"""
+        return await asyncio.gather(
+            *(self.result(task_id) for task_id in task_ids),
+            return_exceptions=return_exceptions
+        )
+
+    async def _worker(self):
+        while True:
+            _, _, item = await self._queue.get()
+            try:
+                await self._execute_task_with_tracking(item)
+            finally:
+                self._queue.task_done()
+
+    async def _execute_task_with_tracking(self, task_item: Dict[str, Any]):
+        """Execute task with performance tracking"""
+        task_id = task_item['id']
+        future: asyncio.Future = task_item['future']
+        self.queued_by_priority[task_item['priority']] -= 1
+
+        start_time = time.perf_counter()
+        self.queue_wait_times.append(start_time - task_item['submitted_at'])
+        if future.cancelled():
+            task_item['coro'].close()
+            return
+
+        self.active_tasks[task_id] = asyncio.current_task()
+        try:
+            result = await task_item['coro']
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            duration = time.perf_counter() - start_time
+            self.failed_tasks.append({
+                'id': task_id,
+                'duration': duration,
+                'failed_at': time.time(),
+                'error': str(e)
+            })
+            self.logger.error(f"Task {task_id} failed after {duration:.3f}s: {e}")
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # don't warn if the caller never asks
+        else:
+            duration = time.perf_counter() - start_time
+            self.task_metrics[task_item['priority']].append(duration)
+            self.completed_tasks.append({
+                'id': task_id,
+                'duration': duration,
+                'completed_at': time.time(),
+                'success': True
+            })
+            self.logger.debug(f"Task {task_id} completed in {duration:.3f}s")
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self.active_tasks.pop(task_id, None)
+
+    async def shutdown(self):
+        """Cancel workers; queued tasks are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers and self._loop is _running_loop():
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, item = self._queue.get_nowait()
+                item['coro'].close()
+                if not item['future'].done():
+                    item['future'].cancel()
+        self.queued_by_priority.clear()
+
+    def get_task_stats(self) -> Dict[str, Any]:
+        """Get task management statistics"""
+        total_completed = len(self.completed_tasks)
+        total_failed = len(self.failed_tasks)
+
+        avg_durations = {}
+        for priority, durations in self.task_metrics.items():
+            if durations:
+                avg_durations[priority] = sum(durations) / len(durations)
+
+        avg_wait = sum(self.queue_wait_times) / len(self.queue_wait_times) if self.queue_wait_times else 0
+
+        return {
+            'active_tasks': len(self.active_tasks),
+            'workers': len(self._workers),
+            'max_concurrent_tasks': self.max_concurrent_tasks,
+            'completed_tasks': total_completed,
+            'failed_tasks': total_failed,
+            'success_rate': total_completed / (total_completed + total_failed) if (total_completed + total_failed) > 0 else 1.0,
+            'avg_duration_by_priority': avg_durations,
+            'avg_queue_wait_ms': avg_wait * 1000,
+            'queue_sizes': {priority: max(0, self.queued_by_priority.get(priority, 0))
+                            for priority in TASK_PRIORITIES}
+        }
+
+
+class PerformanceProfiler:
+    """
+    Advanced performance profiling and optimization recommendations
+    """
+
+    def __init__(self, slow_threshold: float = 1.0):
+        self.logger = Logger("PerformanceOptimizer").logger
+        self.slow_threshold = slow_threshold
+        self.metrics_history: deque = deque(maxlen=10000)
+        self.slow_operations: deque = deque(maxlen=100)
+        self.memory_snapshots: deque = deque(maxlen=1000)
+        self._process = psutil.Process(os.getpid())
+
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def profile_function(self, operation_name: str):
+        """Decorator for profiling function performance"""
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await self._profile_execution(operation_name, func, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    async def _profile_execution(self, operation_name: str, func: Callable, *args, **kwargs):
+        """Profile function execution (wall time + RSS delta; CPU is sampled in the background)"""
+        self.start_monitoring()
+        start_time = time.perf_counter()
+        start_memory = self._get_memory_usage()
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            duration = time.perf_counter() - start_time
+            self.logger.error(f"Profiled operation {operation_name} failed after {duration:.3f}s: {e}")
+            raise
+
+        duration = time.perf_counter() - start_time
+        self.metrics_history.append(PerformanceMetrics(
+            timestamp=datetime.now(),
+            operation=operation_name,
+            duration=duration,
+            memory_usage=self._get_memory_usage() - start_memory,
+            cpu_usage=self.memory_snapshots[-1]['cpu_percent'] if self.memory_snapshots else 0.0
+        ))
+
+        if duration > self.slow_threshold:
+            self.slow_operations.append({
+                'operation': operation_name,
+                'duration': duration,
+                'timestamp': datetime.now().isoformat(),
+                'args_summary': str(args)[:100] if args else None
+            })
+
+        return result
+
+    def _get_memory_usage(self) -> float:
+        """Get current memory usage in MB"""
+        return self._process.memory_info().rss / 1024 / 1024
+
+    def start_monitoring(self):
+        """Start background sampling (no-op without a running loop)"""
+        if self._monitor_task is not None and not self._monitor_task.done():
+            return
+        if _running_loop() is None:
+            return
+        self._monitor_task = asyncio.create_task(self._background_monitoring())
+
+    async def _background_monitoring(self):
+        """Background monitoring of system performance"""
+        psutil.cpu_percent(interval=None)  # prime the non-blocking counter
+        while True:
+            try:
+                await asyncio.sleep(30)  # Monitor every 30 seconds
+
+                self.memory_snapshots.append({
+                    'timestamp': datetime.now().isoformat(),
+                    'memory_mb': self._get_memory_usage(),
+                    'cpu_percent': psutil.cpu_percent(interval=None)
+                })
+
+                if len(self.memory_snapshots) > 100:
+                    await self._check_memory_trends()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Background monitoring failed: {e}")
+
+    async def _check_memory_trends(self):
+        """Check for memory usage trends and leaks"""
+        if len(self.memory_snapshots) < 50:
+            return
+
+        recent_snapshots = list(self.memory_snapshots)[-50:]
+        memory_values = [s['memory_mb'] for s in recent_snapshots]
+
+        # Simple trend analysis
+        first_half = memory_values[:25]
+        second_half = memory_values[25:]
+
+        avg_first = sum(first_half) / len(first_half)
+        avg_second = sum(second_half) / len(second_half)
+
+        memory_increase = avg_second - avg_first
+
+        if memory_increase > 50:  # More than 50MB increase
+            self.logger.warning(f"Potential memory leak detected: {memory_increase:.1f}MB increase")
+
+    def stop_monitoring(self):
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+
+    def get_performance_report(self) -> Dict[str, Any]:
+        """Generate comprehensive performance report"""
+        if not self.metrics_history:
+            return {"error": "No performance data available"}
+
+        durations = [m.duration for m in self.metrics_history]
+        memory_usages = [m.memory_usage for m in self.metrics_history]
+
+        # Group by operation
+        operation_stats = defaultdict(list)
+        for metric in self.metrics_history:
+            operation_stats[metric.operation].append(metric.duration)
+
+        sorted_durations = sorted(durations)
+        p95_duration = sorted_durations[min(len(sorted_durations) - 1, int(len(sorted_durations) * 0.95))]
+
+        operation_summary = {}
+        for operation, times in operation_stats.items():
+            operation_summary[operation] = {
+                'count': len(times),
+                'avg_duration': sum(times) / len(times),
+                'max_duration': max(times),
+                'min_duration': min(times)
+            }
+
+        recent_slow = list(self.slow_operations)[-10:]
+
+        return {
+            'overall_stats': {
+                'avg_duration': sum(durations) / len(durations),
+                'max_duration': sorted_durations[-1],
+                'p95_duration': p95_duration,
+                'avg_memory_usage': sum(memory_usages) / len(memory_usages),
+                'total_operations': len(self.metrics_history)
+            },
+            'operation_breakdown': operation_summary,
+            'recent_slow_operations': recent_slow,
+            'recommendations': self._generate_recommendations(operation_summary, recent_slow)
+        }
+
+    def _generate_recommendations(self, operation_stats: Dict, slow_ops: List) -> List[str]:
+        """Generate performance optimization recommendations"""
+        recommendations = []
+
+        for operation, stats in operation_stats.items():
+            if stats['avg_duration'] > 2.0:
+                recommendations.append(f"Optimize {operation}: avg {stats['avg_duration']:.2f}s")
+
+        slow_operations_count: Dict[str, int] = defaultdict(int)
+        for slow_op in slow_ops:
+            slow_operations_count[slow_op['operation']] += 1
+
+        for operation, count in slow_operations_count.items():
+            if count > 3:
+                recommendations.append(f"Frequent slow operation: {operation} ({count} times)")
+
+        if len(self.memory_snapshots) > 10:
+            recent_memory = [s['memory_mb'] for s in list(self.memory_snapshots)[-10:]]
+            if max(recent_memory) > 500:
+                recommendations.append("High memory usage detected - consider optimization")
+
+        if not recommendations:
+            recommendations.append("Performance looks good!")
+
+        return recommendations
+
+
+# Global instances (no event loop needed at import time)
+connection_pool_manager = ConnectionPoolManager()
+advanced_cache = AdvancedCache()
+task_manager = AsyncTaskManager()
+performance_profiler = PerformanceProfiler()
+
+
+# Convenience decorators and functions
+def performance_optimized(operation_name: str, cache_ttl: int = 300):
+    """
+    Decorator combining caching and performance profiling
+
+    cache_ttl=0 profiles only (for side-effecting calls like order placement).
+    """
+    def decorator(func: Callable) -> Callable:
+        profiled_func = performance_profiler.profile_function(operation_name)(func)
+        return cached(ttl=cache_ttl, cache_key_prefix=operation_name)(profiled_func)
+    return decorator
+
+
+async def get_performance_summary() -> Dict[str, Any]:
+    """Get comprehensive performance summary"""
+    return {
+        'connection_pools': connection_pool_manager.get_pool_stats(),
+        'cache_performance': advanced_cache.get_cache_stats(),
+        'task_management': task_manager.get_task_stats(),
+        'profiling_report': performance_profiler.get_performance_report()
+    }
+
+
+async def initialize_performance_system():
+    """Initialize performance optimization system"""
+    advanced_cache.register_invalidation_pattern(
+        "market_data", ["price_update", "market_close"]
+    )
+    advanced_cache.register_invalidation_pattern(
+        "portfolio", ["trade_executed", "position_update"]
+    )
+
+    # Create HTTP pools for different services
+    await connection_pool_manager.get_http_session("binance_api")
+    await connection_pool_manager.get_http_session("market_data")
+    await connection_pool_manager.get_http_session("external_api")
+
+    performance_profiler.start_monitoring()
+
+    LOGGER.info("Performance optimization system initialized")
+
+
+async def cleanup_performance_system():
+    """Cleanup performance system resources"""
+    await connection_pool_manager.close_all_pools()
+    await advanced_cache.close()
+    await task_manager.shutdown()
+    performance_profiler.stop_monitoring()
+
+
+async def submit_background_task(task_func, priority: str = "normal") -> str:
+    """Submit background task with priority"""
+    return await task_manager.submit_task(task_func(), priority=priority)
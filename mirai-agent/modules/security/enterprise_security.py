@@ -7,7 +7,12 @@ import os
 import json
 import logging
 import hashlib
+import hmac
+import queue
 import secrets
+import time
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
@@ -365,16 +370,57 @@ class SecretsManager:
 class AuditLogger:
     """
     Comprehensive audit logging for compliance and security
+
+    Events are written by a background writer:
+    - the hash chain tip is read once per batch inside BEGIN IMMEDIATE
+      (no SELECT per event), so several writers - processes or
+      AuditLogger instances - can share one database
+    - details are encrypted in a worker pool as soon as the event is queued
+    - batches are group-committed to SQLite and appended to the JSONL log
+      in one transaction / one write
+    - signed checkpoints of the chain tip let verify_integrity() start from
+      the last checkpoint instead of rehashing the whole table
+
+    Durability knob: a batch is committed after flush_every events or
+    flush_interval seconds, whichever comes first; log_event(wait=True)
+    or flush() block until everything queued so far is committed.
+    A batch that fails to commit is kept and retried with backoff
+    (flush() reports False meanwhile); close() gives up after
+    close_retries more attempts.
     """
 
     def __init__(self, log_file: str = "logs/audit.log",
-                 db_file: str = "state/audit.db"):
+                 db_file: str = "state/audit.db",
+                 flush_every: int = 64,
+                 flush_interval: float = 0.05,
+                 checkpoint_every: int = 1000,
+                 checkpoint_key: Optional[bytes] = None,
+                 encrypt_workers: int = 2,
+                 fsync: bool = False,
+                 close_retries: int = 3):
         self.log_file = log_file
         self.db_file = db_file
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        self.fsync = fsync
+        self.close_retries = close_retries
         self.encryption = EncryptionManager()
         self.logger = logging.getLogger(__name__)
         self._lock = threading.Lock()
         self._init_storage()
+        self._checkpoint_key = checkpoint_key or self._load_checkpoint_key()
+        self._tip_seq, self._tip_hash = self._load_tip()
+
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'failed': 0, 'retries': 0,
+                      'duplicates': 0, 'checkpoints': 0}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._encryptor = ThreadPoolExecutor(max_workers=encrypt_workers,
+                                             thread_name_prefix="audit-encrypt")
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, name="audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def _init_storage(self):
         """Initialize audit log storage"""
@@ -382,6 +428,7 @@ class AuditLogger:
         os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
 
         with sqlite3.connect(self.db_file) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS audit_events (
                     event_id TEXT PRIMARY KEY,
@@ -397,10 +444,23 @@ class AuditLogger:
                     security_level TEXT,
                     success BOOLEAN,
                     error_message TEXT,
-                    hash_chain TEXT
+                    hash_chain TEXT,
+                    seq INTEGER
                 )
             """)
 
+            # Chain position: older databases were chained in timestamp order
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(audit_events)")]
+            if 'seq' not in columns:
+                conn.execute("ALTER TABLE audit_events ADD COLUMN seq INTEGER")
+            legacy = conn.execute(
+                "SELECT rowid FROM audit_events WHERE seq IS NULL ORDER BY timestamp, rowid"
+            ).fetchall()
+            if legacy:
+                start = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM audit_events").fetchone()[0]
+                conn.executemany("UPDATE audit_events SET seq = ? WHERE rowid = ?",
+                                 [(start + i, rowid) for i, (rowid,) in enumerate(legacy, 1)])
+
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_audit_timestamp 
                 ON audit_events(timestamp)
@@ -416,79 +476,256 @@ class AuditLogger:
                 ON audit_events(event_type)
             """)
 
-    def log_event(self, event: AuditEvent) -> bool:
-        """Log an audit event with encryption and integrity protection"""
-        try:
-            with self._lock:
-                # Encrypt sensitive details
-                encrypted_details = self.encryption.encrypt_data(event.details)
-
-                # Calculate hash chain for integrity
-                hash_chain = self._calculate_hash_chain(event)
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_audit_seq 
+                ON audit_events(seq)
+            """)
 
-                # Store in database
-                with sqlite3.connect(self.db_file) as conn:
-                    conn.execute("""
-                        INSERT INTO audit_events 
-                        (event_id, timestamp, event_type, user_id, session_id, 
-                         ip_address, user_agent, resource, action, encrypted_details,
-                         security_level, success, error_message, hash_chain)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        event.event_id, event.timestamp, event.event_type.value,
-                        event.user_id, event.session_id, event.ip_address,
-                        event.user_agent, event.resource, event.action,
-                        encrypted_details, event.security_level.value,
-                        event.success, event.error_message, hash_chain
-                    ))
-
-                # Also write to log file
-                self._write_to_log_file(event)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS audit_checkpoints (
+                    seq INTEGER PRIMARY KEY,
+                    hash_chain TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    signature TEXT NOT NULL
+                )
+            """)
 
-                return True
+    def _load_checkpoint_key(self) -> bytes:
+        """Checkpoint signing key: $MIRAI_AUDIT_CHECKPOINT_KEY or a key file next to the DB"""
+        env_key = os.getenv("MIRAI_AUDIT_CHECKPOINT_KEY")
+        if env_key:
+            return env_key.encode()
+
+        key_file = f"{self.db_file}.key"
+        if os.path.exists(key_file):
+            with open(key_file, 'rb') as f:
+                return f.read()
+
+        key = secrets.token_bytes(32)
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        return key
+
+    def _load_tip(self, conn: Optional[sqlite3.Connection] = None):
+        """(seq, hash) of the last chained event"""
+        if conn is None:
+            with sqlite3.connect(self.db_file) as conn:
+                return self._load_tip(conn)
+        row = conn.execute(
+            "SELECT seq, hash_chain FROM audit_events ORDER BY seq DESC LIMIT 1"
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, "genesis")
+
+    def log_event(self, event: AuditEvent, wait: bool = False) -> bool:
+        """
+        Queue an audit event (encryption starts immediately)
+
+        Args:
+            wait: Block until the event is committed
+
+        Returns:
+            True if the event was accepted (and committed, when wait=True)
+        """
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("audit logger is closed")
+                details = self._encryptor.submit(self.encryption.encrypt_data, event.details)
+                self._queue.put(('event', event, details))
+                self.stats['queued'] += 1
+
+            if wait:
+                return self.flush()
+            return True
 
         except Exception as e:
             self.logger.error(f"Failed to log audit event: {e}")
             return False
 
-    def _calculate_hash_chain(self, event: AuditEvent) -> str:
-        """Calculate hash chain for audit event integrity"""
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Commit everything queued so far; False if the last batch failed"""
+        done = threading.Event()
+        result: Dict[str, bool] = {}
+        self._queue.put(('flush', done, result))
+        if not done.wait(timeout):
+            return False
+        return result.get('ok', False)
+
+    def _run_writer(self):
+        # Transactions are explicit (BEGIN IMMEDIATE in _commit)
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+        log = open(self.log_file, 'a', encoding='utf-8')
+        batch: List[tuple] = []  # failed events stay here until committed
+        failures, stop = 0, False
         try:
-            # Get last hash from database
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.execute(
-                    "SELECT hash_chain FROM audit_events ORDER BY timestamp DESC LIMIT 1"
+            while True:
+                waiters: List[tuple] = []
+                if not stop:
+                    retry_delay = min(self.flush_interval * 2 ** failures, 5.0) if batch else None
+                    stop = self._collect(batch, waiters, retry_delay)
+
+                if batch and self._commit(conn, log, batch):
+                    batch, failures = [], 0
+                elif batch:
+                    failures += 1
+                    self.stats['retries'] += 1
+                for _, done, result in waiters:
+                    result['ok'] = not batch
+                    done.set()
+
+                if stop and (not batch or failures > self.close_retries):
+                    break
+                if stop:
+                    time.sleep(min(self.flush_interval * 2 ** failures, 1.0))
+        finally:
+            if batch:
+                self.stats['failed'] += len(batch)
+                self.logger.error(f"Audit writer stopped with {len(batch)} uncommitted events")
+            log.close()
+            conn.close()
+
+    def _collect(self, batch: List[tuple], waiters: List[tuple], timeout: Optional[float]) -> bool:
+        """Append queued events to batch until it is due; True on stop"""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return False  # time to retry a failed batch
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            kind = item[0]
+            if kind == 'event':
+                batch.append(item)
+            elif kind == 'flush':
+                waiters.append(item)
+                return False
+            else:
+                return True
+            if len(batch) >= self.flush_every:
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return False
+
+    def _commit(self, conn: sqlite3.Connection, log, batch) -> bool:
+        """
+        Group-commit a batch to SQLite and the JSONL log
+
+        The chain tip is read under the write lock, so concurrent writers
+        extend each other's chain instead of colliding on seq. Events
+        already in the table (a retried batch that did commit) are skipped.
+        """
+        rows, lines = [], []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            seq, previous_hash = self._load_tip(conn)
+            checkpoint_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM audit_checkpoints").fetchone()[0]
+            known = self._known_event_ids(conn, [event.event_id for _, event, _ in batch])
+            for _, event, details in batch:
+                if event.event_id in known:
+                    self.stats['duplicates'] += 1
+                    continue
+                known.add(event.event_id)
+                seq += 1
+                hash_chain = self._chain_hash(event.event_id, str(event.timestamp),
+                                              event.event_type.value, previous_hash)
+                rows.append((
+                    event.event_id, str(event.timestamp), event.event_type.value,
+                    event.user_id, event.session_id, event.ip_address,
+                    event.user_agent, event.resource, event.action,
+                    details.result(), event.security_level.value,
+                    event.success, event.error_message, hash_chain, seq
+                ))
+                lines.append(json.dumps(self._log_entry(event)) + '\n')
+                previous_hash = hash_chain
+
+            conn.executemany("""
+                INSERT INTO audit_events 
+                (event_id, timestamp, event_type, user_id, session_id, 
+                 ip_address, user_agent, resource, action, encrypted_details,
+                 security_level, success, error_message, hash_chain, seq)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            checkpoint = rows and seq - checkpoint_seq >= self.checkpoint_every
+            if checkpoint:
+                conn.execute(
+                    "INSERT INTO audit_checkpoints (seq, hash_chain, created_at, signature) "
+                    "VALUES (?, ?, ?, ?)",
+                    (seq, previous_hash, datetime.now().isoformat(),
+                     self._sign_checkpoint(seq, previous_hash)),
                 )
-                result = cursor.fetchone()
-                previous_hash = result[0] if result else "genesis"
-
-            # Create hash of current event + previous hash
-            event_data = f"{event.event_id}{event.timestamp}{event.event_type.value}{previous_hash}"
-            return hashlib.sha256(event_data.encode()).hexdigest()
+            conn.execute("COMMIT")
 
+            self._tip_seq, self._tip_hash = seq, previous_hash
+            self.stats['written'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['checkpoints'] += bool(checkpoint)
         except Exception as e:
-            self.logger.error(f"Hash chain calculation failed: {e}")
-            return "error"
+            if conn.in_transaction:
+                conn.rollback()
+            self.logger.error(f"Failed to commit {len(batch)} audit events, will retry: {e}")
+            return False
 
-    def _write_to_log_file(self, event: AuditEvent):
-        """Write audit event to log file"""
+        # Also write to log file
         try:
-            log_entry = {
-                'timestamp': event.timestamp.isoformat(),
-                'event_id': event.event_id,
-                'type': event.event_type.value,
-                'user': event.user_id,
-                'resource': event.resource,
-                'action': event.action,
-                'success': event.success,
-                'security_level': event.security_level.value
-            }
-
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
-
+            log.write(''.join(lines))
+            log.flush()
+            if self.fsync:
+                os.fsync(log.fileno())
         except Exception as e:
             self.logger.error(f"Failed to write to log file: {e}")
+        return True
+
+    @staticmethod
+    def _known_event_ids(conn: sqlite3.Connection, event_ids: List[str]) -> set:
+        known = set()
+        for i in range(0, len(event_ids), 500):
+            chunk = event_ids[i:i + 500]
+            known.update(row[0] for row in conn.execute(
+                f"SELECT event_id FROM audit_events WHERE event_id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return known
+
+    @staticmethod
+    def _chain_hash(event_id: str, timestamp: str, event_type: str, previous_hash: str) -> str:
+        """Hash of the event linked to the previous event's hash"""
+        event_data = f"{event_id}{timestamp}{event_type}{previous_hash}"
+        return hashlib.sha256(event_data.encode()).hexdigest()
+
+    def _sign_checkpoint(self, seq: int, hash_chain: str) -> str:
+        return hmac.new(self._checkpoint_key, f"{seq}:{hash_chain}".encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _log_entry(event: AuditEvent) -> Dict[str, Any]:
+        return {
+            'timestamp': event.timestamp.isoformat(),
+            'event_id': event.event_id,
+            'type': event.event_type.value,
+            'user': event.user_id,
+            'resource': event.resource,
+            'action': event.action,
+            'success': event.success,
+            'security_level': event.security_level.value
+        }
+
+    def close(self):
+        """Commit queued events and stop the writer"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(('stop',))
+        self._writer.join()
+        self._encryptor.shutdown(wait=True)
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'pending': self._queue.qsize(), 'chain_length': self._tip_seq}
 
     def query_events(self, start_time: Optional[datetime] = None,
                     end_time: Optional[datetime] = None,
@@ -497,6 +734,7 @@ class AuditLogger:
                     limit: int = 100) -> List[AuditEvent]:
         """Query audit events with filters"""
         try:
+            self.flush()
             query = "SELECT * FROM audit_events WHERE 1=1"
             params = []
 
@@ -554,41 +792,79 @@ class AuditLogger:
             return []
 
     def verify_integrity(self, start_time: Optional[datetime] = None,
-                        end_time: Optional[datetime] = None) -> bool:
-        """Verify audit log integrity using hash chain"""
+                        end_time: Optional[datetime] = None,
+                        full: bool = False) -> bool:
+        """
+        Verify audit log integrity using hash chain
+
+        The chain is rehashed from the last signed checkpoint before the
+        requested range (full=True: from genesis, also cross-checking every
+        checkpoint). Gaps in the chain positions are reported as violations.
+        """
         try:
-            query = "SELECT event_id, timestamp, event_type, hash_chain FROM audit_events"
-            params = []
-
-            if start_time:
-                query += " WHERE timestamp >= ?"
-                params.append(start_time)
-                if end_time:
-                    query += " AND timestamp <= ?"
-                    params.append(end_time)
-            elif end_time:
-                query += " WHERE timestamp <= ?"
-                params.append(end_time)
-
-            query += " ORDER BY timestamp ASC"
-
+            self.flush()
             with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.execute(query, params)
-
-                previous_hash = "genesis"
-                for row in cursor.fetchall():
-                    event_id, timestamp, event_type, stored_hash = row
+                first_seq, last_seq = 1, None
+                if start_time:
+                    first_seq = conn.execute(
+                        "SELECT MIN(seq) FROM audit_events WHERE timestamp >= ?", (str(start_time),)
+                    ).fetchone()[0]
+                if end_time:
+                    last_seq = conn.execute(
+                        "SELECT MAX(seq) FROM audit_events WHERE timestamp <= ?", (str(end_time),)
+                    ).fetchone()[0]
+                if first_seq is None or (end_time and last_seq is None):
+                    return True  # nothing in range
+
+                anchor_seq, previous_hash = 0, "genesis"
+                checkpoints = dict(conn.execute("SELECT seq, hash_chain FROM audit_checkpoints")) if full else {}
+                # Without start_time everything up to the newest checkpoint is covered by it
+                checkpoint = None if full else conn.execute(
+                    "SELECT seq, hash_chain, signature FROM audit_checkpoints "
+                    "WHERE seq < ? ORDER BY seq DESC LIMIT 1",
+                    (first_seq if start_time else self._tip_seq + 1,)
+                ).fetchone()
+                if checkpoint:
+                    seq, hash_chain, signature = checkpoint
+                    if not hmac.compare_digest(signature, self._sign_checkpoint(seq, hash_chain)):
+                        self.logger.warning(f"Invalid audit checkpoint signature at seq {seq}")
+                        return False
+                    row = conn.execute("SELECT hash_chain FROM audit_events WHERE seq = ?", (seq,)).fetchone()
+                    if row is None or row[0] != hash_chain:
+                        self.logger.warning(f"Integrity violation detected at checkpoint {seq}")
+                        return False
+                    anchor_seq, previous_hash = seq, hash_chain
+
+                query = ("SELECT seq, event_id, timestamp, event_type, hash_chain "
+                         "FROM audit_events WHERE seq > ?")
+                params = [anchor_seq]
+                if last_seq is not None:
+                    query += " AND seq <= ?"
+                    params.append(last_seq)
+                query += " ORDER BY seq ASC"
+
+                expected_seq = anchor_seq
+                for seq, event_id, timestamp, event_type, stored_hash in conn.execute(query, params):
+                    expected_seq += 1
+                    if seq != expected_seq:
+                        self.logger.warning(f"Integrity violation: audit events missing before {event_id}")
+                        return False
 
                     # Recalculate expected hash
-                    event_data = f"{event_id}{timestamp}{event_type}{previous_hash}"
-                    expected_hash = hashlib.sha256(event_data.encode()).hexdigest()
-
+                    expected_hash = self._chain_hash(event_id, timestamp, event_type, previous_hash)
                     if stored_hash != expected_hash and stored_hash != "error":
                         self.logger.warning(f"Integrity violation detected at event {event_id}")
                         return False
+                    if seq in checkpoints and checkpoints[seq] != stored_hash:
+                        self.logger.warning(f"Integrity violation detected at checkpoint {seq}")
+                        return False
 
                     previous_hash = stored_hash
 
+                if last_seq is None and expected_seq < self._tip_seq:
+                    self.logger.warning(f"Integrity violation: audit log truncated after seq {expected_seq}")
+                    return False
+
             return True
 
         except Exception as e:
@@ -840,20 +1116,38 @@ class SecurityManager:
         return recommendations
 
 
-# Global security manager instance
-security_manager = SecurityManager()
+# Global security manager instance: created on first use, so importing this
+# module does not create state files or start the audit writer
+_security_manager: Optional[SecurityManager] = None
+_security_manager_lock = threading.Lock()
+
+
+def get_security_manager() -> SecurityManager:
+    """Get the global SecurityManager instance"""
+    global _security_manager
+    with _security_manager_lock:
+        if _security_manager is None:
+            _security_manager = SecurityManager()
+        return _security_manager
+
+
+def __getattr__(name):
+    """security_manager stays importable as a module attribute"""
+    if name == "security_manager":
+        return get_security_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def initialize_security():
     """Initialize the security system"""
-    await security_manager.initialize_security()
+    await get_security_manager().initialize_security()
 
 
 async def log_trade_execution(symbol: str, side: str, size: float,
                             price: float, success: bool,
                             user_id: Optional[str] = None):
     """Log trade execution event"""
-    await security_manager.log_security_event(
+    await get_security_manager().log_security_event(
         event_type=EventType.TRADE_EXECUTED,
         resource=f"trading/{symbol}",
         action=f"{side.lower()}_order",
@@ -871,14 +1165,14 @@ async def log_trade_execution(symbol: str, side: str, size: float,
 
 async def get_security_report() -> Dict[str, Any]:
     """Get comprehensive security report"""
-    return await security_manager.generate_security_report()
+    return await get_security_manager().generate_security_report()
 
 
 def encrypt_sensitive_data(data: Union[str, Dict, List]) -> str:
     """Encrypt sensitive data"""
-    return security_manager.encryption_manager.encrypt_data(data)
+    return get_security_manager().encryption_manager.encrypt_data(data)
 
 
 def decrypt_sensitive_data(encrypted_data: str) -> Union[str, Dict, List]:
     """Decrypt sensitive data"""
-    return security_manager.encryption_manager.decrypt_data(encrypted_data)
+    return get_security_manager().encryption_manager.decrypt_data(encrypted_data)
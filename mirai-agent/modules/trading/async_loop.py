@@ -218,6 +218,17 @@ class AsyncTradingLoop:
                         for signal in signals:
                             await self.signal_queue.put(signal)
 
+            # Collect results of the concurrent work
+            if signal_tasks:
+                for signals in await task_manager.gather(signal_tasks, return_exceptions=True):
+                    if isinstance(signals, Exception):
+                        self.logger.error(f"Signal generation failed: {signals}")
+                        continue
+                    for signal in signals or []:
+                        await self.signal_queue.put(signal)
+            if market_data_tasks:
+                await task_manager.gather(market_data_tasks, return_exceptions=True)
+
             # Update performance metrics
             iteration_time = time.time() - iteration_start
             self.loop_times.append(iteration_time)
@@ -256,21 +267,22 @@ class AsyncTradingLoop:
             # Collect multiple data points concurrently
 
             if PERFORMANCE_AVAILABLE:
-                # Submit tasks to task manager
-                ticker_task = await task_manager.submit_task(
+                # Submit tasks to task manager, then await both results
+                ticker_task = await task_manager.submit(
                     self.trading_client.get_ticker_price(symbol),
                     priority="high"
                 )
 
-                orderbook_task = await task_manager.submit_task(
+                orderbook_task = await task_manager.submit(
                     self.trading_client.get_order_book(symbol, limit=20),
                     priority="high"
                 )
 
+                ticker, orderbook = await asyncio.gather(ticker_task, orderbook_task)
                 return {
                     'symbol': symbol,
-                    'ticker_task': ticker_task,
-                    'orderbook_task': orderbook_task,
+                    'ticker': ticker,
+                    'orderbook': orderbook,
                     'timestamp': datetime.now().isoformat()
                 }
             else:
@@ -357,11 +357,13 @@ class OptimizedTradingClient:
             )
             tasks.append(task_id)
 
-        # Wait for all orders to complete (simplified)
-        # In production, you'd track tasks properly
-        await asyncio.sleep(1)  # Allow tasks to process
-
-        return [{"task_id": task_id, "status": "submitted"} for task_id in tasks]
+        # Wait for all orders to complete
+        results = await task_manager.gather(tasks, return_exceptions=True)
+        return [
+            {"task_id": task_id, "status": "failed", "error": str(result)}
+            if isinstance(result, Exception) else result
+            for task_id, result in zip(tasks, results)
+        ]
 
     async def get_real_time_data_stream(self, symbols: List[str]) -> Dict[str, Any]:
         """Get real-time market data stream (optimized)"""
@@ -105,7 +105,8 @@ def test_docker_runner():
     from core.docker_runner import DockerCodeRunner, SubprocessCodeRunner
     
     try:
-        runner = DockerCodeRunner()
+        # one snippet - no need to prewarm every language
+        runner = DockerCodeRunner(prewarm=False)
         
         if runner.docker_available:
             print("✅ Docker is available")
@@ -119,6 +120,7 @@ def test_docker_runner():
                 print(f"⚠️ Python execution failed: {result.error}")
             
             print(f"✅ Execution time: {result.execution_time:.3f}s")
+            runner.close()
             
         else:
             print("⚠️ Docker not available, testing fallback subprocess runner")
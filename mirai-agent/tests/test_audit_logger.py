@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the group-commit audit pipeline
+
+- Events are batched into few commits and keep their hash chain
+- Signed checkpoints make verification incremental and detect tampering
+- Databases written by the previous logger are migrated and extended
+- Several writers share one chain; failed batches are retried, not dropped
+- Importing the module does not touch the working directory
+"""
+
+import hashlib
+import json
+import sqlite3
+import subprocess
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("cryptography")
+
+from modules.security.enterprise_security import (  # noqa: E402
+    AuditEvent,
+    AuditLogger,
+    EventType,
+    SecurityLevel,
+)
+
+
+def _event(i, timestamp=None):
+    return AuditEvent(
+        event_id=f"evt-{i:04d}", timestamp=timestamp or datetime.now(),
+        event_type=EventType.TRADE_EXECUTED, user_id="trader", session_id=None,
+        ip_address=None, user_agent=None, resource="trading/BTCUSDT", action="buy_order",
+        details={"size": i}, security_level=SecurityLevel.HIGH, success=True,
+    )
+
+
+def _logger(tmp_path, **kwargs):
+    return AuditLogger(
+        log_file=str(tmp_path / "logs" / "audit.log"), db_file=str(tmp_path / "state" / "audit.db"),
+        checkpoint_key=b"test-key", **kwargs,
+    )
+
+
+def test_group_commit_and_chain(tmp_path):
+    audit = _logger(tmp_path, flush_every=50, flush_interval=1.0)
+    try:
+        for i in range(120):
+            assert audit.log_event(_event(i))
+        assert audit.flush(timeout=10)
+
+        stats = audit.get_stats()
+        assert stats["written"] == 120 and stats["batches"] <= 4 and stats["pending"] == 0
+
+        lines = (tmp_path / "logs" / "audit.log").read_text().splitlines()
+        assert [json.loads(line)["event_id"] for line in lines] == [f"evt-{i:04d}" for i in range(120)]
+
+        (latest,) = audit.query_events(limit=1)
+        assert latest.event_id == "evt-0119" and latest.details == {"size": 119}
+        assert audit.log_event(_event(120), wait=True)
+        assert audit.verify_integrity(full=True)
+    finally:
+        audit.close()
+    assert not audit.log_event(_event(121))  # закрытый логгер не принимает события
+
+
+def test_checkpoints_make_verification_incremental(tmp_path):
+    audit = _logger(tmp_path, flush_every=10, checkpoint_every=25)
+    try:
+        for i in range(100):
+            audit.log_event(_event(i))
+        audit.flush(timeout=10)
+        assert audit.get_stats()["checkpoints"] >= 3
+
+        db = sqlite3.connect(tmp_path / "state" / "audit.db")
+        with db:
+            # подмена события до последнего чекпоинта видна только при полной проверке
+            db.execute("UPDATE audit_events SET event_type = 'login' WHERE seq = 3")
+        assert audit.verify_integrity()
+        assert not audit.verify_integrity(full=True)
+
+        with db:
+            db.execute("UPDATE audit_events SET event_type = 'trade_executed' WHERE seq = 3")
+            db.execute("DELETE FROM audit_events WHERE seq = 95")  # удаление после чекпоинта
+        assert not audit.verify_integrity()
+        with db:
+            db.execute("DELETE FROM audit_events WHERE seq > 94")  # обрезанный хвост
+        assert not audit.verify_integrity()
+
+        with db:
+            db.execute("UPDATE audit_checkpoints SET hash_chain = 'forged' WHERE seq = "
+                       "(SELECT MAX(seq) FROM audit_checkpoints)")
+        assert not audit.verify_integrity()
+        db.close()
+    finally:
+        audit.close()
+
+
+def test_legacy_database_is_migrated(tmp_path):
+    (tmp_path / "state").mkdir()
+    start = datetime(2025, 1, 1, 12, 0, 0, 500)
+    with sqlite3.connect(tmp_path / "state" / "audit.db") as conn:
+        conn.execute("""
+            CREATE TABLE audit_events (
+                event_id TEXT PRIMARY KEY, timestamp TIMESTAMP, event_type TEXT, user_id TEXT,
+                session_id TEXT, ip_address TEXT, user_agent TEXT, resource TEXT, action TEXT,
+                encrypted_details TEXT, security_level TEXT, success BOOLEAN, error_message TEXT,
+                hash_chain TEXT
+            )
+        """)
+        previous = "genesis"
+        for i in range(3):
+            timestamp = str(start + timedelta(seconds=i))
+            previous = hashlib.sha256(f"old-{i}{timestamp}login{previous}".encode()).hexdigest()
+            conn.execute(
+                "INSERT INTO audit_events (event_id, timestamp, event_type, hash_chain) VALUES (?, ?, ?, ?)",
+                (f"old-{i}", timestamp, "login", previous),
+            )
+    conn.close()
+
+    audit = _logger(tmp_path)
+    try:
+        assert audit.get_stats()["chain_length"] == 3
+        audit.log_event(_event(0), wait=True)
+        assert audit.verify_integrity(full=True)
+        assert audit.verify_integrity(start_time=start + timedelta(seconds=1))
+    finally:
+        audit.close()
+
+
+def test_two_writers_share_the_chain(tmp_path):
+    first, second = _logger(tmp_path, flush_every=8), _logger(tmp_path, flush_every=8)
+    try:
+        def write(audit, prefix):
+            for i in range(100):
+                event = _event(i)
+                event.event_id = f"{prefix}-{i:04d}"
+                assert audit.log_event(event, wait=i % 10 == 9)
+
+        threads = [threading.Thread(target=write, args=(audit, name))
+                   for audit, name in ((first, "a"), (second, "b"))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert first.flush(timeout=10) and second.flush(timeout=10)
+
+        for audit in (first, second):
+            assert audit.get_stats()["failed"] == 0 and audit.get_stats()["retries"] == 0
+        with sqlite3.connect(tmp_path / "state" / "audit.db") as db:
+            assert db.execute("SELECT COUNT(*), MAX(seq) FROM audit_events").fetchone() == (200, 200)
+        db.close()
+        assert first.verify_integrity(full=True) and second.verify_integrity(full=True)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_failed_batch_is_retried(tmp_path):
+    audit = _logger(tmp_path, flush_interval=0.01)
+    db = sqlite3.connect(tmp_path / "state" / "audit.db")
+    try:
+        with db:
+            db.execute("CREATE TRIGGER reject BEFORE INSERT ON audit_events "
+                       "BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+        assert audit.log_event(_event(0))
+        assert not audit.flush(timeout=10)  # не записано, но и не потеряно
+        assert audit.get_stats()["retries"] >= 1
+
+        with db:
+            db.execute("DROP TRIGGER reject")
+        assert audit.log_event(_event(1), wait=True)
+        assert [e.event_id for e in audit.query_events()] == ["evt-0001", "evt-0000"]
+        assert audit.get_stats()["failed"] == 0 and audit.verify_integrity(full=True)
+    finally:
+        db.close()
+        audit.close()
+
+
+def test_import_has_no_side_effects(tmp_path):
+    root = Path(__file__).parent.parent
+    subprocess.run(
+        [sys.executable, "-c", "import sys; sys.path.insert(0, sys.argv[1]); "
+         "import modules.security.enterprise_security", str(root)],
+        cwd=tmp_path, check=True,
+    )
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for lazy capability loading
+
+- Modules are imported and constructed on first use only
+- Missing dependencies make a capability unavailable without importing it
+- Usage statistics drive background warm-up
+- Startup profiler reports per-module import/init time
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.capabilities import CapabilityRegistry
+
+
+@pytest.fixture
+def fake_module(tmp_path, monkeypatch):
+    (tmp_path / "fake_tool_module.py").write_text(
+        "import time\n"
+        "time.sleep(0.05)\n"
+        "class Tool:\n"
+        "    created = 0\n"
+        "    def __init__(self, name):\n"
+        "        Tool.created += 1\n"
+        "        self.name = name\n"
+        "    def run(self, x):\n"
+        "        return f'{self.name}:{x}'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "fake_tool_module"
+    sys.modules.pop("fake_tool_module", None)
+
+
+def test_lazy_load_and_proxy(fake_module):
+    registry = CapabilityRegistry()
+    tool = registry.register("tool", fake_module, lambda m: m.Tool("demo"))
+
+    assert fake_module not in sys.modules
+    assert tool.available and not tool.loaded
+
+    assert tool.run(1) == "demo:1"
+    assert tool.run(2) == "demo:2"
+    assert sys.modules[fake_module].Tool.created == 1
+    assert registry.status()["tool"] == {"available": True, "loaded": True, "error": None}
+
+    report = registry.profiler.report()
+    assert "tool" in report.splitlines()[2]
+    assert registry.profiler.records["tool"]["import_s"] >= 0.05
+
+
+def test_missing_dependency_and_failing_factory(fake_module):
+    registry = CapabilityRegistry()
+    missing = registry.register("gui", fake_module, lambda m: m.Tool("gui"), requires=("no_such_package_xyz",))
+    broken = registry.register("broken", fake_module, lambda m: m.Tool())
+
+    assert not missing.available and "no_such_package_xyz" in missing.error
+    assert missing.get() is None and fake_module not in sys.modules
+
+    assert broken.available  # до первой попытки неизвестно
+    with pytest.raises(RuntimeError, match="broken"):
+        broken.run(1)
+    assert not broken.available and broken.loaded
+
+
+def test_usage_driven_warm_up(fake_module, tmp_path):
+    usage_path = tmp_path / "usage.json"
+    registry = CapabilityRegistry(usage_path=usage_path)
+    for name in ("a", "b", "c"):
+        registry.register(name, fake_module, lambda m, name=name: m.Tool(name))
+    registry["b"].run(1)
+    registry["b"].run(2)
+    registry["c"].run(1)
+    registry.save_usage()
+
+    restarted = CapabilityRegistry(usage_path=usage_path)
+    for name in ("a", "b", "c"):
+        restarted.register(name, fake_module, lambda m, name=name: m.Tool(name))
+    assert restarted.most_used(1) == ["b"]
+
+    restarted.warm_up(restarted.most_used(1))
+    restarted.wait_warm_up(timeout=5)
+    assert restarted["b"].loaded and not restarted["a"].loaded
+    assert restarted.usage["b"] == 2  # прогрев не считается использованием
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the compile artifact cache
+
+- Single compilation for concurrent identical requests
+- Size-bounded LRU eviction that survives reopening
+- MultiLanguageExecutor reuses compiled C binaries
+"""
+
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.compile_cache import CompileCache
+
+
+def _builder(calls, payload=b"x" * 100, success=True):
+    async def build(output):
+        calls.append(output)
+        await asyncio.sleep(0.01)
+        if success:
+            Path(output).write_bytes(payload)
+        return {"success": success, "output": "", "error": "boom", "execution_time": 0.01}
+
+    return build
+
+
+def test_concurrent_requests_share_one_build(tmp_path):
+    cache = CompileCache(tmp_path)
+    calls = []
+    key = cache.key("c", "int main(){}", "gcc 13", [])
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_build(key, _builder(calls)) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert len({path for path, _ in results}) == 1
+
+    path, compile_result = asyncio.run(cache.get_or_build(key, _builder(calls)))
+    assert compile_result is None and path.read_bytes() == b"x" * 100
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["shared_builds"], stats["hits"]) == (1, 2, 1)
+    assert stats["saved_compile_seconds"] > 0
+
+    # Failed builds are not cached; keys depend on compiler version and flags
+    failing = cache.key("c", "broken", "gcc 13", [])
+    assert asyncio.run(cache.get_or_build(failing, _builder(calls, success=False)))[0] is None
+    assert cache.lookup(failing) is None
+    assert cache.key("c", "int main(){}", "gcc 14", []) != key
+    assert cache.key("c", "int main(){}", "gcc 13", ["-O2"]) != key
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = CompileCache(tmp_path, max_bytes=250)
+    keys = [cache.key("c", f"src{i}", "v", []) for i in range(3)]
+
+    async def scenario():
+        await cache.get_or_build(keys[0], _builder([]))
+        await cache.get_or_build(keys[1], _builder([]))
+        assert cache.lookup(keys[0]) is not None  # keys[1] is now least recent
+        await cache.get_or_build(keys[2], _builder([]))
+
+    asyncio.run(scenario())
+    assert cache.lookup(keys[1]) is None
+    assert cache.get_stats()["evictions"] == 1
+
+    reopened = CompileCache(tmp_path, max_bytes=250)
+    assert reopened.get_stats()["entries"] == 2
+    assert reopened.lookup(keys[0]) is not None
+
+
+@pytest.mark.skipif(not shutil.which("gcc"), reason="gcc not installed")
+def test_executor_reuses_compiled_c(tmp_path):
+    from core.multi_language_executor import MultiLanguageExecutor
+
+    executor = MultiLanguageExecutor(cache_dir=str(tmp_path / "cache"))
+    code = '#include <stdio.h>\nint main(){printf("hi\\n");return 0;}\n'
+
+    first = executor.execute("c", code)
+    second = executor.execute("c", code)
+    assert first["success"] and second["success"]
+    assert second["output"].strip() == "hi"
+    assert (first["compile_cached"], second["compile_cached"]) == (False, True)
+    assert executor.get_compile_cache_stats()["hits"] == 1
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the token-budgeted context packer
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.context_packer import ContextChunk, ContextPacker, text_overlap
+
+
+def test_oversized_chunk_is_skipped_not_fatal():
+    """A chunk that doesn't fit no longer stops packing"""
+    candidates = [
+        ContextChunk("a" * 10, tokens=50, source="a.md", score=0.9),
+        ContextChunk("b" * 10, tokens=500, source="b.md", score=0.8),
+        ContextChunk("c" * 10, tokens=40, source="c.md", score=0.7),
+    ]
+    pack = ContextPacker(max_tokens=100).pack(candidates)
+
+    assert [c.source for c in pack.chunks] == ["a.md", "c.md"]
+    assert pack.total_tokens == 90
+    assert pack.skipped == 1
+    assert pack.text.startswith("[Source: a.md]")
+
+
+def test_overlapping_neighbours_are_merged():
+    """Adjacent chunks of one source are rendered once, without the overlap"""
+    first = "The agent keeps a long term memory in SQLite and "
+    second = "memory in SQLite and searches it with FTS5 indexes."
+    candidates = [
+        ContextChunk(second, tokens=12, source="doc.md", chunk_index=1, score=0.9),
+        ContextChunk(first, tokens=12, source="doc.md", chunk_index=0, score=0.8),
+        ContextChunk(second, tokens=12, source="copy.md", score=0.7),
+    ]
+    pack = ContextPacker(max_tokens=100, overlap_tokens=4, source_format=None).pack(candidates)
+
+    assert pack.parts == [first + "searches it with FTS5 indexes."]
+    assert pack.total_tokens == 12 + 8  # overlap refunded
+    assert pack.deduplicated == 2  # exact duplicate + merged overlap
+
+
+def test_text_overlap():
+    assert text_overlap("x" * 5 + "shared overlap text", "shared overlap text!") == 19
+    assert text_overlap("abc", "abd") == 0
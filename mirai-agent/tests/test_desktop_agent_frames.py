@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for frame reuse in the desktop agent
+
+- Every mouse, keyboard and window action invalidates the frame buffer,
+  so OCR / template search never run on a pre-action screenshot
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from core import desktop_agent_v2
+except Exception as e:  # pyautogui нужен дисплей
+    pytest.skip(f"desktop agent unavailable: {e}", allow_module_level=True)
+
+from core.frame_buffer import FrameBuffer
+
+
+class ChangingScreen:
+    """Grabber: каждое действие меняет содержимое экрана"""
+
+    def __init__(self):
+        self.version = 0
+        self.grabs = 0
+
+    def act(self, *args, **kwargs):
+        self.version += 1
+
+    def __call__(self, region=None):
+        self.grabs += 1
+        return np.full((120, 160, 3), self.version % 256, dtype=np.uint8)
+
+
+@pytest.fixture
+def agent(monkeypatch, tmp_path):
+    screen = ChangingScreen()
+    gui = desktop_agent_v2.pyautogui
+    for name in ("click", "write", "press", "hotkey", "moveTo"):
+        monkeypatch.setattr(gui, name, screen.act, raising=False)
+    monkeypatch.setattr(gui, "size", lambda: (160, 120), raising=False)
+    monkeypatch.setattr(desktop_agent_v2, "MIRAI_CORE_AVAILABLE", False)
+    monkeypatch.setattr(desktop_agent_v2.subprocess, "Popen", screen.act)
+    monkeypatch.setattr(desktop_agent_v2.time, "sleep", lambda seconds: None)
+
+    agent = desktop_agent_v2.MiraiDesktopAgent(
+        openai_api_key="sk-test", enable_safety=False, enable_memory=False,
+        screenshots_dir=str(tmp_path),
+    )
+    agent.frames = FrameBuffer(grabber=screen)
+    return agent, screen
+
+
+@pytest.mark.parametrize("action, args", [
+    ("click_at_position", (10, 10)),
+    ("type_text", ("hello",)),
+    ("press_key", ("ctrl+s",)),
+    ("move_mouse", (20, 20)),
+    ("open_application", ("notepad",)),
+    ("wait_seconds", (0.1,)),
+])
+def test_actions_invalidate_frames(agent, action, args):
+    agent, screen = agent
+    before = agent.frames.get_or_capture()
+    assert agent.frames.get_or_capture() is before  # без действий кадр переиспользуется
+
+    assert getattr(agent, action)(*args).startswith("✅")
+    after = agent.frames.get_or_capture()
+    assert after is not before and screen.grabs == 2
+    assert after.pixels[0, 0, 0] == screen.version % 256
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for Docker code runner container pool
+
+Uses a stub `docker` executable on PATH: it logs every call and runs
+`docker exec` commands locally, so no Docker daemon is needed.
+`docker ps` prints $FAKE_DOCKER_LOG.ps when that file exists.
+"""
+
+import gc
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.docker_runner import ContainerPool, DockerCodeRunner, ExecutionStatus
+
+STUB = """#!{python}
+import itertools, os, subprocess, sys
+args = sys.argv[1:]
+with open(os.environ["FAKE_DOCKER_LOG"], "a") as log:
+    log.write(" ".join(args) + "\\n")
+if args[:1] == ["run"] and "-d" in args:
+    counter = os.environ["FAKE_DOCKER_LOG"] + ".ids"
+    with open(counter, "a+") as f:
+        f.seek(0)
+        n = len(f.read())
+        f.write("x")
+    print("container%d" % n)
+elif args[:1] == ["ps"]:
+    listing = os.environ["FAKE_DOCKER_LOG"] + ".ps"
+    if os.path.exists(listing):
+        print(open(listing).read())
+elif args[:1] == ["exec"]:
+    rest = args[1:]
+    while rest[0].startswith("-"):
+        rest = rest[2:] if rest[0] == "-w" else rest[1:]
+    command = rest[1:]
+    if command[0] == "sh":
+        sys.exit(0)  # filesystem reset
+    if command[0] == "python":
+        command[0] = sys.executable
+    sys.exit(subprocess.run(command).returncode)
+"""
+
+
+@pytest.fixture
+def fake_docker(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "docker"
+    stub.write_text(STUB.format(python=sys.executable))
+    stub.chmod(0o755)
+    log = tmp_path / "docker.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_LOG", str(log))
+    return lambda: log.read_text().splitlines() if log.exists() else []
+
+
+def _wait_idle(runner, language, count, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if runner.pool.get_stats().get(language, {}).get("idle") == count:
+            return
+        time.sleep(0.01)
+    raise AssertionError(runner.pool.get_stats())
+
+
+def test_pooled_execution_reuses_warm_containers(fake_docker):
+    runner = DockerCodeRunner(pool_size=1, prewarm=False)
+    try:
+        first = runner.execute_python("print(6 * 7)")
+        _wait_idle(runner, "python", 1)
+        second = runner.execute_python("import sys; sys.exit(3)")
+        _wait_idle(runner, "python", 1)
+
+        assert first.status == ExecutionStatus.SUCCESS and first.output.strip() == "42"
+        assert second.status == ExecutionStatus.ERROR and second.exit_code == 3
+        assert first.container_id == second.container_id
+
+        calls = fake_docker()
+        assert sum(c.startswith("run -d") for c in calls) == 1
+        assert not any(c.startswith("pull") for c in calls)  # image inspect succeeded
+        assert sum(c.startswith("exec -i") for c in calls) == 2
+        assert sum("find /sandbox" in c for c in calls) == 2  # reset after every run
+        run_call = next(c for c in calls if c.startswith("run -d"))
+        assert "--network none" in run_call and "--read-only" in run_call
+
+        stats = runner.get_stats()
+        assert stats["latency"]["python"]["count"] == 2
+        assert stats["latency"]["python"]["p95_ms"] >= stats["latency"]["python"]["p50_ms"]
+        assert stats["pool"]["python"]["cold_starts"] == 1
+        assert stats["pool"]["python"]["reuses"] == 1
+    finally:
+        runner.close()
+    assert any(c.startswith("rm -f container0") for c in fake_docker())
+
+
+def test_timeout_replaces_container(fake_docker):
+    runner = DockerCodeRunner(pool_size=1, prewarm=False)
+    try:
+        result = runner.execute_python("import time; time.sleep(5)", timeout=1)
+        assert result.status == ExecutionStatus.TIMEOUT
+        _wait_idle(runner, "python", 1)
+        assert runner.pool.get_stats()["python"]["recycled"] == 1
+        assert runner.execute_python("print('ok')").container_id != result.container_id
+    finally:
+        runner.close()
+
+
+def _wait_for(fake_docker, prefix, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        calls = [c for c in fake_docker() if c.startswith(prefix)]
+        if calls:
+            return calls
+        time.sleep(0.01)
+    raise AssertionError(fake_docker())
+
+
+def test_orphaned_pool_containers_are_reaped(fake_docker, tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    host = socket.gethostname()
+    (tmp_path / "docker.log.ps").write_text("\n".join([
+        f"orphan1 {host}:{dead.pid}",
+        f"mine1 {host}:{os.getpid()}",
+        f"remote1 other-host:{dead.pid}",
+        "legacy1 ",
+    ]))
+
+    runner = DockerCodeRunner(pool_size=1, prewarm=False)
+    try:
+        assert _wait_for(fake_docker, "rm -f") == ["rm -f orphan1"]
+        ps_call = next(c for c in fake_docker() if c.startswith("ps"))
+        assert "label=mirai.pool=1" in ps_call
+
+        runner.execute_python("print(1)")
+        run_call = next(c for c in fake_docker() if c.startswith("run -d"))
+        assert f"mirai.pool.owner={host}:{os.getpid()}" in run_call
+    finally:
+        runner.close()
+
+
+def test_unclosed_pool_removes_containers(fake_docker):
+    pool = ContainerPool({"python": "python:3.11-slim"}, size=2)
+    containers = [pool.acquire("python"), pool.acquire("python")]
+    for container_id in containers:
+        pool.release("python", container_id)
+    deadline = time.time() + 5
+    while pool.get_stats()["python"]["idle"] < 2 and time.time() < deadline:
+        time.sleep(0.01)  # сброс после запуска
+    del pool
+    gc.collect()
+    (call,) = _wait_for(fake_docker, "rm -f")
+    assert sorted(call.split()[2:]) == sorted(containers)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for embedding backends
+
+- On-disk embedding cache in front of a backend
+- Backend selection by name
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.embedding_backends import CachedEmbeddings, LocalEmbeddings, create_embedding_backend
+
+
+class CountingBackend:
+    """Deterministic 3-dim embeddings that record every backend call"""
+
+    model_name = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+
+def test_cached_embeddings_only_embed_new_texts(tmp_path):
+    backend = CountingBackend()
+    embeddings = CachedEmbeddings(backend, tmp_path / "emb.db")
+
+    first = embeddings.embed_documents(["a", "bb", "a"])
+    assert first == [[1.0, 1.0, 0.0], [2.0, 1.0, 0.0], [1.0, 1.0, 0.0]]
+    assert backend.calls == [["a", "bb"]]
+
+    # Reopened cache serves known texts without touching the backend
+    embeddings = CachedEmbeddings(backend, tmp_path / "emb.db")
+    assert embeddings.embed_query("bb") == [2.0, 1.0, 0.0]
+    embeddings.embed_documents(["bb", "ccc"])
+    assert backend.calls[1:] == [["ccc"]]
+    assert embeddings.get_stats()["cache_hits"] == 2
+
+
+def test_create_embedding_backend(tmp_path, monkeypatch):
+    monkeypatch.delenv("MIRAI_EMBEDDINGS", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    assert isinstance(create_embedding_backend(), LocalEmbeddings)
+    cached = create_embedding_backend("local", cache_dir=tmp_path)
+    assert isinstance(cached, CachedEmbeddings)
+    assert (tmp_path / "embeddings_local.db").exists()
+
+    with pytest.raises(ValueError):
+        create_embedding_backend("openai")
+    with pytest.raises(ValueError):
+        create_embedding_backend("unknown")
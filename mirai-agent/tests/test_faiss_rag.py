@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for FAISSRAGSystem queries
+
+- search_many keeps input order and encodes queries in one batch
+- Query embedding / result LRU caches and their invalidation (ingest, clear)
+- hit@k metrics reuse the results of the original search
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("tiktoken")
+pytest.importorskip("sentence_transformers")
+
+import core.faiss_rag as faiss_rag  # noqa: E402
+
+VOCABULARY = ["python", "asyncio", "coroutines", "rust", "ownership", "borrow", "docker", "containers", "images"]
+DOCUMENTS = {
+    "python.md": "python asyncio coroutines",
+    "rust.md": "rust ownership borrow",
+    "docker.md": "docker containers images",
+}
+
+
+class BagOfWordsModel:
+    """Deterministic word-count embeddings that record every encode() call"""
+
+    calls = []
+
+    def __init__(self, name):
+        self.name = name
+
+    def get_sentence_embedding_dimension(self):
+        return len(VOCABULARY)
+
+    def encode(self, texts, **kwargs):
+        BagOfWordsModel.calls.append(list(texts))
+        return np.array(
+            [[float(text.lower().split().count(word)) for word in VOCABULARY] for text in texts],
+            dtype=np.float32,
+        )
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    monkeypatch.setattr(faiss_rag, "SentenceTransformer", BagOfWordsModel)
+    BagOfWordsModel.calls = []
+    system = faiss_rag.FAISSRAGSystem(persist_directory=str(tmp_path), query_cache_size=8)
+    for source, text in DOCUMENTS.items():
+        system.add_document(text, source)
+    BagOfWordsModel.calls = []
+    yield system
+    system.close()
+
+
+def _sources(results):
+    return [doc["metadata"]["source"] for doc, _ in results]
+
+
+def test_search_many_keeps_input_order(rag):
+    queries = ["rust ownership", "python asyncio", "docker images", "rust ownership"]
+    results = rag.search_many(queries, top_k=2)
+
+    assert [_sources(hits)[0] for hits in results] == ["rust.md", "python.md", "docker.md", "rust.md"]
+    assert all(len(hits) == 2 for hits in results)
+    assert results[0] == results[3]
+    # повторный запрос в пакете кодируется один раз, все промахи - одним вызовом
+    assert BagOfWordsModel.calls == [["rust ownership", "python asyncio", "docker images"]]
+
+    assert [rag.search(query, top_k=2) for query in queries] == results
+    assert rag.search_many([]) == []
+    assert len(BagOfWordsModel.calls) == 1 and rag.metrics["total_queries"] == 8
+
+
+def test_query_caches_hit_and_invalidate(rag):
+    first = rag.search("python asyncio", top_k=3)
+    assert rag.search("python asyncio", top_k=3) == first
+    cache = rag.get_stats()["query_cache"]
+    assert (cache["result_hits"], cache["result_misses"]) == (1, 1)
+    assert cache["embedding_misses"] == 1
+
+    # другой top_k - другой ключ результата, но эмбеддинг запроса из кэша
+    rag.search("python asyncio", top_k=1)
+    assert rag.get_stats()["query_cache"]["embedding_hits"] == 1
+    assert len(BagOfWordsModel.calls) == 1
+
+    # новый документ меняет версию индекса - результат ищется заново
+    version = rag.get_stats()["query_cache"]["index_version"]
+    rag.add_document("python asyncio tutorial", "tutorial.md")
+    assert rag.get_stats()["query_cache"]["index_version"] == version + 1
+    fresh = rag.search("python asyncio", top_k=3)
+    assert _sources(fresh)[0] == "tutorial.md" and fresh != first
+    assert rag.get_stats()["query_cache"]["result_misses"] == 3
+
+    # после clear() старые результаты не возвращаются
+    rag.clear()
+    assert rag.search("python asyncio", top_k=3) == []
+    rag.add_document("rust borrow", "borrow.md")
+    assert _sources(rag.search("python asyncio", top_k=3)) == ["borrow.md"]
+    assert len(BagOfWordsModel.calls) == 3  # два новых документа, запрос - из кэша эмбеддингов
+
+
+def test_hit_at_k_metrics(rag):
+    query = "python asyncio docker containers images"
+    results = rag.search(query, top_k=5)
+    assert _sources(results) == ["docker.md", "python.md", "rust.md"]
+
+    rag.update_hit_metrics(query, ["python.md"], k=5)  # ранг 2, без повторного поиска
+    assert rag.metrics["total_queries"] == 1
+    assert (rag.metrics["hits_at_1"], rag.metrics["hits_at_3"], rag.metrics["hits_at_5"]) == (0, 1, 1)
+
+    rag.update_hit_metrics(query, ["docker.md"], k=3, results=results)
+    rag.update_hit_metrics(query, ["missing.md"], k=5, results=results)
+    assert (rag.metrics["hits_at_1"], rag.metrics["hits_at_3"], rag.metrics["hits_at_5"]) == (1, 2, 1)
+
+    rag.search("rust ownership", top_k=5)
+    assert rag.get_hit_rate(1) == 50.0 and rag.get_hit_rate(3) == 100.0
+    assert rag.get_hit_rate(5) == 50.0 and rag.get_hit_rate(2) == 0.0
+    stats = rag.get_stats()
+    assert (stats["hit_rate_1"], stats["hit_rate_3"], stats["hit_rate_5"]) == (50.0, 100.0, 50.0)
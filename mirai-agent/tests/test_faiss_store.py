@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for FAISS storage layer
+
+- Append-only vector segment
+- SQLite chunk store
+- Crash recovery (reconcile)
+- Embedding cache and ingestion manifest
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.faiss_store import (
+    ChunkStore,
+    EmbeddingCache,
+    VectorSegment,
+    atomic_write_bytes,
+    reconcile,
+)
+
+
+def _chunks(n, source="doc.md"):
+    return [
+        {"text": f"chunk {i}", "tokens": 2, "metadata": {"source": source}, "chunk_index": i}
+        for i in range(n)
+    ]
+
+
+def test_segment_and_store_roundtrip(tmp_path):
+    """Vectors and chunks persist and reopen without loading everything"""
+    segment = VectorSegment(tmp_path / "c.vectors.f32", dim=4)
+    store = ChunkStore(tmp_path / "c.chunks.db")
+
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+    start = segment.append(vectors)
+    store.append_many(start, _chunks(3))
+    segment.close()
+    store.close()
+
+    segment = VectorSegment(tmp_path / "c.vectors.f32", dim=4)
+    store = ChunkStore(tmp_path / "c.chunks.db")
+    assert reconcile(segment, store) == 3
+    assert np.array_equal(segment.read(1, 3), vectors[1:])
+    assert store[2]["text"] == "chunk 2"
+    assert store[-1]["metadata"]["source"] == "doc.md"
+    assert sorted(store.get_many([0, 2])) == [0, 2]
+
+
+def test_reconcile_after_crash(tmp_path):
+    """Torn rows and vectors without committed metadata are dropped"""
+    segment = VectorSegment(tmp_path / "c.vectors.f32", dim=4)
+    store = ChunkStore(tmp_path / "c.chunks.db")
+    store.append_many(segment.append(np.ones((2, 4), dtype=np.float32)), _chunks(2))
+
+    # Crash after appending vectors but before the metadata commit
+    segment.append(np.ones((3, 4), dtype=np.float32))
+    segment.close()
+    with open(tmp_path / "c.vectors.f32", "ab") as f:
+        f.write(b"\x00" * 6)  # torn partial row
+
+    segment = VectorSegment(tmp_path / "c.vectors.f32", dim=4)
+    assert len(segment) == 5
+    assert reconcile(segment, store) == 2
+    assert len(segment) == 2
+    assert (tmp_path / "c.vectors.f32").stat().st_size == 2 * 4 * 4
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    target = tmp_path / "c.index"
+    target.write_bytes(b"old")
+    atomic_write_bytes(target, b"new checkpoint")
+    assert target.read_bytes() == b"new checkpoint"
+    assert not (tmp_path / "c.index.tmp").exists()
+
+
+def test_embedding_cache_and_manifest(tmp_path):
+    """Cached vectors survive reopen; manifest and tombstones track sources"""
+    cache = EmbeddingCache(tmp_path / "c.embcache.db", "model-a", dim=4)
+    key = cache.key("hello")
+    cache.put_many({key: np.ones(4, dtype=np.float32)})
+    cache.close()
+
+    cache = EmbeddingCache(tmp_path / "c.embcache.db", "model-a", dim=4)
+    assert np.array_equal(cache.get_many([key, cache.key("other")])[key], np.ones(4))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert EmbeddingCache(tmp_path / "c.embcache.db", "model-b", dim=4).key("hello") != key
+
+    store = ChunkStore(tmp_path / "c.chunks.db")
+    store.append_many(0, _chunks(3, source="a.md") + _chunks(2, source="b.md"))
+    store.record_files([("a.md", 1.0, 10, "abc")])
+    assert store.get_file("a.md") == (1.0, 10, "abc")
+
+    assert store.delete_source("a.md") == 3
+    assert store.deleted_count == 3
+    assert sorted(store.get_many(range(5))) == [3, 4]
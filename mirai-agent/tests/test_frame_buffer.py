@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the in-memory screen frame buffer
+
+- Fresh frames are shared instead of re-grabbing the screen
+- invalidate() after an action forces the next read to grab a new frame
+- Encoding fits the byte budget and is done once per format
+- Disk persistence is optional and asynchronous
+"""
+
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.frame_buffer import DiskSink, FrameBuffer
+
+
+class FakeScreen:
+    """Grabber, считающий снятые кадры"""
+
+    def __init__(self, width=1280, height=720):
+        rng = np.random.default_rng(0)
+        self.pixels = rng.integers(0, 255, (height, width, 4), dtype=np.uint8)  # RGBA: альфа-канал отбрасывается
+        self.grabs = 0
+
+    def __call__(self, region=None):
+        self.grabs += 1
+        if region is None:
+            return self.pixels
+        x, y, width, height = region
+        return self.pixels[y:y + height, x:x + width]
+
+
+def test_frames_are_shared():
+    screen = FakeScreen()
+    frames = FrameBuffer(grabber=screen)
+
+    frame = frames.capture()
+    assert frame.pixels.shape == (720, 1280, 3) and not frame.pixels.flags.writeable
+    assert frames.get_or_capture(max_age=5) is frame
+    assert frame.bgr() is frame.bgr() and frame.gray().shape == (720, 1280)
+
+    region = frames.capture(region=(100, 50, 200, 100))
+    assert region.origin == (100, 50) and region.size == (200, 100)
+    assert frames.latest() is region
+    assert frames.get_or_capture(max_age=5) is frame  # регион не подменяет полный кадр
+
+    calls = []
+    assert frame.memo("ocr", lambda f: calls.append(1) or "text") == "text"
+    assert frame.memo("ocr", lambda f: calls.append(1) or "text") == "text"
+    assert calls == [1]
+
+    assert frames.get_or_capture(max_age=0) is not frame
+    assert screen.grabs == 3 and frames.stats["reuses"] == 2
+
+
+def test_invalidate_forces_fresh_frame():
+    screen = FakeScreen()
+    frames = FrameBuffer(grabber=screen)
+
+    before = frames.capture()
+    frames.invalidate()  # клик / ввод текста изменили экран
+    after = frames.get_or_capture(max_age=5)
+    assert after is not before and screen.grabs == 2
+    assert frames.get_or_capture(max_age=5) is after
+    assert frames.latest() is after and frames.stats["invalidations"] == 1
+
+
+def test_encode_budget_and_cache():
+    frame = FrameBuffer(grabber=FakeScreen()).capture()
+
+    budget = 150_000
+    data = frame.encode("JPEG", max_bytes=budget)
+    assert len(data) <= budget
+    assert frame.encode("jpeg", max_bytes=budget) is data
+
+    with Image.open(BytesIO(data)) as image:
+        assert image.format == "JPEG" and image.width <= 1280
+
+    small = frame.crop((0, 0, 64, 64)).encode("WEBP")
+    with Image.open(BytesIO(small)) as image:
+        assert image.format == "WEBP" and image.size == (64, 64)
+
+
+def test_disk_sink_is_optional(tmp_path):
+    screen = FakeScreen(320, 200)
+    assert FrameBuffer(grabber=screen).capture().path is None
+
+    sink = DiskSink(str(tmp_path))
+    frames = FrameBuffer(grabber=screen, sink=sink)
+    frame = frames.capture()
+    frames.close()
+
+    assert frame.path and Path(frame.path).parent == tmp_path
+    with Image.open(frame.path) as image:
+        assert image.size == (320, 200)
+    assert frames.stats["persisted"] == 1
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for NASA-level learning pipeline scheduling
+
+- Dependencies release waiting tasks without polling
+- Failed dependencies fail their dependents
+- Debounced state snapshots
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.nasa_level.learning_pipeline import LearningPipeline, Priority, TaskStatus
+
+
+class RecordingEngine:
+    """Learning engine that succeeds unless the technology is in fail"""
+
+    def __init__(self, fail=(), delay=0.01):
+        self.fail = set(fail)
+        self.delay = delay
+        self.order = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def learn_technology(self, technology, depth):
+        with self._lock:
+            self.order.append(technology)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return SimpleNamespace(
+            success=technology not in self.fail,
+            proficiency=0.9,
+            quality_grade="A",
+            tests_passed=1,
+            execution_time=self.delay,
+            errors=["boom"],
+        )
+
+
+def _run(pipeline, timeout=5):
+    async def scenario():
+        await asyncio.wait_for(pipeline.process_queue(until_idle=True), timeout)
+
+    asyncio.run(scenario())
+
+
+def test_dependencies_release_waiting_tasks(tmp_path):
+    engine = RecordingEngine()
+    pipeline = LearningPipeline(engine, max_concurrent=3, state_file=str(tmp_path / "state.json"))
+
+    pipeline.add_task("pandas", dependencies=["numpy"], priority=Priority.CRITICAL)
+    pipeline.add_task("sklearn", dependencies=["numpy", "scipy"])
+    pipeline.add_task("scipy", dependencies=["numpy"], priority=Priority.LOW)
+    pipeline.add_batch([f"lib{i}" for i in range(6)], priority=Priority.LOW)
+    pipeline.add_task("numpy", priority=Priority.HIGH)
+    assert pipeline.get_status()["tasks"]["waiting"] == 3
+
+    start = time.perf_counter()
+    _run(pipeline)
+    assert time.perf_counter() - start < 1.0  # no one-second polling
+
+    order = engine.order
+    assert order[0] == "numpy"
+    assert order.index("pandas") < order.index("scipy") < order.index("sklearn")
+    assert engine.max_running <= 3
+    assert all(t.status == TaskStatus.COMPLETED for t in pipeline.tasks.values())
+    assert pipeline.get_status()["tasks"]["waiting"] == 0
+
+
+def test_failed_dependency_fails_dependents(tmp_path):
+    engine = RecordingEngine(fail={"numpy"})
+    pipeline = LearningPipeline(engine, state_file=str(tmp_path / "state.json"))
+    pipeline.add_task("numpy")
+    pipeline.add_task("pandas", dependencies=["numpy"])
+    pipeline.add_task("seaborn", dependencies=["pandas"])
+    pipeline.tasks["numpy"].max_retries = 0
+
+    _run(pipeline)
+
+    assert engine.order == ["numpy"]
+    assert pipeline.tasks["seaborn"].status == TaskStatus.FAILED
+    assert "pandas" in pipeline.tasks["seaborn"].error
+    assert pipeline.get_status()["stats"]["total_failed"] == 3
+
+
+def test_state_snapshots_are_debounced(tmp_path):
+    engine = RecordingEngine(delay=0)
+    state_file = tmp_path / "state.json"
+    pipeline = LearningPipeline(engine, state_file=str(state_file), save_debounce=10)
+    pipeline.add_batch([f"lib{i}" for i in range(50)])
+    assert pipeline.saves == 1
+
+    _run(pipeline)
+
+    assert pipeline.saves == 2  # one debounced snapshot for the whole run
+    assert '"completed"' in state_file.read_text()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the pooled, streaming LLM client layer
+
+- Token streaming with time-to-first-token metrics (Ollama NDJSON, OpenAI SSE)
+- Keep-alive connection reuse and coalescing of identical in-flight requests
+- chat() no longer mutates caller messages; tools preamble is cached
+- aclose() on the clients releases their pooled sessions
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.ai_engine import AIEngine
+from core.llm_client import StreamMetrics, close_shared_clients
+from core.ollama_client import OllamaClient
+
+TOKENS = ["Hel", "lo", ", ", "world"]
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Ollama (/api/*) и OpenAI-совместимый (/v1/chat/completions) сервер"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._send(json.dumps({"models": [{"name": "fake:1b"}]}).encode())
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, payload))
+            server.ports.add((self.path.startswith("/api"), self.client_address[1]))
+        time.sleep(server.delay)
+
+        if not payload.get("stream"):
+            if self.path == "/api/generate":
+                body = {"response": "".join(TOKENS), "done": True}
+            elif self.path == "/api/chat":
+                body = {"message": {"role": "assistant", "content": payload["messages"][-1]["content"]}, "done": True}
+            else:
+                body = {"choices": [{"message": {"content": payload["messages"][-1]["content"].upper()}}]}
+            self._send(json.dumps(body).encode())
+            return
+
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(TOKENS):
+            if i:
+                time.sleep(0.1)
+            if self.path.startswith("/v1"):
+                self._chunk(b"data: " + json.dumps({"choices": [{"delta": {"content": token}}]}).encode() + b"\n\n")
+            else:
+                self._chunk(json.dumps({"response": token, "done": False}).encode() + b"\n")
+        self._chunk(b"data: [DONE]\n\n" if self.path.startswith("/v1") else b'{"done": true}\n')
+        self._chunk(b"")
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests, httpd.ports, httpd.delay = [], set(), 0.0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_streaming_with_time_to_first_token(server):
+    client = OllamaClient(base_url=_url(server), model="fake:1b")
+    engine = AIEngine(openai_key="sk-test", openai_base_url=f"{_url(server)}/v1")
+
+    async def run():
+        metrics = StreamMetrics()
+        arrivals = []
+        start = time.perf_counter()
+        async for delta in client.stream_generate("hi", metrics=metrics):
+            arrivals.append((delta, time.perf_counter() - start))
+
+        sse_metrics = StreamMetrics()
+        sse = [delta async for delta in engine.stream("hi", metrics=sse_metrics)]
+        sessions = [c._states[asyncio.get_running_loop()].session
+                    for c in (client._client, engine._clients["openai"])]
+        await client.aclose()
+        await engine.aclose()
+        assert all(session.closed for session in sessions)
+        return metrics, arrivals, sse_metrics, sse
+
+    metrics, arrivals, sse_metrics, sse = asyncio.run(run())
+    assert [delta for delta, _ in arrivals] == TOKENS
+    assert arrivals[0][1] < 0.1 and arrivals[-1][1] >= 0.3  # первый токен не ждёт конца ответа
+    assert metrics.ttft < 0.1 <= metrics.duration and metrics.chunks == 4
+    assert metrics.chars == len("Hello, world")
+    assert sse == TOKENS and sse_metrics.ttft < 0.1
+    assert server.requests[0][1]["stream"] is True
+    assert server.requests[1][0] == "/v1/chat/completions"
+
+
+def test_connection_reuse_and_request_coalescing(server):
+    server.delay = 0.2
+    client = OllamaClient(base_url=_url(server), model="fake:1b")
+    engine = AIEngine(openai_key="sk-test", openai_base_url=f"{_url(server)}/v1")
+    messages = [{"role": "user", "content": "same question"}]
+
+    async def run():
+        same = await asyncio.gather(*(client.achat(messages) for _ in range(5)))
+        different = await client.achat([{"role": "user", "content": "other question"}])
+        text = await client.agenerate("hi")
+        answer = await engine.think("ping")
+        await close_shared_clients()
+        return same, different, text, answer
+
+    same, different, text, answer = asyncio.run(run())
+    assert [r["message"]["content"] for r in same] == ["same question"] * 5
+    assert different["message"]["content"] == "other question"
+    assert text == "Hello, world" and answer == "PING"
+
+    chat_requests = [p for path, p in server.requests if path == "/api/chat"]
+    assert len(chat_requests) == 2  # 5 одинаковых запросов - один поход к серверу
+    # все запросы к Ollama - в одном keep-alive соединении, у AIEngine свой пул
+    assert sorted(ollama for ollama, _ in server.ports) == [False, True]
+    assert client._client.get_stats()["coalesced"] == 4
+
+
+def test_chat_does_not_mutate_messages_and_caches_tools(server):
+    client = OllamaClient(base_url=_url(server), model="fake:1b")
+    tools = [{
+        "type": "function",
+        "function": {
+            "name": "read_file",
+            "description": "Read a file",
+            "parameters": {"properties": {"path": {"type": "string", "description": "File path"}}},
+        },
+    }]
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "hi"}]
+
+    for _ in range(3):
+        result = client.chat(messages, tools=tools)
+    client.close()
+    assert result["message"]["content"] == "hi"
+    assert messages[0] == {"role": "system", "content": "Be brief."}
+
+    system = server.requests[-1][1]["messages"][0]["content"]
+    assert system.startswith("Be brief.\n\n# Available Tools") and system.count("## read_file") == 1
+    assert "- path (string): File path" in system
+    assert client._format_tools_for_prompt(tools) is client._format_tools_for_prompt(list(tools))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for MemoryManager storage layer
+
+- Pooled WAL connections
+- Group-commit of concurrent add_message() calls
+- Hybrid (FTS5 + vector) knowledge search
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.memory_manager import Knowledge, MemoryManager, Message
+
+
+def test_pooled_wal_connections(tmp_path):
+    """Connections are reused per thread and run in WAL mode"""
+    mm = MemoryManager(str(tmp_path / "memory.db"))
+    session = mm.create_session("pool_user")
+
+    for i in range(20):
+        mm.add_message(Message(session_id=session.id, content=f"msg {i}"))
+
+    with mm._get_connection() as conn:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
+
+    pool = mm.get_stats()["connection_pool"]
+    assert pool["connections"]["created"] == 1
+    assert pool["connections"]["reused"] > 20
+    assert pool["commits"] > 20
+    assert pool["avg_commit_ms"] >= 0.0
+
+    assert len(mm.get_recent_messages(session.id, limit=50)) == 20
+    assert mm.get_session(session.id).message_count == 20
+    mm.close()
+
+
+def test_batched_add_message(tmp_path):
+    """Concurrent add_message() calls are grouped into shared transactions"""
+    mm = MemoryManager(
+        str(tmp_path / "memory.db"), batch_writes=True, batch_window_ms=20
+    )
+    sessions = [mm.create_session(f"user_{i}") for i in range(2)]
+    ids = []
+    ids_lock = threading.Lock()
+
+    def writer(n):
+        for j in range(10):
+            session = sessions[(n + j) % 2]
+            message_id = mm.add_message(Message(session_id=session.id, content=f"{n}-{j}"))
+            with ids_lock:
+                ids.append(message_id)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(ids) == 80
+    assert len(set(ids)) == 80
+
+    counts = [mm.get_session(s.id).message_count for s in sessions]
+    assert sum(counts) == 80
+    assert counts == [40, 40]
+
+    pool = mm.get_pool_stats()
+    assert pool["batch_writes"] is True
+    assert pool["batches"] < 80
+    assert pool["avg_batch_size"] > 1.0
+    mm.close()
+
+
+def test_search_knowledge_modes(tmp_path):
+    """FTS, semantic and hybrid knowledge search"""
+    vectors = {
+        "python": [1.0, 0.0, 0.0],
+        "docker": [0.0, 1.0, 0.0],
+        "sqlite": [0.0, 0.0, 1.0],
+    }
+    mm = MemoryManager(
+        str(tmp_path / "memory.db"),
+        embedding_fn=lambda text: vectors.get(text.lower(), [0.5, 0.5, 0.0]),
+    )
+    mm.add_knowledge(Knowledge(key="python", value="Dynamic language", embedding=vectors["python"]))
+    mm.add_knowledge(Knowledge(key="docker", value="Containers for python apps", embedding=vectors["docker"]))
+
+    # Embeddings are stored as float32 BLOBs and decoded on read
+    with mm._get_connection() as conn:
+        kind = conn.execute("SELECT typeof(embedding) FROM knowledge LIMIT 1").fetchone()[0]
+    assert kind == "blob"
+    assert mm.get_knowledge(key="python", category="general")[0].embedding == [1.0, 0.0, 0.0]
+
+    fts = mm.search_knowledge("containers", mode="fts")
+    assert [k.key for k in fts] == ["docker"]
+
+    semantic = mm.search_knowledge("docker", k=1, mode="semantic")
+    assert [k.key for k in semantic] == ["docker"]
+
+    # Index stays in sync with rows added after it was loaded
+    mm.add_knowledge(Knowledge(key="sqlite", value="Embedded database", embedding=vectors["sqlite"]))
+    assert mm.search_knowledge("sqlite", k=1, mode="semantic")[0].key == "sqlite"
+
+    hybrid = mm.search_knowledge("python", k=2)
+    assert hybrid[0].key == "python"
+    assert {k.key for k in hybrid} == {"python", "docker"}
+    mm.close()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the incremental OCR index
+
+- Only tiles that changed since the last pass are OCR'd again
+- Words in tile overlaps are not duplicated
+- Word and phrase lookups return screen coordinates
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.frame_buffer import Frame
+from core.ocr_index import OCRIndex, OCRWord
+
+WORDS = {1: "File", 2: "Edit", 3: "Save", 4: "As...", 5: "Cancel", 6: "OK"}
+
+
+def fake_ocr(tile):
+    """'Распознаёт' прямоугольники с R=255: G - номер слова в WORDS"""
+    words = []
+    mask = (tile[..., 0] == 255) & (tile[..., 2] == 0)
+    for word_id in np.unique(tile[..., 1][mask]):
+        ys, xs = np.nonzero(mask & (tile[..., 1] == word_id))
+        words.append(OCRWord(
+            WORDS[int(word_id)], int(xs.min()), int(ys.min()),
+            int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1), 90.0,
+        ))
+    return words
+
+
+def _draw(screen, word_id, x, y, width=60, height=16):
+    screen[y:y + height, x:x + width] = (255, word_id, 0)
+
+
+def _screen():
+    screen = np.full((720, 1280, 3), 200, dtype=np.uint8)
+    _draw(screen, 1, 10, 5)
+    _draw(screen, 2, 80, 5)
+    _draw(screen, 3, 620, 300)  # на границе тайлов
+    _draw(screen, 4, 690, 300)
+    return screen
+
+
+def test_index_lookup_and_overlap():
+    index = OCRIndex(engine=fake_ocr, tile_size=(400, 200), overlap=(100, 40), workers=0)
+    stats = index.update(Frame(_screen()))
+    assert 0 < stats["ocr_tiles"] < stats["tiles"]  # одинаковые пустые тайлы распознаются один раз
+
+    assert [w.text for w in index.words] == ["File", "Edit", "Save", "As..."]
+    assert index.text() == "File Edit\nSave As..."
+
+    (save_as,) = index.find("save as")
+    assert save_as.text == "Save As..." and (save_as.x, save_as.y) == (620, 300)
+    assert save_as.width == 130 and save_as.center == (685, 308)
+
+    assert [m.text for m in index.find("sav")] == ["Save"]
+    assert index.find("sav", partial=False) == []
+    assert index.find("Edit File") == []  # порядок слов важен
+    assert index.find("Cancel") == []
+
+
+def test_only_changed_tiles_are_recognized():
+    index = OCRIndex(engine=fake_ocr, tile_size=(400, 200), overlap=(100, 40), workers=0)
+    screen = _screen()
+    first = index.update(Frame(screen))
+
+    again = index.update(Frame(screen.copy()))
+    assert again["ocr_tiles"] == 0
+
+    dialog = screen.copy()
+    _draw(dialog, 5, 1000, 600)
+    _draw(dialog, 6, 1100, 600, width=30)
+    frame = Frame(dialog)
+    changed = index.update(frame)
+    assert 0 < changed["ocr_tiles"] <= 4 < first["tiles"]
+
+    (ok,) = index.find("ok", frame=frame)
+    assert ok.center == (1115, 608)
+    assert index.update(frame)["ocr_tiles"] == 0  # тот же кадр - без работы
+
+    # Вернулись к прежнему экрану: результаты тайлов из кэша по хэшу
+    assert index.update(Frame(screen))["ocr_tiles"] == 0
+    assert index.find("ok") == []
+
+
+def test_process_pool_and_frame_origin():
+    index = OCRIndex(engine=fake_ocr, tile_size=(400, 200), overlap=(100, 40), workers=2)
+    try:
+        index.update(Frame(_screen(), origin=(100, 50)))
+        (edit,) = index.find("Edit")
+        assert (edit.x, edit.y) == (180, 55)
+        assert index.get_stats()["words"] == 4
+    finally:
+        index.close()
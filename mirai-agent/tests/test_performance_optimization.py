@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the in-process performance framework
+
+- TTL/LRU cache and the cached decorator
+- Priority task manager with awaitable results
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.performance.optimization import AdvancedCache, AsyncTaskManager, cached
+
+
+def test_cache_ttl_and_lru():
+    async def scenario():
+        cache = AdvancedCache(redis_url="", max_memory_items=2)
+        await cache.set("a", 1)
+        await cache.set("b", None)
+        assert await cache.get("a") == 1  # "a" becomes most recent
+        await cache.set("c", 3)  # evicts "b"
+        assert await cache.get("b", "missing") == "missing"
+
+        assert await cache.set("d", 4, ttl=0) is False
+        await cache.set("short", 5, ttl=0.01)
+        await asyncio.sleep(0.02)
+        assert await cache.get("short") is None
+
+        stats = cache.get_cache_stats()
+        assert stats["evictions"] >= 1 and stats["expirations"] == 1
+        assert stats["l2_backend"] is None
+
+    asyncio.run(scenario())
+
+
+def test_cached_decorator_single_flight():
+    cache = AdvancedCache(redis_url="")
+    calls = []
+
+    @cached(ttl=60, cache_key_prefix="square", cache=cache)
+    async def square(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * x
+
+    @cached(ttl=0, cache=cache)
+    async def uncached(x):
+        calls.append(-x)
+        return x
+
+    async def scenario():
+        assert await asyncio.gather(square(3), square(3), square(4)) == [9, 9, 16]
+        assert await square(3) == 9
+        await uncached(1)
+        await uncached(1)
+
+    asyncio.run(scenario())
+    assert calls == [3, 4, -1, -1]
+
+
+def test_task_manager_priority_and_results():
+    async def scenario():
+        manager = AsyncTaskManager(max_concurrent_tasks=1)
+        order = []
+
+        async def job(name, fail=False):
+            order.append(name)
+            if fail:
+                raise ValueError(name)
+            return name.upper()
+
+        blocker = await manager.submit(asyncio.sleep(0.01, result="blocker"))
+        low = await manager.submit_task(job("low"), priority="low")
+        high = await manager.submit_task(job("high"), priority="high")
+        failing = await manager.submit(job("bad", fail=True))
+
+        assert await blocker == "blocker"
+        assert await manager.gather([low, high]) == ["LOW", "HIGH"]
+        with pytest.raises(ValueError):
+            await failing
+        assert order == ["high", "bad", "low"]
+        assert await manager.run(job("direct")) == "DIRECT"
+
+        stats = manager.get_task_stats()
+        assert stats["failed_tasks"] == 1 and stats["completed_tasks"] == 4
+        await manager.shutdown()
+
+    asyncio.run(scenario())
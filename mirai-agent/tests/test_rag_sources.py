@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for source-level updates in MiraiRAG
+
+- upsert_by_source replaces the chunks of a changed source, skips an unchanged one
+- delete_by_source removes a source from search (also chunks added before the index)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+for module in ("tiktoken", "chromadb", "langchain", "langchain_community"):
+    pytest.importorskip(module)
+
+from langchain.schema import Document  # noqa: E402
+
+from core.rag_system import MiraiRAG  # noqa: E402
+
+VOCABULARY = ["python", "asyncio", "rust", "ownership", "docker", "images"]
+
+
+class BagOfWordsEmbeddings:
+    """Deterministic word-count embeddings that record every embedded text"""
+
+    model_name = "bag-of-words"
+
+    def __init__(self):
+        self.texts = []
+
+    def _embed(self, text):
+        words = text.lower().replace(".", " ").split()
+        return [1.0] + [float(words.count(word)) for word in VOCABULARY]
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+@pytest.fixture
+def rag(tmp_path):
+    return MiraiRAG(
+        persist_directory=str(tmp_path), chunk_size=40, chunk_overlap=0,
+        embedding_backend=BagOfWordsEmbeddings(),
+    )
+
+
+def _sources(docs):
+    return sorted({doc.metadata["source"] for doc in docs})
+
+
+def test_upsert_replaces_changed_source(rag):
+    old = "python asyncio loops. python asyncio tasks. python asyncio queues."
+    new = "rust ownership rules. rust ownership moves."
+    assert rag.upsert_by_source("docker images layers.", source="docker.md") == 1
+    first = rag.upsert_by_source(old, source="notes.md")
+    assert first > 1
+
+    # тот же текст - ни эмбеддингов, ни дублей
+    embedded = len(rag.embeddings.texts)
+    assert rag.upsert_by_source(old, source="notes.md") == 0
+    assert len(rag.embeddings.texts) == embedded
+    assert rag.get_stats()["total_chunks"] == 1 + first
+
+    replaced = rag.upsert_by_source(new, source="notes.md")
+    stats = rag.get_stats()
+    assert stats["total_chunks"] == 1 + replaced and stats["total_sources"] == 2
+
+    notes = [doc for doc in rag.search("python asyncio", k=10) if doc.metadata["source"] == "notes.md"]
+    assert len(notes) == replaced
+    assert all("rust" in doc.page_content and "python" not in doc.page_content for doc in notes)
+    assert all(doc.metadata["total_chunks"] == replaced for doc in notes)
+
+
+def test_delete_by_source_removes_from_search(rag):
+    rag.upsert_by_source("python asyncio loops. python asyncio tasks.", source="python.md")
+    rag.upsert_by_source("rust ownership rules.", source="rust.md")
+    # чанк, добавленный до появления индекса source -> chunk ids
+    rag.vectorstore.add_documents(
+        [Document(page_content="docker images cache.", metadata={"source": "docker.md"})], ids=["legacy-0"]
+    )
+    assert _sources(rag.search("python asyncio", k=10)) == ["docker.md", "python.md", "rust.md"]
+
+    removed = rag.delete_by_source("python.md")
+    assert removed >= 2
+    assert _sources(rag.search("python asyncio", k=10)) == ["docker.md", "rust.md"]
+    assert rag.delete_by_source("python.md") == 0
+
+    assert rag.delete_by_source("docker.md") == 1
+    assert _sources(rag.search("docker images", k=10)) == ["rust.md"]
+    stats = rag.get_stats()
+    assert stats["total_chunks"] == 1 and stats["total_sources"] == 1
+
+    # удалённый источник можно загрузить заново тем же текстом
+    assert rag.upsert_by_source("python asyncio loops. python asyncio tasks.", source="python.md") == removed
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for indexed situation matching in reasoning_engine LongTermMemory
+
+- FTS5 + structured features give ranked, scored results
+- Action history uses the generated action_type column index
+- Optional embedding index
+- Databases created before the indexes are migrated
+"""
+
+import json
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.reasoning_engine.memory_system import EventActionResult, LongTermMemory
+
+
+def _store(ltm, event, action_type="click", success=True, age_days=0):
+    return ltm.store_event_action_result(EventActionResult(
+        event=event,
+        action={"type": action_type, "target": "button"},
+        result={"ok": success},
+        success=success,
+        timestamp=datetime.now() - timedelta(days=age_days),
+    ))
+
+
+def test_ranked_situations_and_action_history(tmp_path):
+    ltm = LongTermMemory(tmp_path / "memory.db")
+    try:
+        save_chrome = _store(ltm, {"task": "save bookmark", "application": "Chrome"})
+        _store(ltm, {"task": "save document", "application": "Word"}, action_type="type")
+        _store(ltm, {"task": "open settings", "application": "Chrome"}, success=False)
+        _store(ltm, {"task": "play music", "application": "Spotify"})
+        for i in range(10):
+            _store(ltm, {"task": f"check mail {i}", "application": "Outlook"})
+        assert ltm.fts_enabled
+
+        results = ltm.find_similar_situations({"task": "save bookmark", "application": "chrome"})
+        assert results[0]["id"] == save_chrome
+        assert [r["situation"]["task"] for r in results[:3]] == [
+            "save bookmark", "open settings", "save document"
+        ]
+        assert all(0 < r["score"] <= 1 for r in results)
+        assert results == sorted(results, key=lambda r: r["score"], reverse=True)
+        assert "play music" not in [r["situation"]["task"] for r in results]
+
+        history = ltm.get_action_history("type")
+        assert len(history) == 1 and history[0]["action"]["type"] == "type"
+
+        plan = " ".join(str(row) for row in ltm._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT action FROM event_action_results "
+            "WHERE action_type = ? ORDER BY timestamp DESC LIMIT 10", ("click",)
+        ))
+        assert "idx_action_type" in plan
+
+        # Устаревшие записи удаляются вместе с индексами
+        _store(ltm, {"task": "save old file"}, age_days=365)
+        ltm.consolidate_memory()
+        tasks = [r["situation"]["task"] for r in ltm.find_similar_situations({"task": "save"}, limit=10)]
+        assert "save old file" not in tasks and len(tasks) == 2
+    finally:
+        ltm.close()
+
+
+def test_embedding_index(tmp_path):
+    vocabulary = ["browser", "tab", "music", "song", "file"]
+
+    def embedder(text):
+        words = text.lower().split()
+        return [float(sum(word.startswith(v) for word in words)) for v in vocabulary]
+
+    ltm = LongTermMemory(tmp_path / "memory.db", embedder=embedder)
+    try:
+        _store(ltm, {"task": "close browser tab"})
+        song = _store(ltm, {"task": "skip song", "note": "music"})
+
+        (best, *_) = ltm.find_similar_situations({"query": "songs and music"})
+        assert best["id"] == song and best["score"] > 0.5
+        assert ltm._conn.execute("SELECT count(*) FROM memory_embeddings").fetchone()[0] == 2
+    finally:
+        ltm.close()
+
+
+def test_legacy_database_is_migrated(tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE event_action_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL, action TEXT NOT NULL,
+                result TEXT NOT NULL, success INTEGER NOT NULL, confidence REAL,
+                timestamp DATETIME NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute(
+            "INSERT INTO event_action_results (event, action, result, success, timestamp) VALUES (?, ?, ?, 1, ?)",
+            (json.dumps({"task": "rename folder", "app": "Explorer"}), json.dumps({"type": "rename"}),
+             "{}", datetime.now().isoformat()),
+        )
+    conn.close()
+
+    ltm = LongTermMemory(path)
+    try:
+        (match,) = ltm.find_similar_situations({"task": "rename", "app": "explorer"})
+        assert match["situation"]["task"] == "rename folder" and match["score"] == 1.0
+        assert ltm.get_action_history("rename")[0]["success"] is True
+
+        backup = ltm.backup_memory(tmp_path / "backup.db")
+        _store(ltm, {"task": "rename file"})
+        ltm.restore_memory(backup)
+        assert len(ltm.find_similar_situations({"task": "rename"})) == 1
+    finally:
+        ltm.close()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the LLM response cache
+
+- Exact hits on normalised (model, messages, tools, temperature) keys
+- Embedding near-hits, TTL expiry and LRU eviction
+- Per-caller hit-rate metrics; ReActController served from the cache
+- Calls without an explicit temperature are not cached by a thresholded cache
+"""
+
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.react_controller import ReActController
+import core.response_cache as response_cache
+from core.response_cache import ResponseCache
+
+SYSTEM = {"role": "system", "content": "You are MIRAI."}
+
+
+def _counter():
+    calls = []
+
+    def call(answer="answer"):
+        calls.append(answer)
+        return f"{answer} #{len(calls)}"
+
+    return calls, call
+
+
+def test_exact_hits_and_key_normalisation():
+    cache = ResponseCache()
+    calls, call = _counter()
+    messages = [SYSTEM, {"role": "user", "content": "Explain  asyncio\n"}]
+
+    first = cache.cached_call("agent", call, "gpt-4o-mini", messages, temperature=0)
+    # пробелы не важны; объект ответа OpenAI нормализуется как dict
+    same = [SimpleNamespace(role="system", content="You are MIRAI. "), {"role": "user", "content": "Explain asyncio"}]
+    assert cache.cached_call("agent", call, "gpt-4o-mini", same, temperature=0) == first
+    assert len(calls) == 1
+
+    cache.cached_call("agent", call, "gpt-4o", messages, temperature=0)
+    cache.cached_call("agent", call, "gpt-4o-mini", messages, temperature=0.7)
+    cache.cached_call("agent", call, "gpt-4o-mini", messages, tools=[{"name": "search_web"}], temperature=0)
+    assert len(calls) == 4
+
+    key, scope, text = cache.keys("gpt-4o-mini", messages, temperature=0)
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get(key, scope, text, caller="bench")
+    assert (time.perf_counter() - start) / 1000 < 50e-6
+
+    # ошибки не кэшируются
+    failing = cache.cached_call("agent", lambda: "Error: timeout", "m", messages, temperature=0,
+                                validate=lambda t: "Error" not in t)
+    assert failing == "Error: timeout" and cache.get(*cache.keys("m", messages, temperature=0)) is None
+
+    stats = cache.get_stats()["agent"]
+    assert stats["hits"] == 1 and stats["misses"] == 5 and stats["hit_rate"] == round(1 / 6, 3)
+
+
+def test_near_hits_ttl_and_eviction():
+    vocabulary = ["python", "asyncio", "explain", "weather", "rust"]
+
+    def embedder(text):
+        words = text.lower().replace("?", "").split()
+        return [float(word in words) for word in vocabulary]
+
+    cache = ResponseCache(max_entries=3, ttl=0.2, embedder=embedder, similarity_threshold=0.9)
+    calls, call = _counter()
+
+    def ask(question, **kwargs):
+        return cache.cached_call("learning", call, "m", [SYSTEM, {"role": "user", "content": question}], **kwargs)
+
+    first = ask("Explain python asyncio")
+    assert ask("explain asyncio in python?") == first  # почти то же самое
+    assert ask("Explain python asyncio", near=False) == first  # точное совпадение
+    assert ask("Explain rust") != first
+    assert cache.get_stats()["learning"]["near_hits"] == 1
+
+    # другой системный промпт - другая область, почти-совпадения нет
+    other = cache.cached_call("learning", call, "m", [{"role": "system", "content": "Other"},
+                                                      {"role": "user", "content": "explain asyncio in python"}])
+    assert other != first and len(calls) == 3
+
+    ask("What is the weather")
+    assert len(cache) == 3  # самый старый ответ вытеснен
+    fresh = ask("Explain python asyncio")
+    assert fresh != first and ask("Explain python asyncio") == fresh
+
+    time.sleep(0.25)
+    assert ask("Explain python asyncio") != fresh  # TTL истёк
+
+
+def test_react_controller_uses_cache():
+    class FakeOllama:
+        model = "fake:1b"
+
+        def __init__(self):
+            self.requests = 0
+
+        def chat(self, messages, **kwargs):
+            self.requests += 1
+            return {"message": {"content": "Thought: done\nFinal Answer: 42"}}
+
+    cache = ResponseCache(max_temperature=0.5)
+    llm = FakeOllama()
+    controller = ReActController(llm, tools=[], verbose=False, response_cache=cache)
+    context = [SYSTEM, {"role": "user", "content": "Task: answer"}]
+
+    assert controller._get_thought(context) == controller._get_thought(list(context))
+    assert llm.requests == 1
+    assert cache.get_stats()["react_controller"]["hit_rate"] == 0.5
+
+    hot = ResponseCache(max_temperature=0.0)  # temperature 0.3 выше порога - без кэша
+    controller = ReActController(llm, tools=[], verbose=False, response_cache=hot)
+    controller._get_thought(context)
+    controller._get_thought(context)
+    assert llm.requests == 3 and len(hot) == 0
+
+
+def test_shared_cache_only_caches_deterministic_calls(monkeypatch):
+    monkeypatch.setattr(response_cache, "_global_response_cache", None)
+    monkeypatch.delenv("MIRAI_LLM_CACHE_MAX_TEMPERATURE", raising=False)
+    shared = response_cache.get_response_cache()
+    assert shared.cacheable(0) and not shared.cacheable(0.3)
+    assert not shared.cacheable(None)  # температура модели по умолчанию - сэмплирование
+
+    calls, call = _counter()
+    messages = [SYSTEM, {"role": "user", "content": "Plan the next step"}]
+    assert shared.cached_call("agent", call, "m", messages) != shared.cached_call("agent", call, "m", messages)
+    assert shared.cached_call("agent", call, "m", messages, temperature=0) == \
+        shared.cached_call("agent", call, "m", messages, temperature=0)
+    assert len(calls) == 3 and not ResponseCache(max_temperature=0.5).cacheable(None)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the NASA-level sandbox worker pool
+
+- Workers are reused, each run gets a fresh namespace
+- Timeouts kill the run, not the worker
+- The worker enforces the deadline itself and kills the run's process group
+- Recycling after max runs
+- Callers waiting for a full pool get a new worker after recycle or crash
+- Real peak RSS and CPU time per run
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.nasa_level.sandbox_executor import ExecutionStatus, SandboxExecutor, SandboxWorkerPool
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+
+
+def test_worker_reuse_and_isolation():
+    executor = SandboxExecutor(pool_size=1, max_runs_per_worker=10)
+    try:
+        first = executor.execute_python("secret = 42\nprint(6 * 7)")
+        second = executor.execute_python("print('secret' in globals())")
+        failing = executor.execute_python("raise ValueError('boom')")
+
+        assert first.status == ExecutionStatus.SUCCESS and first.output.strip() == "42"
+        assert second.output.strip() == "False"
+        assert failing.status == ExecutionStatus.ERROR and "ValueError: boom" in failing.error
+
+        stats = executor.get_stats()
+        assert stats["spawned"] == 1 and stats["runs"] == 3
+    finally:
+        executor.close()
+
+
+def test_timeout_keeps_worker():
+    executor = SandboxExecutor(pool_size=1)
+    try:
+        result = executor.execute_python("while True:\n    pass", timeout=1)
+        assert result.status == ExecutionStatus.TIMEOUT
+        assert executor.execute_python("print('ok')").output.strip() == "ok"
+        assert executor.get_stats()["spawned"] == 1
+    finally:
+        executor.close()
+
+
+def _running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="requires /proc")
+def test_deadline_survives_ignored_sigalrm():
+    executor = SandboxExecutor(pool_size=1)
+    code = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGALRM, signal.SIG_IGN)\n"
+        "pid = os.fork()\n"
+        "if pid == 0:\n"
+        "    time.sleep(40)\n"
+        "print(pid, flush=True)\n"
+        "time.sleep(40)"
+    )
+    try:
+        start = time.monotonic()
+        result = executor.execute_python("import os\n" + code, timeout=1)
+        assert result.status == ExecutionStatus.TIMEOUT
+        assert time.monotonic() - start < 4  # воркер не ждал 40 секунд
+        assert not _running(int(result.output.strip()))  # внук убит вместе с группой
+
+        assert executor.execute_python("print('ok')").output.strip() == "ok"
+        stats = executor.get_stats()
+        assert stats["spawned"] == 1 and stats["crashed"] == 0
+    finally:
+        executor.close()
+
+
+def test_recycle_and_resource_usage():
+    executor = SandboxExecutor(pool_size=1, max_runs_per_worker=2)
+    try:
+        code = "data = bytearray(64 * 1024 * 1024)\nsum(range(200000))"
+        results = [executor.execute_python(code) for _ in range(3)]
+
+        assert all(r.status == ExecutionStatus.SUCCESS for r in results)
+        assert all(r.memory_used >= 64 * 1024 * 1024 for r in results)
+        assert all(r.cpu_time > 0 for r in results)
+
+        stats = executor.get_stats()
+        assert stats["recycled"] == 1 and stats["spawned"] == 2
+
+        huge = executor.execute_python("data = bytearray(4 * 1024 ** 3)")
+        assert huge.status == ExecutionStatus.MEMORY_LIMIT
+    finally:
+        executor.close()
+
+
+@pytest.mark.parametrize("first_code", [
+    "import time\ntime.sleep(0.5)",  # воркер уходит на рецикл (max_runs=1)
+    "import os, time\ntime.sleep(0.5)\nos.kill(os.getppid(), 9)",  # воркер падает
+])
+def test_waiting_caller_gets_new_worker(first_code):
+    pool = SandboxWorkerPool(size=1, max_runs=1)
+    results = {}
+
+    def call(name, code):
+        try:
+            results[name] = pool.run(code, timeout=5)
+        except Exception as e:
+            results[name] = e
+
+    try:
+        first = threading.Thread(target=call, args=("first", first_code))
+        first.start()
+        time.sleep(0.2)  # второй вызов ждёт занятый единственный воркер
+        second = threading.Thread(target=call, args=("second", "print('ok')"))
+        second.start()
+        first.join(10)
+        second.join(10)
+
+        assert not second.is_alive()
+        assert results["second"]["stdout"].strip() == "ok"
+        assert pool.get_stats()["spawned"] == 2
+    finally:
+        pool.shutdown()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the perceptual screen state cache
+
+- Tiny changes (clock tick) hit the cache
+- Local changes report only the changed region
+- Different screens and TTL expiry miss
+- Cached analyses are copies: callers cannot mutate the cache
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.screen_cache import HIT, MISS, PARTIAL, ScreenStateCache, crop, dhash, hamming, phash
+
+
+def _screen(seed=0):
+    rng = np.random.default_rng(seed)
+    screen = np.zeros((720, 1280, 3), dtype=np.uint8)
+    screen[:] = np.linspace(40, 200, 1280, dtype=np.uint8)[None, :, None]
+    for _ in range(6):
+        x, y = rng.integers(0, 1000), rng.integers(0, 500)
+        screen[y:y + 200, x:x + 260] = rng.integers(0, 255, 3)
+    return screen
+
+
+def test_hashes_ignore_tiny_changes():
+    screen = _screen()
+    ticked = screen.copy()
+    ticked[700:708, 1250:1260] = 255  # clock digit in the tray
+
+    assert hamming(dhash(screen), dhash(ticked)) <= 2
+    assert hamming(phash(screen), phash(_screen(seed=1))) > hamming(phash(screen), phash(ticked))
+
+    cache = ScreenStateCache()
+    first = cache.lookup(screen, key="what is open?")
+    assert first.status == MISS
+    cache.store(first.fingerprint, "editor", key="what is open?")
+
+    hit = cache.lookup(ticked, key="what is open?")
+    assert hit.status == HIT and hit.analysis == "editor"
+    assert cache.lookup(ticked, key="other question").status == MISS
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_local_change_reports_region():
+    screen = _screen()
+    cache = ScreenStateCache(grid=(8, 8))
+    cache.store(cache.fingerprint(screen), "desktop")
+
+    dialog = screen.copy()
+    dialog[300:380, 520:700] = [255, 0, 0]
+    lookup = cache.lookup(dialog)
+
+    assert lookup.status == PARTIAL and lookup.analysis == "desktop"
+    x, y, width, height = lookup.changed_region
+    assert x <= 520 and y <= 300 and x + width >= 700 and y + height >= 380
+    assert width * height <= 1280 * 720 / 8
+    assert crop(dialog, lookup.changed_region).shape[:2] == (height, width)
+
+    assert cache.lookup(_screen(seed=2)).status == MISS
+
+
+def test_ttl_expiry():
+    cache = ScreenStateCache(ttl=0.01)
+    screen = _screen()
+    cache.store(cache.fingerprint(screen), "desktop")
+    time.sleep(0.02)
+    assert cache.lookup(screen).status == MISS
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_hit_returns_copy():
+    cache = ScreenStateCache()
+    screen = _screen()
+    analysis = {"description": "desktop", "elements": ["start"]}
+    cache.store(cache.fingerprint(screen), analysis)
+    analysis["elements"].append("stored after")
+
+    hit = cache.lookup(screen)
+    assert hit.status == HIT and hit.analysis == {"description": "desktop", "elements": ["start"]}
+    hit.analysis["elements"].clear()
+    assert cache.lookup(screen).analysis["elements"] == ["start"]
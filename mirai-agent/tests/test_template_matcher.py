@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for the coarse-to-fine template matcher
+
+- NCC matches cv2.TM_CCOEFF_NORMED semantics
+- Several templates are found in one pass over a shared pyramid
+- Last known position and explicit ROI restrict the search
+- Scaled templates (DPI / zoom)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.frame_buffer import Frame
+from core.template_matcher import Template, TemplateMatcher, match_ncc
+
+
+def _icon(rng, size=48, cell=8):
+    cells = rng.integers(0, 255, (size // cell, size // cell, 3))
+    return np.kron(cells, np.ones((cell, cell, 1))).astype(np.uint8)
+
+
+def _desktop(rng, width=1920, height=1080):
+    screen = np.empty((height, width, 3), dtype=np.uint8)
+    screen[:] = np.linspace(30, 90, width, dtype=np.uint8)[None, :, None]
+    for _ in range(12):
+        x, y = rng.integers(0, width - 400), rng.integers(0, height - 300)
+        screen[y:y + 250, x:x + 380] = rng.integers(100, 250, 3)
+        for line in range(y + 40, y + 240, 16):
+            screen[line:line + 7, x + 10:x + 10 + int(rng.integers(50, 360))] = 20
+    return screen
+
+
+def test_ncc_matches_brute_force():
+    rng = np.random.default_rng(0)
+    image = rng.random((30, 40)).astype(np.float32)
+    template = image[8:18, 12:24].copy()
+
+    scores = match_ncc(image, template)
+    assert scores.shape == (21, 29)
+    assert np.unravel_index(np.argmax(scores), scores.shape) == (8, 12)
+
+    window = image[3:13, 5:17]
+    a, b = window - window.mean(), template - template.mean()
+    expected = (a * b).sum() / np.sqrt((a * a).sum() * (b * b).sum())
+    assert abs(scores[3, 5] - expected) < 1e-4
+
+
+def test_find_many_shares_frame_and_tracks_position():
+    rng = np.random.default_rng(1)
+    screen = _desktop(rng)
+    positions = [(1500, 200), (300, 900), (960, 540)]
+    templates = []
+    for i, (x, y) in enumerate(positions):
+        icon = _icon(rng)
+        screen[y:y + 48, x:x + 48] = icon
+        templates.append(Template(icon, name=f"icon{i}"))
+    missing = Template(_icon(rng), name="missing")
+
+    matcher = TemplateMatcher()
+    frame = Frame(screen)
+    results = matcher.find_many(frame, templates + [missing])
+
+    for template, (x, y) in zip(templates, positions):
+        match = results[template.name]
+        assert (match.x, match.y) == (x, y) and match.score > 0.95
+        assert match.center == (x + 24, y + 24)
+    assert results["missing"] is None
+
+    # Следующий поиск идёт в окрестности прошлого положения
+    assert matcher.find(frame, templates[0]).region == (1500, 200, 48, 48)
+    stats = matcher.get_stats()
+    assert stats["roi_hits"] == 1 and stats["tracked"] == 3
+
+    # Явный roi: за его пределами не ищем
+    assert matcher.find(frame, templates[1], roi=(1000, 0, 900, 500)) is None
+
+
+def test_scaled_template_and_file_cache(tmp_path):
+    rng = np.random.default_rng(2)
+    screen = _desktop(rng)
+    icon = _icon(rng, size=40)
+    scaled = np.asarray(Image.fromarray(icon).resize((50, 50), Image.NEAREST))
+    screen[600:650, 700:750] = scaled
+
+    path = tmp_path / "button.png"
+    Image.fromarray(icon).save(path)
+
+    matcher = TemplateMatcher()
+    template = matcher.load_template(str(path), scales=(1.0, 1.25))
+    assert matcher.load_template(str(path), scales=(1.0, 1.25)) is template
+
+    match = matcher.find(Frame(screen, origin=(100, 0)), template, threshold=0.7)
+    assert match.scale == 1.25
+    assert abs(match.x - 800) <= 2 and abs(match.y - 600) <= 2
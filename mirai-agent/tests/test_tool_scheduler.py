@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+🧪 Tests for concurrent tool-call execution
+
+- Independent calls run concurrently, results keep tool_calls order
+- Side-effecting tools run alone, in order
+- Per-tool timeouts and errors become tool messages
+- Calls after a timed-out side-effecting call are refused while it still runs
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.tool_scheduler import ToolCall, ToolScheduler, ToolSpec
+
+SPECS = {
+    "search_web": ToolSpec(serial=False, timeout=5),
+    "read_file": ToolSpec(serial=False, timeout=5),
+    "write_file": ToolSpec(serial=True, timeout=5),
+    "slow": ToolSpec(serial=False, timeout=0.1),
+    "slow_write": ToolSpec(serial=True, timeout=0.1),
+}
+
+
+class FakeTools:
+    def __init__(self):
+        self.log = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, name, arguments):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.log.append(("start", name, arguments.get("key")))
+        try:
+            if name == "slow":
+                time.sleep(1)
+            elif name == "slow_write":
+                time.sleep(0.5)
+            elif name == "broken":
+                raise ValueError("boom")
+            else:
+                time.sleep(arguments.get("delay", 0.1))
+            return f"{name}:{arguments.get('key')}"
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.log.append(("end", name, arguments.get("key")))
+
+
+def test_independent_calls_run_concurrently_in_order():
+    tools = FakeTools()
+    scheduler = ToolScheduler(tools, SPECS, max_workers=4)
+    calls = [
+        ToolCall("call_1", "search_web", {"key": "a", "delay": 0.3}),
+        ToolCall("call_2", "read_file", {"key": "b", "delay": 0.1}),
+        ToolCall("call_3", "search_web", {"key": "c", "delay": 0.2}),
+    ]
+    try:
+        start = time.perf_counter()
+        results = scheduler.run(calls)
+        elapsed = time.perf_counter() - start
+    finally:
+        scheduler.close()
+
+    assert [r.id for r in results] == ["call_1", "call_2", "call_3"]
+    assert [r.content for r in results] == ["search_web:a", "read_file:b", "search_web:c"]
+    assert tools.max_active == 3
+    assert elapsed < 0.5 < sum(r.duration for r in results)
+    assert scheduler.get_stats()["concurrent_batches"] == 1
+
+
+def test_side_effecting_tools_are_serialised():
+    tools = FakeTools()
+    scheduler = ToolScheduler(tools, SPECS, max_workers=4)
+    calls = [
+        ToolCall("1", "read_file", {"key": "r1"}),
+        ToolCall("2", "read_file", {"key": "r2"}),
+        ToolCall("3", "write_file", {"key": "w1"}),
+        ToolCall("4", "unknown_tool", {"key": "u1"}),  # без политики - как побочный эффект
+        ToolCall("5", "read_file", {"key": "r3"}),
+    ]
+    try:
+        assert scheduler.batches(calls) == [[0, 1], [2], [3], [4]]
+        results = scheduler.run(calls)
+    finally:
+        scheduler.close()
+
+    assert [r.id for r in results] == ["1", "2", "3", "4", "5"]
+    order = [(event, key) for event, _, key in tools.log]
+    # запись начинается после обоих чтений и заканчивается до следующего вызова
+    write_start, write_end = order.index(("start", "w1")), order.index(("end", "w1"))
+    assert write_end == write_start + 1
+    assert order.index(("end", "r1")) < write_start and order.index(("end", "r2")) < write_start
+    assert order.index(("start", "u1")) > write_end
+    assert order.index(("start", "r3")) > order.index(("end", "u1"))
+
+
+def test_timeout_and_error_results():
+    tools = FakeTools()
+    scheduler = ToolScheduler(tools, SPECS, max_workers=2)
+    calls = [
+        ToolCall("1", "slow", {}),
+        ToolCall("2", "slow", {}),
+        ToolCall("3", "search_web", {"key": "queued"}),  # ждёт свободного потока
+        ToolCall("4", "broken", {}),
+    ]
+    try:
+        start = time.perf_counter()
+        results = scheduler.run(calls)
+        elapsed = time.perf_counter() - start
+    finally:
+        scheduler.close()
+
+    assert [r.timed_out for r in results] == [True, True, False, False]
+    assert "превысил" in results[0].content
+    assert results[2].content == "search_web:queued"
+    assert results[3].error == "boom" and results[3].content.startswith("❌")
+    assert elapsed < 0.8
+    assert scheduler.get_stats() == {"calls": 4, "concurrent_batches": 1, "timeouts": 2, "errors": 1, "skipped": 0}
+
+
+def test_calls_wait_for_abandoned_side_effect():
+    tools = FakeTools()
+    scheduler = ToolScheduler(tools, SPECS, max_workers=2)
+    try:
+        results = scheduler.run([
+            ToolCall("1", "slow_write", {"key": "w0"}),
+            ToolCall("2", "write_file", {"key": "w1"}),
+            ToolCall("3", "read_file", {"key": "r1"}),
+        ])
+        assert [r.timed_out for r in results] == [True, False, False]
+        assert all("slow_write" in r.content and r.error for r in results[1:])
+
+        # следующий ход модели - брошенная запись всё ещё идёт
+        (refused,) = scheduler.run([ToolCall("4", "write_file", {"key": "w2"})])
+        assert refused.error == "previous side-effecting call still running"
+
+        time.sleep(0.6)
+        (done,) = scheduler.run([ToolCall("5", "write_file", {"key": "w3"})])
+        assert done.content == "write_file:w3"
+    finally:
+        scheduler.close()
+
+    order = [(event, key) for event, _, key in tools.log]
+    assert [key for event, key in order if event == "start"] == ["w0", "w3"]
+    assert order.index(("end", "w0")) < order.index(("start", "w3"))
+    assert scheduler.get_stats()["skipped"] == 3
@@ -50,10 +50,12 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from openai import OpenAI
 
+from core.capabilities import CapabilityRegistry, StartupProfiler
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -82,8 +84,15 @@ class UnifiedMiraiAgent:
     - Memory (долговременная память)
     """
     
-    def __init__(self, user_id: str = "main_user"):
-        """Инициализация единого агента MIRAI"""
+    def __init__(self, user_id: str = "main_user", warm_up: Optional[Sequence[str]] = None):
+        """
+        Инициализация единого агента MIRAI
+        
+        Args:
+            user_id: ID пользователя
+            warm_up: Какие модули загрузить заранее в фоне
+                (None - два самых используемых по статистике прошлых запусков)
+        """
         
         logger.info("=" * 70)
         logger.info("MIRAI - Запуск Единого Автономного Агента")
@@ -91,14 +100,25 @@ class UnifiedMiraiAgent:
         
         self.user_id = user_id
         self.start_time = time.time()
+        self.profiler = StartupProfiler()
+        self.capabilities = CapabilityRegistry(
+            usage_path=Path(__file__).parent / "data" / "capability_usage.json",
+            profiler=self.profiler
+        )
         
         # Загрузить API ключи
-        self.api_keys = self._load_api_keys()
-        self.client = OpenAI(api_key=self.api_keys.get("openai"))
+        with self.profiler.stage("api_keys"):
+            self.api_keys = self._load_api_keys()
+        with self.profiler.stage("openai_client"):
+            self.client = OpenAI(api_key=self.api_keys.get("openai"))
         self.model = "gpt-4o"  # Используем GPT-4o для всего
         
-        # Инициализировать все модули
-        self._init_modules()
+        # Зарегистрировать модули (загружаются при первом использовании)
+        with self.profiler.stage("register_modules"):
+            self._init_modules()
+        
+        # Фоновый прогрев самых нужных модулей
+        self.capabilities.warm_up(self.capabilities.most_used() if warm_up is None else warm_up)
         
         # Состояние агента
         self.is_running = False
@@ -118,6 +138,28 @@ class UnifiedMiraiAgent:
         logger.info(f"   • Веб-поиск: {self.web_search_available}")
         logger.info(f"   • Память: {self.memory_available}")
         logger.info(f"   • Саморазвитие: {self.evolution_available}")
+        logger.info(f"⏱️ Старт за {time.time() - self.start_time:.2f} с")
+        
+        if os.getenv("MIRAI_PROFILE_STARTUP"):
+            self.profiler.print_report()
+    
+    # Доступность возможностей (без загрузки модулей)
+    desktop_available = property(lambda self: self.capabilities["desktop"].available)
+    code_execution_available = property(lambda self: self.capabilities["code_execution"].available)
+    browser_available = property(lambda self: self.capabilities["browser"].available)
+    web_scraper_available = property(lambda self: self.capabilities["web_scraper"].available)
+    selenium_available = property(lambda self: self.capabilities["selenium"].available)
+    database_available = property(lambda self: self.capabilities["database"].available)
+    github_available = property(lambda self: self.capabilities["github"].available)
+    web_search_available = property(lambda self: self.capabilities["web_search"].available)
+    memory_available = property(lambda self: self.capabilities["memory"].available)
+    evolution_available = property(lambda self: self.capabilities["evolution"].available)
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        """ID сессии памяти (память загружается при первом обращении)"""
+        self.capabilities["memory"].get(count_use=False)
+        return self._session_id
     
     def _load_api_keys(self) -> Dict[str, str]:
         """Загрузить API ключи"""
@@ -135,130 +177,82 @@ class UnifiedMiraiAgent:
         }
     
     def _init_modules(self):
-        """Инициализировать все модули"""
+        """
+        Зарегистрировать все модули
+        
+        Модули не импортируются здесь: каждый загружается при первом
+        использовании инструмента (LazyCapability проксирует атрибуты).
+        Доступность для списка инструментов определяется по наличию
+        зависимостей, без импорта.
+        """
+        registry = self.capabilities
+        api_key = self.api_keys.get("openai")
+        
+        def create_memory(module):
+            memory = module.get_memory_manager()
+            self._session_id = memory.create_session(user_id=self.user_id).id
+            logger.info(f"✅ Memory session: {self._session_id}")
+            return memory
         
         # 1. Desktop Agent (управление компьютером)
-        try:
-            from core.desktop_agent_v2 import MiraiDesktopAgent
-            self.desktop = MiraiDesktopAgent(
-                openai_api_key=self.api_keys.get("openai"),
+        self.desktop = registry.register(
+            "desktop", "core.desktop_agent_v2",
+            lambda m: m.MiraiDesktopAgent(
+                openai_api_key=api_key,
                 enable_safety=True,
                 enable_memory=False,  # Используем единую память
                 user_id=self.user_id
-            )
-            self.desktop_available = True
-            logger.info("✅ Desktop Agent загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Desktop Agent недоступен: {e}")
-            self.desktop = None
-            self.desktop_available = False
+            ),
+            requires=("pyautogui", "PIL", "numpy", "openai")  # cv2 - опционально (TemplateMatcher)
+        )
         
         # 2. Multi-Language Executor (выполнение кода)
-        try:
-            from core.multi_language_executor import MultiLanguageExecutor
-            self.code_executor = MultiLanguageExecutor()
-            self.code_execution_available = True
-            logger.info("✅ Multi-Language Executor загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Code Executor недоступен: {e}")
-            self.code_executor = None
-            self.code_execution_available = False
+        self.code_executor = registry.register(
+            "code_execution", "core.multi_language_executor", lambda m: m.MultiLanguageExecutor()
+        )
         
         # 3. Browser Automation (Старый модуль)
-        try:
-            from core.browser_automation import BrowserAutomation
-            self.browser = BrowserAutomation(headless=False)
-            self.browser_available = True
-            logger.info("✅ Browser Automation загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Browser недоступен: {e}")
-            self.browser = None
-            self.browser_available = False
+        self.browser = registry.register(
+            "browser", "core.browser_automation", lambda m: m.BrowserAutomation(headless=False)
+        )
         
-        # 3.1. Web Scraper Agent (НОВЫЙ - для реального парсинга веб-страниц)
-        try:
-            from core.web_scraper_agent import WebScraperAgent
-            self.web_scraper = WebScraperAgent(ai_manager=None)  # AI будем передавать позже
-            self.web_scraper_available = True
-            logger.info("✅ Web Scraper Agent загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Web Scraper недоступен: {e}")
-            self.web_scraper = None
-            self.web_scraper_available = False
+        # 3.1. Web Scraper Agent (для реального парсинга веб-страниц)
+        self.web_scraper = registry.register(
+            "web_scraper", "core.web_scraper_agent",
+            lambda m: m.WebScraperAgent(ai_manager=None),  # AI будем передавать позже
+            requires=("requests", "bs4")
+        )
         
-        # 3.2. Selenium Browser Agent (НОВЫЙ - для реальной автоматизации браузера)
-        try:
-            from core.selenium_browser_agent import SeleniumBrowserAgent, SELENIUM_AVAILABLE
-            if SELENIUM_AVAILABLE:
-                self.selenium_agent = SeleniumBrowserAgent(headless=False)
-                self.selenium_available = True
-                logger.info("✅ Selenium Browser Agent загружен")
-            else:
-                self.selenium_agent = None
-                self.selenium_available = False
-                logger.info("ℹ️ Selenium не установлен (опционально)")
-        except Exception as e:
-            logger.warning(f"⚠️ Selenium Agent недоступен: {e}")
-            self.selenium_agent = None
-            self.selenium_available = False
+        # 3.2. Selenium Browser Agent (для реальной автоматизации браузера)
+        self.selenium_agent = registry.register(
+            "selenium", "core.selenium_browser_agent",
+            lambda m: m.SeleniumBrowserAgent(headless=False) if m.SELENIUM_AVAILABLE else None,
+            requires=("selenium",)
+        )
         
         # 4. Database Manager
-        try:
-            from core.database_manager import DatabaseManager
-            self.database = DatabaseManager()
-            self.database_available = True
-            logger.info("✅ Database Manager загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Database недоступен: {e}")
-            self.database = None
-            self.database_available = False
+        self.database = registry.register(
+            "database", "core.database_manager", lambda m: m.DatabaseManager()
+        )
         
         # 5. GitHub Integration
-        try:
-            from core.github_integration import GitHubIntegration
-            self.github = GitHubIntegration()
-            self.github_available = True
-            logger.info("✅ GitHub Integration загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ GitHub недоступен: {e}")
-            self.github = None
-            self.github_available = False
+        self.github = registry.register(
+            "github", "core.github_integration", lambda m: m.GitHubIntegration(), requires=("requests",)
+        )
         
         # 6. Web Search
-        try:
-            from core.web_search_integration import get_web_search
-            self.web_search = get_web_search()
-            self.web_search_available = True
-            logger.info("✅ Web Search загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Web Search недоступен: {e}")
-            self.web_search = None
-            self.web_search_available = False
+        self.web_search = registry.register(
+            "web_search", "core.web_search_integration", lambda m: m.get_web_search(), requires=("openai",)
+        )
         
         # 7. Memory Manager
-        try:
-            from core.memory_manager import get_memory_manager
-            self.memory = get_memory_manager()
-            self.session = self.memory.create_session(user_id=self.user_id)
-            self.session_id = self.session.id
-            self.memory_available = True
-            logger.info(f"✅ Memory Manager загружен (session: {self.session_id})")
-        except Exception as e:
-            logger.warning(f"⚠️ Memory недоступен: {e}")
-            self.memory = None
-            self.session_id = None
-            self.memory_available = False
+        self._session_id = None
+        self.memory = registry.register("memory", "core.memory_manager", create_memory)
         
         # 8. Self Evolution
-        try:
-            from core.self_evolution import SelfEvolutionSystem
-            self.evolution = SelfEvolutionSystem()
-            self.evolution_available = True
-            logger.info("✅ Self Evolution загружен")
-        except Exception as e:
-            logger.warning(f"⚠️ Self Evolution недоступен: {e}")
-            self.evolution = None
-            self.evolution_available = False
+        self.evolution = registry.register(
+            "evolution", "core.self_evolution", lambda m: m.SelfEvolutionSystem()
+        )
         
         # Создать инструменты для GPT
         self.tools = self._create_tools()
@@ -990,13 +984,29 @@ class UnifiedMiraiAgent:
                 "web_search": self.web_search_available,
                 "memory": self.memory_available,
                 "evolution": self.evolution_available
-            }
+            },
+            "loaded_modules": [
+                name for name, capability in self.capabilities.capabilities.items() if capability.loaded
+            ]
         }
     
+    def profile_startup(self, load_all: bool = True) -> str:
+        """
+        Разбивка времени старта по модулям
+        
+        Args:
+            load_all: Загрузить все модули, чтобы увидеть полную стоимость
+        """
+        if load_all:
+            for capability in self.capabilities.capabilities.values():
+                capability.get(count_use=False)
+        return self.profiler.report()
+    
     def stop(self):
         """Остановить агента"""
         logger.info("🛑 Остановка MIRAI...")
         self.is_running = False
+        self.capabilities.save_usage()
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -1014,6 +1024,11 @@ def main():
         # Создать агента
         mirai = UnifiedMiraiAgent()
         
+        if "--profile-startup" in sys.argv:
+            print("\n⏱️ Старт по модулям (все модули загружены):")
+            print(mirai.profile_startup())
+            return 0
+        
         print("\n" + "=" * 70)
         print("📋 МЕНЮ")
         print("=" * 70)